@@ -269,11 +269,20 @@ class SimulationAgent(Agent):
         """
             Respond to a driver scrape. Capture data from each simulated point.
 
-        @param topic: The point name.
-        @param message: The point's scraped value.
+            A lock-step SimulationDriverAgent may publish only the device's 'all' topic,
+            whose message holds every point's value.
+
+        @param topic: The point name, or the device's 'all' topic.
+        @param message: The point's scraped value, or a dictionary of values by point name.
         """
-        if self.simulation_started and topic in self.sim_topics:
-            self.sim_data[topic] = message[0]
+        if self.simulation_started:
+            if topic in self.sim_topics:
+                self.sim_data[topic] = message[0]
+            elif topic.endswith('/all') and isinstance(message[0], dict):
+                device_path = topic[:-len('all')]
+                for point, value in message[0].items():
+                    if device_path + point in self.sim_topics:
+                        self.sim_data[device_path + point] = value
 
     def run_simulation(self):
         """
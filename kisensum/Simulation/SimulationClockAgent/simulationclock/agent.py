@@ -56,13 +56,16 @@ import logging
 import sys
 
 from volttron.platform.agent import utils
-from volttron.platform.vip.agent import Agent, RPC
+from volttron.platform.messaging import headers as headers_mod
+from volttron.platform.vip.agent import Agent, Core, RPC
 
 _log = logging.getLogger(__name__)
 utils.setup_logging()
 
 __version__ = "1.0"
 
+CLOCK_TOPIC = 'simulation/clock'
+
 
 def simulation_clock_agent(config_path, **kwargs):
     """
@@ -88,8 +91,12 @@ class SimulationClockAgent(Agent):
         Allow the simulated clock to start at a time other than the actual (wall clock) time,
         and to progress at a different rate.
 
-        Agents participating in a simulation should issue an RPC get_time() call to
-        this agent whenever they need a simulated time.
+        Agents participating in a simulation can issue an RPC get_time() call to
+        this agent whenever they need a simulated time. Agents that need the time often,
+        such as the SimulationDriverAgent, should instead subscribe to CLOCK_TOPIC.
+        A message is published there when a simulation starts or stops, and every
+        tick_interval seconds while it runs, from which the simulated time can be
+        extrapolated locally.
     """
 
     def __init__(self, config_path, **kwargs):
@@ -101,7 +108,8 @@ class SimulationClockAgent(Agent):
         super(SimulationClockAgent, self).__init__(**kwargs)
         _log.debug('vip_identity: ' + self.core.identity)
         config = utils.load_config(config_path)
-        self.default_config = {'agentid': config.get('agentid', 'simulationclock')}
+        self.default_config = {'agentid': config.get('agentid', 'simulationclock'),
+                               'tick_interval': config.get('tick_interval', 1.0)}
         self.vip.config.set_default('config', self.default_config)
         self.vip.config.subscribe(self.configure, actions=['NEW', 'UPDATE'], pattern='config')
 
@@ -109,6 +117,8 @@ class SimulationClockAgent(Agent):
         self.simulated_start_time = None
         self.simulated_stop_time = None
         self.speed = None
+        self.tick_interval = None
+        self.tick_greenlet = None
 
     def configure(self, config_name, action, contents):
         """
@@ -122,12 +132,23 @@ class SimulationClockAgent(Agent):
         config = self.default_config.copy()
         config.update(contents)
         try:
-            # No configuration parameters are currently needed. If they were, use this:
-            # self.config_property_tbd = str(config['config_property_tbd'])
-            # _log.debug('config_property_tbd: {}'.format(self.config_property_tbd))
-            pass
+            tick_interval = float(config['tick_interval'])
+            if tick_interval <= 0.0:
+                raise ValueError('tick_interval must be positive')
+            _log.debug('tick_interval: {}'.format(tick_interval))
         except ValueError as e:
             _log.error('ERROR PROCESSING CONFIGURATION: {}'.format(e))
+            return
+        if tick_interval != self.tick_interval:
+            self.tick_interval = tick_interval
+            if self.tick_greenlet:
+                self.tick_greenlet.kill()
+                self.tick_greenlet = self.core.periodic(self.tick_interval, self.publish_tick)
+
+    @Core.receiver('onstart')
+    def onstart(self, sender, **kwargs):
+        if self.tick_greenlet is None:
+            self.tick_greenlet = self.core.periodic(self.tick_interval or 1.0, self.publish_tick)
 
     @RPC.export
     def initialize_clock(self, simulated_start_time, simulated_stop_time=None, speed=None):
@@ -186,6 +207,7 @@ class SimulationClockAgent(Agent):
         _log.debug('Initializing clock at {} to start at: {}'.format(self.actual_start_time, self.simulated_start_time))
         _log.debug('Initializing clock to stop at:  {}'.format(self.simulated_stop_time))
         _log.debug('Initializing clock to run at: {} times normal'.format(self.speed))
+        self.publish_clock('start')
         return 'Simulation started at {}'.format(self.actual_start_time)
 
     @RPC.export
@@ -217,8 +239,51 @@ class SimulationClockAgent(Agent):
         self.simulated_start_time = None
         self.simulated_stop_time = None
         self.speed = None
+        self.publish_clock('stop')
         return 'Simulation stopped'
 
+    @RPC.export
+    def get_clock(self):
+        """
+            Get the state of the simulated clock, in the form published to CLOCK_TOPIC.
+
+            An agent that follows CLOCK_TOPIC can call this once when it starts,
+            rather than waiting for the next tick.
+
+        @return: A dictionary; see clock_message().
+        """
+        return self.clock_message('tick' if self.simulated_start_time else 'stop')
+
+    def clock_message(self, event):
+        """
+            Describe the simulated clock.
+
+            simulated_time is the simulated time when the message was created. A receiver
+            extrapolates from it at speed simulated seconds per wall-clock second.
+
+        @param event: 'start', 'tick' or 'stop'.
+        @return: A dictionary with event, simulated_time, simulated_stop_time and speed.
+        """
+        if not (self.actual_start_time and self.simulated_start_time and self.speed):
+            return {'event': 'stop', 'simulated_time': None, 'simulated_stop_time': None, 'speed': None}
+        elapsed_seconds = (utils.get_aware_utc_now() - self.actual_start_time).total_seconds()
+        simulation_timestamp = self.simulated_start_time + timedelta(seconds=elapsed_seconds * self.speed)
+        return {'event': event,
+                'simulated_time': str(simulation_timestamp),
+                'simulated_stop_time': str(self.simulated_stop_time) if self.simulated_stop_time else None,
+                'speed': self.speed}
+
+    def publish_clock(self, event):
+        """Publish the simulated clock to CLOCK_TOPIC."""
+        now = utils.format_timestamp(utils.get_aware_utc_now())
+        headers = {headers_mod.DATE: now, headers_mod.TIMESTAMP: now}
+        self.vip.pubsub.publish('pubsub', CLOCK_TOPIC, headers=headers, message=self.clock_message(event))
+
+    def publish_tick(self):
+        """Publish the simulated clock while a simulation is in progress."""
+        if self.simulated_start_time:
+            self.publish_clock('tick')
+
 
 def main():
     """Main method called to start the agent."""
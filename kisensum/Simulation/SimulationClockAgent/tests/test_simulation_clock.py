@@ -150,6 +150,38 @@ class TestSimulationClock:
         response = self.start_one_for_one_simulation(agent, '2017-01-01 08:00', '2017-01-01 10:00')
         assert 'started' in response
 
+    def test_get_clock(self, agent):
+        """Confirm that the clock state matches the simulation, and that a stopped clock reports 'stop'."""
+        response = self.start_simulation(agent, '2017-01-01 08:00', '2017-01-01 10:00', '10.0')
+        assert 'started' in response
+        clock = self.issue_rpc_call(agent, 'get_clock')
+        assert clock['event'] == 'tick'
+        assert clock['speed'] == 10.0
+        assert utils.parse_timestamp_string(clock['simulated_stop_time']) == \
+            utils.parse_timestamp_string('2017-01-01 10:00')
+        assert utils.parse_timestamp_string(clock['simulated_time']) >= \
+            utils.parse_timestamp_string('2017-01-01 08:00')
+        self.stop_simulation(agent)
+        clock = self.issue_rpc_call(agent, 'get_clock')
+        assert clock['event'] == 'stop'
+        assert clock['simulated_time'] is None
+
+    def test_clock_ticks(self, agent):
+        """Confirm that the clock is published when a simulation starts, while it runs, and when it stops."""
+        messages = []
+        agent.vip.pubsub.subscribe('pubsub', 'simulation/clock',
+                                   lambda peer, sender, bus, topic, headers, message: messages.append(message))
+        gevent.sleep(1)
+        response = self.start_simulation(agent, '2017-01-01 08:00', '2017-01-01 10:00', '10.0')
+        assert 'started' in response
+        gevent.sleep(3)
+        self.stop_simulation(agent)
+        gevent.sleep(1)
+        events = [message['event'] for message in messages]
+        assert events[0] == 'start'
+        assert 'tick' in events
+        assert events[-1] == 'stop'
+
     def start_simulation(self, agt, start_time, stop_time, speed):
         """Issue an RPC call to initialize a simulation."""
         return self.issue_rpc_call(agt, 'initialize_clock', start_time, simulated_stop_time=stop_time, speed=speed)
@@ -24,7 +24,7 @@ __version__ = _temp.__version__
 setup(
     name=agent_package + 'agent',
     version=__version__,
-    install_requires=['volttron'],
+    install_requires=['volttron', 'numpy'],
     packages=packages,
     entry_points={
         'setuptools.installation': [
@@ -59,10 +59,11 @@ import logging
 import sys
 from zmq.utils import jsonapi
 
-from volttron.platform.vip.agent import Agent, RPC
+from volttron.platform.vip.agent import Agent, Core, PubSub, RPC
 from volttron.platform.agent import utils
 
-from driver import DriverAgent
+from clock import CLOCK_TOPIC, SimulationClock
+from driver import DriverAgent, publish_frames
 from driver_locks import configure_socket_lock, configure_publish_lock
 from interfaces import DriverInterfaceError
 
@@ -87,6 +88,9 @@ def simulation_driver_agent(config_path, **kwargs):
     config = utils.load_config(config_path)
     return SimulationDriverAgent(get_config('driver_config_list'),
                                  get_config('driver_scrape_interval', 0.02),
+                                 lock_step=get_config('lock_step', False),
+                                 lock_step_interval=get_config('lock_step_interval', 60.0),
+                                 lock_step_publish_points=get_config('lock_step_publish_points', False),
                                  heartbeat_autostart=True,
                                  **kwargs)
 
@@ -99,11 +103,21 @@ class SimulationDriverAgent(Agent):
         Its strategy for scheduling device-driver scrapes attempts to match that of the Master Driver.
         Please see services.core.MasterDriverAgent.master_driver.agent.py for additional commentary
         about this agent's implementation.
+
+        In lock-step mode, devices are not scraped on the wall clock. Instead, every lock_step_interval
+        seconds of simulated time, all devices whose interval has passed are scraped at that step's
+        simulated time, and their results are published together, by default to the 'all' topics only.
     """
 
-    def __init__(self, driver_config_list, driver_scrape_interval=0.02, **kwargs):
+    def __init__(self, driver_config_list, driver_scrape_interval=0.02, lock_step=False,
+                 lock_step_interval=60.0, lock_step_publish_points=False, **kwargs):
         super(SimulationDriverAgent, self).__init__(**kwargs)
         self.instances = {}
+        self.clock = SimulationClock()
+        self.lock_step = False
+        self.lock_step_interval = None
+        self.lock_step_publish_points = False
+        self.lock_step_greenlet = None
         try:
             self.driver_scrape_interval = float(driver_scrape_interval)
         except ValueError:
@@ -113,7 +127,10 @@ class SimulationDriverAgent(Agent):
         self._override_devices = set()
         self._override_patterns = None
         self._override_interval_events = {}
-        self.default_config = {"driver_scrape_interval": driver_scrape_interval}
+        self.default_config = {"driver_scrape_interval": driver_scrape_interval,
+                               "lock_step": lock_step,
+                               "lock_step_interval": lock_step_interval,
+                               "lock_step_publish_points": lock_step_publish_points}
         self.vip.config.set_default("config", self.default_config)
         self.vip.config.subscribe(self.configure_main, actions=["NEW", "UPDATE"], pattern="config")
         self.vip.config.subscribe(self.update_driver, actions=["NEW", "UPDATE"], pattern="devices/*")
@@ -132,6 +149,20 @@ class SimulationDriverAgent(Agent):
                 sys.exit(1)
         self.update_override_patterns()
         self.update_scrape_schedule(config)
+        self.update_lock_step(config)
+
+    @Core.receiver('onstart')
+    def sync_clock(self, sender, **kwargs):
+        """Get the simulated clock once; after that it is kept current by on_clock."""
+        try:
+            self.clock.update(self.vip.rpc.call('simulationclock', 'get_clock').get(timeout=5))
+        except Exception as err:
+            _log.info('No simulated clock available yet: {}'.format(err))
+
+    @PubSub.subscribe('pubsub', CLOCK_TOPIC)
+    def on_clock(self, peer, sender, bus, topic, headers, message):
+        """Update the simulated clock shared by all devices from a SimulationClockAgent message."""
+        self.clock.update(message)
 
     def update_override_patterns(self):
         if self._override_patterns is None:
@@ -179,6 +210,75 @@ class SimulationDriverAgent(Agent):
                 driver.update_scrape_schedule(time_slot, self.driver_scrape_interval)
                 time_slot += 1
 
+    def update_lock_step(self, config):
+        try:
+            lock_step_interval = float(config["lock_step_interval"])
+            if lock_step_interval <= 0.0:
+                raise ValueError("lock_step_interval must be positive")
+        except ValueError as e:
+            _log.error("ERROR PROCESSING CONFIGURATION: {}".format(e))
+            _log.error("Lock-step settings unchanged")
+            return
+        self.lock_step_interval = lock_step_interval
+        self.lock_step_publish_points = bool(config["lock_step_publish_points"])
+        lock_step = bool(config["lock_step"])
+        if self.lock_step != lock_step:
+            self.lock_step = lock_step
+            _log.info("Lock-step scraping " + ("on" if lock_step else "off"))
+            for driver in self.instances.itervalues():
+                driver.set_lock_step(lock_step)
+            if lock_step:
+                self.lock_step_greenlet = self.core.spawn(self.run_lock_step)
+            elif self.lock_step_greenlet:
+                self.lock_step_greenlet.kill()
+                self.lock_step_greenlet = None
+
+    def run_lock_step(self):
+        """
+            Scrape the devices in step with the simulated clock.
+
+            Steps are lock_step_interval simulated seconds apart, starting when a simulation starts.
+            Each step waits until the simulated clock reaches it. If scraping falls behind the clock,
+            steps run back to back; none are skipped. Every start message from the SimulationClockAgent
+            begins a new series of steps at the new simulated time, whether it is earlier or later.
+        """
+        step_time = None
+        start_count = self.clock.start_count
+        while True:
+            sim_time, _ = self.clock.get_time()
+            if sim_time is None:
+                step_time = None
+                gevent.sleep(1.0)
+                continue
+            if (step_time is None or start_count != self.clock.start_count or
+                    sim_time < step_time - timedelta(seconds=self.lock_step_interval)):
+                # A new simulation, or the clock went back without a start message reaching us
+                step_time = sim_time
+                start_count = self.clock.start_count
+            wait_seconds = (step_time - sim_time).total_seconds() / self.clock.speed
+            if wait_seconds > 0:
+                gevent.sleep(wait_seconds)
+                continue
+            self.step(step_time)
+            step_time += timedelta(seconds=self.lock_step_interval)
+            gevent.sleep(0)
+
+    def step(self, step_time):
+        """
+            Scrape every device that is due at a lock-step's simulated time, then publish the results.
+
+        :param step_time: (datetime) The step's simulated time.
+        :return: (int) The number of frames published.
+        """
+        frames = []
+        self.clock.step_time = step_time
+        try:
+            for driver in self.instances.values():
+                frames.extend(driver.step(step_time, self.lock_step_publish_points))
+        finally:
+            self.clock.step_time = None
+        return publish_frames(self.vip, frames)
+
     def stop_driver(self, device_topic):
         real_name = self._name_map.pop(device_topic.lower(), device_topic)
         driver = self.instances.pop(real_name, None)
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*- {{{
+# vim: set fenc=utf-8 ft=python sw=4 ts=4 sts=4 et:
+
+# Copyright (c) 2017, SLAC National Laboratory / Kisensum Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# The views and conclusions contained in the software and documentation
+# are those of the authors and should not be interpreted as representing
+# official policies, either expressed or implied, of the FreeBSD
+# Project.
+#
+# This material was prepared as an account of work sponsored by an
+# agency of the United States Government.  Neither the United States
+# Government nor the United States Department of Energy, nor SLAC / Kisensum,
+# nor any of their employees, nor any jurisdiction or organization that
+# has cooperated in the development of these materials, makes any
+# warranty, express or implied, or assumes any legal liability or
+# responsibility for the accuracy, completeness, or usefulness or any
+# information, apparatus, product, software, or process disclosed, or
+# represents that its use would not infringe privately owned rights.
+#
+# Reference herein to any specific commercial product, process, or
+# service by trade name, trademark, manufacturer, or otherwise does not
+# necessarily constitute or imply its endorsement, recommendation, or
+# favoring by the United States Government or any agency thereof, or
+# SLAC / Kisensum. The views and opinions of authors
+# expressed herein do not necessarily state or reflect those of the
+# United States Government or any agency thereof.
+#
+# }}}
+"""
+    Time device scrapes with the simulated time read from the shared SimulationClock,
+    against asking the SimulationClockAgent for it by RPC on every scrape.
+
+    With --lock-step, time a simulation step in which every device is scraped and published:
+    each frame published and awaited in turn, as on the wall clock, against a lock-step
+    that publishes only the 'all' frames, pipelined.
+
+    RPC and publish round trips are modeled as fixed delays (--rpc-ms), and each published
+    message is serialized, so no platform is needed. Half of the devices are simload and half
+    simpv drivers, using the SimulationAgent's sample data.
+
+        python -m simulation_driver.benchmark --devices 10 100 1000 --rpc-ms 1.0
+        python -m simulation_driver.benchmark --devices 100 1000 --lock-step
+"""
+import argparse
+import csv
+from datetime import datetime, timedelta
+import logging
+import os
+import time
+
+import gevent
+from gevent.event import AsyncResult
+from zmq.utils import jsonapi
+from volttron.platform.messaging.topics import DRIVER_TOPIC_ALL
+
+from clock import SimulationClock
+from driver import DriverAgent, publish_frames
+from driver_locks import configure_publish_lock
+from interfaces import simload, simpv
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(os.path.dirname(AGENT_DIR), 'SimulationAgent', 'data')
+
+
+class ModeledRPC(object):
+    """Answers the SimulationClockAgent's get_time() after a fixed round-trip time."""
+
+    def __init__(self, clock, round_trip_seconds):
+        self.rpc = self
+        self.clock = clock
+        self.round_trip_seconds = round_trip_seconds
+
+    def call(self, peer, method, *args, **kwargs):
+        return self
+
+    def get(self, timeout=None):
+        time.sleep(self.round_trip_seconds)
+        return self.clock.get_time()[1]
+
+
+class ModeledBus(object):
+    """Serializes each published message and confirms it after a fixed round-trip time."""
+
+    def __init__(self, round_trip_seconds):
+        self.pubsub = self
+        self.round_trip_seconds = round_trip_seconds
+
+    def publish(self, peer, topic, headers=None, message=None):
+        jsonapi.dumps([topic, headers, message])
+        result = AsyncResult()
+        gevent.spawn_later(self.round_trip_seconds, result.set, None)
+        return result
+
+
+class BenchmarkDriverAgent(object):
+    """The parts of a SimulationDriverAgent that a DriverAgent uses."""
+
+    def __init__(self, clock, vip):
+        self.clock = clock
+        self.vip = vip
+        self.lock_step = True
+
+
+def read_registry(file_name):
+    with open(os.path.join(AGENT_DIR, file_name), 'rb') as csv_file:
+        return list(csv.DictReader(csv_file))
+
+
+def device_configs():
+    """Return the simload and simpv driver configurations, with their registries."""
+    load_config = {'driver_type': 'simload',
+                   'registry_config': read_registry('simload.csv'),
+                   'interval': 60,
+                   'driver_config': {'csv_file_path': os.path.join(DATA_DIR, 'load_and_pv.csv'),
+                                     'timestamp_column_header': 'local_date',
+                                     'power_column_header': 'load_kw',
+                                     'data_frequency_min': 15,
+                                     'data_year': '2015'}}
+    pv_config = {'driver_type': 'simpv',
+                 'registry_config': read_registry('simpv.csv'),
+                 'interval': 60,
+                 'driver_config': {'csv_file_path': os.path.join(DATA_DIR, 'nrel_pv_readings.csv'),
+                                   'max_power_kw': 10.0,
+                                   'panel_area': 50.0,
+                                   'efficiency': 0.75,
+                                   'data_frequency_min': 30,
+                                   'data_year': '2015'}}
+    return load_config, pv_config
+
+
+def build_devices(count, clock, vip):
+    """Return count configured simload and simpv interfaces, reading time from clock or from vip."""
+    configs = device_configs()
+    devices = []
+    for index in range(count):
+        config = configs[index % 2]
+        module = simload if config['driver_type'] == 'simload' else simpv
+        interface = module.Interface(vip=vip, core=None)
+        interface.clock = clock
+        interface.configure(dict(config['driver_config']), config['registry_config'])
+        devices.append(interface)
+    return devices
+
+
+def build_drivers(count, parent):
+    """Return count started DriverAgents, alternating simload and simpv, that scrape in lock-step."""
+    configs = device_configs()
+    drivers = []
+    for index in range(count):
+        driver = DriverAgent(parent, configs[index % 2], index, 0.02, 'feeder/device{}'.format(index))
+        driver.setup_device()
+        driver.all_path_depth, driver.all_path_breadth = driver.get_paths_for_point(DRIVER_TOPIC_ALL)
+        drivers.append(driver)
+    return drivers
+
+
+def time_wall_clock_step(drivers):
+    """Scrape every driver and publish each frame in turn, as DriverAgent.periodic_read does."""
+    frames = 0
+    begin = time.time()
+    for driver in drivers:
+        for topic, headers, message in driver.scrape_frames():
+            driver._publish_wrapper(topic, headers=headers, message=message)
+            frames += 1
+    return frames, time.time() - begin
+
+
+def time_lock_step(drivers, parent, step_time):
+    """Scrape every driver at step_time and publish the 'all' frames together, as SimulationDriverAgent.step does."""
+    begin = time.time()
+    frames = []
+    parent.clock.step_time = step_time
+    try:
+        for driver in drivers:
+            frames.extend(driver.step(step_time, False))
+    finally:
+        parent.clock.step_time = None
+    publish_frames(parent.vip, frames)
+    return len(frames), time.time() - begin
+
+
+def benchmark_lock_step(device_counts, rounds, round_trip_seconds):
+    configure_publish_lock(10000)
+    clock = SimulationClock()
+    clock.update({'event': 'start', 'simulated_time': str(datetime(2017, 7, 1, 12)), 'speed': 1.0})
+    parent = BenchmarkDriverAgent(clock, ModeledBus(round_trip_seconds))
+    print('{:>8} {:>14} {:>14} {:>14} {:>14} {:>14}'.format('devices', 'wall frames', 'wall s/step',
+                                                            'lock frames', 'lock s/step', 'lock max speed'))
+    for count in device_counts:
+        drivers = build_drivers(count, parent)
+        wall_frames, wall_seconds = time_wall_clock_step(drivers)
+        step_time = datetime(2017, 7, 1, 12)
+        lock_seconds = 0.0
+        for _ in range(rounds):
+            step_time += timedelta(seconds=60)
+            lock_frames, seconds = time_lock_step(drivers, parent, step_time)
+            lock_seconds += seconds / rounds
+        print('{:>8} {:>14} {:>14.3f} {:>14} {:>14.3f} {:>13.0f}x'.format(count, wall_frames, wall_seconds,
+                                                                         lock_frames, lock_seconds,
+                                                                         60.0 / lock_seconds))
+
+
+def time_scrapes(devices, rounds):
+    """Return the seconds taken to scrape every device, averaged over rounds."""
+    for device in devices:
+        device.scrape_all()         # Load the reference data outside the timing
+    begin = time.time()
+    for _ in range(rounds):
+        for device in devices:
+            device.scrape_all()
+    return (time.time() - begin) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time simulated device scrapes by clock source')
+    parser.add_argument('--devices', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--rpc-ms', type=float, default=1.0, help='modeled RPC and publish round trip (ms)')
+    parser.add_argument('--lock-step', action='store_true', help='time wall-clock against lock-step publishing')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+    if args.lock_step:
+        benchmark_lock_step(args.devices, args.rounds, args.rpc_ms / 1000.0)
+        return
+
+    clock = SimulationClock()
+    clock.update({'event': 'start', 'simulated_time': str(datetime(2017, 7, 1, 12)), 'speed': 60.0})
+    print('{:>8} {:>16} {:>16} {:>16} {:>16}'.format('devices', 'rpc s/round', 'rpc scrapes/s',
+                                                     'clock s/round', 'clock scrapes/s'))
+    for count in args.devices:
+        rpc_seconds = time_scrapes(build_devices(count, None, ModeledRPC(clock, args.rpc_ms / 1000.0)), args.rounds)
+        clock_seconds = time_scrapes(build_devices(count, clock, None), args.rounds)
+        print('{:>8} {:>16.3f} {:>16.0f} {:>16.3f} {:>16.0f}'.format(count, rpc_seconds, count / rpc_seconds,
+                                                                     clock_seconds, count / clock_seconds))
+
+
+if __name__ == '__main__':
+    main()
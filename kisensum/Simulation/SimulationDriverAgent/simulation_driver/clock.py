@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*- {{{
+# vim: set fenc=utf-8 ft=python sw=4 ts=4 sts=4 et:
+
+# Copyright (c) 2017, SLAC National Laboratory / Kisensum Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# The views and conclusions contained in the software and documentation
+# are those of the authors and should not be interpreted as representing
+# official policies, either expressed or implied, of the FreeBSD
+# Project.
+#
+# This material was prepared as an account of work sponsored by an
+# agency of the United States Government.  Neither the United States
+# Government nor the United States Department of Energy, nor SLAC / Kisensum,
+# nor any of their employees, nor any jurisdiction or organization that
+# has cooperated in the development of these materials, makes any
+# warranty, express or implied, or assumes any legal liability or
+# responsibility for the accuracy, completeness, or usefulness or any
+# information, apparatus, product, software, or process disclosed, or
+# represents that its use would not infringe privately owned rights.
+#
+# Reference herein to any specific commercial product, process, or
+# service by trade name, trademark, manufacturer, or otherwise does not
+# necessarily constitute or imply its endorsement, recommendation, or
+# favoring by the United States Government or any agency thereof, or
+# SLAC / Kisensum. The views and opinions of authors
+# expressed herein do not necessarily state or reflect those of the
+# United States Government or any agency thereof.
+#
+# }}}
+from datetime import timedelta
+import logging
+import time
+
+from volttron.platform.agent import utils
+
+_log = logging.getLogger(__name__)
+
+CLOCK_TOPIC = 'simulation/clock'
+NO_SIMULATION = 'No simulation is in progress'
+PAST_STOP_TIME = 'Past the simulation stop time'
+
+
+class SimulationClock(object):
+    """
+        A local copy of the SimulationClockAgent's simulated clock.
+
+        The SimulationClockAgent publishes its clock to CLOCK_TOPIC when a simulation starts or stops,
+        and at regular intervals while it runs. Between messages, the simulated time is extrapolated
+        from the last one at the simulation's speed, so reading it needs no RPC call.
+
+        One SimulationClock is shared by all of the SimulationDriverAgent's devices.
+        In lock-step mode, step_time is set while the devices are scraped for a step,
+        so that they all read that step's simulated time.
+    """
+
+    def __init__(self):
+        self.simulated_time = None          # Simulated time in the last message
+        self.received_time = None           # Wall-clock time (seconds) at which it was received
+        self.simulated_stop_time = None
+        self.speed = None
+        self.step_time = None               # Simulated time of the lock-step in progress, if any
+        self.start_count = 0                # Number of simulation starts received
+
+    def update(self, message):
+        """
+            Apply a clock message published by the SimulationClockAgent.
+
+        :param message: (dict) event ('start', 'tick' or 'stop'), simulated_time, simulated_stop_time and speed.
+        """
+        if message.get('event') == 'stop' or not message.get('simulated_time'):
+            if self.simulated_time:
+                _log.debug('Simulation stopped')
+            self.simulated_time = None
+            self.received_time = None
+            self.simulated_stop_time = None
+            self.speed = None
+            return
+        try:
+            simulated_time = utils.parse_timestamp_string(message['simulated_time'])
+            stop_time = message.get('simulated_stop_time')
+            simulated_stop_time = utils.parse_timestamp_string(stop_time) if stop_time else None
+            speed = float(message['speed'])
+        except (KeyError, TypeError, ValueError):
+            _log.warning('Invalid simulated clock message: {}'.format(message))
+            return
+        if message.get('event') == 'start':
+            _log.debug('Simulation started at {}, running at {} times normal'.format(simulated_time, speed))
+            self.start_count += 1
+        self.received_time = time.time()
+        self.simulated_time = simulated_time
+        self.simulated_stop_time = simulated_stop_time
+        self.speed = speed
+
+    def get_time(self):
+        """
+            Return the current simulated time.
+
+            The string is formatted as the SimulationClockAgent's get_time() would return it,
+            including its messages when no simulated time is available.
+
+        :return: (datetime, str) The simulated time, or None, and its string.
+        """
+        if self.step_time is not None:
+            return self.step_time, str(self.step_time)
+        if self.simulated_time is None:
+            return None, NO_SIMULATION
+        elapsed_seconds = (time.time() - self.received_time) * self.speed
+        simulated_time = self.simulated_time + timedelta(seconds=elapsed_seconds)
+        if self.simulated_stop_time and simulated_time > self.simulated_stop_time:
+            return None, PAST_STOP_TIME
+        return simulated_time, str(simulated_time)
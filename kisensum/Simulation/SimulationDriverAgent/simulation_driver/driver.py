@@ -103,8 +103,10 @@ class DriverAgent(BasicAgent):
             _log.warning("Invalid device scrape interval {}. Defaulting to 60 seconds.".format(config.get("interval")))
             interval = 60
         self.interval = interval
+        self.last_step_time = None
         self.meta_data = None
         self.periodic_read_event = None
+        self.point_topics = {}
         self.time_slot_offset = None
         self.vip = parent.vip           # Use the parent's vip connection
         self.update_scrape_schedule(self.time_slot, driver_scrape_interval)
@@ -142,16 +144,29 @@ class DriverAgent(BasicAgent):
         sub_module = getattr(module, driver_type)
         klass = getattr(sub_module, "Interface")
         interface = klass(vip=self.vip, core=self.core)
+        interface.clock = self.parent.clock
         interface.configure(config_dict, config_string)
         return interface
 
     @Core.receiver('onstart')
     def starting(self, sender, **kwargs):
         self.setup_device()
-        next_periodic_read = self.find_starting_datetime(utils.get_aware_utc_now())
-        self.periodic_read_event = self.core.schedule(next_periodic_read, self.periodic_read, next_periodic_read)
+        if not self.parent.lock_step:
+            next_periodic_read = self.find_starting_datetime(utils.get_aware_utc_now())
+            self.periodic_read_event = self.core.schedule(next_periodic_read, self.periodic_read, next_periodic_read)
         self.all_path_depth, self.all_path_breadth = self.get_paths_for_point(DRIVER_TOPIC_ALL)
 
+    def set_lock_step(self, lock_step):
+        """Stop scraping on the wall clock when the driver agent scrapes in lock-step, or resume it."""
+        if lock_step:
+            if self.periodic_read_event:
+                self.periodic_read_event.cancel()
+                self.periodic_read_event = None
+        elif self.interface and not self.periodic_read_event:
+            self.last_step_time = None
+            next_periodic_read = self.find_starting_datetime(utils.get_aware_utc_now())
+            self.periodic_read_event = self.core.schedule(next_periodic_read, self.periodic_read, next_periodic_read)
+
     def setup_device(self):
         config = self.config
         driver_config = config["driver_config"]
@@ -206,24 +221,59 @@ class DriverAgent(BasicAgent):
         if test_now - next_scrape_time > datetime.timedelta(seconds=self.interval):
             next_scrape_time = self.find_starting_datetime(test_now)
         self.periodic_read_event = self.core.schedule(next_scrape_time, self.periodic_read, next_scrape_time)
+        for topic, headers, message in self.scrape_frames():
+            self._publish_wrapper(topic, headers=headers, message=message)
+
+    def step(self, step_time, publish_points):
+        """
+            Scrape the device for a lock-step, if its interval has passed since its last step.
+
+        :param step_time: (datetime) The step's simulated time.
+        :param publish_points: (bool) Include the per-point frames as well as the 'all' frames.
+        :return: (list) The (topic, headers, message) frames to publish.
+        """
+        if self.interface is None:
+            return []
+        if self.last_step_time is not None:
+            elapsed_seconds = (step_time - self.last_step_time).total_seconds()
+            if 0 <= elapsed_seconds < self.interval:
+                return []
+        self.last_step_time = step_time
+        return self.scrape_frames(publish_points)
+
+    def scrape_frames(self, publish_points=True):
+        """
+            Scrape the device and return what to publish.
+
+            Each point's value is published to its depth-first and breadth-first topics,
+            followed by all of the values on both 'all' topics.
+
+        :param publish_points: (bool) Include the per-point frames as well as the 'all' frames.
+        :return: (list) The (topic, headers, message) frames to publish.
+        """
         _log.debug("scraping device: " + self.device_name)
         try:
             results = self.interface.scrape_all()
         except Exception as ex:
             _log.error('Failed to scrape ' + self.device_name + ': ' + str(ex))
-            return
+            return []
+        frames = []
         if results:
             utcnow_string = utils.format_timestamp(utils.get_aware_utc_now())
             headers = {headers_mod.DATE: utcnow_string,
                        headers_mod.TIMESTAMP: utcnow_string, }
-            for point, value in results.iteritems():
-                depth_first_topic, breadth_first_topic = self.get_paths_for_point(point)
-                message = [value, self.meta_data[point]]
-                self._publish_wrapper(depth_first_topic, headers=headers, message=message)
-                self._publish_wrapper(breadth_first_topic, headers=headers, message=message)
+            if publish_points:
+                for point, value in results.iteritems():
+                    if point not in self.point_topics:
+                        self.point_topics[point] = self.get_paths_for_point(point)
+                    depth_first_topic, breadth_first_topic = self.point_topics[point]
+                    message = [value, self.meta_data[point]]
+                    frames.append((depth_first_topic, headers, message))
+                    frames.append((breadth_first_topic, headers, message))
             message = [results, self.meta_data]
-            self._publish_wrapper(self.all_path_depth, headers=headers, message=message)
-            self._publish_wrapper(self.all_path_breadth, headers=headers, message=message)
+            frames.append((self.all_path_depth, headers, message))
+            frames.append((self.all_path_breadth, headers, message))
+        return frames
 
     def _publish_wrapper(self, topic, headers, message):
         while True:
@@ -277,3 +327,41 @@ class DriverAgent(BasicAgent):
 
     def revert_all(self, **kwargs):
         self.interface.revert_all(**kwargs)
+
+
+def publish_frames(vip, frames, pipeline_depth=1000, attempts=3):
+    """
+        Publish (topic, headers, message) frames without waiting for each one to be confirmed.
+
+        Up to pipeline_depth publishes are in flight at once. Frames refused because pubsub
+        is busy are published again, up to attempts times in all.
+
+    :param vip: The agent's VIP subsystems.
+    :param frames: (list) The (topic, headers, message) frames to publish.
+    :return: (int) The number of frames confirmed.
+    """
+    confirmed = 0
+    for start in range(0, len(frames), pipeline_depth):
+        batch = frames[start:start + pipeline_depth]
+        for attempt in range(attempts):
+            pending = [(frame, vip.pubsub.publish('pubsub', frame[0], headers=frame[1], message=frame[2]))
+                       for frame in batch]
+            gevent.wait([result for frame, result in pending], timeout=10.0)
+            batch = []
+            for frame, result in pending:
+                if not result.ready():
+                    _log.warn("Did not receive confirmation of publish to " + frame[0])
+                elif isinstance(result.exception, Again):
+                    batch.append(frame)
+                elif result.exception is not None:
+                    _log.warn("driver failed to publish " + frame[0] + ": " + str(result.exception))
+                else:
+                    confirmed += 1
+            if not batch:
+                break
+            if attempt + 1 == attempts:
+                _log.warn("driver failed to publish {} frames: pubsub is busy".format(len(batch)))
+            else:
+                _log.warn("publish delayed: {} frames, pubsub is busy".format(len(batch)))
+                gevent.sleep(random.random())
+    return confirmed
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*- {{{
+# vim: set fenc=utf-8 ft=python sw=4 ts=4 sts=4 et:
+
+# Copyright (c) 2017, SLAC National Laboratory / Kisensum Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# The views and conclusions contained in the software and documentation
+# are those of the authors and should not be interpreted as representing
+# official policies, either expressed or implied, of the FreeBSD
+# Project.
+#
+# This material was prepared as an account of work sponsored by an
+# agency of the United States Government.  Neither the United States
+# Government nor the United States Department of Energy, nor SLAC / Kisensum,
+# nor any of their employees, nor any jurisdiction or organization that
+# has cooperated in the development of these materials, makes any
+# warranty, express or implied, or assumes any legal liability or
+# responsibility for the accuracy, completeness, or usefulness or any
+# information, apparatus, product, software, or process disclosed, or
+# represents that its use would not infringe privately owned rights.
+#
+# Reference herein to any specific commercial product, process, or
+# service by trade name, trademark, manufacturer, or otherwise does not
+# necessarily constitute or imply its endorsement, recommendation, or
+# favoring by the United States Government or any agency thereof, or
+# SLAC / Kisensum. The views and opinions of authors
+# expressed herein do not necessarily state or reflect those of the
+# United States Government or any agency thereof.
+#
+# }}}
+import calendar
+from datetime import datetime
+import logging
+import os
+
+import numpy
+
+_log = logging.getLogger(__name__)
+
+# Reference series are shared by every driver in the process that uses the same file and parameters,
+# including drivers recreated when their configuration is reloaded.
+_series_cache = {}
+
+
+class ReferenceSeries(object):
+    """
+        A year of reference data, resampled at a regular frequency and indexed by minute of the year.
+
+        A lookup matches the simulated time to the reference year by month, day, hour and minute,
+        and interpolates linearly between the two samples around it.
+    """
+
+    def __init__(self, data_year, frequency_min, timestamps, values):
+        """
+            Initialize the instance.
+
+        :param data_year: (int) The year of the reference data.
+        :param frequency_min: (int) The reference data's frequency in minutes, e.g. 15 or 30.
+        :param timestamps: (list) Datetime of each sample. Samples outside data_year are used only
+                           to interpolate at the ends of the year.
+        :param values: (list) Float value of each sample.
+        """
+        self.data_year = data_year
+        self.frequency_min = frequency_min
+        start = datetime(data_year, 1, 1)
+        self.month_starts = [0, 0]
+        for month in range(1, 12):
+            self.month_starts.append(self.month_starts[-1] + calendar.monthrange(data_year, month)[1] * 1440)
+        year_minutes = (366 if calendar.isleap(data_year) else 365) * 1440
+        minutes = numpy.array([(t - start).total_seconds() / 60.0 for t in timestamps])
+        values = numpy.array(values, dtype=float)
+        in_range = (minutes > -1440) & (minutes < year_minutes + 1440)
+        if not in_range.any():
+            raise ValueError('No reference data for {}'.format(data_year))
+        order = numpy.argsort(minutes[in_range], kind='mergesort')
+        grid = numpy.arange(0, year_minutes + frequency_min, frequency_min)
+        self.samples = numpy.interp(grid, minutes[in_range][order], values[in_range][order])
+
+    def minute_of_year(self, timestamp):
+        """Return the minute of the reference year matching a datetime's month, day and time."""
+        return (self.month_starts[timestamp.month] + (timestamp.day - 1) * 1440 +
+                timestamp.hour * 60 + timestamp.minute + timestamp.second / 60.0)
+
+    def value_at(self, timestamp):
+        """
+            Return the reference value for a datetime, interpolated between samples.
+
+            February 29th in a simulation whose reference year is not a leap year reads March 1st.
+
+        :param timestamp: (datetime) The simulated time.
+        :return: (float) The reference value.
+        """
+        index, offset = divmod(self.minute_of_year(timestamp), self.frequency_min)
+        index = int(index)
+        before = self.samples[index]
+        return float(before + (self.samples[index + 1] - before) * offset / self.frequency_min)
+
+
+def load_series(csv_file_path, data_year, frequency_min, read_rows, *read_args):
+    """
+        Return the ReferenceSeries for a CSV file, reading the file only if no driver has read it already.
+
+        The cache key includes the file's modification time and size, so a file that has been
+        replaced is read again.
+
+    :param csv_file_path: Pathname of the CSV file containing reference data by time.
+    :param data_year: (int) The year of the reference data.
+    :param frequency_min: (int) The reference data's frequency in minutes, e.g. 15 or 30.
+    :param read_rows: Function of (csv_file, *read_args) yielding a (datetime, value) per row.
+    :return: A ReferenceSeries.
+    """
+    expanded_path = os.path.expandvars(os.path.expanduser(csv_file_path))
+    stat = os.stat(expanded_path)
+    key = (expanded_path, stat.st_mtime, stat.st_size, int(data_year), int(frequency_min), read_rows) + read_args
+    series = _series_cache.get(key)
+    if series is None:
+        _log.info('{} Starting to load reference data from {}.'.format(datetime.now(), expanded_path))
+        for old_key in [k for k in _series_cache if k[0] == expanded_path and k[1:3] != key[1:3]]:
+            del _series_cache[old_key]
+        with open(expanded_path, 'rb') as csv_file:
+            rows = list(read_rows(csv_file, *read_args))
+        series = ReferenceSeries(int(data_year), int(frequency_min), [t for t, v in rows], [v for t, v in rows])
+        _series_cache[key] = series
+        _log.info('{} Finished loading reference data from {}.'.format(datetime.now(), expanded_path))
+    return series
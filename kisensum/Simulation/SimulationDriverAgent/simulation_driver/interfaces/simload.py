@@ -54,7 +54,6 @@
 import csv
 from datetime import datetime
 import logging
-import os
 
 from simulation import SimulationRegister, SimulationInterface
 
@@ -89,80 +88,69 @@ class Interface(SimulationInterface):
 
     def __init__(self, **kwargs):
         super(Interface, self).__init__(**kwargs)
-        self.power_dict = None
+        self.power_series = None
 
     def update(self):
         """Update the device driver's state in advance of a periodic scrape request."""
         super(Interface, self).update()
-        if not self.power_dict:
-            csv_file_path = self.get_register_value('csv_file_path')
-            if csv_file_path:
-                self.power_dict = self.load_power_dict(csv_file_path)
-
-        if self.power_dict:
+        self.power_series = self.reference_series(self.read_power_rows,
+                                                  self.get_register_value('timestamp_column_header'),
+                                                  self.get_register_value('power_column_header'))
+        if self.power_series:
             power_kw = self.calculate_power()
         else:
             _log.info('No Load simulation data has been loaded')
             power_kw = None
 
-        if power_kw:
+        if power_kw is not None:
             self.set_register_by_name('power_kw', power_kw)
 
     def calculate_power(self):
         """Return the reference data's power value for the current simulated time."""
         power_kw = None
-        if not self.power_dict:
+        if not self.power_series:
             _log.info('No simulation is in progress')
         else:
             sim_time = self.sim_time()
             if sim_time:
-                data_year = self.get_register_value('data_year')
-                data_frequency_min = self.get_register_value('data_frequency_min')
-                adjusted_time = self.adjusted_sim_time(data_year, data_frequency_min)
-                try:
-                    time_string = adjusted_time.strftime('%-m/%-d/%y %-H:%M')    # The keys are formatted as M/D/YY H:MM
-                    power_kw = self.power_dict[time_string]
-                    _log.debug('Load at {} = {} kw'.format(sim_time, power_kw))
-                except AttributeError:
-                    _log.warning('Unable to look up Load value for {} (adjusted to {})'.format(sim_time, adjusted_time))
+                power_kw = self.power_series.value_at(sim_time)
+                _log.debug('Load at {} = {} kw'.format(sim_time, power_kw))
             else:
                 _log.info('No simulation is in progress')
         return power_kw
 
-    def load_power_dict(self, csv_file_path):
+    @staticmethod
+    def read_power_rows(csv_file, timestamp_column, power_column):
         """
-            Load reference data from a CSV-formatted file into a dictionary indexed by timestamp.
+            Read power reference data from a CSV-formatted file.
 
             The reference file should include a calendar year's worth of data, gathered at a regular frequency.
+            Timestamps are formatted as M/D/YY H:MM.
 
             CSV file info can be furnished as simulation initialization parameters,
             either in the driver configuration or via set_point calls to the running driver.
             The following parameters are configurable:
 
                 csv_file_path
-                reference_data_year
-                reference_data_frequency_mins
+                data_year
+                data_frequency_min
                 timestamp_column_header
                 power_column_header
 
-        :param csv_file_path: Pathname of the CSV file containing power data by time.
-        :return: A dictionary of power data read from the CSV file.
+        :param csv_file: The open CSV file containing power data by time.
+        :param timestamp_column: Header of the timestamp column.
+        :param power_column: Header of the power column.
+        :return: Yields a (datetime, power_kw) for each row.
         """
-        _log.info('{} Starting to load circuit-load data.'.format(datetime.now()))
-        power_dict = {}
-        expanded_path = os.path.expandvars(os.path.expanduser(csv_file_path))
-        with open(expanded_path, 'rb') as csv_file:
-            timestamp_column = self.get_register_value('timestamp_column_header')
-            power_column = self.get_register_value('power_column_header')
-            csv_reader = csv.DictReader(csv_file)
-            for row in csv_reader:
-                try:
-                    time_string = row[timestamp_column]
-                    if time_string:
-                        power_dict[time_string] = row[power_column]
-                    else:
-                        _log.warning('Missing timestamp during Load data file load')
-                except ValueError:
-                    _log.warning('Skipping row during Load data file load')
-        _log.info('{} Finished loading circuit-load data.'.format(datetime.now()))
-        return power_dict
+        csv_reader = csv.reader(csv_file)
+        header = next(csv_reader)
+        timestamp_index = header.index(timestamp_column)
+        power_index = header.index(power_column)
+        for row in csv_reader:
+            try:
+                date_string, time_string = row[timestamp_index].split(' ')
+                month, day, year = [int(part) for part in date_string.split('/')]
+                hour, minute = [int(part) for part in time_string.split(':')]
+                yield datetime(year + 2000 if year < 100 else year, month, day, hour, minute), float(row[power_index])
+            except (IndexError, ValueError):
+                _log.warning('Skipping row during Load data file load')
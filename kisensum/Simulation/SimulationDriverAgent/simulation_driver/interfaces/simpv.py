@@ -54,7 +54,6 @@
 import csv
 from datetime import datetime
 import logging
-import os
 from simulation import SimulationRegister, SimulationInterface
 
 _log = logging.getLogger(__name__)
@@ -91,58 +90,49 @@ class Interface(SimulationInterface):
 
     def __init__(self, **kwargs):
         super(Interface, self).__init__(**kwargs)
-        self.irradiance_dict = None
+        self.irradiance_series = None
 
     def update(self):
         """Update the device driver's state in advance of a periodic scrape request."""
         super(Interface, self).update()
-        if not self.irradiance_dict:
-            csv_file_path = self.get_register_value('csv_file_path')
-            if csv_file_path:
-                self.irradiance_dict = self.load_irradiance_dict(csv_file_path)
-
-        if self.irradiance_dict:
+        self.irradiance_series = self.reference_series(self.read_irradiance_rows)
+        if self.irradiance_series:
             power_kw = self.calculate_power()
         else:
             _log.info('No PV simulation data has been loaded')
             power_kw = None
 
-        if power_kw:
+        if power_kw is not None:
             self.set_register_by_name('power_kw', power_kw)
 
     def calculate_power(self):
         """Calculate and return power for the current simulated time based on the reference data's irradiance value."""
         power_kw = None
-        if not self.irradiance_dict:
+        if not self.irradiance_series:
             _log.info('No simulation is in progress')
         else:
             sim_time = self.sim_time()
             if sim_time:
-                data_year = self.get_register_value('data_year')
                 data_frequency_min = self.get_register_value('data_frequency_min')
                 area_m2 = self.get_register_value('panel_area')
                 efficiency = self.get_register_value('efficiency')
-                adjusted_time = self.adjusted_sim_time(data_year, data_frequency_min)
                 elapsed_time_hrs = data_frequency_min / 60.0
-                try:
-                    irradiance_wh_m2 = self.irradiance_dict[str(adjusted_time)]
-                    # The power_kw value is negated because the PV contributes power to the circuit
-                    power_kw = -(irradiance_wh_m2 / 1000.0) * area_m2 * efficiency / elapsed_time_hrs
-                    numerator = 'irradiance {} wh/m2 * area {} m2 * efficiency {}'.format(irradiance_wh_m2,
-                                                                                          area_m2,
-                                                                                          efficiency)
-                    denominator = '(1000 * elapsed time {} hr)'.format(elapsed_time_hrs)
-                    _log.debug('PV power at {} = {} kw = {} / {}'.format(sim_time, power_kw, numerator, denominator))
-                except AttributeError:
-                    _log.warning('Unable to look up PV value for {} (adjusted to {})'.format(sim_time, adjusted_time))
+                irradiance_wh_m2 = self.irradiance_series.value_at(sim_time)
+                # The power_kw value is negated because the PV contributes power to the circuit
+                power_kw = -(irradiance_wh_m2 / 1000.0) * area_m2 * efficiency / elapsed_time_hrs
+                numerator = 'irradiance {} wh/m2 * area {} m2 * efficiency {}'.format(irradiance_wh_m2,
+                                                                                      area_m2,
+                                                                                      efficiency)
+                denominator = '(1000 * elapsed time {} hr)'.format(elapsed_time_hrs)
+                _log.debug('PV power at {} = {} kw = {} / {}'.format(sim_time, power_kw, numerator, denominator))
             else:
                 _log.info('No simulation is in progress')
         return power_kw
 
     @staticmethod
-    def load_irradiance_dict(csv_file_path):
+    def read_irradiance_rows(csv_file):
         """
-            Load irradiance reference data from a CSV-formatted file into a dictionary indexed by timestamp.
+            Read irradiance reference data from a CSV-formatted file.
 
             The reference file should include a calendar year's worth of data, gathered at a regular frequency.
 
@@ -156,35 +146,18 @@ class Interface(SimulationInterface):
                 data_frequency_min
                 data_year
 
-        :param csv_file_path: Pathname of the CSV file containing irradiance data by time.
-        :return: A dictionary of irradiance data read from the CSV file.
+        :param csv_file: The open CSV file containing irradiance data by time.
+        :return: Yields a (datetime, irradiance) for each row.
         """
-        _log.info('{} Starting to load PV data.'.format(datetime.now()))
-        irradiance_dict = {}
-        expanded_path = os.path.expandvars(os.path.expanduser(csv_file_path))
-        with open(expanded_path, 'rb') as csv_file:
-            # This column sequence can vary depending on how the data was extracted.
-            # It's difficult to be data-sensitive since the file starts with two extra header rows
-            # prior to the column headers.
-            fieldnames = ['Year', 'Month', 'Day', 'Hour', 'Minute', 'DHI', 'DNI', 'Temperature']
-            csv_reader = csv.DictReader(csv_file, fieldnames=fieldnames)
-            for row in csv_reader:
-                try:
-                    timestamp = datetime(int(row['Year']),
-                                         int(row['Month']),
-                                         int(row['Day']),
-                                         int(row['Hour']),
-                                         int(row['Minute']))
-                    if timestamp:
-                        # Not currently making use of DHI and Temperature data
-                        diffuse_horizontal_irradiance = float(row['DHI'])       # Wh/m2
-                        direct_normal_irradiance = float(row['DNI'])            # Wh/m2
-                        temperature = float(row['Temperature'])                 # deg Celsius
-                        irradiance_dict[str(timestamp)] = diffuse_horizontal_irradiance
-                    else:
-                        _log.warning('Unparseable time values during PV data file load')
-                except ValueError:
-                    # Skip rows that have other data types in the columns of interest
-                    _log.warning('Skipping row during PV data file load')
-        _log.info('{} Finished loading PV data.'.format(datetime.now()))
-        return irradiance_dict
+        # This column sequence can vary depending on how the data was extracted.
+        # It's difficult to be data-sensitive since the file starts with two extra header rows
+        # prior to the column headers: Year, Month, Day, Hour, Minute, DHI, DNI, Temperature.
+        for row in csv.reader(csv_file):
+            try:
+                timestamp = datetime(*[int(value) for value in row[:5]])
+                # Not currently making use of DNI and Temperature data
+                diffuse_horizontal_irradiance = float(row[5])       # Wh/m2
+                yield timestamp, diffuse_horizontal_irradiance
+            except (IndexError, TypeError, ValueError):
+                # Skip rows that have other data types in the columns of interest
+                _log.warning('Skipping row during PV data file load')
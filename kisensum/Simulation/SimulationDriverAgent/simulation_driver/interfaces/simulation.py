@@ -54,9 +54,9 @@
 import logging
 
 from volttron.platform.agent import utils
-from volttron.platform.agent.utils import parse_timestamp_string
 
 from . import BaseInterface, BaseRegister, BasicRevert
+from .reference_data import load_series
 
 _log = logging.getLogger(__name__)
 
@@ -115,6 +115,11 @@ class SimulationInterface(BasicRevert, BaseInterface):
 
     def __init__(self, vip=None, core=None, **kwargs):
         super(SimulationInterface, self).__init__(vip=vip, core=core, **kwargs)
+        self._reference_parameters = None
+        self._reference_series = None
+        self.clock = None                       # The driver agent's SimulationClock, if it has one
+        self._clock_time = None
+        self._clock_time_string = None
 
     def configure(self, config_dict, registry_config):
         if registry_config:
@@ -176,13 +181,26 @@ class SimulationInterface(BasicRevert, BaseInterface):
         """
         pass
 
+    def get_simulated_time(self):
+        """
+            Return the current simulated time (as a string) from the driver agent's SimulationClock.
+
+            If the driver agent has no clock, fall back to asking the SimulationClockAgent
+            via an RPC call (see BasicRevert.get_simulated_time()).
+        """
+        if self.clock is None:
+            return super(SimulationInterface, self).get_simulated_time()
+        self._clock_time, self._clock_time_string = self.clock.get_time()
+        return self._clock_time_string
+
     def sim_time(self):
         """
             Return the current simulated timestamp.
 
-            The current simulated timestamp (as a string) was requested from the SimulationClockAgent
-            via an RPC call (see BasicRevert.scrape_all()) and stored in a register.
+            The current simulated timestamp (as a string) was read during the scrape
+            (see BasicRevert.scrape_all()) and stored in a register.
             Get that value from the register, parse the string, and return the datetime.
+            If the string is the one read from the driver agent's clock, return its datetime without parsing.
 
             If a simulated timestamp cannot be returned, log the reason and return None.
 
@@ -190,6 +208,8 @@ class SimulationInterface(BasicRevert, BaseInterface):
         """
         sim_time = None
         timestamp_string = self.get_register_value('last_timestamp')
+        if self._clock_time is not None and timestamp_string == self._clock_time_string:
+            return self._clock_time
         try:
             sim_time = utils.parse_timestamp_string(timestamp_string)
         except TypeError:
@@ -201,32 +221,26 @@ class SimulationInterface(BasicRevert, BaseInterface):
                 _log.warning('Invalid timestamp format returned by simulated time agent: {}'.format(timestamp_string))
         return sim_time
 
-    def adjusted_sim_time(self, data_year, minute_boundary):
+    def reference_series(self, read_rows, *read_args):
         """
-            Return an adjusted version of the current simulated timestamp.
+            Return the reference data for this driver's csv_file_path, data_year and data_frequency_min.
 
-            This version of the time is suitable for use during a CSV/dictionary lookup
-            in which each row is normalized to a certain frequency in minutes (e.g. every 15 minutes),
-            and the simulation's lookup must be adjusted to happen during the reference
-            data's year.
+            The file is loaded through reference_data.load_series, which shares it with other drivers
+            using the same file. It is looked up again only when one of those registers changes.
 
-            If an adjusted simulated timestamp cannot be returned, return None.
+            If no csv_file_path has been configured, return None.
 
-        :param data_year: (int) The year of the reference data.
-        :param minute_boundary: (int) The reference data's frequency in minutes, e.g. 15 or 30.
-        :return: (datetime) The adjusted timestamp.
+        :param read_rows: Function of (csv_file, *read_args) yielding a (datetime, value) per row.
+        :return: (ReferenceSeries) The reference data.
         """
-        normalized_time = None
-        sim_time = self.sim_time()
-        if sim_time:
-            adjusted_minutes = (minute_boundary * (sim_time.minute / minute_boundary + 1)) % 60
-            timestamp_string = '{}/{}/{} {}:{}:00'.format(sim_time.month,
-                                                          sim_time.day,
-                                                          data_year,
-                                                          sim_time.hour,
-                                                          adjusted_minutes)
-            try:
-                normalized_time = parse_timestamp_string(timestamp_string)
-            except ValueError:
-                _log.warning('Unable to parse the adjusted simulation timestamp: {}'.format(timestamp_string))
-        return normalized_time
+        csv_file_path = self.get_register_value('csv_file_path')
+        if not csv_file_path:
+            return None
+        parameters = (csv_file_path,
+                      self.get_register_value('data_year'),
+                      self.get_register_value('data_frequency_min'),
+                      read_rows) + read_args
+        if parameters != self._reference_parameters:
+            self._reference_series = load_series(*parameters)
+            self._reference_parameters = parameters
+        return self._reference_series
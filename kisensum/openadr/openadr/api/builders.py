@@ -72,6 +72,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_xml.parsers import XMLParser
 from api.xsd import oadr_20b
+from api import codec
 from vtn.models import *
 from django.core.handlers.wsgi import WSGIRequest
 from rest_framework import status
@@ -110,6 +111,10 @@ class OADRResponseBuilder(PayloadXML):
         self.response_description = response_description
         self.ven_id = ven_id
 
+    def wrap(self):
+        return codec.XMLPayload(codec.render_response(self.schema_version, self.status_number, self.request_id,
+                                                      self.response_description, self.ven_id))
+
     def build(self):
         return oadr_20b.oadrResponseType(schemaVersion=self.schema_version,
                                          eiResponse=oadr_20b.EiResponseType(responseCode=self.status_number,
@@ -128,6 +133,32 @@ class OADRDistributeEventBuilder(PayloadXML):
         self.ven_id = ven_id
         self.site_events = site_events
 
+    def wrap(self):
+        created_date_time = datetime.isoformat(datetime.now())[0:19]
+        oadr_events = [self.render_oadr_event(site_event) for site_event in self.site_events]
+        return codec.XMLPayload(codec.render_distribute_event(SCHEMA_VERSION, BOGUS_REQUEST_ID, settings.VTN_ID,
+                                                              oadr_events, created_date_time))
+
+    @staticmethod
+    def render_oadr_event(site_event):
+        """
+        Every VEN told about a DR event gets the same oadrEvent, so it is rendered once per
+        DR event, modification number and status.
+        """
+        dr_event = site_event.dr_event
+        if site_event.status == 'cancelled' or site_event.status == 'CANCELED':
+            event_status = 'cancelled'
+        else:
+            event_status = dr_event.status
+
+        def render():
+            seconds = (dr_event.end - dr_event.start).seconds
+            duration = isoduration.duration_isoformat(isoduration.Duration(seconds=seconds))
+            return codec.render_oadr_event(dr_event.event_id, dr_event.modification_number, event_status,
+                                           dr_event.start, duration)
+
+        return get_oadr_event_fragment((dr_event.pk, dr_event.modification_number, event_status), render)
+
     def build(self):
         return oadr_20b.oadrDistributeEventType(schemaVersion=SCHEMA_VERSION,
                                                 eiResponse=build_ei_response(status=STATUS_OK,
@@ -0,0 +1,370 @@
+# -*- coding: utf-8 -*- {{{
+# vim: set fenc=utf-8 ft=python sw=4 ts=4 sts=4 et:
+
+# Copyright (c) 2017, Battelle Memorial Institute
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# The views and conclusions contained in the software and documentation
+# are those of the authors and should not be interpreted as representing
+# official policies, either expressed or implied, of the FreeBSD
+# Project.
+#
+# This material was prepared as an account of work sponsored by an
+# agency of the United States Government.  Neither the United States
+# Government nor the United States Department of Energy, nor Battelle,
+# nor any of their employees, nor any jurisdiction or organization that
+# has cooperated in the development of these materials, makes any
+# warranty, express or implied, or assumes any legal liability or
+# responsibility for the accuracy, completeness, or usefulness or any
+# information, apparatus, product, software, or process disclosed, or
+# represents that its use would not infringe privately owned rights.
+#
+# Reference herein to any specific commercial product, process, or
+# service by trade name, trademark, manufacturer, or otherwise does not
+# necessarily constitute or imply its endorsement, recommendation, or
+# favoring by the United States Government or any agency thereof, or
+# Battelle Memorial Institute. The views and opinions of authors
+# expressed herein do not necessarily state or reflect those of the
+# United States Government or any agency thereof.
+#
+# PACIFIC NORTHWEST NATIONAL LABORATORY
+# operated by BATTELLE for the UNITED STATES DEPARTMENT OF ENERGY
+# under Contract DE-AC05-76RL01830
+# }}}
+
+"""
+A lighter codec for the OpenADR 2.0b payloads the VTN handles most.
+
+parse() reads the payloads that VENs send most, oadrPoll, oadrUpdateReport, oadrCreatedEvent
+and oadrRegisterReport, straight from the lxml tree into OADRElement objects. These have the
+same attribute names and value types as the generateDS classes in api.xsd.oadr_20b.
+Any other payload is left to oadr_20b.parseString.
+
+oadrResponse and oadrDistributeEvent are rendered from string templates that hold the same
+markup as the generateDS export, without indentation. XMLPayload hands a rendered document to
+OADRRenderer in place of a generateDS object.
+"""
+
+from __future__ import unicode_literals
+import inspect
+import re
+import threading
+from datetime import datetime
+from lxml import etree
+from api.xsd import oadr_20b
+
+FAST_PAYLOADS = ('oadrPoll', 'oadrUpdateReport', 'oadrCreatedEvent', 'oadrRegisterReport')
+
+
+def get_schema_names():
+    """
+    :return: the child element and attribute names of the generateDS classes
+    """
+    names = set()
+    for generated_class in vars(oadr_20b).values():
+        if inspect.isclass(generated_class) and issubclass(generated_class, oadr_20b.GeneratedsSuper):
+            names.update(inspect.signature(generated_class.__init__).parameters)
+    names.discard('self')
+    return names
+
+
+SCHEMA_NAMES = get_schema_names()
+
+# Elements that generateDS names after their substitution group head
+SUBSTITUTIONS = {
+    'oadrReportPayload': 'streamPayloadBase',
+    'signalPayload': 'streamPayloadBase',
+    'payloadFloat': 'payloadBase',
+    'oadrPayloadResourceStatus': 'payloadBase',
+}
+
+# Elements that may repeat, so generateDS keeps them in a list
+LIST_ELEMENTS = {'oadrReport', 'oadrReportDescription', 'interval', 'streamPayloadBase', 'eventResponse',
+                 'oadrEvent', 'eiEventSignal', 'oadrReportRequest', 'specifierPayload'}
+
+# Repeating elements that are single values under other parents
+PARENT_LIST_ELEMENTS = {('oadrPendingReports', 'reportRequestID'), ('eiTarget', 'venID'),
+                        ('eiTarget', 'resourceID'), ('eiTarget', 'groupID'), ('eiTarget', 'partyID')}
+
+# Complex elements, which generateDS builds even when they are empty
+COMPLEX_ELEMENTS = LIST_ELEMENTS | {'payloadBase', 'oadrSamplingRate', 'dtstart', 'properties', 'intervals',
+                                    'eiResponse', 'eventResponses', 'qualifiedEventID', 'oadrPendingReports',
+                                    'eiTarget', 'reportDataSource', 'reportSubject', 'oadrLoadControlState'}
+
+
+def parse_boolean(text):
+    if text in ('true', '1'):
+        return True
+    if text in ('false', '0'):
+        return False
+    raise ValueError('Requires boolean value, got {}'.format(text))
+
+
+UTC = oadr_20b.GeneratedsSuper._FixedOffsetTZ(0, 'UTC')
+UTC_DATETIME = re.compile('([0-9]{4})-([0-9]{2})-([0-9]{2})T([0-9]{2}):([0-9]{2}):([0-9]{2})(Z?)$')
+
+
+def parse_datetime(text):
+    # Reports carry a date-time per interval, almost all of them whole seconds in UTC
+    match = UTC_DATETIME.match(text)
+    if match is None:
+        return oadr_20b.GeneratedsSuper.gds_parse_datetime(text)
+    year, month, day, hour, minute, second, utc = match.groups()
+    return datetime(int(year), int(month), int(day), int(hour), int(minute), int(second),
+                    tzinfo=UTC if utc else None)
+
+
+VALUE_TYPES = {
+    'value': float,
+    'modificationNumber': int,
+    'priority': int,
+    'date_time': parse_datetime,
+    'createdDateTime': parse_datetime,
+    'oadrOnChange': parse_boolean,
+    'oadrOnline': parse_boolean,
+    'oadrManualOverride': parse_boolean,
+}
+
+
+class OADRElement(object):
+    """
+    An element of a parsed payload. Child elements and XML attributes are attributes of the
+    element. Children that the schema allows but the document leaves out are None (or [] for
+    repeating elements), and get_<name>() returns attribute <name>, as with the generateDS classes.
+    """
+
+    def __getattr__(self, name):
+        if name.startswith('get_') and name[4:] in SCHEMA_NAMES:
+            return lambda: getattr(self, name[4:])
+        if name not in SCHEMA_NAMES:
+            raise AttributeError(name)
+        if name in LIST_ELEMENTS:
+            return []
+        return None
+
+
+element_names = {}
+
+
+def element_name(tag):
+    name = element_names.get(tag)
+    if name is None:
+        name = tag[tag.find('}') + 1:].replace('-', '_')
+        name = element_names[tag] = SUBSTITUTIONS.get(name, name)
+    return name
+
+
+# lxml parsers can't be shared between threads
+parsers = threading.local()
+
+
+def get_parser():
+    if not hasattr(parsers, 'parser'):
+        parsers.parser = etree.XMLParser(remove_blank_text=True, remove_comments=True, remove_pis=True,
+                                         resolve_entities=False, no_network=True)
+    return parsers.parser
+
+
+def parse(xml):
+    """
+    :param xml: an oadrPayload document, as bytes
+    :return: the OADRElement for the oadrPayload, or None if it does not hold a FAST_PAYLOADS payload
+    :raises ValueError: if an element's value can't be converted
+    :raises lxml.etree.XMLSyntaxError: if the document is not well-formed
+    """
+    root = etree.fromstring(xml, get_parser())
+    # Only unsigned oadrPayload/oadrSignedObject/<payload> documents
+    if element_name(root.tag) != 'oadrPayload' or len(root) != 1:
+        return None
+    signed_object = root[0]
+    if element_name(signed_object.tag) != 'oadrSignedObject' or len(signed_object) != 1:
+        return None
+    if element_name(signed_object[0].tag) not in FAST_PAYLOADS:
+        return None
+    return build_element(root, 'oadrPayload')
+
+
+def build_element(element, name):
+    """
+    :param element: an lxml element
+    :param name: the element's name, as from element_name()
+    :return: the element and its children as an OADRElement
+    """
+    node = OADRElement()
+    values = node.__dict__
+    for key, value in element.attrib.items():
+        values[element_name(key)] = value
+    for child in element:
+        child_name = element_name(child.tag)
+        if len(child) or child_name in COMPLEX_ELEMENTS:
+            value = build_element(child, child_name)
+        else:
+            text = child.text.strip() if child.text is not None else ''
+            convert = VALUE_TYPES.get(child_name)
+            value = convert(text) if convert is not None else text
+        if child_name in LIST_ELEMENTS or (name, child_name) in PARENT_LIST_ELEMENTS:
+            values.setdefault(child_name, []).append(value)
+        else:
+            values[child_name] = value
+    return node
+
+
+def quote_xml(value):
+    return '{}'.format(value).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+class XMLPayload(object):
+    """
+    A rendered oadrPayload, exported by OADRRenderer like a generateDS oadrPayload.
+    """
+
+    def __init__(self, xml):
+        self.xml = xml
+
+    def export(self, outfile, level, *args, **kwargs):
+        outfile.write(self.xml)
+
+
+NS_OADR = 'xmlns:oadr="http://openadr.org/oadr-2.0b/2012/07"'
+NS_EI = 'xmlns:ei="http://docs.oasis-open.org/ns/energyinterop/201110"'
+NS_PYLD = 'xmlns:pyld="http://docs.oasis-open.org/ns/energyinterop/201110/payloads"'
+NS_XCAL = 'xmlns:xcal="urn:ietf:params:xml:ns:icalendar-2.0"'
+NS_STRM = 'xmlns:strm="urn:ietf:params:xml:ns:icalendar-2.0:stream"'
+NS_EMIX = 'xmlns:emix="http://docs.oasis-open.org/ns/emix/2011/06"'
+
+PAYLOAD_START = ('<oadr:oadrPayload ' + NS_OADR + ' xmlns:ds="http://www.w3.org/2000/09/xmldsig#" >'
+                 '<oadr:oadrSignedObject ' + NS_OADR + '>')
+PAYLOAD_END = '</oadr:oadrSignedObject></oadr:oadrPayload>'
+
+EI_RESPONSE = ('<ei:eiResponse ' + NS_OADR + ' ' + NS_EI + '  ' + NS_PYLD + ' >'
+               '<ei:responseCode>{response_code}</ei:responseCode>{response_description}'
+               '<pyld:requestID>{request_id}</pyld:requestID></ei:eiResponse>')
+
+RESPONSE = (PAYLOAD_START +
+            '<oadr:oadrResponse ' + NS_OADR + ' ' + NS_EI + '  schemaVersion="{schema_version}">' +
+            EI_RESPONSE + '{ven_id}</oadr:oadrResponse>' +
+            PAYLOAD_END)
+
+DISTRIBUTE_EVENT_START = (PAYLOAD_START +
+                          '<oadr:oadrDistributeEvent ' + NS_OADR + ' ' + NS_EI + '  ' + NS_PYLD +
+                          '  schemaVersion="{schema_version}">' +
+                          EI_RESPONSE +
+                          '<pyld:requestID>{request_id}</pyld:requestID><ei:vtnID>{vtn_id}</ei:vtnID>')
+DISTRIBUTE_EVENT_END = '</oadr:oadrDistributeEvent>' + PAYLOAD_END
+
+DTSTART = ('<xcal:dtstart ' + NS_OADR + ' ' + NS_XCAL + ' >'
+           '<oadr:date-time>{start}</oadr:date-time></xcal:dtstart>')
+DURATION = ('<xcal:duration ' + NS_OADR + ' ' + NS_XCAL + ' >'
+            '<oadr:duration>{duration}</oadr:duration></xcal:duration>')
+
+# oadrEvent, split around its createdDateTime
+OADR_EVENT_HEAD = ('<oadr:oadrEvent ' + NS_OADR + ' ' + NS_EI + ' >'
+                   '<ei:eiEvent ' + NS_OADR + ' ' + NS_EI + ' >'
+                   '<ei:eventDescriptor ' + NS_OADR + ' ' + NS_EI + '  ' + NS_XCAL + ' >'
+                   '<ei:eventID>{event_id}</ei:eventID>'
+                   '<oadr:modificationNumber>{modification_number}</oadr:modificationNumber>'
+                   '<oadr:priority>{priority}</oadr:priority>'
+                   '<oadr:createdDateTime>')
+OADR_EVENT_TAIL = ('</oadr:createdDateTime>'
+                   '<ei:eventStatus>{event_status}</ei:eventStatus>'
+                   '<oadr:testEvent>{test_event}</oadr:testEvent>'
+                   '</ei:eventDescriptor>'
+                   '<ei:eiActivePeriod ' + NS_OADR + ' ' + NS_XCAL + ' >'
+                   '<xcal:properties ' + NS_OADR + ' ' + NS_XCAL + '  ' + NS_EI + ' >' +
+                   DTSTART + DURATION +
+                   '<ei:x-eiNotification ' + NS_OADR + ' ' + NS_XCAL + ' >'
+                   '<oadr:duration>{duration}</oadr:duration></ei:x-eiNotification>'
+                   '</xcal:properties></ei:eiActivePeriod>'
+                   '<ei:eiEventSignals ' + NS_OADR + ' ' + NS_EI + ' >'
+                   '<ei:eiEventSignal ' + NS_OADR + ' ' + NS_STRM + '  ' + NS_EI + '  ' + NS_EMIX + ' >'
+                   '<strm:intervals ' + NS_OADR + ' ' + NS_EI + ' >'
+                   '<ei:interval ' + NS_OADR + ' ' + NS_XCAL + '  ' + NS_STRM + ' >' +
+                   DTSTART + DURATION +
+                   '</ei:interval></strm:intervals>'
+                   '<ei:signalName>{signal_name}</ei:signalName><ei:signalType>{signal_type}</ei:signalType>'
+                   '</ei:eiEventSignal></ei:eiEventSignals></ei:eiEvent>'
+                   '<oadr:oadrResponseRequired>{response_required}</oadr:oadrResponseRequired>'
+                   '</oadr:oadrEvent>')
+
+
+def format_datetime(value):
+    return oadr_20b.GeneratedsSuper().gds_format_datetime(value)
+
+
+def render_ei_response(response_code, request_id, response_description=None):
+    if response_description is not None:
+        response_description = ('<oadr:responseDescription>{}</oadr:responseDescription>'
+                                .format(quote_xml(response_description)))
+    return dict(response_code=quote_xml(response_code),
+                request_id=quote_xml(request_id),
+                response_description=response_description or '')
+
+
+def render_response(schema_version, response_code, request_id, response_description=None, ven_id=None):
+    """
+    :return: oadrResponse document
+    """
+    return RESPONSE.format(schema_version=quote_xml(schema_version),
+                           ven_id='<oadr:venID>{}</oadr:venID>'.format(quote_xml(ven_id)) if ven_id is not None else '',
+                           **render_ei_response(response_code, request_id, response_description))
+
+
+def render_oadr_event(event_id, modification_number, event_status, start, duration, priority=1,
+                      signal_name='simple', signal_type='level', response_required='always'):
+    """
+    :param start: event start date-time
+    :param duration: ISO 8601 duration of the event
+    :return: (head, tail) of the oadrEvent element, to be joined around its createdDateTime
+    """
+    head = OADR_EVENT_HEAD.format(event_id=quote_xml(event_id),
+                                  modification_number=int(modification_number),
+                                  priority=int(priority))
+    tail = OADR_EVENT_TAIL.format(event_status=quote_xml(event_status),
+                                  test_event='',
+                                  start=format_datetime(start),
+                                  duration=quote_xml(duration),
+                                  signal_name=quote_xml(signal_name),
+                                  signal_type=quote_xml(signal_type),
+                                  response_required=quote_xml(response_required))
+    return head, tail
+
+
+def render_distribute_event(schema_version, request_id, vtn_id, oadr_events, created_date_time):
+    """
+    :param oadr_events: (head, tail) pairs from render_oadr_event
+    :param created_date_time: createdDateTime for every event
+    :return: oadrDistributeEvent document
+    """
+    created_date_time = quote_xml(created_date_time)
+    parts = [DISTRIBUTE_EVENT_START.format(schema_version=quote_xml(schema_version),
+                                           vtn_id=quote_xml(vtn_id),
+                                           **render_ei_response(200, request_id, 'OK'))]
+    for head, tail in oadr_events:
+        parts.append(head)
+        parts.append(created_date_time)
+        parts.append(tail)
+    parts.append(DISTRIBUTE_EVENT_END)
+    return ''.join(parts)
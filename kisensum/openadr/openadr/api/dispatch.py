@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*- {{{
+# vim: set fenc=utf-8 ft=python sw=4 ts=4 sts=4 et:
+
+# Copyright (c) 2017, Battelle Memorial Institute
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# The views and conclusions contained in the software and documentation
+# are those of the authors and should not be interpreted as representing
+# official policies, either expressed or implied, of the FreeBSD
+# Project.
+#
+# This material was prepared as an account of work sponsored by an
+# agency of the United States Government.  Neither the United States
+# Government nor the United States Department of Energy, nor Battelle,
+# nor any of their employees, nor any jurisdiction or organization that
+# has cooperated in the development of these materials, makes any
+# warranty, express or implied, or assumes any legal liability or
+# responsibility for the accuracy, completeness, or usefulness or any
+# information, apparatus, product, software, or process disclosed, or
+# represents that its use would not infringe privately owned rights.
+#
+# Reference herein to any specific commercial product, process, or
+# service by trade name, trademark, manufacturer, or otherwise does not
+# necessarily constitute or imply its endorsement, recommendation, or
+# favoring by the United States Government or any agency thereof, or
+# Battelle Memorial Institute. The views and opinions of authors
+# expressed herein do not necessarily state or reflect those of the
+# United States Government or any agency thereof.
+#
+# PACIFIC NORTHWEST NATIONAL LABORATORY
+# operated by BATTELLE for the UNITED STATES DEPARTMENT OF ENERGY
+# under Contract DE-AC05-76RL01830
+# }}}
+
+"""
+Push delivery of DR events.
+
+The VTN normally tells VENs about DR events when they poll. With settings.PUSH_EVENTS, it also
+POSTs an oadrDistributeEvent to every enrolled VEN of a new or changed DR event that has an
+IP address, a bounded number at a time, once the event's scheduled notification time has come.
+As for a poll, the oadrDistributeEvent holds all of the VEN's current site events, since a VEN
+takes an event missing from it to be cancelled. Site events that reach their VEN are marked as
+told; the rest are left for the VEN's next poll.
+"""
+
+from __future__ import unicode_literals
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+from django.conf import settings
+from django.utils import timezone
+from api.builders import OADRDistributeEventBuilder
+from api.views import update_notification_sent_time
+from vtn.models import SiteEvent
+
+logger = logging.getLogger(__name__)
+
+
+def get_push_url(site):
+    return settings.PUSH_VEN_URL.format(ip_address=site.ip_address)
+
+
+def render_distribute_event(ven_id, site_events):
+    buffer = StringIO()
+    OADRDistributeEventBuilder(ven_id, site_events).wrap().export(buffer, 1, pretty_print=False)
+    return buffer.getvalue().encode('utf-8')
+
+
+def post_distribute_event(url, xml, retries=None, backoff_seconds=None, timeout_seconds=None):
+    """
+    POST an oadrDistributeEvent to a VEN, retrying with exponential backoff.
+    :param url: the VEN's EiEvent URL
+    :param xml: the oadrDistributeEvent, as bytes
+    :return: True if the VEN accepted the event
+    """
+    retries = settings.PUSH_RETRIES if retries is None else retries
+    backoff_seconds = settings.PUSH_BACKOFF_SECONDS if backoff_seconds is None else backoff_seconds
+    timeout_seconds = settings.PUSH_TIMEOUT_SECONDS if timeout_seconds is None else timeout_seconds
+
+    request = Request(url, data=xml, headers={'Content-Type': 'application/xml'})
+    for attempt in range(retries + 1):
+        try:
+            with urlopen(request, timeout=timeout_seconds) as response:
+                response.read()
+            return True
+        except HTTPError as err:
+            # The VEN answered; only a server error is worth repeating
+            logger.warning('VEN at {} rejected event push: HTTP {}'.format(url, err.code))
+            if err.code < 500:
+                return False
+        except (URLError, OSError) as err:
+            logger.warning('Could not push event to VEN at {}: {}'.format(url, err))
+        if attempt < retries:
+            time.sleep(backoff_seconds * 2 ** attempt)
+    return False
+
+
+def push_site_events(ven_id, url, site_events):
+    """
+    :return: site_events if they were pushed to the VEN, otherwise []
+    """
+    if post_distribute_event(url, render_distribute_event(ven_id, site_events)):
+        return site_events
+    return []
+
+
+def get_push_site_events(dr_event, now):
+    """
+    :return: {(ven_id, url): site events} for each VEN of the DR event that has an IP address,
+             holding every site event the VEN would be sent if it polled now
+    """
+    site_ids = SiteEvent.objects.filter(dr_event=dr_event).exclude(site__ip_address='').values('site_id')
+    site_events = SiteEvent.objects.select_related('dr_event', 'site') \
+                                   .filter(site_id__in=site_ids,
+                                           dr_event__end__gt=now,
+                                           dr_event__scheduled_notification_time__lt=now)
+    pushes = {}
+    for site_event in site_events:
+        site = site_event.site
+        pushes.setdefault((site.ven_id, get_push_url(site)), []).append(site_event)
+    return pushes
+
+
+def push_dr_event(dr_event, workers=None):
+    """
+    Push a DR event to the VENs of its sites that have an IP address, along with the
+    VENs' other current site events.
+    :param dr_event: a DREvent
+    :param workers: how many VENs to push to at a time
+    :return: the number of VENs that accepted the push; 0 if the event's scheduled
+             notification time hasn't come yet
+    """
+    workers = settings.PUSH_WORKERS if workers is None else workers
+    now = timezone.now()
+    if dr_event.scheduled_notification_time >= now:
+        logger.info('DR event {} is not due to be sent until {}'.format(dr_event.event_id,
+                                                                       dr_event.scheduled_notification_time))
+        return 0
+    pushes = get_push_site_events(dr_event, now)
+    if not pushes:
+        return 0
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda push: push_site_events(push[0][0], push[0][1], push[1]),
+                                    pushes.items()))
+
+    update_notification_sent_time([site_event for pushed in results for site_event in pushed])
+    ven_count = len([pushed for pushed in results if pushed])
+    logger.info('Pushed DR event {} to {} of {} VENs'.format(dr_event.event_id, ven_count, len(pushes)))
+    return ven_count
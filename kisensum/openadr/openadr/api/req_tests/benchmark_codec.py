@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*- {{{
+# vim: set fenc=utf-8 ft=python sw=4 ts=4 sts=4 et:
+
+# Copyright (c) 2017, Battelle Memorial Institute
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# The views and conclusions contained in the software and documentation
+# are those of the authors and should not be interpreted as representing
+# official policies, either expressed or implied, of the FreeBSD
+# Project.
+#
+# This material was prepared as an account of work sponsored by an
+# agency of the United States Government.  Neither the United States
+# Government nor the United States Department of Energy, nor Battelle,
+# nor any of their employees, nor any jurisdiction or organization that
+# has cooperated in the development of these materials, makes any
+# warranty, express or implied, or assumes any legal liability or
+# responsibility for the accuracy, completeness, or usefulness or any
+# information, apparatus, product, software, or process disclosed, or
+# represents that its use would not infringe privately owned rights.
+#
+# Reference herein to any specific commercial product, process, or
+# service by trade name, trademark, manufacturer, or otherwise does not
+# necessarily constitute or imply its endorsement, recommendation, or
+# favoring by the United States Government or any agency thereof, or
+# Battelle Memorial Institute. The views and opinions of authors
+# expressed herein do not necessarily state or reflect those of the
+# United States Government or any agency thereof.
+#
+# PACIFIC NORTHWEST NATIONAL LABORATORY
+# operated by BATTELLE for the UNITED STATES DEPARTMENT OF ENERGY
+# under Contract DE-AC05-76RL01830
+# }}}
+
+
+"""
+Benchmark of the generateDS and api.codec paths for OpenADR payloads.
+
+Parses the VEN payloads in api/tests/xml with oadr_20b.parseString and codec.parse,
+and renders oadrResponse and oadrDistributeEvent payloads with the generateDS export
+(pretty printed, as the VTN did) and with the codec templates, with and without the
+rendered oadrEvents already cached, e.g.
+
+    DJANGO_SETTINGS_MODULE=openadr.settings.sqlite python -m api.req_tests.benchmark_codec
+    DJANGO_SETTINGS_MODULE=openadr.settings.sqlite python -m api.req_tests.benchmark_codec --events 10
+"""
+
+from __future__ import print_function
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+from io import StringIO
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "openadr.settings.base")
+
+import django
+django.setup()
+
+import pytz
+from api import codec
+from api.builders import OADRDistributeEventBuilder, OADRResponseBuilder, PayloadXML
+from api.static_methods import clear_oadr_event_fragments
+from api.xsd import oadr_20b
+
+XML_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests', 'xml')
+FIXTURES = ['ven_poll', 'ven_created_event', 'ven_register_report', 'ven_update_report', 'ven_update_report_batch']
+
+
+class BenchmarkEvent(object):
+    """
+    Stands in for a DREvent, so that payloads can be rendered without a database.
+    """
+
+    def __init__(self, event_id, start):
+        self.pk = event_id
+        self.event_id = event_id
+        self.modification_number = 0
+        self.status = 'far'
+        self.start = start
+        self.end = start + timedelta(hours=2)
+
+
+class BenchmarkSiteEvent(object):
+    """
+    Stands in for a SiteEvent, so that payloads can be rendered without a database.
+    """
+
+    def __init__(self, dr_event):
+        self.status = 'scheduled'
+        self.dr_event = dr_event
+
+
+def export(payload, pretty_print):
+    buffer = StringIO()
+    payload.export(buffer, 1, pretty_print=pretty_print)
+    return buffer.getvalue()
+
+
+def time_call(function, number):
+    """
+    :return: best time of one call, in microseconds
+    """
+    return min(timeit.repeat(function, number=number, repeat=5)) / number * 1e6
+
+
+def report(name, old_time, new_time):
+    print('{:<28} {:>12.1f} {:>12.1f} {:>8.1f}x'.format(name, old_time, new_time, old_time / new_time))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Benchmark generateDS against api.codec')
+    arg_parser.add_argument('--number', type=int, default=200, help='calls per timing')
+    arg_parser.add_argument('--events', type=int, default=2, help='events in the oadrDistributeEvent')
+    args = arg_parser.parse_args()
+
+    print('{:<28} {:>12} {:>12} {:>9}'.format('payload (us per call)', 'generateDS', 'codec', 'speedup'))
+    for filename in FIXTURES:
+        with open(os.path.join(XML_DIR, filename + '.xml'), 'rb') as f:
+            xml = f.read()
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, 'w')
+        try:
+            old_time = time_call(lambda: oadr_20b.parseString(xml, silence=True), args.number)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        new_time = time_call(lambda: codec.parse(xml), args.number)
+        report('parse ' + filename, old_time, new_time)
+
+    start = pytz.utc.localize(datetime(2018, 1, 1, 12))
+    site_events = [BenchmarkSiteEvent(BenchmarkEvent(n + 1, start)) for n in range(args.events)]
+    builders = [('render oadrResponse', OADRResponseBuilder('2.0b', 200, 300, 'No events to send', '0')),
+                ('render oadrDistributeEvent', OADRDistributeEventBuilder('0', site_events))]
+    for name, builder in builders:
+        old_time = time_call(lambda: export(PayloadXML.wrap(builder), True), args.number)
+        new_time = time_call(lambda: (clear_oadr_event_fragments(), export(builder.wrap(), False)), args.number)
+        report(name, old_time, new_time)
+    # Later polls find the events already rendered
+    new_time = time_call(lambda: export(builders[1][1].wrap(), False), args.number)
+    report('cached oadrDistributeEvent', old_time, new_time)
+
+
+if __name__ == '__main__':
+    main()
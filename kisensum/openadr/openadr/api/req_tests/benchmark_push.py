@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*- {{{
+# vim: set fenc=utf-8 ft=python sw=4 ts=4 sts=4 et:
+
+# Copyright (c) 2017, Battelle Memorial Institute
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# The views and conclusions contained in the software and documentation
+# are those of the authors and should not be interpreted as representing
+# official policies, either expressed or implied, of the FreeBSD
+# Project.
+#
+# This material was prepared as an account of work sponsored by an
+# agency of the United States Government.  Neither the United States
+# Government nor the United States Department of Energy, nor Battelle,
+# nor any of their employees, nor any jurisdiction or organization that
+# has cooperated in the development of these materials, makes any
+# warranty, express or implied, or assumes any legal liability or
+# responsibility for the accuracy, completeness, or usefulness or any
+# information, apparatus, product, software, or process disclosed, or
+# represents that its use would not infringe privately owned rights.
+#
+# Reference herein to any specific commercial product, process, or
+# service by trade name, trademark, manufacturer, or otherwise does not
+# necessarily constitute or imply its endorsement, recommendation, or
+# favoring by the United States Government or any agency thereof, or
+# Battelle Memorial Institute. The views and opinions of authors
+# expressed herein do not necessarily state or reflect those of the
+# United States Government or any agency thereof.
+#
+# PACIFIC NORTHWEST NATIONAL LABORATORY
+# operated by BATTELLE for the UNITED STATES DEPARTMENT OF ENERGY
+# under Contract DE-AC05-76RL01830
+# }}}
+
+
+"""
+Benchmark of pushing a DR event to many VENs.
+
+Creates sites whose VENs are a local stub server, in a throwaway test database, and prints how
+long api.dispatch takes to push one DR event to all of them with each pool size, e.g.
+
+    DJANGO_SETTINGS_MODULE=openadr.settings.sqlite python -m api.req_tests.benchmark_push
+    DJANGO_SETTINGS_MODULE=openadr.settings.sqlite python -m api.req_tests.benchmark_push --vens 1000 --delay 0.05
+"""
+
+from __future__ import print_function
+import argparse
+import logging
+import os
+import time
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "openadr.settings.base")
+
+import django
+django.setup()
+
+from django.db import connection
+from django.test.utils import setup_test_environment, override_settings
+from django.utils import timezone
+
+
+def run(num_vens, delay, workers):
+    """
+    Push one DR event to num_vens VENs, each taking delay seconds to answer.
+    :return: [(workers, seconds, VENs told)]
+    """
+    from api import dispatch
+    from api.tests import factories
+    from api.tests.helper_functions import StubVEN, StubVENHandler
+    from vtn.models import Site, SiteEvent
+
+    class SlowVENHandler(StubVENHandler):
+
+        def do_POST(self):
+            time.sleep(delay)
+            StubVENHandler.do_POST(self)
+
+    factories.CustomerFactory()
+    factories.DRProgramFactory()
+    results = []
+    with StubVEN() as ven:
+        ven.RequestHandlerClass = SlowVENHandler
+        for n in range(num_vens):
+            factories.SiteFactory(ven_id='push{}'.format(n), ip_address=ven.ip_address)
+        for pool_size in workers:
+            dr_event = factories.DREventFactory()
+            now = timezone.now()
+            SiteEvent.objects.bulk_create([SiteEvent(dr_event=dr_event, site=site, status='far',
+                                                     last_status_time=now, opt_in='none')
+                                           for site in Site.objects.all()])
+            begin = time.time()
+            told = dispatch.push_dr_event(dr_event, workers=pool_size)
+            results.append((pool_size, time.time() - begin, told))
+    return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Benchmark pushing a DR event to VENs')
+    arg_parser.add_argument('--vens', type=int, default=1000, help='number of VENs')
+    arg_parser.add_argument('--delay', type=float, default=0.02, help='seconds each VEN takes to answer')
+    arg_parser.add_argument('--workers', type=int, nargs='+', default=[1, 10, 50], help='pool sizes to time')
+    args = arg_parser.parse_args()
+
+    # Keep per-VEN retry warnings out of the timings
+    logging.disable(logging.WARNING)
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        with override_settings(PUSH_VEN_URL='http://{ip_address}/OpenADR2/Simple/2.0b/EiEvent'):
+            results = run(args.vens, args.delay, args.workers)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    for workers, elapsed, told in results:
+        print('{} workers: {} of {} VENs told in {:.2f} s ({:.1f} ms per VEN)'.format(
+            workers, told, args.vens, elapsed, elapsed / args.vens * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*- {{{
+# vim: set fenc=utf-8 ft=python sw=4 ts=4 sts=4 et:
+
+# Copyright (c) 2017, Battelle Memorial Institute
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# The views and conclusions contained in the software and documentation
+# are those of the authors and should not be interpreted as representing
+# official policies, either expressed or implied, of the FreeBSD
+# Project.
+#
+# This material was prepared as an account of work sponsored by an
+# agency of the United States Government.  Neither the United States
+# Government nor the United States Department of Energy, nor Battelle,
+# nor any of their employees, nor any jurisdiction or organization that
+# has cooperated in the development of these materials, makes any
+# warranty, express or implied, or assumes any legal liability or
+# responsibility for the accuracy, completeness, or usefulness or any
+# information, apparatus, product, software, or process disclosed, or
+# represents that its use would not infringe privately owned rights.
+#
+# Reference herein to any specific commercial product, process, or
+# service by trade name, trademark, manufacturer, or otherwise does not
+# necessarily constitute or imply its endorsement, recommendation, or
+# favoring by the United States Government or any agency thereof, or
+# Battelle Memorial Institute. The views and opinions of authors
+# expressed herein do not necessarily state or reflect those of the
+# United States Government or any agency thereof.
+#
+# PACIFIC NORTHWEST NATIONAL LABORATORY
+# operated by BATTELLE for the UNITED STATES DEPARTMENT OF ENERGY
+# under Contract DE-AC05-76RL01830
+# }}}
+
+
+"""
+Load test for oadrUpdateReport telemetry.
+
+Posts UpdateReports to EiReport through the Django test client and prints the
+number of reports and telemetry intervals stored per second.  It runs against
+a throwaway test database created from the configured settings, e.g.
+
+    DJANGO_SETTINGS_MODULE=openadr.settings.sqlite python -m api.req_tests.load_update_report
+    DJANGO_SETTINGS_MODULE=openadr.settings.base python -m api.req_tests.load_update_report --intervals 1440
+"""
+
+from __future__ import print_function
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "openadr.settings.base")
+
+import django
+django.setup()
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment
+
+REPORT_URL = '/OpenADR2/Simple/2.0b/EiReport'
+
+UPDATE_REPORT = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<oadr:oadrPayload xmlns:oadr="http://openadr.org/oadr-2.0b/2012/07">
+  <oadr:oadrSignedObject>
+    <oadr:oadrUpdateReport xmlns:pyld="http://docs.oasis-open.org/ns/energyinterop/201110/payloads" xmlns:ei="http://docs.oasis-open.org/ns/energyinterop/201110" schemaVersion="2.0b">
+      <pyld:requestID>{request_id}</pyld:requestID>
+      <oadr:oadrReport>
+        <strm:intervals xmlns:strm="urn:ietf:params:xml:ns:icalendar-2.0:stream">
+{intervals}
+        </strm:intervals>
+        <ei:reportRequestID>RR_load_test</ei:reportRequestID>
+        <ei:reportSpecifierID>telemetry</ei:reportSpecifierID>
+        <ei:reportName>TELEMETRY_USAGE</ei:reportName>
+        <ei:createdDateTime>{created}</ei:createdDateTime>
+      </oadr:oadrReport>
+      <ei:venID>{ven_id}</ei:venID>
+    </oadr:oadrUpdateReport>
+  </oadr:oadrSignedObject>
+</oadr:oadrPayload>'''
+
+INTERVAL = '''          <ei:interval xmlns:xcal="urn:ietf:params:xml:ns:icalendar-2.0">
+            <xcal:dtstart><xcal:date-time>{start}</xcal:date-time></xcal:dtstart>
+            <xcal:duration><oadr:duration>PT60S</oadr:duration></xcal:duration>
+            <oadr:oadrReportPayload>
+              <ei:rID>baseline_power</ei:rID>
+              <ei:payloadFloat><ei:value>{baseline}</ei:value></ei:payloadFloat>
+            </oadr:oadrReportPayload>
+            <oadr:oadrReportPayload>
+              <ei:rID>actual_power</ei:rID>
+              <ei:payloadFloat><ei:value>{actual}</ei:value></ei:payloadFloat>
+            </oadr:oadrReportPayload>
+          </ei:interval>'''
+
+ISO_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+
+def build_update_report(ven_id, request_id, start, num_intervals):
+    """
+    :param ven_id: VEN ID of the reporting site
+    :param request_id: request ID of the report
+    :param start: start of the first 1-minute interval
+    :param num_intervals: number of intervals in the report
+    :return: oadrUpdateReport XML
+    """
+    intervals = [INTERVAL.format(start=(start + timedelta(minutes=i)).strftime(ISO_FORMAT),
+                                 baseline=10.0 + i % 7,
+                                 actual=9.0 + i % 5)
+                 for i in range(num_intervals)]
+    return UPDATE_REPORT.format(request_id=request_id,
+                                intervals='\n'.join(intervals),
+                                created=datetime.utcnow().strftime(ISO_FORMAT),
+                                ven_id=ven_id)
+
+
+def run(num_reports, num_intervals, num_sites):
+    """
+    Post num_reports UpdateReports, spread over num_sites sites.
+    :return: (seconds, telemetry rows stored)
+    """
+    from api.tests import factories
+    from vtn.models import Telemetry
+
+    factories.CustomerFactory()
+    ven_ids = ['load{}'.format(n) for n in range(num_sites)]
+    for ven_id in ven_ids:
+        factories.SiteFactory(ven_id=ven_id)
+
+    start = datetime(2018, 1, 1)
+    payloads = [build_update_report(ven_ids[n % num_sites], n,
+                                    start + timedelta(days=n // num_sites), num_intervals)
+                for n in range(num_reports)]
+    client = Client()
+    begin = time.time()
+    for payload in payloads:
+        response = client.post(REPORT_URL, payload, content_type='application/xml')
+        if response.status_code != 200:
+            raise RuntimeError('UpdateReport failed with status {}'.format(response.status_code))
+    elapsed = time.time() - begin
+    return elapsed, Telemetry.objects.count()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Load test oadrUpdateReport telemetry')
+    arg_parser.add_argument('--reports', type=int, default=50, help='number of UpdateReports to post')
+    arg_parser.add_argument('--intervals', type=int, default=60, help='1-minute intervals per report')
+    arg_parser.add_argument('--sites', type=int, default=5, help='number of reporting sites')
+    args = arg_parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        elapsed, rows = run(args.reports, args.intervals, args.sites)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    print('{}: {} reports of {} intervals in {:.2f} s'.format(connection.vendor, args.reports,
+                                                             args.intervals, elapsed))
+    print('{:.1f} reports/s, {:.0f} intervals/s, {} telemetry rows'.format(args.reports / elapsed,
+                                                                          rows / elapsed, rows))
+
+
+if __name__ == '__main__':
+    main()
@@ -62,12 +62,95 @@ from django.db.models import Q
 
 import lxml.etree as etree_
 import random
+import uuid
 from io import StringIO
 import isodate
 from isodate import isoduration
 from api.xsd import oadr_20b
 from vtn.models import Site, DREvent, SiteEvent
 from django.db.models import ObjectDoesNotExist
+from django.conf import settings
+from django.core.cache import cache
+
+
+# The time before which a VEN has no site events to be told about is kept in the Django cache,
+# under the VEN's key together with the generation it was stored in. Clearing every VEN
+# starts a new generation, so a cache shared by all processes invalidates their entries too.
+PENDING_EVENTS_GENERATION_KEY = 'pending_events:generation'
+
+
+def pending_events_key(ven_id):
+    return 'pending_events:ven:{}'.format(ven_id)
+
+
+def ven_is_quiet(ven_id, now):
+    """
+    :param ven_id: the VEN ID of a polling VEN
+    :param now: time of the poll
+    :return: (True if the VEN is known to have no site events to be told about at that time,
+              the current generation, to pass to set_ven_quiet_until after checking the database)
+    """
+    key = pending_events_key(ven_id)
+    cached = cache.get_many([PENDING_EVENTS_GENERATION_KEY, key])
+    generation = cached.get(PENDING_EVENTS_GENERATION_KEY)
+    if key not in cached:
+        return False, generation
+    entry_generation, quiet_until = cached[key]
+    return entry_generation == generation and now < quiet_until, generation
+
+
+def set_ven_quiet_until(ven_id, now, generation, next_notification_time=None):
+    """
+    Remember that a VEN has no site events to be told about before next_notification_time.
+    :param ven_id: the VEN ID of a polling VEN
+    :param now: time of the poll
+    :param generation: generation returned by ven_is_quiet before the database was checked,
+                       so a change made in the meantime is not hidden
+    :param next_notification_time: notification time of the VEN's next site event, or None
+    """
+    quiet_until = now + timedelta(seconds=settings.PENDING_EVENTS_CACHE_SECONDS)
+    if next_notification_time is not None:
+        quiet_until = min(quiet_until, next_notification_time)
+    cache.set(pending_events_key(ven_id), (generation, quiet_until), settings.PENDING_EVENTS_CACHE_SECONDS)
+
+
+def clear_pending_events(ven_id=None):
+    """
+    Forget cached poll results, for one VEN or (by default) every VEN.
+    Called whenever DR events or site events change.
+    """
+    if ven_id is None:
+        cache.set(PENDING_EVENTS_GENERATION_KEY, uuid.uuid4().hex, None)
+    else:
+        cache.delete(pending_events_key(ven_id))
+
+
+# (DREvent pk, modification number, event status) -> rendered oadrEvent, as (head, tail)
+# around its createdDateTime. Entries for a DR event are dropped whenever it is saved or deleted.
+oadr_event_fragments = {}
+
+
+def get_oadr_event_fragment(key, render):
+    """
+    :param key: (DREvent pk, modification number, event status)
+    :param render: function returning the oadrEvent for the key, called on a cache miss
+    :return: the rendered oadrEvent, as (head, tail)
+    """
+    fragment = oadr_event_fragments.get(key)
+    if fragment is None:
+        fragment = oadr_event_fragments[key] = render()
+    return fragment
+
+
+def clear_oadr_event_fragments(dr_event_id=None):
+    """
+    Forget rendered oadrEvents, for one DR event or (by default) every DR event.
+    """
+    if dr_event_id is None:
+        oadr_event_fragments.clear()
+    else:
+        for key in [key for key in oadr_event_fragments if key[0] == dr_event_id]:
+            oadr_event_fragments.pop(key, None)
 
 
 def get_payload_xml(oadr_payload):
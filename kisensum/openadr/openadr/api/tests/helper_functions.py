@@ -1,10 +1,14 @@
 import sys
 from api.xsd import oadr_20b
+import lxml.etree as etree_
 import os
 from vtn.models import *
 import random
 from django.utils import timezone
 from datetime import datetime, timedelta
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
 
 TEST_DIR = os.path.dirname(os.path.abspath(__file__))
 XML_DIR = os.path.join(TEST_DIR, 'xml/')
@@ -14,6 +18,54 @@ EVENT_URL = '/OpenADR2/Simple/2.0b/EiEvent'
 REPORT_URL = '/OpenADR2/Simple/2.0b/EiReport'
 
 
+class StubVEN(ThreadingMixIn, HTTPServer):
+    """
+    A local HTTP server that takes the place of the VENs that events are pushed to.
+    It answers the first `failures` requests with a 503 and records the bodies of the others.
+    """
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, failures=0):
+        super(StubVEN, self).__init__(('127.0.0.1', 0), StubVENHandler)
+        self.failures = failures
+        self.requests = []
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+
+    @property
+    def ip_address(self):
+        return '{}:{}'.format(*self.server_address)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
+
+
+class StubVENHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        with self.server.lock:
+            failed = self.server.failures > 0
+            if failed:
+                self.server.failures -= 1
+            else:
+                self.server.requests.append((self.path, body))
+        self.send_response(503 if failed else 200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
 def python_dt_to_iso(date_time):
     """
     :param date_time: Python date-time object
@@ -39,6 +91,48 @@ def get_file_xml(filename):
     return xml
 
 
+def payload_differences(generated, parsed, path=''):
+    """
+    :param generated: an object parsed by generateDS
+    :param parsed: the same object parsed by api.codec
+    :return: a list of the attribute paths whose values differ
+    """
+
+    differences = []
+    for name, value in vars(generated).items():
+        if name.endswith('_') or value is None or value == []:
+            continue
+        parsed_value = getattr(parsed, name, None)
+        if isinstance(value, list):
+            if not isinstance(parsed_value, list) or len(value) != len(parsed_value):
+                differences.append(path + name)
+                continue
+            for index, (item, parsed_item) in enumerate(zip(value, parsed_value)):
+                if isinstance(item, oadr_20b.GeneratedsSuper):
+                    differences += payload_differences(item, parsed_item, '{}{}[{}].'.format(path, name, index))
+                elif item != parsed_item:
+                    differences.append('{}{}[{}]'.format(path, name, index))
+        elif isinstance(value, oadr_20b.GeneratedsSuper):
+            differences += payload_differences(value, parsed_value, path + name + '.')
+        elif value != parsed_value or type(value) != type(parsed_value):
+            differences.append(path + name)
+    for name in vars(parsed):
+        if getattr(generated, name, None) in (None, []):
+            differences.append(path + name)
+    return differences
+
+
+def get_compact_file_xml(filename):
+    """
+    :param filename: the filename, without the .xml suffix, in the tests/xml directory
+    :return: returns the specified file's xml without the whitespace between elements,
+             as the VTN renders it
+    """
+
+    parser = etree_.XMLParser(remove_blank_text=True)
+    return etree_.tostring(etree_.fromstring(get_file_xml(filename).encode('utf-8'), parser)).decode('utf-8')
+
+
 class NullWriter(object):
     """
     This class is used in conjunction with suppress_output()
@@ -7,9 +7,19 @@ from django.utils import timezone
 import time
 from django.db.models import Q
 from api.xsd import oadr_20b
+from api import codec
+from api.builders import OADRDistributeEventBuilder, OADRResponseBuilder, PayloadXML
+from api.static_methods import oadr_event_fragments, PENDING_EVENTS_GENERATION_KEY
+from django.core.cache import cache
+from api import dispatch
+from django.test import override_settings
+from io import StringIO
 import isodate
 import pytz
 import sys
+import re
+import gzip
+from django.contrib.auth.models import User
 from .helper_functions import *
 
 import django
@@ -84,7 +94,7 @@ class TestDialogue(TestCase):
         Report.objects.all().delete()  # Clean the slate
         Report(ven_id='0', report_request_id='0', report_status='active').save()
         created_report_xml = get_file_xml('ven_created_report')
-        vtn_response = get_file_xml('vtn_200_response')
+        vtn_response = get_compact_file_xml('vtn_200_response')
         request_id = 'c206f5a8-e1c3-11e7-91ae-6c96cfdb28b5'  # Can change this as long as corresponding xml file is changed as well
         client = Client()
         created_report_response = client.post(REPORT_URL, created_report_xml, content_type="application/xml")
@@ -128,6 +138,134 @@ class TestDialogue(TestCase):
         self.assertEqual(actual_power, t_data.measured_power_kw)
         self.assertEqual('0', t_data.site.ven_id)
 
+    def test_update_report_batch(self):
+        """
+        This checks that every well-formed interval in an UpdateReport is recorded,
+        and that malformed intervals are skipped without rejecting the report.
+        """
+        Telemetry.objects.all().delete()  # Delete any existing Telemetry objects
+        update_report_xml = get_file_xml('ven_update_report_batch')
+        client = Client()
+        response = client.post(REPORT_URL, update_report_xml, content_type="application/xml")
+        self.assertEqual(response.status_code, 200)
+        t_data = Telemetry.objects.order_by('created_on')
+        self.assertEqual(len(t_data), 2)
+        self.assertEqual([t.baseline_power_kw for t in t_data], [6.2, 5.9])
+        self.assertEqual([t.measured_power_kw for t in t_data], [5.4, 5.1])
+        self.assertEqual(t_data[0].reported_on, t_data[1].reported_on)
+        self.assertEqual('0', t_data[0].site.ven_id)
+
+    def test_telemetry_rollup(self):
+        """
+        This checks that telemetry is rolled up per site and GRAPH_TIMECHUNK_SECONDS chunk as it
+        arrives and is deleted, and that the DR Event graph is read from the rollups.
+        """
+        from vtn.views import get_graph_data
+        Telemetry.objects.all().delete()  # Delete any existing Telemetry objects
+        TelemetryRollup.objects.all().delete()
+        update_report_xml = get_file_xml('ven_update_report_batch')
+        client = Client()
+        client.post(REPORT_URL, update_report_xml, content_type="application/xml")
+        client.post(REPORT_URL, update_report_xml, content_type="application/xml")
+
+        rollups = TelemetryRollup.objects.order_by('bucket')
+        self.assertEqual(len(rollups), 2)
+        self.assertEqual([r.baseline_samples for r in rollups], [2, 2])
+        self.assertAlmostEqual(rollups[0].baseline_power_kw_sum, 12.4)
+        self.assertAlmostEqual(rollups[1].measured_power_kw_sum, 10.2)
+        self.assertEqual(rollups[1].last_measured_power_kw, 5.1)
+
+        start = datetime(2017, 12, 6, 21, 0, tzinfo=pytz.utc)
+        graph_data = get_graph_data(Site.objects.filter(ven_id='0'), start, start + timedelta(hours=1))
+        self.assertEqual(list(graph_data['sum_baseline'].keys()), [r.bucket for r in rollups])
+        self.assertAlmostEqual(list(graph_data['sum_baseline'].values())[0], 6.2)
+        self.assertAlmostEqual(list(graph_data['sum_measured'].values())[1], 5.1)
+
+        latest = Telemetry.objects.order_by('created_on', 'pk').last()
+        latest.measured_power_kw = 4.0
+        latest.save()
+        rollups = TelemetryRollup.objects.order_by('bucket')
+        self.assertEqual([r.measured_samples for r in rollups], [2, 2])
+        self.assertAlmostEqual(rollups[1].measured_power_kw_sum, 9.1)
+        self.assertEqual(rollups[1].last_measured_power_kw, 4.0)
+        created_on, latest.created_on = latest.created_on, rollups[0].last_created_on
+        latest.save()
+        self.assertEqual([r.measured_samples for r in TelemetryRollup.objects.order_by('bucket')], [3, 1])
+        latest.created_on = created_on
+        latest.save()
+        self.assertEqual([r.measured_samples for r in TelemetryRollup.objects.order_by('bucket')], [2, 2])
+
+        Telemetry.objects.filter(created_on__gte=datetime(2017, 12, 6, 21, 36, tzinfo=pytz.utc)).delete()
+        self.assertEqual(TelemetryRollup.objects.count(), 1)
+        Telemetry.objects.order_by('created_on').first().delete()
+        self.assertEqual(TelemetryRollup.objects.get().baseline_samples, 1)
+        Telemetry.objects.all().delete()
+        self.assertEqual(TelemetryRollup.objects.count(), 0)
+
+    def test_site_delete_telemetry(self):
+        """
+        This checks that deleting a Site deletes its telemetry in bulk, without loading it,
+        and deletes its rollups with it.
+        """
+        from django.db.models.deletion import Collector
+        update_report_xml = get_file_xml('ven_update_report_batch')
+        Client().post(REPORT_URL, update_report_xml, content_type="application/xml")
+        site = Site.objects.get(ven_id='0')
+        self.assertTrue(Telemetry.objects.filter(site=site).exists())
+        self.assertTrue(TelemetryRollup.objects.filter(site=site).exists())
+        self.assertTrue(Collector(using='default').can_fast_delete(Telemetry.objects.filter(site=site)))
+
+        site_id = site.pk
+        site.delete()
+        self.assertFalse(Telemetry.objects.filter(site_id=site_id).exists())
+        self.assertFalse(TelemetryRollup.objects.filter(site_id=site_id).exists())
+
+    def test_dr_event_export(self):
+        """
+        This checks that a DR Event's telemetry is streamed as CSV, with site, customer and
+        time range filters and optional gzip compression.
+        """
+        DREvent.objects.all().delete()  # Clean the slate
+        Telemetry.objects.all().delete()
+        create_dr_event('0', 'active', 'not_told')
+        event = DREvent.objects.get(event_id=0)
+        site = Site.objects.get(ven_id='0')
+        for minute in range(5):
+            Telemetry(site=site, created_on=event.start + timedelta(minutes=minute), reported_on=timezone.now(),
+                      baseline_power_kw=10.0 + minute, measured_power_kw=8.0).save()
+
+        User.objects.create_user('exporter', password='export*1')
+        client = Client()
+        client.login(username='exporter', password='export*1')
+        export_url = '/vtn/export/{}/'.format(event.pk)
+
+        response = client.get(export_url)
+        self.assertTrue(response.streaming)
+        rows = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(rows[0], 'DR Program,Site,Time,Baseline Power (kw),Measured Power (kw)')
+        self.assertEqual(len(rows), 6)
+        self.assertTrue(rows[1].endswith(',14.0,8.0'))
+
+        start = python_dt_to_iso(event.start + timedelta(minutes=3))
+        response = client.get(export_url, {'start': start, 'site': site.pk})
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 3)
+
+        other_customer = Customer.objects.exclude(pk=site.customer.pk).first()
+        response = client.get(export_url, {'customer': other_customer.pk})
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 1)
+
+        response = client.get(export_url, {'gzip': '1'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        csv_text = gzip.decompress(b''.join(response.streaming_content)).decode('utf-8')
+        self.assertEqual(csv_text.splitlines(), rows)
+        response = client.get(export_url, {'gzip': '0'})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+
+        response = client.get(export_url, {'end': 'not a date'})
+        self.assertEqual(response.status_code, 400)
+        response = client.get(export_url, {'gzip': 'maybe'})
+        self.assertEqual(response.status_code, 400)
+
     # Test Events #
 
     def test_no_events(self):
@@ -136,7 +274,7 @@ class TestDialogue(TestCase):
         with an empty response when there are no applicable DR Events.
         """
         DREvent.objects.all().delete()  # Clean the slate
-        vtn_response_xml = get_file_xml('vtn_response_no_events')
+        vtn_response_xml = get_compact_file_xml('vtn_response_no_events')
         poll_xml = get_file_xml('ven_poll')
         client = Client()
         response = client.post(POLL_URL, poll_xml, content_type="application/xml")
@@ -148,6 +286,45 @@ class TestDialogue(TestCase):
         vtn_response_xml = vtn_response_xml.replace("<oadr:venID>0</oadr:venID>", "<oadr:venID>1</oadr:venID>")
         self.assertXMLEqual(vtn_response_xml, response.content.decode('utf-8'))
 
+    def test_quiet_poll(self):
+        """
+        This checks that once the VTN knows a VEN has no pending events, its polls are
+        answered with a single query, and that a new DR Event is still sent on the next poll.
+        """
+        DREvent.objects.all().delete()  # Clean the slate
+        vtn_response_xml = get_compact_file_xml('vtn_response_no_events')
+        poll_xml = get_file_xml('ven_poll')
+        client = Client()
+        client.post(POLL_URL, poll_xml, content_type="application/xml")
+        with self.assertNumQueries(1):
+            response = client.post(POLL_URL, poll_xml, content_type="application/xml")
+        self.assertXMLEqual(vtn_response_xml, response.content.decode('utf-8'))
+
+        create_dr_event('0', 'active', 'not_told')
+        response = client.post(POLL_URL, poll_xml, content_type="application/xml")
+        old_stdout = suppress_output()
+        parsed = oadr_20b.parseString(response.content)
+        sys.stdout = old_stdout
+        self.assertIsNotNone(parsed.oadrSignedObject.oadrDistributeEvent)
+
+    def test_quiet_poll_cleared_by_another_process(self):
+        """
+        This checks that a VEN's polls are checked against the database again once another
+        process, sharing the cache, has started a new generation of pending events.
+        """
+        DREvent.objects.all().delete()  # Clean the slate
+        poll_xml = get_file_xml('ven_poll')
+        client = Client()
+        client.post(POLL_URL, poll_xml, content_type="application/xml")
+        with self.assertNumQueries(1):
+            client.post(POLL_URL, poll_xml, content_type="application/xml")
+
+        cache.set(PENDING_EVENTS_GENERATION_KEY, 'another process', None)
+        with self.assertNumQueries(2):
+            client.post(POLL_URL, poll_xml, content_type="application/xml")
+        with self.assertNumQueries(1):
+            client.post(POLL_URL, poll_xml, content_type="application/xml")
+
     def test_one_event(self):
         """
         This checks that a distribute event is correctly returned by the VTN when there is an
@@ -203,7 +380,7 @@ class TestDialogue(TestCase):
         poll_xml = get_file_xml('ven_poll')
         client = Client()
         response = client.post(POLL_URL, poll_xml, content_type="application/xml")
-        vtn_response_xml = get_file_xml('vtn_response_no_events')
+        vtn_response_xml = get_compact_file_xml('vtn_response_no_events')
         self.assertXMLEqual(vtn_response_xml, response.content.decode('utf-8'))
 
     def test_inconsistent_ack_events(self):
@@ -280,12 +457,172 @@ class TestDialogue(TestCase):
         """
         DREvent.objects.all().delete()  # clean the slate
         poll_xml = get_file_xml('ven_poll_ven_id_too_high')
-        vtn_response_xml = get_file_xml('vtn_no_site_found')
+        vtn_response_xml = get_compact_file_xml('vtn_no_site_found')
         client = Client()
         response = client.post(POLL_URL, poll_xml, content_type="application/xml")
         self.assertEqual(response.status_code, 400)
         self.assertXMLEqual(vtn_response_xml, response.content.decode('utf-8'))
 
+    # Test the codec #
+
+    def test_codec_parse(self):
+        """
+        Tests that api.codec parses VEN payloads into the same values as generateDS, and leaves
+        other payloads to generateDS.
+        """
+        for filename in ['ven_poll', 'ven_created_event', 'ven_register_report', 'ven_update_report',
+                         'ven_update_report_batch', 'sample_oadrRegisterReport']:
+            xml = get_file_xml(filename).encode('utf-8')
+            old_stdout = suppress_output()
+            generated = oadr_20b.parseString(xml, silence=True)
+            sys.stdout = old_stdout
+            parsed = codec.parse(xml)
+            self.assertIsNotNone(parsed, filename)
+            self.assertEqual(payload_differences(generated, parsed), [], filename)
+
+        for filename in ['ven_created_report', 'ven_canceled_report', 'sample_ven_poll_signed', 'vtn_distribute_event']:
+            self.assertIsNone(codec.parse(get_file_xml(filename).encode('utf-8')), filename)
+
+        signed_object = codec.parse(get_file_xml('ven_update_report').encode('utf-8')).oadrSignedObject
+        self.assertIsNone(signed_object.oadrCreatedReport)
+        self.assertEqual(signed_object.oadrUpdateReport.get_venID(), '0')
+        with self.assertRaises(AttributeError):
+            signed_object.data
+
+    def test_codec_render(self):
+        """
+        Tests that the rendered oadrResponse and oadrDistributeEvent match the generateDS export.
+        """
+        DREvent.objects.all().delete()  # clean the slate
+        create_dr_event('0', 'far', 'not_told')
+        site_events = [SiteEvent.objects.select_related('dr_event').get() for i in range(2)]
+        site_events[0].status = 'cancelled'
+        # generateDS writes an eventID of 0 as an empty element
+        for site_event in site_events:
+            site_event.dr_event.event_id = 1
+
+        for builder in [OADRDistributeEventBuilder('0', site_events),
+                        OADRResponseBuilder('2.0b', 200, 300, 'No events to send', '0'),
+                        OADRResponseBuilder('2.0b', 400, 300, 'Bad <request> & more')]:
+            generated = StringIO()
+            PayloadXML.wrap(builder).export(generated, 1, pretty_print=False)
+            rendered = StringIO()
+            builder.wrap().export(rendered, 1, pretty_print=False)
+            # createdDateTime is the time each payload was built
+            created = re.compile('<oadr:createdDateTime>[^<]*</oadr:createdDateTime>')
+            self.assertXMLEqual(created.sub('', generated.getvalue()), created.sub('', rendered.getvalue()))
+
+    # Test push delivery #
+
+    @override_settings(PUSH_VEN_URL='http://{ip_address}/OpenADR2/Simple/2.0b/EiEvent', PUSH_BACKOFF_SECONDS=0)
+    def test_push_dr_event(self):
+        """
+        Tests that a DR event is pushed to its VENs, retrying after a server error, and that
+        VENs without an IP address are left to poll.
+        """
+        DREvent.objects.all().delete()  # clean the slate
+        create_dr_event('0', 'far', 'not_told')
+        dr_event = DREvent.objects.get()
+        site = Site.objects.get(ven_id='0')
+
+        Site.objects.update(ip_address='')
+        self.assertEqual(dispatch.push_dr_event(dr_event), 0)
+
+        with StubVEN(failures=1) as ven:
+            Site.objects.filter(pk=site.pk).update(ip_address=ven.ip_address)
+            self.assertEqual(dispatch.push_dr_event(dr_event), 1)
+        self.assertEqual(len(ven.requests), 1)
+        path, body = ven.requests[0]
+        self.assertEqual(path, EVENT_URL)
+        self.assertIn('<ei:eventID>{}</ei:eventID>'.format(dr_event.event_id), body.decode('utf-8'))
+        self.assertEqual(SiteEvent.objects.get().ven_status, 'told')
+
+    @override_settings(PUSH_VEN_URL='http://{ip_address}/OpenADR2/Simple/2.0b/EiEvent', PUSH_BACKOFF_SECONDS=0)
+    def test_push_dr_event_unreachable(self):
+        """
+        Tests that site events whose VEN can't be reached are left for the VEN's next poll.
+        """
+        DREvent.objects.all().delete()  # clean the slate
+        create_dr_event('0', 'far', 'not_told')
+        dr_event = DREvent.objects.get()
+
+        with StubVEN(failures=3) as ven:
+            Site.objects.filter(ven_id='0').update(ip_address=ven.ip_address)
+            self.assertEqual(dispatch.push_dr_event(dr_event), 0)
+        self.assertEqual(ven.failures, 0)
+        self.assertEqual(SiteEvent.objects.get().ven_status, 'not_told')
+
+        response = Client().post(POLL_URL, get_file_xml('ven_poll'), content_type="application/xml")
+        self.assertIn('<ei:eventID>{}</ei:eventID>'.format(dr_event.event_id), response.content.decode('utf-8'))
+
+    @override_settings(PUSH_VEN_URL='http://{ip_address}/OpenADR2/Simple/2.0b/EiEvent')
+    def test_push_dr_event_current_events(self):
+        """
+        Tests that a push holds all of the VEN's current site events, as a poll would, and that
+        a DR event is not pushed before its scheduled notification time.
+        """
+        DREvent.objects.all().delete()  # clean the slate
+        create_dr_event('0', 'active', 'acknowledged')
+        active_event = DREvent.objects.get()
+        site = Site.objects.get(ven_id='0')
+        new_event = DREvent.objects.get(pk=active_event.pk)
+        new_event.pk = None
+        new_event.event_id = str(int(active_event.event_id) + 1)
+        new_event.status = 'far'
+        new_event.save()
+        SiteEvent(dr_event=new_event, site=site, status='far', modification_number=0, opt_in='none',
+                  ven_status='not_told', deleted=False, last_status_time=timezone.now()).save()
+
+        with StubVEN() as ven:
+            Site.objects.filter(pk=site.pk).update(ip_address=ven.ip_address)
+            self.assertEqual(dispatch.push_dr_event(new_event), 1)
+
+            later_event = DREvent.objects.get(pk=new_event.pk)
+            later_event.pk = None
+            later_event.event_id = str(int(new_event.event_id) + 1)
+            later_event.scheduled_notification_time = timezone.now() + timedelta(hours=1)
+            later_event.save()
+            SiteEvent(dr_event=later_event, site=site, status='far', modification_number=0, opt_in='none',
+                      ven_status='not_told', deleted=False, last_status_time=timezone.now()).save()
+            self.assertEqual(dispatch.push_dr_event(later_event), 0)
+        self.assertEqual(len(ven.requests), 1)
+        body = ven.requests[0][1].decode('utf-8')
+        self.assertIn('<ei:eventID>{}</ei:eventID>'.format(active_event.event_id), body)
+        self.assertIn('<ei:eventID>{}</ei:eventID>'.format(new_event.event_id), body)
+        self.assertNotIn('<ei:eventID>{}</ei:eventID>'.format(later_event.event_id), body)
+        self.assertEqual(SiteEvent.objects.get(dr_event=later_event).ven_status, 'not_told')
+
+    def test_oadr_event_cache(self):
+        """
+        Tests that an oadrEvent is rendered once for all VENs, and rendered again after
+        its DR event changes.
+        """
+        DREvent.objects.all().delete()  # clean the slate
+        create_dr_event('0', 'far', 'not_told')
+        site_event = SiteEvent.objects.select_related('dr_event').get()
+        dr_event = site_event.dr_event
+        key = (dr_event.pk, dr_event.modification_number, 'far')
+
+        OADRDistributeEventBuilder('0', [site_event]).wrap()
+        self.assertIn(key, oadr_event_fragments)
+        oadr_event_fragments[key] = ('<!-- head -->', '<!-- tail -->')
+        rendered = StringIO()
+        OADRDistributeEventBuilder('1', [site_event]).wrap().export(rendered, 1)
+        self.assertIn('<!-- head -->', rendered.getvalue())
+
+        dr_event.status = 'active'
+        dr_event.save()
+        self.assertNotIn(key, oadr_event_fragments)
+        rendered = StringIO()
+        OADRDistributeEventBuilder('0', [site_event]).wrap().export(rendered, 1)
+        self.assertNotIn('<!-- head -->', rendered.getvalue())
+        self.assertIn('<ei:eventStatus>active</ei:eventStatus>', rendered.getvalue())
+
+        site_event.status = 'cancelled'
+        rendered = StringIO()
+        OADRDistributeEventBuilder('0', [site_event]).wrap().export(rendered, 1)
+        self.assertIn('<ei:eventStatus>cancelled</ei:eventStatus>', rendered.getvalue())
+
 
 
 
@@ -65,6 +65,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_xml.parsers import XMLParser
 from api.xsd import oadr_20b
+from api import codec
 from vtn.models import *
 from django.core.handlers.wsgi import WSGIRequest
 from rest_framework import status
@@ -75,7 +76,9 @@ from django.utils import timezone
 import pytz
 from rest_framework_xml.renderers import XMLRenderer
 from django.conf import settings
-from django.db import connection
+from django.db import connection, transaction, IntegrityError
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 
 SCHEMA_VERSION = '2.0b'
 VEN_STATUS_ACK = 'acknowledged'
@@ -91,10 +94,8 @@ logger = logging.getLogger(__name__)
 
 
 def update_notification_sent_time(site_events):
-    for site_event in site_events:
-        site_event.notification_sent_time = timezone.now()
-        site_event.ven_status = VEN_STATUS_TOLD
-        site_event.save()
+    SiteEvent.objects.filter(pk__in=[site_event.pk for site_event in site_events]) \
+                     .update(notification_sent_time=timezone.now(), ven_status=VEN_STATUS_TOLD)
 
 
 def update_last_status_time(ven_id):
@@ -106,6 +107,76 @@ def update_last_status_time(ven_id):
         pass
 
 
+# Site primary keys by VEN ID, so telemetry can be stored without looking up the site first.
+ven_site_ids = {}
+
+
+def get_site_id(ven_id):
+    """
+    :param ven_id: the VEN ID sent in a VEN request
+    :return: the primary key of the site with that VEN ID, or None if there is no such site
+    """
+    site_id = ven_site_ids.get(ven_id)
+    if site_id is None:
+        site_id = Site.objects.filter(ven_id=ven_id).values_list('pk', flat=True).first()
+        if site_id is not None:
+            ven_site_ids[ven_id] = site_id
+    return site_id
+
+
+@receiver(post_save, sender=Site)
+def site_saved(sender, instance, **kwargs):
+    # Sites are saved on every status update; only a changed VEN ID invalidates the map.
+    if ven_site_ids.get(instance.ven_id) != instance.pk:
+        ven_site_ids.clear()
+
+
+@receiver(post_delete, sender=Site)
+def site_deleted(sender, instance, **kwargs):
+    ven_site_ids.clear()
+
+
+@receiver(post_save, sender=DREvent)
+@receiver(post_delete, sender=DREvent)
+@receiver(post_save, sender=SiteEvent)
+@receiver(post_delete, sender=SiteEvent)
+def dr_event_changed(sender, instance, **kwargs):
+    # Any new or changed event may have to be sent to VENs that were polled as having nothing pending.
+    clear_pending_events()
+
+
+@receiver(post_save, sender=DREvent)
+@receiver(post_delete, sender=DREvent)
+def dr_event_saved(sender, instance, **kwargs):
+    # Created, updated, cancelled and deleted DR events are all saved (or deleted) here.
+    clear_oadr_event_fragments(instance.pk)
+
+
+def get_interval_telemetry(interval):
+    """
+    :param interval: an interval from an oadrReport in an oadrUpdateReport
+    :return: (start, baseline power, actual power), a power is None if the interval does not report it
+    :raises ValueError: if the interval has no start time or a power value is missing
+    """
+    try:
+        start = interval.dtstart.get_date_time()
+    except AttributeError:
+        start = None
+    if start is None:
+        raise ValueError('Interval has no start time')
+    baseline_power = None
+    actual_power = None
+    for report_payload in interval.streamPayloadBase:
+        try:
+            if report_payload.rID == 'baseline_power':
+                baseline_power = float(report_payload.payloadBase.value)
+            elif report_payload.rID == 'actual_power':
+                actual_power = float(report_payload.payloadBase.value)
+        except (AttributeError, TypeError):
+            raise ValueError('No value given for {}'.format(report_payload.rID))
+    return start, baseline_power, actual_power
+
+
 class OADRRenderer(XMLRenderer):
 
     media_type = 'application/xml'
@@ -126,7 +197,7 @@ class OADRRenderer(XMLRenderer):
         if 'result' not in data:
             data['rendered_result'] = ''
         else:
-            make_pretty = True # 'html' in accepted_media_type
+            make_pretty = False # 'html' in accepted_media_type
             data['rendered_result'] = self.export(data['result'], make_pretty)
 
         return data['rendered_result']
@@ -145,11 +216,21 @@ class OADRParser(XMLParser):
         I don't understand this and need to figure it out. (Bob's comments)
         """
         if isinstance(stream, WSGIRequest):
-            return oadr_20b.parseString(stream.body, silence=True)
+            xml = stream.body
         elif hasattr(stream, 'buf'):
-            return oadr_20b.parseString(stream.buf, silence=True)
+            xml = stream.buf
+        else:
+            return None
 
-        return None
+        # The common VEN payloads go through the lighter codec; anything else, or anything it
+        # can't convert, is left to generateDS.
+        try:
+            payload = codec.parse(xml)
+        except ValueError:
+            payload = None
+        if payload is None:
+            payload = oadr_20b.parseString(xml, silence=True)
+        return payload
 
 
 class OADRPoll(APIView):
@@ -167,17 +248,6 @@ class OADRPoll(APIView):
         # Make preliminary checks
         try:
             ven_id = request.data.oadrSignedObject.oadrPoll.venID
-            # 'Validate' VEN ID if there is one
-            if not Site.objects.filter(ven_id=ven_id).exists():
-                payload_response = OADRResponseBuilder(SCHEMA_VERSION,
-                                                       400,
-                                                       BOGUS_REQUEST_ID,
-                                                       'No site with given VEN ID found')
-                payload_xml = payload_response.wrap()
-                update_last_status_time(ven_id)
-                logger.warning('No site with given VEN ID found')
-                return Response({'result' : payload_xml}, content_type='application/xml', status=status.HTTP_400_BAD_REQUEST)
-
         except AttributeError as err:
             payload_response = OADRResponseBuilder(SCHEMA_VERSION,
                                                    400,
@@ -187,39 +257,50 @@ class OADRPoll(APIView):
             logging.warning('VTN Poll has no VEN ID')
             return Response({'result' : payload_xml}, content_type='application/xml', status=status.HTTP_400_BAD_REQUEST)
 
+        # Record the poll. This also 'validates' the VEN ID: no site is updated if there is no such site.
+        now = timezone.now()
+        if not Site.objects.filter(ven_id=ven_id).update(last_status_time=now):
+            payload_response = OADRResponseBuilder(SCHEMA_VERSION,
+                                                   400,
+                                                   BOGUS_REQUEST_ID,
+                                                   'No site with given VEN ID found')
+            payload_xml = payload_response.wrap()
+            logger.warning('No site with given VEN ID found')
+            return Response({'result' : payload_xml}, content_type='application/xml', status=status.HTTP_400_BAD_REQUEST)
+
         # A site with that VEN ID exists
-        build_events = SiteEvent.objects.filter(site__ven_id=ven_id,
-                                                dr_event__scheduled_notification_time__lt=timezone.now(),
-                                                dr_event__end__gt=timezone.now()) \
-                                                .filter(~Q(ven_status=VEN_STATUS_ACK))
-
-        # Do we have events to send?
-        if build_events.count() > 0:
-            build_events = SiteEvent.objects.filter(site__ven_id=ven_id,
-                                                    dr_event__scheduled_notification_time__lt=timezone.now(),
-                                                    dr_event__end__gt=timezone.now())
-
-            # Build OADR distribute event
-            payload_event = OADRDistributeEventBuilder(ven_id=ven_id, site_events=build_events)
-            payload_xml = payload_event.wrap()
-
-            # Update the notification_sent_time of the involved site events
-            update_notification_sent_time(build_events)
-            update_last_status_time(ven_id)
-            logger.info("VTN sent distribute event")
+        quiet, generation = ven_is_quiet(ven_id, now)
+        if not quiet:
+            site_events = list(SiteEvent.objects.select_related('dr_event')
+                                                .filter(site__ven_id=ven_id, dr_event__end__gt=now))
+            build_events = [site_event for site_event in site_events
+                            if site_event.dr_event.scheduled_notification_time < now]
+
+            # Do we have events to send?
+            if any(site_event.ven_status != VEN_STATUS_ACK for site_event in build_events):
+                # Build OADR distribute event
+                payload_event = OADRDistributeEventBuilder(ven_id=ven_id, site_events=build_events)
+                payload_xml = payload_event.wrap()
+
+                # Update the notification_sent_time of the involved site events
+                update_notification_sent_time(build_events)
+                logger.info("VTN sent distribute event")
 
-            return Response({'result' : payload_xml}, content_type='application/xml', status=status.HTTP_200_OK)
+                return Response({'result' : payload_xml}, content_type='application/xml', status=status.HTTP_200_OK)
+
+            # Nothing to send until the next un-acknowledged site event reaches its notification time
+            notification_times = [site_event.dr_event.scheduled_notification_time for site_event in site_events
+                                  if site_event.ven_status != VEN_STATUS_ACK]
+            set_ven_quiet_until(ven_id, now, generation, min(notification_times) if notification_times else None)
 
         # Nothing to return at this point - return normal status with an empty oadr_response
-        else:
-            payload_response = OADRResponseBuilder(SCHEMA_VERSION,
-                                                   200,
-                                                   BOGUS_REQUEST_ID,
-                                                   'No events to send',
-                                                   ven_id)
-            payload_xml = payload_response.wrap()
-            update_last_status_time(ven_id)
-            return Response({'result' : payload_xml}, content_type='application/xml', status=status.HTTP_200_OK)
+        payload_response = OADRResponseBuilder(SCHEMA_VERSION,
+                                               200,
+                                               BOGUS_REQUEST_ID,
+                                               'No events to send',
+                                               ven_id)
+        payload_xml = payload_response.wrap()
+        return Response({'result' : payload_xml}, content_type='application/xml', status=status.HTTP_200_OK)
 
 
 class EIReport(APIView):
@@ -318,9 +399,8 @@ class EIReport(APIView):
                 logger.warning("UpdateReport XML from VEN is missing elements")
                 return Response({'result' : payload_xml}, content_type='application/xml', status=status.HTTP_400_BAD_REQUEST)
 
-            try:
-                site = Site.objects.get(ven_id=ven_id)
-            except (ObjectDoesNotExist, MultipleObjectsReturned):
+            site_id = get_site_id(ven_id)
+            if site_id is None:
                 response_description = 'No site with the given VEN ID'
                 payload_response = OADRResponseBuilder(SCHEMA_VERSION,
                                                        400,
@@ -329,6 +409,11 @@ class EIReport(APIView):
                 payload_xml = payload_response.wrap()
                 logger.warning("No site with the given VEN ID in UpdateReport")
                 return Response({'result' : payload_xml}, content_type='application/xml', status=status.HTTP_400_BAD_REQUEST)
+
+            # Collect every interval first so a backfill is stored with a single INSERT.
+            reported_on = pytz.timezone(settings.TIME_ZONE).localize(datetime.now())
+            telemetry = []
+            rejected = 0
             for oadr_report in oadr_reports:
                 try:
                     intervals = oadr_report.intervals.interval
@@ -342,25 +427,34 @@ class EIReport(APIView):
                     logger.warning("No intervals given in UpdateReport")
                     return Response({'result' : payload_xml}, content_type='application/xml', status=status.HTTP_400_BAD_REQUEST)
                 for interval in intervals:
-                    start = interval.dtstart.get_date_time()
-                    start.replace(tzinfo=pytz.utc)
-                    if start is not None:
-                        baseline_power = 'n.a.'
-                        actual_power = 'n.a.'
-                        report_payloads = interval.streamPayloadBase
-                        for report_payload in report_payloads:
-                            rID = report_payload.rID
-                            if rID == 'baseline_power':
-                                baseline_power = report_payload.payloadBase.value
-                            elif rID == 'actual_power':
-                                actual_power = report_payload.payloadBase.value
-                        reported_on = pytz.timezone(settings.TIME_ZONE).localize(datetime.now())
-                        if baseline_power != 'n.a.' and actual_power != 'n.a.':
-                            t = Telemetry(site=site, created_on=start,
-                                          reported_on=reported_on,
-                                          baseline_power_kw=baseline_power,
-                                          measured_power_kw=actual_power)
-                            t.save()
+                    try:
+                        start, baseline_power, actual_power = get_interval_telemetry(interval)
+                    except ValueError as err:
+                        rejected += 1
+                        logger.debug("Malformed interval in UpdateReport from VEN {}: {}".format(ven_id, err))
+                        continue
+                    if baseline_power is not None and actual_power is not None:
+                        telemetry.append(Telemetry(site_id=site_id, created_on=start,
+                                                   reported_on=reported_on,
+                                                   baseline_power_kw=baseline_power,
+                                                   measured_power_kw=actual_power))
+            try:
+                with transaction.atomic():
+                    Telemetry.objects.bulk_create(telemetry)
+                    update_telemetry_rollups(telemetry)
+            except IntegrityError:
+                # The site was deleted by another process since its ID was cached.
+                ven_site_ids.pop(ven_id, None)
+                response_description = 'No site with the given VEN ID'
+                payload_response = OADRResponseBuilder(SCHEMA_VERSION,
+                                                       400,
+                                                       BOGUS_REQUEST_ID,
+                                                       response_description)
+                payload_xml = payload_response.wrap()
+                logger.warning("No site with the given VEN ID in UpdateReport")
+                return Response({'result' : payload_xml}, content_type='application/xml', status=status.HTTP_400_BAD_REQUEST)
+            if rejected:
+                logger.warning("Rejected {} malformed intervals in UpdateReport from VEN {}".format(rejected, ven_id))
             payload_response = OADRResponseBuilder(SCHEMA_VERSION,
                                                    200,
                                                    request_id)
@@ -444,6 +538,8 @@ class EIEvent(APIView):
                 payload_xml = oadr_distribute_event.wrap()
 
                 update_notification_sent_time(site_events)
+                # Acknowledged events were re-marked as told, so the VEN's next poll must check again
+                clear_pending_events(ven_id)
 
                 return Response({'result' : payload_xml}, content_type='application/xml')
             except (AttributeError, Exception) as err:
@@ -176,8 +176,30 @@ VTN_ID = 'vtn01'
 
 ONLINE_INTERVAL_MINUTES = 15
 
+# Telemetry is rolled up in chunks of this size; run vtn.models.rebuild_telemetry_rollups() after changing it
 GRAPH_TIMECHUNK_SECONDS = 60
 
+# How long VEN polls may be answered with 'no events' without checking the database.
+# The answers are kept in the default cache. When polls are served by more than one process,
+# configure a cache they all share (memcached, redis or the database cache), so a changed
+# DR event reaches every process at once.
+PENDING_EVENTS_CACHE_SECONDS = 60
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Push new and changed DR events to VENs that have an IP address, instead of waiting for their next poll.
+# VENs that can't be reached still get the events when they poll.
+PUSH_EVENTS = False
+PUSH_VEN_URL = 'http://{ip_address}:8080/OpenADR2/Simple/2.0b/EiEvent'
+PUSH_WORKERS = 50
+PUSH_RETRIES = 2
+PUSH_BACKOFF_SECONDS = 1
+PUSH_TIMEOUT_SECONDS = 10
+
 
 DATETIME_INPUT_FORMATS = [
     '%Y-%m-%d %H:%M:%S',
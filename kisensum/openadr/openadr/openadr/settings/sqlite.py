@@ -0,0 +1,13 @@
+"""
+Settings for running the VTN against a local SQLite database, e.g.
+    DJANGO_SETTINGS_MODULE=openadr.settings.sqlite python manage.py migrate
+"""
+
+from .base import *
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'openadr.sqlite3'),
+    }
+}
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.23 on 2026-10-18 11:39
+from __future__ import unicode_literals
+
+import calendar
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def rollup_telemetry(apps, schema_editor):
+    Telemetry = apps.get_model('vtn', 'Telemetry')
+    TelemetryRollup = apps.get_model('vtn', 'TelemetryRollup')
+    chunk = settings.GRAPH_TIMECHUNK_SECONDS
+    rollups = {}
+    for datum in Telemetry.objects.order_by('created_on').iterator():
+        key = (datum.site_id, calendar.timegm(datum.created_on.utctimetuple()) // chunk * chunk)
+        rollup = rollups.get(key)
+        if rollup is None:
+            rollup = rollups[key] = TelemetryRollup(site_id=key[0], bucket=key[1])
+        if datum.baseline_power_kw is not None:
+            rollup.baseline_samples += 1
+            rollup.baseline_power_kw_sum += datum.baseline_power_kw
+        if datum.measured_power_kw is not None:
+            rollup.measured_samples += 1
+            rollup.measured_power_kw_sum += datum.measured_power_kw
+        rollup.last_created_on = datum.created_on
+        rollup.last_baseline_power_kw = datum.baseline_power_kw
+        rollup.last_measured_power_kw = datum.measured_power_kw
+    TelemetryRollup.objects.bulk_create(rollups.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vtn', '0059_auto_20171213_1300'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TelemetryRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.BigIntegerField(verbose_name='Chunk Start (epoch seconds)')),
+                ('baseline_samples', models.IntegerField(default=0)),
+                ('baseline_power_kw_sum', models.FloatField(default=0.0)),
+                ('measured_samples', models.IntegerField(default=0)),
+                ('measured_power_kw_sum', models.FloatField(default=0.0)),
+                ('last_created_on', models.DateTimeField(blank=True, null=True)),
+                ('last_baseline_power_kw', models.FloatField(blank=True, null=True)),
+                ('last_measured_power_kw', models.FloatField(blank=True, null=True)),
+                ('site', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='vtn.Site')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='telemetryrollup',
+            unique_together=set([('site', 'bucket')]),
+        ),
+        migrations.RunPython(rollup_telemetry, migrations.RunPython.noop),
+    ]
@@ -58,7 +58,15 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
-from django.db import models
+import calendar
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import models, transaction, IntegrityError
+from django.db.models import F
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
 from django.core.urlresolvers import reverse, reverse_lazy
 from django.contrib.auth.models import User
 
@@ -192,17 +200,206 @@ class SiteEvent(models.Model):
     deleted = models.BooleanField(default=False)
 
 
+class TelemetryQuerySet(models.QuerySet):
+
+    def delete(self):
+        """
+        Delete the telemetry and remove it from the rollups.
+        """
+        with transaction.atomic():
+            update_telemetry_rollups(
+                self.only('site', 'created_on', 'baseline_power_kw', 'measured_power_kw').iterator(), sign=-1)
+            return super(TelemetryQuerySet, self).delete()
+
+
 class Telemetry(models.Model):
+    """
+    Telemetry deleted with delete() on a Telemetry object or queryset is removed from the
+    rollups. There is deliberately no post_delete receiver, so that deleting a Site still
+    deletes its telemetry in bulk; its rollups are deleted with it by the cascade.
+    Telemetry changed with save() has the chunks it moved out of and into rebuilt.
+    Run rebuild_telemetry_rollups() after deleting or changing telemetry any other way,
+    e.g. with update() or in SQL.
+    """
 
     class Meta:
         verbose_name_plural = "Telemetry"
 
+    objects = TelemetryQuerySet.as_manager()
+
     site = models.ForeignKey(Site)
     created_on = models.DateTimeField(auto_created=True)
     reported_on = models.DateTimeField(null=True, blank=True)
     baseline_power_kw = models.FloatField('Baseline Power (kw)', blank=True, null=True)
     measured_power_kw = models.FloatField('Measured Power (kw)', blank=True, null=True)
 
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            update_telemetry_rollups([self], sign=-1)
+            return super(Telemetry, self).delete(*args, **kwargs)
+
+
+class TelemetryRollup(models.Model):
+    """
+    A site's telemetry summed over one GRAPH_TIMECHUNK_SECONDS chunk, kept up to date
+    as telemetry is added so the DR Event pages don't aggregate raw telemetry.
+    """
+
+    class Meta:
+        unique_together = ('site', 'bucket')
+
+    site = models.ForeignKey(Site)
+    bucket = models.BigIntegerField('Chunk Start (epoch seconds)')
+    baseline_samples = models.IntegerField(default=0)
+    baseline_power_kw_sum = models.FloatField(default=0.0)
+    measured_samples = models.IntegerField(default=0)
+    measured_power_kw_sum = models.FloatField(default=0.0)
+    last_created_on = models.DateTimeField(blank=True, null=True)
+    last_baseline_power_kw = models.FloatField(blank=True, null=True)
+    last_measured_power_kw = models.FloatField(blank=True, null=True)
+
+    def add(self, telemetry, sign=1):
+        """
+        Add one telemetry datum to this rollup, or with sign=-1 remove it.
+        """
+        if telemetry.baseline_power_kw is not None:
+            self.baseline_samples += sign
+            self.baseline_power_kw_sum += sign * telemetry.baseline_power_kw
+        if telemetry.measured_power_kw is not None:
+            self.measured_samples += sign
+            self.measured_power_kw_sum += sign * telemetry.measured_power_kw
+        if sign > 0 and (self.last_created_on is None or telemetry.created_on >= self.last_created_on):
+            self.last_created_on = telemetry.created_on
+            self.last_baseline_power_kw = telemetry.baseline_power_kw
+            self.last_measured_power_kw = telemetry.measured_power_kw
+
+
+def telemetry_bucket(created_on):
+    """
+    :param created_on: time zone aware date-time of a telemetry datum
+    :return: start of its GRAPH_TIMECHUNK_SECONDS chunk, in epoch seconds
+    """
+    chunk = settings.GRAPH_TIMECHUNK_SECONDS
+    return calendar.timegm(created_on.utctimetuple()) // chunk * chunk
+
+
+def update_telemetry_rollups(telemetry, sign=1):
+    """
+    Add telemetry to the per-site rollups, or with sign=-1 remove it.
+    :param telemetry: Telemetry objects, saved or about to be saved in the same transaction
+    """
+    rollups = OrderedDict()
+    site_buckets = {}
+    for datum in telemetry:
+        key = (datum.site_id, telemetry_bucket(datum.created_on))
+        rollup = rollups.get(key)
+        if rollup is None:
+            rollup = rollups[key] = TelemetryRollup(site_id=key[0], bucket=key[1])
+            site_buckets.setdefault(key[0], []).append(key[1])
+        rollup.add(datum, sign)
+    if not rollups:
+        return
+
+    with transaction.atomic():
+        existing = {}
+        for site_id, buckets in site_buckets.items():
+            for bucket, last_created_on in TelemetryRollup.objects \
+                    .filter(site_id=site_id, bucket__range=(min(buckets), max(buckets))) \
+                    .values_list('bucket', 'last_created_on'):
+                existing[(site_id, bucket)] = last_created_on
+
+        new_rollups = []
+        for key, rollup in rollups.items():
+            if key in existing:
+                increment_telemetry_rollup(rollup, existing[key])
+            elif sign > 0:
+                new_rollups.append(rollup)
+
+        try:
+            with transaction.atomic():
+                TelemetryRollup.objects.bulk_create(new_rollups)
+        except IntegrityError:
+            # Another request created some of these chunks since they were read
+            for rollup in new_rollups:
+                if not increment_telemetry_rollup(rollup):
+                    rollup.save()
+
+        if sign < 0:
+            TelemetryRollup.objects.filter(site_id__in=site_buckets.keys(),
+                                           baseline_samples__lte=0,
+                                           measured_samples__lte=0).delete()
+
+
+def increment_telemetry_rollup(rollup, last_created_on=None):
+    """
+    Add an unsaved rollup's sums to the stored rollup for the same site and chunk.
+    :param rollup: unsaved TelemetryRollup
+    :param last_created_on: the stored rollup's last_created_on, if known
+    :return: number of rollups updated
+    """
+    updates = {'baseline_samples': F('baseline_samples') + rollup.baseline_samples,
+               'baseline_power_kw_sum': F('baseline_power_kw_sum') + rollup.baseline_power_kw_sum,
+               'measured_samples': F('measured_samples') + rollup.measured_samples,
+               'measured_power_kw_sum': F('measured_power_kw_sum') + rollup.measured_power_kw_sum}
+    if rollup.last_created_on is not None and \
+            (last_created_on is None or rollup.last_created_on >= last_created_on):
+        updates.update(last_created_on=rollup.last_created_on,
+                       last_baseline_power_kw=rollup.last_baseline_power_kw,
+                       last_measured_power_kw=rollup.last_measured_power_kw)
+    return TelemetryRollup.objects.filter(site_id=rollup.site_id, bucket=rollup.bucket).update(**updates)
+
+
+def rebuild_telemetry_rollups(batch_size=10000):
+    """
+    Recompute every rollup from the raw telemetry, e.g. after GRAPH_TIMECHUNK_SECONDS is changed.
+    """
+    with transaction.atomic():
+        TelemetryRollup.objects.all().delete()
+        batch = []
+        for datum in Telemetry.objects.order_by('site', 'created_on').iterator():
+            batch.append(datum)
+            if len(batch) == batch_size:
+                update_telemetry_rollups(batch)
+                batch = []
+        update_telemetry_rollups(batch)
+
+
+def rebuild_telemetry_rollup(site_id, bucket):
+    """
+    Recompute one site's rollup for one chunk from the raw telemetry.
+    """
+    start = datetime.fromtimestamp(bucket, timezone.utc)
+    with transaction.atomic():
+        TelemetryRollup.objects.filter(site_id=site_id, bucket=bucket).delete()
+        update_telemetry_rollups(Telemetry.objects.filter(
+            site_id=site_id,
+            created_on__gte=start,
+            created_on__lt=start + timedelta(seconds=settings.GRAPH_TIMECHUNK_SECONDS)).order_by('created_on', 'pk'))
+
+
+@receiver(pre_save, sender=Telemetry)
+def telemetry_saving(sender, instance, **kwargs):
+    # Remember where stored telemetry was rolled up, in case the save moves it to another chunk
+    instance._stored_rollup = None
+    if instance.pk is not None:
+        stored = Telemetry.objects.filter(pk=instance.pk).values_list('site_id', 'created_on').first()
+        if stored is not None:
+            instance._stored_rollup = (stored[0], telemetry_bucket(stored[1]))
+
+
+@receiver(post_save, sender=Telemetry)
+def telemetry_saved(sender, instance, created, **kwargs):
+    # Telemetry stored with bulk_create() does not send signals, and is rolled up by the caller
+    if created:
+        update_telemetry_rollups([instance])
+    else:
+        # The stored values are gone, so rebuild the chunks rather than applying a difference
+        keys = {(instance.site_id, telemetry_bucket(instance.created_on))}
+        if getattr(instance, '_stored_rollup', None) is not None:
+            keys.add(instance._stored_rollup)
+        for site_id, bucket in sorted(keys):
+            rebuild_telemetry_rollup(site_id, bucket)
+
 
 class Report(models.Model):
 
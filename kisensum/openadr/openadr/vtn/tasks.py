@@ -57,6 +57,7 @@
 
 from celery import Celery, absolute_import, unicode_literals, shared_task
 from vtn.models import DREvent, Site
+from api import dispatch
 from datetime import timedelta
 from django.db.models import Q
 from django.utils import timezone
@@ -95,3 +96,12 @@ def update_online_offline():
                 site.save()
         except TypeError:
             continue
+
+
+@shared_task
+def push_dr_event(dr_event_id):
+    try:
+        dr_event = DREvent.objects.get(pk=dr_event_id)
+    except DREvent.DoesNotExist:
+        return 0
+    return dispatch.push_dr_event(dr_event)
@@ -59,22 +59,29 @@
 from __future__ import unicode_literals
 
 import csv
+import pytz
+import zlib
 from datetime import datetime, timedelta
 from django.contrib import messages
 from django.contrib.auth import update_session_auth_hash
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import PasswordChangeForm
-from django.db.models import Case, When, Count, Sum, Min
-from django.db.models import Q, Avg
-from django.http import HttpResponse
-from django.http import HttpResponseRedirect
+from django.db import transaction
+from django.db.models import Case, When, Count, Sum, Max
+from django.db.models import Q, F, FloatField, ExpressionWrapper
+from django import forms
+from django.core.exceptions import ValidationError
+from django.http import StreamingHttpResponse
+from django.http import HttpResponseRedirect, HttpResponseBadRequest
 from django.shortcuts import render, redirect
 from django.views.generic import TemplateView
 from django.views.generic.edit import CreateView, UpdateView, DeleteView, ModelFormMixin
 from .forms import *
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from api.static_methods import *
-from vtn.tasks import update_event_statuses
+from api.codec import parse_boolean
+from vtn.tasks import update_event_statuses, push_dr_event
 from collections import OrderedDict
 from django.conf import settings
 
@@ -208,6 +215,16 @@ def get_new_ven_ID():
     return ven_id
 
 
+def push_dr_event_after_commit(dr_event):
+    """
+    Push a new or changed DR event to its VENs once it is committed, if push delivery is on.
+    The push waits for the event's scheduled notification time.
+    """
+    if settings.PUSH_EVENTS:
+        eta = max(dr_event.scheduled_notification_time, timezone.now()) + timedelta(seconds=1)
+        transaction.on_commit(lambda: push_dr_event.apply_async((dr_event.pk,), eta=eta))
+
+
 def delete_dr_event(request, pk):
     """
     :param pk: the pk of the event that is being cancelled
@@ -224,12 +241,12 @@ def delete_dr_event(request, pk):
     old_dr_event = DREvent.objects.get(pk=pk)
     old_dr_event.superseded = True
     old_dr_event.save()
-    site_events = SiteEvent.objects.filter(dr_event=old_dr_event)
-    for site_event in site_events:
-        site_event.dr_event = new_dr_event
-        site_event.ven_status = 'not_told'
-        site_event.status = 'cancelled'
-        site_event.save()
+    SiteEvent.objects.filter(dr_event=old_dr_event).update(dr_event=new_dr_event,
+                                                           ven_status='not_told',
+                                                           status='cancelled')
+    # update() sends no signals
+    clear_pending_events()
+    push_dr_event_after_commit(new_dr_event)
 
     return HttpResponseRedirect(reverse_lazy('vtn:home'))
 
@@ -250,12 +267,12 @@ def cancel_dr_event(request, pk):
     old_dr_event = DREvent.objects.get(pk=pk)
     old_dr_event.superseded = True
     old_dr_event.save()
-    site_events = SiteEvent.objects.filter(dr_event=old_dr_event)
-    for site_event in site_events:
-        site_event.dr_event = new_dr_event
-        site_event.ven_status = 'not_told'
-        site_event.status = 'cancelled'
-        site_event.save()
+    SiteEvent.objects.filter(dr_event=old_dr_event).update(dr_event=new_dr_event,
+                                                           ven_status='not_told',
+                                                           status='cancelled')
+    # update() sends no signals
+    clear_pending_events()
+    push_dr_event_after_commit(new_dr_event)
 
     return HttpResponseRedirect(reverse_lazy('vtn:home'))
 
@@ -277,28 +294,104 @@ def change_password(request):
                 })
 
 
+class CSVBuffer(object):
+    """
+    A file-like object for csv.writer that hands each written row back to the caller
+    instead of storing it.
+    """
+    def write(self, value):
+        return value
+
+
+def telemetry_csv(event, t_data, chunk_size=65536):
+    """
+    :param event: the DR Event being exported
+    :param t_data: telemetry rollup queryset to export
+    :param chunk_size: approximate size of each yielded chunk
+    :return: generator of CSV text chunks, reading t_data in batches
+    """
+    writer = csv.writer(CSVBuffer())
+    dr_program = str(event.dr_program)
+    rows = [writer.writerow(['DR Program', 'Site', 'Time', 'Baseline Power (kw)', 'Measured Power (kw)'])]
+    size = 0
+    for datum in t_data.iterator():
+        time = datetime.fromtimestamp(datum.bucket, tz=pytz.utc)
+        row = writer.writerow([dr_program, datum.site, time.strftime("%Y-%m-%d %I:%M:%S %p"),
+                               average_power(datum.baseline_power_kw_sum, datum.baseline_samples),
+                               average_power(datum.measured_power_kw_sum, datum.measured_samples)])
+        rows.append(row)
+        size += len(row)
+        if size >= chunk_size:
+            yield ''.join(rows)
+            rows = []
+            size = 0
+    yield ''.join(rows)
+
+
+def gzip_chunks(chunks):
+    """
+    :param chunks: generator of text chunks
+    :return: generator of the gzip-compressed chunks
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def parse_export_time(value):
+    """
+    :param value: an ISO 8601 date-time, or one in a DATETIME_INPUT_FORMATS format
+    :return: time zone aware date-time, or None if value is empty
+    :raises ValidationError: if value is not a date-time
+    """
+    if not value:
+        return None
+    time = parse_datetime(value)
+    if time is None:
+        return forms.DateTimeField().clean(value)
+    if timezone.is_naive(time):
+        time = timezone.make_aware(time)
+    return time
+
+
 def dr_event_export(request, pk):
 
     """
     This function does the actual exporting of a given
-    DR Event's data
+    DR Event's data. The CSV is streamed, so any number of rows can be exported.
+    Optional GET parameters:
+        site, customer: only export the site's or the customer's sites' data
+        start, end: only export data in this time range (defaults to the event's start and end)
+        gzip: true or 1 to gzip-compress the CSV
     """
 
     event = DREvent.objects.get(pk=pk)
     sites = Site.objects.filter(siteevent__dr_event=event)
 
-    t_data = Telemetry.objects.filter(site__in=sites) \
-                              .filter(reported_on__range=(event.start, event.end)) \
-                              .order_by('-reported_on')
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="dr-events.csv"'
-
-    writer = csv.writer(response)
-
-    writer.writerow(['DR Program', 'Site', 'Time', 'Baseline Power (kw)', 'Measured Power (kw)'])
-    for datum in t_data:
-        writer.writerow([event.dr_program, datum.site, datum.created_on.strftime("%Y-%m-%d %I:%M:%S %p"),
-                        datum.baseline_power_kw, datum.measured_power_kw])
+    try:
+        if request.GET.get('site'):
+            sites = sites.filter(pk=int(request.GET['site']))
+        if request.GET.get('customer'):
+            sites = sites.filter(customer__pk=int(request.GET['customer']))
+        start = parse_export_time(request.GET.get('start')) or event.start
+        end = parse_export_time(request.GET.get('end')) or event.end
+        compress = parse_boolean(request.GET.get('gzip') or 'false')
+    except (ValueError, ValidationError):
+        return HttpResponseBadRequest('Invalid export filter')
+
+    t_data = get_telemetry_rollups(sites, start, end) \
+        .select_related('site__customer') \
+        .order_by('-bucket', 'site')
+
+    if compress:
+        response = StreamingHttpResponse(gzip_chunks(telemetry_csv(event, t_data)), content_type='application/gzip')
+        response['Content-Disposition'] = 'attachment; filename="dr-events.csv.gz"'
+    else:
+        response = StreamingHttpResponse(telemetry_csv(event, t_data), content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="dr-events.csv"'
     return response
 
 
@@ -387,14 +480,16 @@ class DREventAdd(CreateView):
         self.object.save()
 
         # Create the site events
-        for site in form.cleaned_data['sites']:
-            s = SiteEvent()
-            s.dr_event = self.object
-            s.site = site
-            s.status = 'far'
-            s.last_status_time = timezone.now()
-            s.opt_in = 'none'
-            s.save()
+        now = timezone.now()
+        SiteEvent.objects.bulk_create([SiteEvent(dr_event=self.object,
+                                                 site=site,
+                                                 status='far',
+                                                 last_status_time=now,
+                                                 opt_in='none')
+                                       for site in form.cleaned_data['sites']])
+        # bulk_create() sends no signals
+        clear_pending_events()
+        push_dr_event_after_commit(self.object)
 
         return super(ModelFormMixin, self).form_valid(form)
 
@@ -472,32 +567,25 @@ class DREventCreate(CreateView):
         remaining_site_events = SiteEvent.objects.filter(dr_event=old_dr_event) \
                                                  .filter(site__pk__in=existing_sites_to_be_updated)
 
-        for site_pk in new_sites_to_be_created:
-            site = Site.objects.get(pk=site_pk)
-            s = SiteEvent()
-            s.dr_event = self.object
-            s.site = site
-            s.status = 'scheduled'
-            s.last_status_time = timezone.now()
-            # s.modification_number = 0
-            s.opt_in = 'none'
-            s.save()
+        now = timezone.now()
+        SiteEvent.objects.bulk_create([SiteEvent(dr_event=self.object,
+                                                 site_id=site_pk,
+                                                 status='scheduled',
+                                                 last_status_time=now,
+                                                 opt_in='none')
+                                       for site_pk in new_sites_to_be_created])
 
         #  For sites removed from the event, mark them 'cancelled' and point
         # them to new DR Event
         #  1. 'Delete' these site-events by marking them  cancelled
-        for site_event_to_be_removed in site_events_to_be_removed:
-            site_event_to_be_removed.status = 'cancelled'
-            site_event_to_be_removed.dr_event = self.object
-            site_event_to_be_removed.ven_status = 'not_told'
-            site_event_to_be_removed.save()
+        site_events_to_be_removed.update(status='cancelled', dr_event=self.object, ven_status='not_told')
 
         #  With remaining site events, re-point them to new DR Event
-        for site_event in remaining_site_events:
-            site_event.dr_event = self.object
-            site_event.status = 'scheduled'
-            site_event.ven_status = 'not_told'
-            site_event.save()
+        remaining_site_events.update(dr_event=self.object, status='scheduled', ven_status='not_told')
+
+        # bulk_create() and update() send no signals
+        clear_pending_events()
+        push_dr_event_after_commit(self.object)
 
         return super(ModelFormMixin, self).form_valid(form)
 
@@ -567,47 +655,12 @@ def get_dr_event_details(request, pk):
     else:
         sites = Site.objects.filter(pk=site_pk)
 
-    start = event.start
-    end = event.end
-
-    date_slice = "trunc(extract(epoch from created_on) / '{}' ) * {}".format(str(settings.GRAPH_TIMECHUNK_SECONDS),
-                                                                             str(settings.GRAPH_TIMECHUNK_SECONDS))
-    t_data = Telemetry.objects.filter(site__in=sites) \
-        .filter(created_on__range=(start, end)) \
-        .extra(select={'date_slice': date_slice}) \
-        .values('date_slice', 'site') \
-        .annotate(avg_baseline_power_kw=Avg('baseline_power_kw'),
-                  avg_measured_power_kw=Avg('measured_power_kw'),
-                  time=Min('created_on'))
-    if t_data.count() == 0:
+    graph_data = get_graph_data(sites, event.start, event.end)
+    if graph_data is None:
         context['no_data_for_sites'] = 'True'
         return render(request, 'vtn/dr_event_customer_detail.html', context)
     else:
-        co = t_data.order_by('-created_on')
-        context['t_data'] = t_data
-        last = co.first()['time']
-        first = co.last()['time']
-        difference = (last - first).seconds
-        quarter = difference // 4
-        last = last - timedelta(seconds=quarter)
-        first = first + timedelta(seconds=quarter)
-        context['start_focus'] = first
-        context['end_focus'] = last
-
-        sum_baseline = {}
-        sum_measured = {}
-        for datum in t_data:
-            if datum['date_slice'] in sum_baseline:
-                sum_baseline[datum['date_slice']] += datum['avg_baseline_power_kw']
-            else:
-                sum_baseline[datum['date_slice']] = datum['avg_baseline_power_kw']
-            if datum['date_slice'] in sum_measured:
-                sum_measured[datum['date_slice']] += datum['avg_measured_power_kw']
-            else:
-                sum_measured[datum['date_slice']] = datum['avg_measured_power_kw']
-
-        context['sum_baseline'] = OrderedDict(sorted(sum_baseline.items(), key=lambda t: t[0]))
-        context['sum_measured'] = OrderedDict(sorted(sum_measured.items(), key=lambda t: t[0]))
+        context.update(graph_data)
         context['no_data_for_sites'] = 'False'
 
         return render(request, 'vtn/dr_event_customer_detail.html', context)
@@ -650,83 +703,104 @@ class DREventDetail(TemplateView):
         context['end'] = event.end
 
         # Get site events for "Site Detail" tab
-        context['site_events'] = SiteEvent.objects.filter(dr_event=event)
-        site_events = SiteEvent.objects.filter(dr_event=event)
+        site_events = SiteEvent.objects.filter(dr_event=event).select_related('site__customer')
+
+        # Only get those sites that have a corresponding Site Event
+        sites = Site.objects.filter(siteevent__dr_event=event)
 
+        last_stats = get_most_recent_stats(event, sites)
         for site_event in site_events:
-            site_event.last_stat = get_most_recent_stat(event, site_event.site)
+            site_event.last_stat = last_stats.get(site_event.site_id, 'N.A.')
 
         context['site_events'] = site_events
 
-        # Only get those sites that have a corresponding Site Event
-        sites = Site.objects.filter(siteevent__dr_event=event)
+        graph_data = get_graph_data(sites, event.start, event.end)
 
         # If there is no telemetry, tell template there is none so 'No data' is displayed
-        if Telemetry.objects.filter(site__in=sites).filter(created_on__range=(event.start, event.end)).count() == 0:
+        if graph_data is None:
             context['no_data'] = True
 
         # If there is telemetry...
         else:
-            start = event.start
-            end = event.end
-
-            date_slice = "trunc(extract(epoch from created_on) / '{}' ) * {}".format(
-                str(settings.GRAPH_TIMECHUNK_SECONDS),
-                str(settings.GRAPH_TIMECHUNK_SECONDS))
-            t_data = Telemetry.objects.filter(site__in=sites) \
-                                      .filter(created_on__range=(start, end)) \
-                                      .extra(select={'date_slice': date_slice}) \
-                                      .values('date_slice', 'site') \
-                                      .annotate(avg_baseline_power_kw=Avg('baseline_power_kw'),
-                                                avg_measured_power_kw=Avg('measured_power_kw'),
-                                                time=Min('created_on'))
-
-            co = t_data.order_by('-created_on')
-            context['t_data'] = t_data
-            last = co.first()['time']
-            first = co.last()['time']
-            difference = (last - first).seconds
-            quarter = difference // 4
-            last = last - timedelta(seconds=quarter)
-            first = first + timedelta(seconds=quarter)
-            context['start_focus'] = first
-            context['end_focus'] = last
-
-            sum_baseline = {}
-            sum_measured = {}
-            for datum in t_data:
-                if datum['date_slice'] in sum_baseline:
-                    sum_baseline[datum['date_slice']] += datum['avg_baseline_power_kw']
-                else:
-                    sum_baseline[datum['date_slice']] = datum['avg_baseline_power_kw']
-                if datum['date_slice'] in sum_measured:
-                    sum_measured[datum['date_slice']] += datum['avg_measured_power_kw']
-                else:
-                    sum_measured[datum['date_slice']] = datum['avg_measured_power_kw']
-
-            context['sum_baseline'] = OrderedDict(sorted(sum_baseline.items(), key=lambda t: t[0]))
-            context['sum_measured'] = OrderedDict(sorted(sum_measured.items(), key=lambda t: t[0]))
+            context.update(graph_data)
 
         return context
 
 
-def get_most_recent_stat(dr_event, site):
+def average_power(power_kw_sum, samples):
+    return power_kw_sum / samples if samples > 0 else None
+
+
+def average_power_expression(field):
+    """
+    :param field: 'baseline' or 'measured'
+    :return: expression for a rollup's average power, NULL if it has no samples
+    """
+    return Case(When(**{field + '_samples__gt': 0,
+                        'then': ExpressionWrapper(F(field + '_power_kw_sum') / F(field + '_samples'),
+                                                  output_field=FloatField())}),
+                output_field=FloatField())
+
+
+def get_telemetry_rollups(sites, start, end):
+    """
+    :param sites: the sites to get telemetry for
+    :param start: start of the time range
+    :param end: end of the time range
+    :return: the sites' telemetry rollups for the GRAPH_TIMECHUNK_SECONDS chunks between start and end
+    """
+    return TelemetryRollup.objects.filter(site__in=sites) \
+                                  .filter(bucket__range=(telemetry_bucket(start), telemetry_bucket(end)))
+
+
+def get_graph_data(sites, start, end):
+    """
+    :param sites: the sites to graph
+    :param start: start of the time range
+    :param end: end of the time range
+    :return: graph context (the sites' average baseline and measured power, summed per
+             GRAPH_TIMECHUNK_SECONDS chunk, and the initial focus), or None if there is no telemetry
+    """
+    t_data = list(get_telemetry_rollups(sites, start, end)
+                  .values('bucket')
+                  .annotate(sum_baseline=Sum(average_power_expression('baseline')),
+                            sum_measured=Sum(average_power_expression('measured')))
+                  .order_by('bucket'))
+    if len(t_data) == 0:
+        return None
+
+    first = datetime.fromtimestamp(t_data[0]['bucket'], tz=pytz.utc)
+    last = datetime.fromtimestamp(t_data[-1]['bucket'], tz=pytz.utc)
+    quarter = int((last - first).total_seconds()) // 4
+
+    return {'start_focus': first + timedelta(seconds=quarter),
+            'end_focus': last - timedelta(seconds=quarter),
+            'sum_baseline': OrderedDict((datum['bucket'], datum['sum_baseline']) for datum in t_data
+                                        if datum['sum_baseline'] is not None),
+            'sum_measured': OrderedDict((datum['bucket'], datum['sum_measured']) for datum in t_data
+                                        if datum['sum_measured'] is not None)}
+
+
+def get_most_recent_stats(dr_event, sites):
     """
-    :param site: The site to get the most recent measured power stat for.
     :param dr_event: Used to get start and end times for telemetry.
-    :return: Ideally, returns the difference between the site's baseline power
-             and its actual power. If there is no baseline, it returns 'N.A.
+    :param sites: The sites to get the most recent measured power stat for.
+    :return: A dictionary of site pk to, ideally, the difference between the site's baseline
+             power and its actual power. If there is no baseline, it is the actual power.
+             Sites without telemetry are left out.
     """
-    try:
-        t_data = Telemetry.objects.filter(site=site) \
-                                  .filter(reported_on__range=(dr_event.start, dr_event.end)) \
-                                  .order_by('-reported_on')[0]
-        if t_data.baseline_power_kw is not None:
-            return t_data.baseline_power_kw - t_data.measured_power_kw
+    rollups = get_telemetry_rollups(sites, dr_event.start, dr_event.end)
+    latest_buckets = dict(rollups.values_list('site').annotate(Max('bucket')))
+
+    stats = {}
+    for rollup in rollups.filter(bucket__in=set(latest_buckets.values())):
+        if latest_buckets[rollup.site_id] != rollup.bucket or rollup.last_measured_power_kw is None:
+            continue
+        if rollup.last_baseline_power_kw is not None:
+            stats[rollup.site_id] = rollup.last_baseline_power_kw - rollup.last_measured_power_kw
         else:
-            return t_data.measured_power_kw
-    except (IndexError, Exception):
-        return 'N.A.'
+            stats[rollup.site_id] = rollup.last_measured_power_kw
+    return stats
 
 
 def get_status(dr_event):
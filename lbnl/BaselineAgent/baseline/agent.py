@@ -7,7 +7,7 @@ from volttron.platform.agent import utils, matching
 from volttron.platform.messaging import headers as headers_mod
 from volttron.platform.messaging import topics
 
-from loadshape import Loadshape
+from loadshape_engine.engine import LoadshapeEngine, process_request
 
 utils.setup_logging()
 _log = logging.getLogger(__name__)
@@ -22,6 +22,15 @@ class BaselineAgent(PublishMixin, BaseAgent):
     def setup(self):
         self._agent_id = self.config['agentid']
         super(BaselineAgent, self).setup()
+        self.engine = LoadshapeEngine(processes=self.config.get('processes'),
+                                      cache_size=self.config.get('cache_size', 128),
+                                      site_limit=self.config.get('site_limit', 1000),
+                                      data_dir=self.config.get('data_dir'))
+        self.periodic_timer(self.config.get('result_interval', 1), self.publish_results)
+
+    def finish(self):
+        self.engine.close()
+        super(BaselineAgent, self).finish()
     
     @matching.match_exact('baseline/request')
     def on_request(self, topic, headers, message, match):
@@ -32,9 +41,13 @@ class BaselineAgent(PublishMixin, BaseAgent):
  
         requester = headers['requesterID']
         response_topic = "baseline/responses/%s" % requester
-        response = self.process_request(message)
-        
-        self.publish_json(response_topic, headers, response)
+        # fitted in the engine's worker pool and published by publish_results
+        self.engine.submit('baseline', message, (response_topic, headers))
+
+    def publish_results(self):
+        '''publish responses for requests that have finished'''
+        for (response_topic, headers), response in self.engine.collect():
+            self.publish_json(response_topic, headers, response)
 
     # ------------------------------------------------------- #
     # example baseline request:
@@ -57,22 +70,8 @@ class BaselineAgent(PublishMixin, BaseAgent):
     #    self.publish_json('baseline/request', headers, example_message)
     # ------------------------------------------------------- #
 
-    def process_request(self, arg_set):        
-        inst_args = ["load_data", "temp_data", "timezone", "temp_units", "sq_ft"]
-        inst_args = { a_name: arg_set[a_name] for a_name in inst_args if arg_set.get(a_name)}
-        
-        baseline_args = ["start_at", "end_at", "weighting_days", "modeling_interval", "step_size"]
-        baseline_args = { a_name: arg_set[a_name] for a_name in baseline_args if arg_set.get(a_name)}
-        
-        ls = Loadshape(**inst_args)
-        baseline_series = ls.baseline(**baseline_args)
-        
-        response = {
-            "baseline": baseline_series.data(),
-            "error_stats": ls.error_stats
-        }
-        
-        return response
+    def process_request(self, arg_set):
+        return process_request('baseline', arg_set, self.config.get('data_dir'))
 
 def main(argv=sys.argv):
     '''Main method called by the eggsecutable.'''
@@ -9,7 +9,7 @@ setup(
     version = "0.1",
     description = 'Baseline agent for Volttron',
     url = 'https://bitbucket.org/berkeleylab/eetd-volttron-agents',
-    install_requires = ['volttron','loadshape'],
+    install_requires = ['volttron','loadshape','loadshape_engine'],
     packages = packages,
     entry_points = {
         'setuptools.installation': [
@@ -0,0 +1,136 @@
+'''
+Times loadshape baseline requests run the old way, one at a time in the bus callback, against
+the engine's worker pool, cache and site history, and times the JSON and columnar series
+encodings.
+
+    python -m loadshape_engine.benchmark --sites 500 --days 365
+    python -m loadshape_engine.benchmark --encoding-only
+'''
+import argparse
+import json
+import math
+import tempfile
+import time
+from array import array
+from multiprocessing import cpu_count
+
+from loadshape_engine.encoding import Columns, decode_series, encode_series
+from loadshape_engine.engine import LoadshapeEngine, process_request
+
+INTERVAL = 900
+START = 1356998400  # 2013-01-01 00:00:00 UTC
+
+
+def site_message(site, days, start=START):
+    '''a baseline request with days of 15-minute load and temperature data'''
+    times = range(start, start + days * 86400, INTERVAL)
+    load_data = [(t, 50 + 20 * math.sin((t % 86400) * math.pi / 43200.0) + site % 7) for t in times]
+    temp_data = [(t, 60 + 15 * math.sin((t % 86400) * math.pi / 43200.0)) for t in times]
+    return {
+        "site": "site%d" % site,
+        "load_data": load_data,
+        "temp_data": temp_data,
+        "timezone": "America/Los_Angeles",
+        "temp_units": "F",
+        "weighting_days": 14,
+        "modeling_interval": INTERVAL,
+        "step_size": INTERVAL,
+    }
+
+
+def wait(engine, count):
+    '''collect count responses, return the seconds taken'''
+    begin = time.time()
+    received = 0
+    while received < count:
+        received += len(engine.collect())
+        time.sleep(0.01)
+    return time.time() - begin
+
+
+def old_request(message):
+    '''what the agents did: decode the whole history and fit it in the callback'''
+    message = json.loads(json.dumps(message))
+    message.pop("site")
+    return process_request("baseline", message)
+
+
+def time_encoding(days, data_dir):
+    '''
+    time sending a series and decoding it on the other side, as JSON pairs and in each
+    columnar encoding, for a sender that already holds the series as arrays
+    '''
+    pairs = site_message(0, days)["load_data"]
+    columns = Columns(array('d', (t for t, v in pairs)), array('d', (v for t, v in pairs)))
+    begin = time.time()
+    message = json.dumps(list(zip(map(int, columns.times), columns.values)))
+    json.loads(message)
+    json_time = time.time() - begin
+    print("%d intervals, JSON pairs: %.1f ms, %d bytes" % (len(pairs), json_time * 1000, len(message)))
+    for encoding in ("base64", "file"):
+        begin = time.time()
+        message = json.dumps(encode_series(columns, encoding, "loadshape_series.bin", data_dir))
+        decode_series(json.loads(message), data_dir)
+        encoded_time = time.time() - begin
+        print("%d intervals, %s: %.1f ms, %d bytes (%.1fx)" % (len(pairs), encoding, encoded_time * 1000,
+                                                              len(message), json_time / encoded_time))
+
+
+def run(sites, days, processes):
+    message = site_message(0, days)
+    begin = time.time()
+    old_request(message)
+    print("one site, %d days: old %.2f s" % (days, time.time() - begin))
+
+    engine = LoadshapeEngine(processes=processes)
+    try:
+        begin = time.time()
+        engine.submit("baseline", message, 0)
+        submitted = time.time() - begin
+        fitted = wait(engine, 1)
+        print("one site, %d days: engine submit %.3f s, fit %.2f s" % (days, submitted, fitted))
+
+        begin = time.time()
+        engine.submit("baseline", dict(message), 0)
+        print("one site, repeated request: %.3f s" % (time.time() - begin + wait(engine, 1)))
+
+        last = message["load_data"][-1][0] + INTERVAL
+        append = dict(message, append=True, load_data=[(last, 50)], temp_data=[(last, 60)])
+        begin = time.time()
+        engine.submit("baseline", append, 0)
+        submitted = time.time() - begin
+        print("one site, one appended interval: submit %.3f s, fit %.2f s" % (submitted, wait(engine, 1)))
+
+        messages = [site_message(site, days) for site in range(sites)]
+        begin = time.time()
+        for request in messages[:10]:
+            old_request(request)
+        print("%d sites: old %.1f s (from 10 sites)" % (sites, (time.time() - begin) / 10 * sites))
+
+        begin = time.time()
+        longest = 0
+        for n, request in enumerate(messages):
+            submit_begin = time.time()
+            engine.submit("baseline", request, n)
+            longest = max(longest, time.time() - submit_begin)
+        wait(engine, sites)
+        print("%d sites: engine %.1f s, longest submit %.3f s" % (sites, time.time() - begin, longest))
+    finally:
+        engine.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark loadshape requests with and without the engine")
+    parser.add_argument("--sites", type=int, default=500, help="number of sites")
+    parser.add_argument("--days", type=int, default=365, help="days of 15-minute data per site")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--data-dir", default=tempfile.gettempdir(), help="directory for the file encoding")
+    parser.add_argument("--encoding-only", action="store_true", help="only time the series encodings")
+    args = parser.parse_args()
+    time_encoding(args.days, args.data_dir)
+    if not args.encoding_only:
+        run(args.sites, args.days, args.processes or cpu_count())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+'''
+Columnar encodings for the [epoch, value] series in loadshape requests and responses.
+
+A series may be sent as the usual JSON list of pairs, or as one of:
+
+    {"encoding": "base64", "times": <base64 int64>, "values": <base64 float64>}
+    {"encoding": "file", "path": <file>, "count": <n>, "offset": <bytes, default 0>}
+
+Arrays are little-endian. A file holds n int64 times followed by n float64 values,
+starting at offset, and is read through mmap. File paths are relative names in a
+data directory; without one the file encoding is refused.
+'''
+import base64
+import binascii
+import mmap
+import os
+import sys
+from array import array
+
+ENCODINGS = ("base64", "file")
+
+# errors raised for a malformed series or an unreadable file
+DECODE_ERRORS = (ValueError, KeyError, TypeError, binascii.Error, EnvironmentError)
+
+
+def int64_array(data=b''):
+    '''array of int64, 'q' is not available before Python 3.3'''
+    typecode = 'q' if 'q' in getattr(array, 'typecodes', '') else 'l'
+    values = array(typecode)
+    if values.itemsize != 8:
+        raise ValueError("no 64 bit integer array type")
+    frombytes(values, data)
+    return values
+
+
+def frombytes(values, data):
+    if hasattr(values, 'frombytes'):
+        values.frombytes(data)
+    else:
+        values.fromstring(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+
+
+def tobytes(values):
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes() if hasattr(values, 'tobytes') else values.tostring()
+
+
+def is_columnar(series):
+    return isinstance(series, dict) and series.get("encoding") in ENCODINGS
+
+
+def series_path(data_dir, name):
+    '''
+    resolve the path of a file series under data_dir
+    name: string, relative to data_dir, without ".." components
+    '''
+    if not data_dir:
+        raise ValueError("file series are not enabled, no data directory is configured")
+    if not name or os.path.isabs(name) or os.pardir in name.replace("\\", "/").split("/"):
+        raise ValueError("series path %r is not a relative name in the data directory" % name)
+    root = os.path.realpath(data_dir)
+    path = os.path.realpath(os.path.join(root, name))
+    if not path.startswith(root + os.sep):
+        raise ValueError("series path %r is outside the data directory" % name)
+    return path
+
+
+def decode_series(series, data_dir=None):
+    '''
+    series: dictionary, a base64 or file encoded series
+    data_dir: string, directory holding file series
+    return (times, values) as float64 arrays
+    '''
+    encoding = series.get("encoding")
+    if encoding == "base64":
+        times = int64_array(base64.b64decode(series["times"]))
+        values = array('d')
+        frombytes(values, base64.b64decode(series["values"]))
+    elif encoding == "file":
+        count = int(series["count"])
+        offset = int(series.get("offset", 0))
+        with open(series_path(data_dir, series["path"]), "rb") as series_file:
+            mapped = mmap.mmap(series_file.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                times = int64_array(mapped[offset:offset + 8 * count])
+                values = array('d')
+                frombytes(values, mapped[offset + 8 * count:offset + 16 * count])
+            finally:
+                mapped.close()
+    else:
+        raise ValueError("unknown series encoding %r" % encoding)
+    if len(times) != len(values):
+        raise ValueError("series has %d times and %d values" % (len(times), len(values)))
+    return array('d', times), values
+
+
+class Columns(object):
+    '''a decoded series, as float64 arrays of times and values'''
+
+    def __init__(self, times, values):
+        self.times = times
+        self.values = values
+
+
+def series_pairs(series, data_dir=None):
+    '''return a series in any encoding, or Columns, as a list of (epoch, value)'''
+    if is_columnar(series):
+        series = Columns(*decode_series(series, data_dir))
+    if isinstance(series, Columns):
+        return list(zip(map(int, series.times), series.values))
+    return series
+
+
+def encode_series(pairs, encoding, path=None, data_dir=None):
+    '''
+    pairs: list of [epoch, value], or Columns
+    encoding: "base64" or "file"
+    path: string, file to write for the "file" encoding, relative to data_dir
+    data_dir: string, directory holding file series
+    return the encoded series
+    '''
+    times = int64_array()
+    if isinstance(pairs, Columns):
+        times.extend(map(int, pairs.times))
+        values = pairs.values
+    else:
+        times.extend(int(t) for t, v in pairs)
+        values = array('d', (v for t, v in pairs))
+    if encoding == "base64":
+        return {
+            "encoding": "base64",
+            "times": base64.b64encode(tobytes(times)).decode('ascii'),
+            "values": base64.b64encode(tobytes(values)).decode('ascii'),
+        }
+    elif encoding == "file":
+        with open(series_path(data_dir, path), "wb") as series_file:
+            series_file.write(tobytes(times))
+            series_file.write(tobytes(values))
+        return {"encoding": "file", "path": path, "count": len(values)}
+    raise ValueError("unknown series encoding %r" % encoding)
@@ -0,0 +1,269 @@
+import hashlib
+import json
+import logging
+import threading
+from array import array
+from collections import OrderedDict, deque
+from multiprocessing import Pool
+
+from .encoding import DECODE_ERRORS, Columns, decode_series, encode_series, is_columnar, series_pairs
+
+_log = logging.getLogger(__name__)
+
+# worker processes of each agent's engine; every agent runs its own pool
+DEFAULT_PROCESSES = 2
+
+INSTANCE_ARGS = ["load_data", "temp_data", "timezone", "temp_units", "sq_ft"]
+
+# loadshape arguments used by each kind of request
+OPERATION_ARGS = {
+    "baseline": ["start_at", "end_at", "weighting_days", "modeling_interval", "step_size"],
+    "cumulative_sum": ["start_at", "end_at", "step_size"],
+    "event_performance": ["start_at", "end_at"],
+}
+
+
+# request keys that choose how response series are encoded
+RESPONSE_ARGS = ["response_encoding", "response_path"]
+
+
+def process_request(operation, arg_set, data_dir=None):
+    '''
+    run one baseline, cumulative sum or event performance request
+    data_dir: string, directory holding file encoded series
+    '''
+    # imported here so that the engine can be loaded without loadshape and R
+    from loadshape import Loadshape
+
+    inst_args = { a_name: arg_set[a_name] for a_name in INSTANCE_ARGS if arg_set.get(a_name)}
+    op_args = { a_name: arg_set[a_name] for a_name in OPERATION_ARGS[operation] if arg_set.get(a_name)}
+    for a_name in ("load_data", "temp_data"):
+        if a_name in inst_args:
+            inst_args[a_name] = series_pairs(inst_args[a_name], data_dir)
+
+    ls = Loadshape(**inst_args)
+    if operation == "baseline":
+        baseline_series = ls.baseline(**op_args)
+        return {
+            "baseline": response_series(baseline_series.data(), arg_set, data_dir),
+            "error_stats": ls.error_stats
+        }
+    elif operation == "cumulative_sum":
+        sum_series = ls.cumulative_sum(**op_args)
+        return {
+            "cumulative_kwh_diff": response_series(sum_series.data(), arg_set, data_dir),
+        }
+    return ls.event_performance(**op_args)
+
+
+def response_series(data, arg_set, data_dir=None):
+    '''encode a response series as the request asked, JSON pairs by default'''
+    encoding = arg_set.get("response_encoding")
+    if not encoding:
+        return data
+    return encode_series(data, encoding, arg_set.get("response_path"), data_dir)
+
+
+def run_request(operation, arg_set, data_dir=None):
+    '''pool entry point for process_request, errors are returned rather than raised'''
+    try:
+        return process_request(operation, arg_set, data_dir), None
+    except Exception as ex:
+        return None, "%s: %s" % (type(ex).__name__, ex)
+
+
+def packed(values):
+    '''bytes of a float64 array'''
+    return values.tobytes() if hasattr(values, 'tobytes') else values.tostring()
+
+
+def pair_columns(data):
+    '''a list of [epoch, value] as float64 arrays of times and values, in time order'''
+    data = sorted((float(t), float(v)) for t, v in data)
+    return array('d', (t for t, v in data)), array('d', (v for t, v in data))
+
+
+class Series(object):
+    '''a site's [epoch, value] history, kept as two packed arrays'''
+
+    def __init__(self):
+        self.times = array('d')
+        self.values = array('d')
+        self.times_digest = hashlib.sha1()
+        self.values_digest = hashlib.sha1()
+
+    def columns(self):
+        '''a copy, as the pool pickles requests after submit() returns'''
+        return Columns(array('d', self.times), array('d', self.values))
+
+    def extend(self, data):
+        '''add a list of [epoch, value]; a value for an existing time replaces the old one'''
+        self.extend_columns(*pair_columns(data))
+
+    def extend_columns(self, times, values):
+        '''add float64 arrays of times and values'''
+        if not times:
+            return
+        ordered = all(times[i] < times[i + 1] for i in range(len(times) - 1))
+        if ordered and (not self.times or times[0] > self.times[-1]):
+            # the usual case: only newer intervals, so the running digests can be extended
+            self.times.extend(times)
+            self.values.extend(values)
+            self.times_digest.update(packed(times))
+            self.values_digest.update(packed(values))
+            return
+        merged = dict(zip(self.times, self.values))
+        merged.update(zip(times, values))
+        ordered_times = sorted(merged)
+        self.times = array('d', ordered_times)
+        self.values = array('d', [merged[t] for t in ordered_times])
+        self.times_digest = hashlib.sha1(packed(self.times))
+        self.values_digest = hashlib.sha1(packed(self.values))
+
+    def hexdigest(self):
+        return self.times_digest.hexdigest() + self.values_digest.hexdigest()
+
+
+class SiteHistory(object):
+    '''load and temperature history of one site'''
+
+    def __init__(self):
+        self.load_data = Series()
+        self.temp_data = Series()
+
+    def update(self, arg_set, append, data_dir=None):
+        '''both series are decoded before the history changes, so a bad request leaves it as it was'''
+        columns = {}
+        for name in ("load_data", "temp_data"):
+            data = arg_set.get(name)
+            if is_columnar(data):
+                columns[name] = decode_series(data, data_dir)
+            else:
+                columns[name] = pair_columns(data or [])
+        if not append:
+            self.load_data = Series()
+            self.temp_data = Series()
+        self.load_data.extend_columns(*columns["load_data"])
+        self.temp_data.extend_columns(*columns["temp_data"])
+
+    def key(self):
+        return self.load_data.hexdigest() + self.temp_data.hexdigest()
+
+
+def decode_request(arg_set, data_dir=None):
+    '''
+    decode columnar series in a request that is not kept as site history
+    return (request, hash of its data)
+    '''
+    request = dict(arg_set)
+    digest = hashlib.sha1()
+    for name in ("load_data", "temp_data"):
+        data = arg_set.get(name)
+        if is_columnar(data):
+            request[name] = Columns(*decode_series(data, data_dir))
+            digest.update(packed(request[name].times))
+            digest.update(packed(request[name].values))
+        else:
+            digest.update(json.dumps(data or []).encode('utf-8'))
+    return request, digest.hexdigest()
+
+
+class LoadshapeEngine(object):
+    '''
+    Runs loadshape requests in a pool of worker processes. Each agent creates its own engine,
+    so the pool is kept small by default.
+
+    Requests that name a "site" may send only new intervals with "append": true; the engine
+    keeps each site's history and fills in the rest. Responses are cached by site, data and
+    arguments, so repeating a request with no new data does not refit the model. Finished
+    responses are handed back by collect(), in the caller's thread. File encoded series are
+    read and written only under data_dir.
+    '''
+
+    def __init__(self, processes=DEFAULT_PROCESSES, cache_size=128, site_limit=1000, runner=run_request,
+                 data_dir=None):
+        self.pool = Pool(processes or DEFAULT_PROCESSES)
+        self.runner = runner
+        self.data_dir = data_dir
+        self.cache_size = cache_size
+        self.site_limit = site_limit
+        self.cache = OrderedDict()
+        self.sites = OrderedDict()
+        self.pending = {}
+        self.finished = deque()
+        self.lock = threading.Lock()
+
+    def submit(self, operation, arg_set, context):
+        '''
+        queue a request
+        operation: "baseline", "cumulative_sum" or "event_performance"
+        arg_set: dictionary, the request message
+        context: anything, returned with the response by collect()
+
+        A request whose series cannot be decoded is answered with {"error": ...}.
+        '''
+        site = arg_set.get("site")
+        try:
+            if site is None:
+                request, data = decode_request(arg_set, self.data_dir)
+            else:
+                history = self.sites.get(site) or SiteHistory()
+                history.update(arg_set, arg_set.get("append", False), self.data_dir)
+        except DECODE_ERRORS as ex:
+            error = "%s: %s" % (type(ex).__name__, ex)
+            _log.error("%s request could not be decoded: %s" % (operation, error))
+            with self.lock:
+                self.finished.append((context, {"error": error}))
+            return
+
+        if site is not None:
+            self.sites.pop(site, None)
+            self.sites[site] = history
+            while len(self.sites) > self.site_limit:
+                self.sites.popitem(last=False)
+            request = dict(arg_set, load_data=history.load_data.columns(), temp_data=history.temp_data.columns())
+            data = history.key()
+
+        args = { a_name: arg_set.get(a_name) for a_name in INSTANCE_ARGS[2:] + OPERATION_ARGS[operation] + RESPONSE_ARGS}
+        key = (operation, site, data, json.dumps(args, sort_keys=True))
+
+        with self.lock:
+            response = self.cache.pop(key, None)
+            if response is not None:
+                self.cache[key] = response
+                self.finished.append((context, response))
+                return
+            if key in self.pending:
+                self.pending[key].append(context)
+                return
+            self.pending[key] = [context]
+
+        request.pop("site", None)
+        request.pop("append", None)
+        self.pool.apply_async(self.runner, (operation, request, self.data_dir), callback=lambda result: self.done(key, result))
+
+    def done(self, key, result):
+        '''called in the pool's result thread'''
+        response, error = result
+        with self.lock:
+            contexts = self.pending.pop(key, [])
+            if error is not None:
+                _log.error("%s request failed: %s" % (key[0], error))
+                response = {"error": error}
+            else:
+                self.cache[key] = response
+                while len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+            for context in contexts:
+                self.finished.append((context, response))
+
+    def collect(self):
+        '''return a list of (context, response) for requests that have finished'''
+        results = []
+        while self.finished:
+            results.append(self.finished.popleft())
+        return results
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
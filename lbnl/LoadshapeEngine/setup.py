@@ -0,0 +1,13 @@
+#!/usr/bin/env python
+from setuptools import setup, find_packages
+
+packages = find_packages('.')
+
+setup(
+    name = 'loadshape_engine',
+    version = "0.1",
+    description = 'Shared loadshape worker pool for the LBNL Volttron agents',
+    url = 'https://bitbucket.org/berkeleylab/eetd-volttron-agents',
+    install_requires = ['loadshape'],
+    packages = packages,
+)
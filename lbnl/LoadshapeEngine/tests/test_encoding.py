@@ -0,0 +1,71 @@
+'''
+Round trips of the columnar series encodings.
+
+    python -m pytest tests
+'''
+import json
+import os
+
+import pytest
+
+from loadshape_engine.encoding import Columns, decode_series, encode_series, series_pairs
+
+PAIRS = [(1379487600 + 900 * i, 5.5 + i % 3) for i in range(100)]
+
+
+def test_base64_round_trip():
+    series = json.loads(json.dumps(encode_series(PAIRS, "base64")))
+    assert series_pairs(series) == PAIRS
+
+
+def test_file_round_trip(tmpdir):
+    columns = Columns(*decode_series(encode_series(PAIRS, "base64")))
+    series = encode_series(columns, "file", "load.bin", str(tmpdir))
+    assert series == {"encoding": "file", "path": "load.bin", "count": len(PAIRS)}
+    assert series_pairs(series, str(tmpdir)) == PAIRS
+
+
+def test_file_offset(tmpdir):
+    encode_series(PAIRS, "file", "load.bin", str(tmpdir))
+    with open(os.path.join(str(tmpdir), "load.bin"), "rb") as series_file:
+        data = series_file.read()
+    with open(os.path.join(str(tmpdir), "offset.bin"), "wb") as series_file:
+        series_file.write(b"header.." + data)
+    series = {"encoding": "file", "path": "offset.bin", "count": len(PAIRS), "offset": 8}
+    assert series_pairs(series, str(tmpdir)) == PAIRS
+
+
+def test_base64_mismatched_count():
+    series = encode_series(PAIRS, "base64")
+    series["values"] = encode_series(PAIRS[:-1], "base64")["values"]
+    with pytest.raises(ValueError):
+        decode_series(series)
+
+
+def test_file_mismatched_count(tmpdir):
+    series = encode_series(PAIRS, "file", "load.bin", str(tmpdir))
+    series["count"] += 1
+    with pytest.raises(ValueError):
+        decode_series(series, str(tmpdir))
+
+
+def test_empty_file(tmpdir):
+    open(os.path.join(str(tmpdir), "empty.bin"), "wb").close()
+    with pytest.raises(ValueError):
+        decode_series({"encoding": "file", "path": "empty.bin", "count": 0}, str(tmpdir))
+
+
+@pytest.mark.parametrize("path", ["/etc/passwd", "../load.bin", "data/../../load.bin", ""])
+def test_file_path_outside_data_dir(tmpdir, path):
+    encode_series(PAIRS, "file", "load.bin", str(tmpdir))
+    with pytest.raises(ValueError):
+        decode_series({"encoding": "file", "path": path, "count": len(PAIRS)}, str(tmpdir))
+    with pytest.raises(ValueError):
+        encode_series(PAIRS, "file", path, str(tmpdir))
+
+
+def test_file_needs_data_dir(tmpdir):
+    with pytest.raises(ValueError):
+        encode_series(PAIRS, "file", "load.bin")
+    with pytest.raises(ValueError):
+        decode_series({"encoding": "file", "path": "load.bin", "count": len(PAIRS)})
@@ -0,0 +1,182 @@
+'''
+Tests for the loadshape engine, run against a stand-in loadshape module and a pool that runs
+requests when the test asks it to.
+
+    python -m pytest tests
+'''
+import os
+import sys
+import types
+
+import pytest
+
+from loadshape_engine import engine as engine_module
+from loadshape_engine.engine import LoadshapeEngine, Series
+
+fits = []
+
+
+class Loadshape(object):
+    '''records the data of each fit, the baseline is the load data itself'''
+
+    def __init__(self, load_data, **kwargs):
+        if load_data == "fail":
+            raise ValueError("bad load data")
+        fits.append(list(load_data))
+        self.load_data = list(load_data)
+        self.error_stats = {"intervals": len(self.load_data)}
+
+    def baseline(self, **kwargs):
+        return Data(self.load_data)
+
+
+class Data(object):
+    def __init__(self, items):
+        self.items = items
+
+    def data(self):
+        return self.items
+
+
+sys.modules["loadshape"] = types.ModuleType("loadshape")
+sys.modules["loadshape"].Loadshape = Loadshape
+
+
+class ManualPool(object):
+    '''stands in for multiprocessing.Pool, runs the queued requests on run()'''
+
+    def __init__(self, processes=None):
+        self.queued = []
+
+    def apply_async(self, func, args, callback):
+        self.queued.append((func, args, callback))
+
+    def run(self):
+        queued, self.queued = self.queued, []
+        for func, args, callback in queued:
+            callback(func(*args))
+
+    def terminate(self):
+        pass
+
+    def join(self):
+        pass
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    monkeypatch.setattr(engine_module, "Pool", ManualPool)
+    del fits[:]
+    return LoadshapeEngine(cache_size=2, site_limit=2)
+
+
+def request(start, count=3, **kwargs):
+    message = {"load_data": [[start + 900 * i, float(i)] for i in range(count)], "timezone": "America/Los_Angeles"}
+    message.update(kwargs)
+    return message
+
+
+def test_series_extend_newer():
+    series = Series()
+    series.extend([(900, 1.0), (0, 0.0)])
+    series.extend([(1800, 2.0)])
+    whole = Series()
+    whole.extend([(0, 0.0), (900, 1.0), (1800, 2.0)])
+    assert list(series.times) == [0, 900, 1800]
+    assert list(series.values) == [0.0, 1.0, 2.0]
+    assert series.hexdigest() == whole.hexdigest()
+
+
+def test_series_extend_merge():
+    series = Series()
+    series.extend([(900, 1.0), (1800, 2.0)])
+    series.extend([(1800, 5.0), (0, 7.0)])
+    merged = Series()
+    merged.extend([(0, 7.0), (900, 1.0), (1800, 5.0)])
+    assert list(series.times) == [0, 900, 1800]
+    assert list(series.values) == [7.0, 1.0, 5.0]
+    assert series.hexdigest() == merged.hexdigest()
+    series.extend([(2700, 3.0)])
+    merged.extend([(2700, 3.0)])
+    assert series.hexdigest() == merged.hexdigest()
+
+
+def test_repeated_request_is_cached(engine):
+    engine.submit("baseline", request(0), "a")
+    engine.pool.run()
+    engine.submit("baseline", request(0), "b")
+    assert not engine.pool.queued
+    responses = engine.collect()
+    assert [context for context, response in responses] == ["a", "b"]
+    assert responses[0][1] == responses[1][1]
+    assert len(fits) == 1
+
+
+def test_cache_evicts_least_recently_used(engine):
+    for context, start in (("a", 0), ("b", 900), ("a", 0), ("c", 1800)):
+        engine.submit("baseline", request(start), context)
+        engine.pool.run()
+    assert len(fits) == 3
+    engine.submit("baseline", request(0), "a")
+    assert not engine.pool.queued
+    engine.submit("baseline", request(900), "b")
+    assert engine.pool.queued
+
+
+def test_requests_in_flight_share_one_fit(engine):
+    engine.submit("baseline", request(0), "a")
+    engine.submit("baseline", request(0), "b")
+    assert len(engine.pool.queued) == 1
+    assert engine.collect() == []
+    engine.pool.run()
+    responses = engine.collect()
+    assert sorted(context for context, response in responses) == ["a", "b"]
+    assert len(fits) == 1
+
+
+def test_append_to_site_history(engine):
+    engine.submit("baseline", request(0, site="s1"), "a")
+    engine.submit("baseline", request(2700, count=1, site="s1", append=True), "b")
+    engine.pool.run()
+    assert [len(fit) for fit in fits] == [3, 4]
+    assert fits[1][-1] == (2700, 0.0)
+
+    engine.submit("baseline", request(2700, count=1, site="s1"), "c")
+    engine.pool.run()
+    assert fits[2] == [(2700, 0.0)]
+
+
+def test_site_history_limit(engine):
+    for site in ("s1", "s2", "s3"):
+        engine.submit("baseline", request(0, site=site), site)
+    assert list(engine.sites) == ["s2", "s3"]
+
+
+def test_failed_request_is_not_cached(engine):
+    engine.submit("baseline", {"load_data": "fail"}, "a")
+    engine.pool.run()
+    engine.submit("baseline", {"load_data": "fail"}, "b")
+    assert engine.pool.queued
+    engine.pool.run()
+    responses = engine.collect()
+    assert [response for context, response in responses] == [{"error": "ValueError: bad load data"}] * 2
+
+
+def test_undecodable_request_is_answered_with_error(engine, tmpdir):
+    engine.data_dir = str(tmpdir)
+    open(os.path.join(str(tmpdir), "empty.bin"), "wb").close()
+    engine.submit("baseline", request(0, site="s1"), "a")
+    for context, load_data in (("b", {"encoding": "base64", "times": "AAAA", "values": "!"}),
+                               ("c", {"encoding": "file", "path": "empty.bin", "count": 3}),
+                               ("d", {"encoding": "file", "path": "../load.bin", "count": 3}),
+                               ("e", {"encoding": "file", "count": 3}),
+                               ("f", [[0, "x"]])):
+        engine.submit("baseline", dict(request(0, site="s1", append=True), load_data=load_data), context)
+    responses = engine.collect()
+    assert [context for context, response in responses] == ["b", "c", "d", "e", "f"]
+    assert all(list(response) == ["error"] for context, response in responses)
+    assert len(engine.pool.queued) == 1
+    assert len(engine.sites["s1"].load_data.times) == 3
+
+    engine.submit("baseline", {"site": "s2", "load_data": [[0, "x"]]}, "g")
+    assert "s2" not in engine.sites
@@ -0,0 +1,709 @@
+"""
+Copyright (c) 2020, Battelle Memorial Institute
+All rights reserved.
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+1. Redistributions of source code must retain the above copyright notice, this
+   list of conditions and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice,
+   this list of conditions and the following disclaimer in the documentation
+   and/or other materials provided with the distribution.
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+(INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+The views and conclusions contained in the software and documentation are those
+of the authors and should not be interpreted as representing official policies,
+either expressed or implied, of the FreeBSD Project.
+This material was prepared as an account of work sponsored by an agency of the
+United States Government. Neither the United States Government nor the United
+States Department of Energy, nor Battelle, nor any of their employees, nor any
+jurisdiction or organization that has cooperated in th.e development of these
+materials, makes any warranty, express or implied, or assumes any legal
+liability or responsibility for the accuracy, completeness, or usefulness or
+any information, apparatus, product, software, or process disclosed, or
+represents that its use would not infringe privately owned rights.
+Reference herein to any specific commercial product, process, or service by
+trade name, trademark, manufacturer, or otherwise does not necessarily
+constitute or imply its endorsement, recommendation, or favoring by the
+United States Government or any agency thereof, or Battelle Memorial Institute.
+The views and opinions of authors expressed herein do not necessarily state or
+reflect those of the United States Government or any agency thereof.
+PACIFIC NORTHWEST NATIONAL LABORATORY
+operated by
+BATTELLE
+for the
+UNITED STATES DEPARTMENT OF ENERGY
+under Contract DE-AC05-76RL01830
+"""
+import logging
+import dateutil.tz
+from datetime import datetime, timedelta as td
+from dateutil import parser
+from volttron.platform.messaging import topics
+from volttron.platform.agent.math_utils import mean
+from volttron.platform.agent.utils import setup_logging
+from .diagnostics import common
+from .diagnostics.sat_aircx import SupplyTempAIRCx
+from .diagnostics.schedule_reset_aircx import SchedResetAIRCx
+from .diagnostics.stcpr_aircx import DuctStaticAIRCx
+from .interval_barrier import IntervalBarrier
+
+setup_logging()
+_log = logging.getLogger(__name__)
+logging.basicConfig(level=logging.debug, format="%(asctime)s   %(levelname)-8s %(message)s",
+                    datefmt="%m-%d-%y %H:%M:%S")
+
+
+class AirsideRCx(object):
+    """
+    Platform independent state and data handling for the Airside diagnostics.
+    Subclasses provide publish_results and send_autocorrect_command, which
+    the diagnostics use to report results and issue commands.
+    """
+
+    def __init__(self, **kwargs):
+        super(AirsideRCx, self).__init__(**kwargs)
+
+
+        # list of class attributes.  Default values will be filled in from reading config file
+        # string attributes
+        self.analysis_name = ""
+        self.config = None
+        self.device = {}
+        self.campus = ""
+        self.building = ""
+        self.units = {}
+        self.sensitivity = ""
+        self.fan_status_name = ""
+        self.fan_sp_name = ""
+        self.duct_stcpr_stpt_name = ""
+        self.duct_stcpr_name = ""
+        self.sa_temp_name = ""
+        self.sat_stpt_name = ""
+        self.zn_damper_name = ""
+        self.zn_reheat_name = ""
+        self.initialize_time = None
+        self.timezone = ""
+        self.local_tz = None
+
+        # int attributes
+        self.no_required_data = 0
+        self.warm_up_time = 0
+        self.data_window = 0
+        self.fan_speed = None
+        self.interval = 0
+        self.grace_period = 0
+
+        # float attributes
+        self.stcpr_retuning = 0.0
+        self.min_stcpr_stpt = 0.0
+        self.max_stcpr_stpt = 0.0
+        self.sat_retuning = 0.0
+        self.min_sat_stpt = 0.0
+        self.max_sat_stpt = 0.0
+        self.low_sf_thr = 0.0
+        self.high_sf_thr = 0.0
+        self.stcpr_stpt_deviation_thr = 0.0
+        self.zn_high_damper_thr = 0.0
+        self.zn_low_damper_thr = 0.0
+        self.hdzn_damper_thr = 0.0
+        self.stcpr_reset_thr = 0.0
+        self.sat_stpt_deviation_thr = 0.0
+        self.sat_high_damper_thr = 0.0
+        self.rht_on_thr = 0.0
+        self.percent_reheat_thr = 0.0
+        self.percent_damper_thr = 0.0
+        self.reheat_valve_thr = 0.0
+        self.sat_reset_thr = 0.0
+        self.unocc_time_thr = 0.0
+        self.unocc_stp_thr = 0.0
+        self.missing_data_threshold = 0.0
+
+        # list attributes
+        self.device_list = []
+        self.publish_list = []
+        self.master_devices = []
+        self.missing_data = []
+        self.units = []
+        self.arguments = []
+        self.point_mapping = []
+        self.monday_sch = []
+        self.tuesday_sch = []
+        self.wednesday_sch = []
+        self.thursday_sch = []
+        self.friday_sch = []
+        self.saturday_sch = []
+        self.sunday_sch = []
+        self.fan_status_data = []
+        self.stcpr_stpt_data = []
+        self.stcpr_data = []
+        self.sat_stpt_data = []
+        self.sat_data = []
+        self.zn_rht_data = []
+        self.zn_dmpr_data = []
+        self.fan_sp_data = []
+        self.frame = None
+        self.barrier = None
+        self.stcpr_stpt_deviation_thr_dict = {}
+        self.sat_stpt_deviation_thr_dict = {}
+        self.percent_reheat_thr_dict = {}
+        self.percent_damper_thr_dict = {}
+        self.reheat_valve_thr_dict = {}
+        self.sat_high_damper_thr_dict = {}
+        self.zn_high_damper_thr_dict = {}
+        self.zn_low_damper_thr_dict = {}
+        self.hdzn_damper_thr_dict = {}
+        self.unocc_stp_thr_dict = {}
+        self.unocc_time_thr_dict = {}
+        self.sat_reset_threshold_dict = {}
+        self.stcpr_reset_threshold_dict = {}
+        self.command_tuple = []
+        self.device_topic_dict = {}
+
+        # bool attributes
+        self.auto_correct_flag = None
+        self.warm_up_start = None
+        self.warm_up_flag = True
+        self.unit_status = None
+        self.low_sf_condition = None
+        self.high_sf_condition = None
+        self.actuation_mode = None
+        self.diagnostic_done_flag = True
+
+        # diagnostics
+        self.stcpr_aircx = None
+        self.sat_aircx = None
+        self.sched_reset_aircx = None
+
+    def configure_diagnostics(self):
+        """Parse self.config and build the diagnostics
+        No return
+        """
+        self.device_list = []
+        self.publish_list = []
+        self.master_devices = []
+        self.setup_device_list()
+        self.read_argument_config()
+        self.read_point_mapping()
+        self.configuration_value_check()
+        self.create_thresholds()
+        self.create_diagnostics()
+
+    def stop_diagnostics(self):
+        """Called when the configuration cannot be used
+        No return
+        """
+        raise ValueError("Invalid configuration for {}".format(self.analysis_name))
+
+    def setup_device_list(self):
+        """Setup the device subscriptions"""
+        self.analysis_name = self.config.get("analysis_name", "AirsideAIRCx")
+        self.actuation_mode = self.config.get("actuation_mode", "passive")
+        self.timezone = self.config.get("local_timezone", "US/Pacific")
+        self.local_tz = dateutil.tz.gettz(self.timezone)
+        self.interval = self.config.get("interval", 60)
+        self.grace_period = self.config.get("grace_period", self.interval)
+        self.missing_data_threshold = self.config.get("missing_data_threshold", 15.0) / 100.0
+
+        self.device = self.config.get("device", {})
+        if not self.device:
+            _log.warning("device parameters are not present in configuration file for {}".format(self.analysis_name))
+            self.stop_diagnostics()
+
+        self.campus = self.device.get("campus", "")
+        self.building = self.device.get("building", "")
+        self.units = self.device.get("unit", {})
+        if not self.units:
+            _log.warning("device unit parameters are not present in configuration file for {}".format(self.analysis_name))
+            self.stop_diagnostics()
+        has_zone_information = False
+        for u in self.units:
+            # building the connection string for each unit
+            device_topic = topics.DEVICES_VALUE(campus=self.campus, building=self.building, unit=u, path="",
+                                                point="all")
+            self.device_list.append(device_topic)
+            self.publish_list.append("/".join([self.campus, self.building, u]))
+            self.device_topic_dict.update({device_topic: u})
+            self.master_devices.append(u)
+            # loop over subdevices and add them
+            if "subdevices" in self.units[u]:
+                for sd in self.units[u]["subdevices"]:
+                    has_zone_information = True
+                    subdevice_topic = topics.DEVICES_VALUE(campus=self.campus, building=self.building,
+                                                           unit=u, path=sd, point="all")
+                    self.device_list.append(subdevice_topic)
+                    sd_string = u + "/" + sd
+                    self.master_devices.append(sd_string)
+                    self.device_topic_dict.update({subdevice_topic: sd_string})
+        if not has_zone_information:
+            _log.warning("subdevice (VAV zone information) is missing from device unit configuration for {}".format(self.analysis_name))
+            self.stop_diagnostics()
+        self.initialize_devices()
+
+    def initialize_devices(self):
+        """Start collecting scrape intervals for the devices and blank out the values"""
+        self.barrier = IntervalBarrier(self.master_devices, self.interval, self.grace_period)
+        if self.frame is not None:
+            self.frame.clear()
+
+    def read_argument_config(self):
+        """read all the config arguments section
+        no return
+        """
+        self.arguments = self.config.get("arguments", {})
+        self.no_required_data = self.read_argument("no_required_data", 10)
+        self.warm_up_time = self.read_argument("warm_up_time", 15)
+        self.data_window = self.read_argument("data_window", None)
+        self.stcpr_retuning = self.read_argument("duct_stcpr_retuning", 0.1)
+        self.min_stcpr_stpt = self.read_argument("min_duct_stcpr_stpt", 0.5)
+        self.max_stcpr_stpt= self.read_argument("max_duct_stcpr_stpt", 2.5)
+        self.sat_retuning = self.read_argument("sat_retuning", 1.0)
+        self.min_sat_stpt = self.read_argument("min_sat_stpt", 50.0)
+        self.max_sat_stpt = self.read_argument("max_sat_stpt", 70.0)
+        self.low_sf_thr = self.read_argument("low_sf_thr", 20.0)
+        self.high_sf_thr = self.read_argument("high_sf_thr", 95.0)
+        self.auto_correct_flag = self.read_argument("auto_correct_flag", False)
+        self.stcpr_stpt_deviation_thr = self.read_argument("stcpr_stpt_deviation_thr", 20.0)
+        self.zn_high_damper_thr = self.read_argument("zn_high_damper_thr", 90.0)
+        self.zn_low_damper_thr = self.read_argument("zn_low_damper_thr", 25.0)
+        self.hdzn_damper_thr = self.read_argument("hdzn_damper_thr", 30.0)
+        self.stcpr_reset_thr = self.read_argument("stcpr_reset_thr", 0.25)
+        self.sat_stpt_deviation_thr = self.read_argument("sat_stpt_deviation_thr", 5.0)
+        self.sat_high_damper_thr = self.read_argument("sat_high_damper_thr", 80.0)
+        self.rht_on_thr = self.read_argument("rht_on_thr", 10.0)
+        self.percent_reheat_thr = self.read_argument("percent_reheat_thr", 25.0)
+        self.percent_damper_thr = self.read_argument("percent_damper_thr", 60.0)
+        self.reheat_valve_thr = self.read_argument("reheat_valve_thr", 50.0)
+        self.sat_reset_thr = self.read_argument("sat_reset_thr", 2.0)
+        self.unocc_time_thr = self.read_argument("unocc_time_thr", 40.0)
+        self.unocc_stp_thr = self.read_argument("unocc_stcpr_thr", 0.2)
+        self.monday_sch = self.read_argument("monday_sch", ["5:30", "18:30"])
+        self.tuesday_sch = self.read_argument("tuesday_sch", ["5:30", "18:30"])
+        self.wednesday_sch = self.read_argument("wednesday_sch", ["5:30", "18:30"])
+        self.thursday_sch = self.read_argument("thursday_sch", ["5:30", "18:30"])
+        self.friday_sch = self.read_argument("friday_sch", ["5:30", "18:30"])
+        self.saturday_sch = self.read_argument("saturday_sch", ["0:00", "0:00"])
+        self.sunday_sch = self.read_argument("saturday_sch", ["0:00", "0:00"])
+        self.analysis_name = self.read_argument("analysis_name", "AirsideAIRCx")
+        self.sensitivity = self.read_argument("sensitivity", "default")
+        self.point_mapping = self.read_argument("point_mapping", {})
+
+    def read_argument(self, config_key, default_value):
+        """Method that reads an argument from the config file and returns the value or returns the default value if key is not present in config file
+        return mixed (string or float or int or dict)
+        """
+        return_value = default_value
+        if config_key in self.arguments:
+            return_value = self.arguments[config_key]
+        return return_value
+
+    def read_point_mapping(self):
+        """Method that reads the point mapping and sets the values
+        no return
+        """
+        self.fan_status_name = self.get_point_mapping_or_none("fan_status")
+        self.fan_sp_name = self.get_point_mapping_or_none("fan_speedcmd")
+        self.duct_stcpr_stpt_name = self.get_point_mapping_or_none("duct_stcpr_stpt")
+        self.duct_stcpr_name = self.get_point_mapping_or_none("duct_stcpr")
+        self.sa_temp_name = self.get_point_mapping_or_none("sa_temp")
+        self.sat_stpt_name = self.get_point_mapping_or_none("sat_stpt")
+        self.zn_damper_name = self.get_point_mapping_or_none("zone_damper")
+        self.zn_reheat_name = self.get_point_mapping_or_none("zone_reheat")
+        self.frame = common.ScrapeFrame(self.master_devices,
+                                        [self.fan_status_name, self.fan_sp_name, self.duct_stcpr_stpt_name,
+                                         self.duct_stcpr_name, self.sa_temp_name, self.sat_stpt_name,
+                                         self.zn_damper_name, self.zn_reheat_name])
+
+    def get_point_mapping_or_none(self, name):
+        """ Get the item from the point mapping, or return None
+        return mixed (string or float or int or dic
+        """
+        value = self.point_mapping.get(name, None)
+        return value
+
+    def configuration_value_check(self):
+        """Method goes through the configuration values and checks them for correctness.  Will error if values are not correct. Some may change based on specific settings
+        no return
+        """
+        if self.sensitivity is not None and self.sensitivity == "custom":
+            self.stcpr_stpt_deviation_thr = max(10.0, min(self.stcpr_stpt_deviation_thr, 30.0))
+            self.zn_high_damper_thr = max(70.0, min(self.zn_high_damper_thr, 70.0))
+            self.zn_low_damper_thr = max(0.0, min(self.zn_low_damper_thr, 35.0))
+            self.hdzn_damper_thr = max(20.0, min(self.hdzn_damper_thr, 50.0))
+            self.stcpr_reset_thr = max(0.1, min(self.stcpr_reset_thr, 0.5))
+
+            self.sat_stpt_deviation_thr = max(2.0, min(self.sat_stpt_deviation_thr, 10.0))
+            self.rht_on_thr = max(5.0, min(self.rht_on_thr, 30.0))
+            self.sat_high_damper_thr = max(70.0, min(self.sat_high_damper_thr, 90.0))
+            self.percent_reheat_thr = max(10.0, min(self.percent_reheat_thr, 40.0))
+            self.percent_damper_thr = max(45.0, min(self.percent_damper_thr, 75.0))
+            self.reheat_valve_thr = max(25.0, min(self.reheat_valve_thr, 75.0))
+            self.sat_reset_thr = max(1.0, min(self.reheat_valve_thr, 5.0))
+
+            self.unocc_time_thr = max(20.0, min(self.unocc_time_thr, 60.0))
+            self.unocc_stp_thr = max(0.125, min(self.unocc_stp_thr, 0.3))
+
+            self.stcpr_retuning = max(0.1, min(self.stcpr_retuning, 0.25))
+            self.sat_retuning = max(1.0, min(self.sat_retuning, 3.0))
+        else:
+            self.stcpr_stpt_deviation_thr = 20.0
+            self.zn_high_damper_thr = 90.0
+            self.zn_low_damper_thr = 25.0
+            self.hdzn_damper_thr = 30.0
+            self.stcpr_reset_thr = 0.25
+
+            self.sat_stpt_deviation_thr = 5.0
+            self.rht_on_thr = 10.0
+            self.sat_high_damper_thr = 80.0
+            self.percent_reheat_thr = 25.0
+            self.percent_damper_thr = 60.0
+            self.reheat_valve_thr = 50.0
+            self.sat_reset_thr = 2.0
+
+            self.unocc_time_thr = 40.0
+            self.unocc_stp_thr = 0.2
+
+            self.stcpr_retuning = 0.15
+            self.sat_retuning = 1
+
+        self.data_window = td(minutes=self.data_window) if self.data_window is not None else None
+        self.no_required_data = int(self.no_required_data)
+        self.low_sf_thr = float(self.low_sf_thr)
+        self.high_sf_thr = float(self.high_sf_thr)
+        self.warm_up_time = td(minutes=self.warm_up_time)
+        self.initialize_time = None
+
+        if self.actuation_mode.lower() == "active":
+            self.actuation_mode = True
+        else:
+            self.actuation_mode = False
+
+        if self.fan_sp_name is None and self.fan_status_name is None:
+            _log.error("SupplyFanStatus or SupplyFanSpeed are required to verify AHU status.")
+            _log.error("Exiting diagnostic, check configuration point mapping!")
+            self.stop_diagnostics()
+
+    def create_thresholds(self):
+        """Create all the threshold dictionaries needed"""
+        self.stcpr_stpt_deviation_thr_dict = {
+            "low": self.stcpr_stpt_deviation_thr * 1.5,
+            "normal": self.stcpr_stpt_deviation_thr,
+            "high": self.stcpr_stpt_deviation_thr * 0.5
+        }
+        self.sat_stpt_deviation_thr_dict = {
+            "low": self.sat_stpt_deviation_thr * 1.5,
+            "normal": self.sat_stpt_deviation_thr,
+            "high": self.sat_stpt_deviation_thr * 0.5
+        }
+        self.percent_reheat_thr_dict = {
+            "low": self.percent_reheat_thr,
+            "normal": self.percent_reheat_thr,
+            "high": self.percent_reheat_thr
+        }
+        self.percent_damper_thr_dict = {
+            "low": self.percent_damper_thr + 15.0,
+            "normal": self.percent_damper_thr,
+            "high": self.percent_damper_thr - 15.0
+        }
+        self.reheat_valve_thr_dict = {
+            "low": self.reheat_valve_thr * 1.5,
+            "normal": self.reheat_valve_thr,
+            "high": self.reheat_valve_thr * 0.5
+        }
+        self.sat_high_damper_thr_dict = {
+            "low": self.sat_high_damper_thr + 15.0,
+            "normal": self.sat_high_damper_thr,
+            "high": self.sat_high_damper_thr - 15.0
+        }
+        self.zn_high_damper_thr_dict = {
+            "low": self.zn_high_damper_thr + 5.0,
+            "normal": self.zn_high_damper_thr,
+            "high": self.zn_high_damper_thr - 5.0
+        }
+        self.zn_low_damper_thr_dict = {
+            "low": self.zn_low_damper_thr,
+            "normal": self.zn_low_damper_thr,
+            "high": self.zn_low_damper_thr
+        }
+        self.hdzn_damper_thr_dict = {
+            "low": self.hdzn_damper_thr - 5.0,
+            "normal": self.hdzn_damper_thr,
+            "high": self.hdzn_damper_thr + 5.0
+        }
+        self.unocc_stp_thr_dict = {
+            "low": self.unocc_stp_thr * 1.5,
+            "normal": self.unocc_stp_thr,
+            "high": self.unocc_stp_thr * 0.625
+        }
+        self.unocc_time_thr_dict = {
+            "low": self.unocc_time_thr * 1.5,
+            "normal": self.unocc_time_thr,
+            "high": self.unocc_time_thr * 0.5
+        }
+        self.sat_reset_threshold_dict = {
+            "low": max(self.sat_reset_thr - 1.0, 0.5),
+            "normal": self.sat_reset_thr,
+            "high": self.sat_reset_thr + 1.0
+        }
+        self.stcpr_reset_threshold_dict = {
+            "low": self.stcpr_reset_thr * 0.5,
+            "normal": self.stcpr_reset_thr,
+            "high": self.stcpr_reset_thr * 1.5
+        }
+
+    def create_diagnostics(self):
+        """creates the diagnostic classes
+        No return
+        """
+        self.stcpr_aircx = DuctStaticAIRCx()
+        self.stcpr_aircx.set_class_values(self.command_tuple, self.no_required_data, self.data_window, self.auto_correct_flag,
+                                          self.stcpr_stpt_deviation_thr_dict, self.max_stcpr_stpt, self.stcpr_retuning, self.zn_high_damper_thr_dict,
+                                          self.zn_low_damper_thr_dict, self.hdzn_damper_thr_dict, self.min_stcpr_stpt, self.duct_stcpr_stpt_name)
+        self.stcpr_aircx.setup_platform_interfaces(self.publish_results, self.send_autocorrect_command)
+
+        self.sat_aircx = SupplyTempAIRCx()
+        self.sat_aircx.set_class_values(self.command_tuple, self.no_required_data, self.data_window, self.auto_correct_flag,
+                                        self.sat_stpt_deviation_thr_dict, self.rht_on_thr,
+                                        self.sat_high_damper_thr_dict, self.percent_damper_thr_dict,
+                                        self.percent_reheat_thr_dict, self.min_sat_stpt, self.sat_retuning,
+                                        self.reheat_valve_thr_dict, self.max_sat_stpt, self.sat_stpt_name)
+        self.sat_aircx.setup_platform_interfaces(self.publish_results, self.send_autocorrect_command)
+
+        self.sched_reset_aircx = SchedResetAIRCx()
+        self.sched_reset_aircx.set_class_values(self.unocc_time_thr_dict, self.unocc_stp_thr_dict, self.monday_sch, self.tuesday_sch, self.wednesday_sch,
+                                                self.thursday_sch, self.friday_sch, self.saturday_sch, self.sunday_sch, self.no_required_data,
+                                                self.stcpr_reset_threshold_dict, self.sat_reset_threshold_dict)
+        self.sched_reset_aircx.setup_platform_interfaces(self.publish_results, self.send_autocorrect_command)
+
+    def parse_frame(self):
+        """Read the point arrays used by the diagnostics from the scrape frame
+        no return
+        """
+        self.fan_status_data = self.frame.values(self.fan_status_name)
+        self.stcpr_stpt_data = self.frame.values(self.duct_stcpr_stpt_name)
+        self.stcpr_data = self.frame.values(self.duct_stcpr_name)
+        self.sat_stpt_data = self.frame.values(self.sat_stpt_name)
+        self.sat_data = self.frame.values(self.sa_temp_name)
+        self.zn_rht_data = self.frame.values(self.zn_reheat_name)
+        self.zn_dmpr_data = self.frame.values(self.zn_damper_name)
+        self.fan_sp_data = self.frame.values(self.fan_sp_name)
+
+    def check_for_missing_data(self):
+        """Method that checks the parsed message results for any missing data
+        return bool
+        """
+        self.missing_data = []
+        if not self.fan_status_data and not self.fan_sp_data:
+            self.missing_data.append(self.fan_status_name)
+        if not self.sat_data:
+            self.missing_data.append(self.sa_temp_name)
+        if not self.zn_rht_data:
+            self.missing_data.append(self.zn_reheat_name)
+        if not self.sat_stpt_data:
+            _log.info("SAT set point data is missing.")
+        if not self.stcpr_data:
+            self.missing_data.append(self.duct_stcpr_name)
+        if not self.stcpr_stpt_data:
+            _log.info("Duct static pressure set point data is missing.")
+        if not self.zn_dmpr_data:
+            self.missing_data.append(self.zn_damper_name)
+
+        if self.missing_data:
+            return True
+        return False
+
+    def check_fan_status(self, current_time):
+        """Check the status and speed of the fan
+        current_time: datetime time delta
+        return int
+        """
+        if self.fan_status_data:
+            supply_fan_status = int(max(self.fan_status_data))
+        else:
+            supply_fan_status = None
+
+        if self.fan_sp_data:
+            self.fan_speed = mean(self.fan_sp_data)
+        else:
+            self.fan_speed = None
+        if supply_fan_status is None:
+            if self.fan_speed > self.low_sf_thr:
+                supply_fan_status = 1
+            else:
+                supply_fan_status = 0
+
+        if not supply_fan_status:
+            if self.unit_status is None:
+                self.unit_status = current_time
+        else:
+            self.unit_status = None
+        return supply_fan_status
+
+    def check_elapsed_time(self, current_time):
+        """Check on time since last message to see if it is in data window
+        current_time: datetime time delta
+        condition: datetime time delta
+        message: string
+        """
+        condition = self.unit_status
+        message = common.FAN_OFF
+        if condition is not None:
+            elapsed_time = current_time - condition
+        else:
+            elapsed_time = td(minutes=0)
+        if self.data_window is not None:
+            if elapsed_time >= self.data_window:
+                common.pre_conditions(self.publish_results, message, common.dx_list, current_time)
+                self.clear_all()
+        elif condition is not None and condition.hour != current_time.hour:
+            message_time = condition.replace(minute=0)
+            common.pre_conditions(self.publish_results, message, common.dx_list, message_time)
+            self.clear_all()
+
+    def clear_all(self):
+        """Reinitialize all data arrays for diagnostics.
+        no return
+        """
+        self.sat_aircx.reinitialize()
+        self.stcpr_aircx.reinitialize()
+        self.warm_up_start = None
+        self.warm_up_flag = True
+        self.unit_status = None
+
+    def new_data_message(self, peer, sender, bus, topic, headers, message):
+        """
+        Call back method for curtailable device data subscription.
+        peer: string
+        sender: string
+        bus: string
+        topic: string
+        headers: dict
+        message: dict
+        no return
+        """
+        current_time = parser.parse(headers["Date"])
+        self.process_data_message(topic, current_time, message, datetime.now(dateutil.tz.tzutc()))
+
+    def process_data_message(self, topic, current_time, message, received=None):
+        """
+        Add one device publish to its scrape interval and run the diagnostics
+        for every interval the publish releases.
+        topic: string
+        current_time: datetime, publish time from the message headers
+        message: dict
+        received: datetime, local time the publish arrived
+        no return
+        """
+        if self.initialize_time is None and len(self.master_devices) > 1:
+            self.initialize_time = self.find_reinitialize_time(current_time)
+
+        if self.initialize_time is not None and current_time < self.initialize_time:
+            if len(self.master_devices) > 1:
+                return
+
+        device_data = message[0]
+        if isinstance(device_data, list):
+            device_data = device_data[0]
+
+        device_tag = self.device_topic_dict[topic]
+        _log.debug("Current device to aggregate: %s", device_tag)
+        for frame in self.barrier.add(device_tag, current_time, device_data, received):
+            self.run_frame(frame)
+
+    def release_expired(self, now=None):
+        """
+        Run the diagnostics for scrape intervals whose grace period has
+        passed without another publish to release them.  The barrier measures
+        the grace period in publish time, offset from the local clock.
+        now: datetime, local time, defaults to the current UTC time
+        no return
+        """
+        if self.barrier is None:
+            return
+        if now is None:
+            now = datetime.now(dateutil.tz.tzutc())
+        for frame in self.barrier.expire(now):
+            self.run_frame(frame)
+
+    def run_frame(self, frame):
+        """
+        Run the diagnostics on one released scrape interval.  Partial intervals
+        are analyzed when few enough devices are missing.
+        frame: IntervalFrame
+        no return
+        """
+        current_time = frame.timestamp.astimezone(self.local_tz)
+        if frame.partial:
+            fraction_missing = float(len(frame.missing)) / len(self.master_devices)
+            if fraction_missing > self.missing_data_threshold:
+                _log.error("Too many devices missing, skipping scrape interval %s: %s", current_time, frame.missing)
+                return
+            _log.warning("Using available data for scrape interval %s, missing: %s", current_time, frame.missing)
+        self.frame.clear()
+        for device, values in frame.values.items():
+            self.frame.fill(device, values)
+        self.run_diagnostics(current_time)
+
+    def run_diagnostics(self, current_time):
+        """Run diagnostics on the data that is available in the scrape frame."""
+        _log.info("Processing Results!")
+        self.diagnostic_done_flag = False
+        self.parse_frame()
+        missing_data = self.check_for_missing_data()
+        if missing_data:
+            _log.info("Missing data from publish: %s", self.missing_data)
+            return self.run_diagnostics_done()
+
+        current_fan_status = self.check_fan_status(current_time)
+        self.sched_reset_aircx.schedule_reset_aircx(current_time, self.stcpr_data, self.stcpr_stpt_data,
+                                                    self.sat_stpt_data, current_fan_status)
+        self.check_elapsed_time(current_time)
+        if not current_fan_status:
+            _log.info("Supply fan is off: %s", current_time)
+            self.warm_up_flag = True
+            return self.run_diagnostics_done()
+        _log.info("Supply fan is on: %s", current_time)
+
+        if self.fan_speed is not None and self.fan_speed > self.high_sf_thr:
+            self.low_sf_condition = True
+        else:
+            self.low_sf_condition = False
+
+        if self.fan_speed is not None and self.fan_speed < self.low_sf_thr:
+            self.high_sf_condition = True
+        else:
+            self.high_sf_condition = False
+
+        if self.warm_up_flag:
+            self.warm_up_flag = False
+            self.warm_up_start = current_time
+
+        if self.warm_up_start is not None and (current_time - self.warm_up_start) < self.warm_up_time:
+            _log.info("Unit is in warm-up. Data will not be analyzed.")
+            return self.run_diagnostics_done()
+
+        self.stcpr_aircx.stcpr_aircx(current_time, self.stcpr_stpt_data, self.stcpr_data, self.zn_dmpr_data, self.low_sf_condition, self.high_sf_condition)
+        self.sat_aircx.sat_aircx(current_time, self.sat_data, self.sat_stpt_data, self.zn_rht_data, self.zn_dmpr_data)
+        return self.run_diagnostics_done()
+
+    def find_reinitialize_time(self, current_time):
+        """determine when next data scrape should be"""
+        midnight = current_time.replace(hour=0, minute=0, second=0, microsecond=0)
+        seconds_from_midnight = (current_time - midnight).total_seconds()
+        offset = seconds_from_midnight % self.interval
+        previous_in_seconds = seconds_from_midnight - offset
+        next_in_seconds = previous_in_seconds + self.interval
+        from_midnight = td(seconds=next_in_seconds)
+        _log.debug("Start of next scrape interval: {}".format(midnight + from_midnight))
+        return midnight + from_midnight
+
+    def run_diagnostics_done(self):
+        """Check the results of the diagnostics for publishing, commands, and loading new config"""
+        self.diagnostic_done_flag = True
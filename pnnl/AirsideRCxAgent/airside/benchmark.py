@@ -0,0 +1,130 @@
+"""
+Compare the per-scrape reference AIRCx diagnostics in airside.test with the
+NumPy window kernels the diagnostic classes run, both given a window as the
+per-scrape zone lists the classes keep.
+
+    python -m airside.benchmark [--zones 10 100 500] [--samples 60]
+
+Copyright (c) 2020, Battelle Memorial Institute
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this
+   list of conditions and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice,
+   this list of conditions and the following disclaimer in the documentation
+   and/or other materials provided with the distribution.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+(INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+The views and conclusions contained in the software and documentation are those
+of the authors and should not be interpreted as representing official policies,
+either expressed or implied, of the FreeBSD Project.
+
+This material was prepared as an account of work sponsored by an agency of the
+United States Government. Neither the United States Government nor the United
+States Department of Energy, nor Battelle, nor any of their employees, nor any
+jurisdiction or organization that has cooperated in the development of these
+materials, makes any warranty, express or implied, or assumes any legal
+liability or responsibility for the accuracy, completeness, or usefulness or
+any information, apparatus, product, software, or process disclosed, or
+represents that its use would not infringe privately owned rights.
+
+Reference herein to any specific commercial product, process, or service by
+trade name, trademark, manufacturer, or otherwise does not necessarily
+constitute or imply its endorsement, recommendation, or favoring by the
+United States Government or any agency thereof, or Battelle Memorial Institute.
+The views and opinions of authors expressed herein do not necessarily state or
+reflect those of the United States Government or any agency thereof.
+
+PACIFIC NORTHWEST NATIONAL LABORATORY
+operated by
+BATTELLE
+for the
+UNITED STATES DEPARTMENT OF ENERGY
+under Contract DE-AC05-76RL01830
+"""
+import sys
+import random
+import argparse
+import timeit
+
+from .diagnostics import vectorized
+from .test import (reference_low_sat, reference_high_sat,
+                   reference_low_stcpr_aircx, reference_high_stcpr_aircx)
+
+PERCENT_RHT_THR = {"low": 25.0, "normal": 25.0, "high": 25.0}
+PERCENT_DMPR_THR = {"low": 75.0, "normal": 60.0, "high": 45.0}
+RHT_VALVE_THR = {"low": 75.0, "normal": 50.0, "high": 25.0}
+HIGH_DMPR_THR = {"low": 95.0, "normal": 80.0, "high": 65.0}
+ZN_HIGH_DMPR_THR = {"low": 95.0, "normal": 90.0, "high": 85.0}
+ZN_LOW_DMPR_THR = {"low": 10.0, "normal": 10.0, "high": 10.0}
+HDZN_DMPR_THR = {"low": 25.0, "normal": 30.0, "high": 35.0}
+
+
+def reference_sat(rht, dmpr):
+    """Run the per-scrape reference SAT diagnostics over one window"""
+    reference_low_sat(rht, 55.0, 10.0, RHT_VALVE_THR, PERCENT_RHT_THR, "normal", 1.0, 65.0)
+    reference_high_sat(rht, dmpr, 55.0, 10.0, HIGH_DMPR_THR, PERCENT_DMPR_THR, PERCENT_RHT_THR, "normal", 1.0, 50.0)
+
+
+def vectorized_sat(rht, dmpr):
+    """Run the SAT window kernels over one window"""
+    vectorized.low_sat(rht, 55.0, 10.0, RHT_VALVE_THR, PERCENT_RHT_THR, "normal", 1.0, 65.0)
+    vectorized.high_sat(rht, dmpr, 55.0, 10.0, HIGH_DMPR_THR, PERCENT_DMPR_THR, PERCENT_RHT_THR, "normal", 1.0, 50.0)
+
+
+def reference_stcpr(dmpr):
+    """Run the per-scrape reference duct static pressure diagnostics over one window"""
+    sf_condition = [0] * len(dmpr)
+    reference_low_stcpr_aircx(dmpr, sf_condition, 1.0, ZN_HIGH_DMPR_THR, ZN_LOW_DMPR_THR, "normal", 0.15, 2.5)
+    reference_high_stcpr_aircx(dmpr, sf_condition, 1.0, HDZN_DMPR_THR, "normal", 0.15, 0.5)
+
+
+def vectorized_stcpr(dmpr):
+    """Run the duct static pressure window kernels over one window"""
+    sf_condition = [0] * len(dmpr)
+    vectorized.low_stcpr_aircx(dmpr, sf_condition, 1.0, ZN_HIGH_DMPR_THR, ZN_LOW_DMPR_THR, "normal", 0.15, 2.5)
+    vectorized.high_stcpr_aircx(dmpr, sf_condition, 1.0, HDZN_DMPR_THR, "normal", 0.15, 0.5)
+
+
+def best_time(function, repeat):
+    """Best time of repeat calls in milliseconds"""
+    return min(timeit.repeat(function, number=1, repeat=repeat)) * 1000.0
+
+
+def main(argv=sys.argv):
+    """Print reference and kernel window times for each zone count"""
+    arg_parser = argparse.ArgumentParser(description="Benchmark the AIRCx window kernels")
+    arg_parser.add_argument("--zones", type=int, nargs="+", default=[10, 100, 500], help="zones per AHU")
+    arg_parser.add_argument("--samples", type=int, default=60, help="scrapes per analysis window")
+    arg_parser.add_argument("--repeat", type=int, default=20, help="repetitions, the best is reported")
+    args = arg_parser.parse_args(argv[1:])
+
+    rng = random.Random(0)
+    print("{:>6} {:>12} {:>12} {:>8} {:>12} {:>12} {:>8}".format(
+        "zones", "sat ref ms", "sat np ms", "speedup", "stcpr ref ms", "stcpr np ms", "speedup"))
+    for zones in args.zones:
+        rht = [[rng.uniform(0.0, 100.0) for _ in range(zones)] for _ in range(args.samples)]
+        dmpr = [[rng.uniform(0.0, 100.0) for _ in range(zones)] for _ in range(args.samples)]
+        sat_ref = best_time(lambda: reference_sat(rht, dmpr), args.repeat)
+        sat_np = best_time(lambda: vectorized_sat(rht, dmpr), args.repeat)
+        stcpr_ref = best_time(lambda: reference_stcpr(dmpr), args.repeat)
+        stcpr_np = best_time(lambda: vectorized_stcpr(dmpr), args.repeat)
+        print("{:>6} {:>12.3f} {:>12.3f} {:>7.1f}x {:>12.3f} {:>12.3f} {:>7.1f}x".format(
+            zones, sat_ref, sat_np, sat_ref / sat_np, stcpr_ref, stcpr_np, stcpr_ref / stcpr_np))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -183,3 +183,52 @@ def table_log_format(timestamp, data):
     return str(timestamp) + '->[' + str(data) + ']'
 
 
+
+
+class ScrapeFrame(object):
+    """
+    Point values for one scrape interval stored by column.
+    Every device has a fixed slot and every point a preallocated column
+    indexed by slot, so a device publish is written in place.
+    """
+
+    def __init__(self, devices, points):
+        self.slots = {device: slot for slot, device in enumerate(devices)}
+        self.empty = [None] * len(self.slots)
+        self.columns = {point: self.empty[:] for point in points if point is not None}
+        self.reported = 0
+
+    def fill(self, device, values):
+        """Write one device publish into the device slot
+        device: string
+        values: dictionary of point: value
+
+        No return
+        """
+        slot = self.slots[device]
+        for point, column in self.columns.items():
+            column[slot] = values.get(point)
+        self.reported += 1
+
+    def values(self, point):
+        """Reported values for point in device slot order
+        point: string
+
+        return list of values, devices without a value are skipped
+        """
+        column = self.columns.get(point)
+        if column is None:
+            return []
+        return [value for value in column if value is not None]
+
+    def clear(self):
+        """Blank every column for the next scrape
+
+        No return
+        """
+        for column in self.columns.values():
+            column[:] = self.empty
+        self.reported = 0
+
+    def __len__(self):
+        return self.reported
@@ -50,10 +50,10 @@ UNITED STATES DEPARTMENT OF ENERGY
 under Contract DE-AC05-76RL01830
 """
 import logging
-from collections import defaultdict
 from volttron.platform.agent.math_utils import mean
 from volttron.platform.agent.utils import setup_logging
 from . import common
+from . import vectorized
 
 
 setup_logging()
@@ -72,6 +72,21 @@ DX = "/diagnostic message"
 
 DX_LIST = [SA_TEMP_RCX, SA_TEMP_RCX1, SA_TEMP_RCX2]
 
+LOW_SAT_MSG = {
+    40.0: "{} - No retuning opportunities detected for Low SAT diagnostic.",
+    41.1: "{} - SAT too low. SAT set point increased to: {}F",
+    42.1: "{} - SAT too low. Auto-correcting to max SAT set point {}F",
+    43.1: "{} - SAT detected to be too low but auto-correction is not enabled.",
+    44.1: "{} - The SAT too low but SAT set point data is not available."
+}
+HIGH_SAT_MSG = {
+    50.0: "{} - No problem detected for High SAT diagnostic.",
+    51.1: "{} - SAT too high. SAT set point decreased to: {}F",
+    52.1: "{} - SAT too high. Auto-correcting to min SAT set point {}F",
+    53.1: "{} - The SAT too high but auto-correction is not enabled.",
+    54.1: "{} - The SAT too high but SAT set point data is not available."
+}
+
 
 class SupplyTempAIRCx(object):
     """Air-side HVAC Self-Correcting Diagnostic: Detect and correct supply-air
@@ -82,7 +97,10 @@ class SupplyTempAIRCx(object):
         sat_stpt_arr (List[float]): supply-air temperature set point
             for analysis period.
         satemp_arr (List[float]): supply-air temperature for analysis period.
-        rht_arr (List[float]): terminal box reheat command for analysis period.
+        rht_arr (List[List[float]]): terminal box reheat commands for
+            analysis period.
+        dmpr_arr (List[List[float]]): terminal box damper commands for
+            analysis period.
 
     """
     def __init__(self):
@@ -90,8 +108,7 @@ class SupplyTempAIRCx(object):
         self.sat_stpt_array = []
         self.sat_array = []
         self.rht_array = []
-        self.percent_rht = []
-        self.percent_dmpr = defaultdict(list)
+        self.dmpr_array = []
         self.table_key = None
         self.command_tuple = []
 
@@ -154,8 +171,7 @@ class SupplyTempAIRCx(object):
         self.sat_stpt_array = []
         self.sat_array = []
         self.rht_array = []
-        self.percent_rht = []
-        self.percent_dmpr = defaultdict(list)
+        self.dmpr_array = []
 
     def sat_aircx(self, current_time, sat_data, sat_stpt_data,
                   zone_rht_data, zone_dmpr_data):
@@ -176,13 +192,6 @@ class SupplyTempAIRCx(object):
             Status of diagnostic (dx_status)
 
         """
-        tot_rht = sum(1 if val > self.rht_on_thr else 0 for val in zone_rht_data)
-        count_rht = len(zone_rht_data)
-        tot_dmpr = {}
-        for key, thr in self.high_dmpr_thr.items():
-            tot_dmpr[key] = sum(1 if val > thr else 0 for val in zone_dmpr_data)
-        count_damper = len(zone_dmpr_data)
-
         if common.check_date(current_time, self.timestamp_array):
             common.pre_conditions(self.publish_results, INCONSISTENT_DATE, DX_LIST, current_time)
             self.reinitialize()
@@ -203,13 +212,31 @@ class SupplyTempAIRCx(object):
             self.reinitialize()
 
         self.sat_array.append(mean(sat_data))
-        self.rht_array.append(mean(zone_rht_data))
+        self.rht_array.append(zone_rht_data)
+        self.dmpr_array.append(zone_dmpr_data)
         if sat_stpt_data:
             self.sat_stpt_array.append(mean(sat_stpt_data))
-        self.percent_rht.append(tot_rht / count_rht)
         self.timestamp_array.append(current_time)
-        for key in self.high_dmpr_thr:
-            self.percent_dmpr[key].append(tot_dmpr[key] / count_damper)
+
+    def send_results(self, dx_name, diagnostic_msg, messages, command):
+        """
+        Log and publish a SAT diagnostic result, sending the auto-correct
+        set point first when there is one.
+        :param dx_name:
+        :param diagnostic_msg:
+        :param messages: log message for each result code
+        :param command: SAT set point command or None
+        :return:
+        """
+        sat_stpt = None
+        if command is not None:
+            self.send_autocorrect_command(self.sat_stpt_cname, command)
+            sat_stpt = "%s" % float("%.2g" % command)
+        for key, result in diagnostic_msg.items():
+            _log.info(messages[result].format(key, sat_stpt))
+
+        _log.info(common.table_log_format(self.timestamp_array[-1], (dx_name + DX + ": " + str(diagnostic_msg))))
+        self.publish_results(self.timestamp_array[-1], dx_name + DX, diagnostic_msg)
 
     def low_sat(self, avg_sat_stpt):
         """
@@ -218,43 +245,10 @@ class SupplyTempAIRCx(object):
         :param avg_sat_stpt:
         :return:
         """
-        avg_zones_rht = mean(self.percent_rht)*100.0
-        rht_avg = mean(self.rht_array)
-        thresholds = zip(self.rht_valve_thr.items(), self.percent_rht_thr.items())
-        diagnostic_msg = {}
-
-        for (key, rht_valve_thr), (key2, percent_rht_thr) in thresholds:
-            if rht_avg > rht_valve_thr and avg_zones_rht > percent_rht_thr:
-                if avg_sat_stpt is None:
-                    # Create diagnostic message for fault
-                    # when supply-air temperature set point
-                    # is not available.
-                    msg = "{} - The SAT too low but SAT set point data is not available.".format(key)
-                    result = 44.1
-                elif self.auto_correct_flag and self.auto_correct_flag == key:
-                    aircx_sat_stpt = avg_sat_stpt + self.sat_retuning
-                    if aircx_sat_stpt <= self.max_sat_stpt:
-                        self.send_autocorrect_command(self.sat_stpt_cname, aircx_sat_stpt)
-                        sat_stpt = "%s" % float("%.2g" % aircx_sat_stpt)
-                        msg = "{} - SAT too low. SAT set point increased to: {}F".format(key, sat_stpt)
-                        result = 41.1
-                    else:
-                        self.send_autocorrect_command(self.sat_stpt_cname, self.max_sat_stpt)
-                        sat_stpt = "%s" % float("%.2g" % self.max_sat_stpt)
-                        sat_stpt = str(sat_stpt)
-                        msg = "{} - SAT too low. Auto-correcting to max SAT set point {}F".format(key, sat_stpt)
-                        result = 42.1
-                else:
-                    msg = "{} - SAT detected to be too low but auto-correction is not enabled.".format(key)
-                    result = 43.1
-            else:
-                msg = "{} - No retuning opportunities detected for Low SAT diagnostic.".format(key)
-                result = 40.0
-            diagnostic_msg.update({key: result})
-            _log.info(msg)
-
-        _log.info(common.table_log_format(self.timestamp_array[-1], (SA_TEMP_RCX1 + DX + ": " + str(diagnostic_msg))))
-        self.publish_results(self.timestamp_array[-1], SA_TEMP_RCX1 + DX, diagnostic_msg)
+        diagnostic_msg, command = vectorized.low_sat(self.rht_array, avg_sat_stpt, self.rht_on_thr,
+                                                     self.rht_valve_thr, self.percent_rht_thr,
+                                                     self.auto_correct_flag, self.sat_retuning, self.max_sat_stpt)
+        self.send_results(SA_TEMP_RCX1, diagnostic_msg, LOW_SAT_MSG, command)
 
     def high_sat(self, avg_sat_stpt):
         """
@@ -263,46 +257,8 @@ class SupplyTempAIRCx(object):
         :param avg_sat_stpt:
         :return:
         """
-        avg_zones_rht = mean(self.percent_rht)*100.0
-        thresholds = zip(self.percent_dmpr_thr.items(), self.percent_rht_thr.items())
-        diagnostic_msg = {}
-
-        for (key, percent_dmpr_thr), (key2, percent_rht_thr) in thresholds:
-            avg_zone_dmpr_data = mean(self.percent_dmpr[key]) * 100.0
-            if avg_zone_dmpr_data > percent_dmpr_thr and avg_zones_rht < percent_rht_thr:
-                if avg_sat_stpt is None:
-                    # Create diagnostic message for fault
-                    # when supply-air temperature set point
-                    # is not available.
-                    msg = "{} - The SAT too high but SAT set point data is not available.".format(key)
-                    result = 54.1
-                elif self.auto_correct_flag and self.auto_correct_flag == key:
-                    aircx_sat_stpt = avg_sat_stpt - self.sat_retuning
-                    # Create diagnostic message for fault condition
-                    # with auto-correction
-                    if aircx_sat_stpt >= self.min_sat_stpt:
-                        self.send_autocorrect_command(self.sat_stpt_cname, aircx_sat_stpt)
-                        sat_stpt = "%s" % float("%.2g" % aircx_sat_stpt)
-                        msg = "{} - SAT too high. SAT set point decreased to: {}F".format(key, sat_stpt)
-                        result = 51.1
-                    else:
-                        # Create diagnostic message for fault condition
-                        # where the maximum SAT has been reached
-                        self.send_autocorrect_command(self.sat_stpt_cname, self.min_sat_stpt)
-                        sat_stpt = "%s" % float("%.2g" % self.min_sat_stpt)
-                        msg = "{} - SAT too high. Auto-correcting to min SAT set point {}F".format(key, sat_stpt)
-                        result = 52.1
-                else:
-                    # Create diagnostic message for fault condition
-                    # without auto-correction
-                    msg = "{} - The SAT too high but auto-correction is not enabled.".format(key)
-                    result = 53.1
-            else:
-                msg = "{} - No problem detected for High SAT diagnostic.".format(key)
-                result = 50.0
-            diagnostic_msg.update({key: result})
-            _log.info(msg)
-
-        _log.info(common.table_log_format(self.timestamp_array[-1], (SA_TEMP_RCX2 + DX + ": " + str(diagnostic_msg))))
-        self.publish_results(self.timestamp_array[-1], SA_TEMP_RCX2 + DX, diagnostic_msg)
-
+        diagnostic_msg, command = vectorized.high_sat(self.rht_array, self.dmpr_array, avg_sat_stpt,
+                                                      self.rht_on_thr, self.high_dmpr_thr, self.percent_dmpr_thr,
+                                                      self.percent_rht_thr, self.auto_correct_flag,
+                                                      self.sat_retuning, self.min_sat_stpt)
+        self.send_results(SA_TEMP_RCX2, diagnostic_msg, HIGH_SAT_MSG, command)
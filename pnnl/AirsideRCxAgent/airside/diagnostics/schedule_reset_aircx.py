@@ -56,6 +56,7 @@ from dateutil.parser import parse
 from volttron.platform.agent.math_utils import mean
 from volttron.platform.agent.utils import setup_logging
 from . import common
+from . import vectorized
 
 DUCT_STC_RCX3 = "No Static Pressure Reset Dx"
 SA_TEMP_RCX3 = "No Supply-air Temperature Reset Dx"
@@ -65,6 +66,14 @@ DX = "/diagnostic message"
 INCONSISTENT_DATE = -89.2
 INSUFFICIENT_DATA = -79.2
 
+UNOCC_FAN_MSG = {
+    60.0: "{} - No problems detected for schedule diagnostic.",
+    63.1: "{} - Supply fan is on during unoccupied times",
+    64.2: ("{} - Fan status show the fan is off but the duct static "
+           "pressure is high, check the functionality of the "
+           "pressure sensor.")
+}
+
 setup_logging()
 _log = logging.getLogger(__name__)
 logging.basicConfig(level=logging.debug, format="%(asctime)s   %(levelname)-8s %(message)s",
@@ -238,59 +247,21 @@ class SchedResetAIRCx(object):
         AIRCx to determine if AHU is operating excessively in unoccupied mode.
         :return:
         """
-        avg_duct_stcpr = 0
-        percent_on = 0
-        fan_status_on = [(fan[0].hour, fan[1]) for fan in self.fan_status_array if int(fan[1]) == 1]
-        fanstat = [(fan[0].hour, fan[1]) for fan in self.fan_status_array]
-        hourly_counter = []
-        thresholds = zip(self.unocc_time_thr.items(), self.unocc_stcpr_thr.items())
-        diagnostic_msg = {}
-
-        for counter in range(24):
-            fan_on_count = [fan_status_time[1] for fan_status_time in fan_status_on if fan_status_time[0] == counter]
-            fan_count = [fan_status_time[1] for fan_status_time in fanstat if fan_status_time[0] == counter]
-            if len(fan_count):
-                hourly_counter.append(fan_on_count.count(1)/len(fan_count)*100)
-            else:
-                hourly_counter.append(0)
-
+        diagnostic_msg, hourly = vectorized.unocc_fan_operation([fan[0].hour for fan in self.fan_status_array],
+                                                                [fan[1] for fan in self.fan_status_array],
+                                                                self.stcpr_array, self.unocc_time_thr,
+                                                                self.unocc_stcpr_thr)
         if self.schedule_time_array:
-            if self.fan_status_array:
-                percent_on = (len(fan_status_on)/len(self.fan_status_array)) * 100.0
-            if self.stcpr_array:
-                avg_duct_stcpr = mean(self.stcpr_array)
-
-            for (key, unocc_time_thr), (key2, unocc_stcpr_thr) in thresholds:
-                if percent_on > unocc_time_thr:
-                    msg = "{} - Supply fan is on during unoccupied times".format(key)
-                    result = 63.1
-                else:
-                    if avg_duct_stcpr < unocc_stcpr_thr:
-                        msg = "{} - No problems detected for schedule diagnostic.".format(key)
-                        result = 60.0
-                    else:
-                        msg = ("{} - Fan status show the fan is off but the duct static "
-                               "pressure is high, check the functionality of the "
-                               "pressure sensor.".format(key))
-                        result = 64.2
-                diagnostic_msg.update({key: result})
-                _log.info(msg)
+            for key, result in diagnostic_msg.items():
+                _log.info(UNOCC_FAN_MSG[result].format(key))
         else:
-            msg = "ALL - No problems detected for schedule diagnostic."
-            _log.info(msg)
-            diagnostic_msg = {"low": 60.0, "normal": 60.0, "high": 60.0}
+            _log.info(UNOCC_FAN_MSG[60.0].format("ALL"))
 
-        if 64.2 not in diagnostic_msg.values():
-            for _hour in range(24):
-                diagnostic_msg = {}
-                utc_offset = self.timestamp_array[0].isoformat()[-6:]
+        if hourly is not None:
+            for _hour, diagnostic_msg in enumerate(hourly):
                 push_time = self.timestamp_array[0].date()
                 push_time = datetime.combine(push_time, datetime.min.time())
                 push_time = push_time.replace(hour=_hour)
-                for key, unocc_time_thr in self.unocc_time_thr.items():
-                    diagnostic_msg.update({key: 60.0})
-                    if hourly_counter[_hour] > unocc_time_thr:
-                        diagnostic_msg.update({key: 63.1})
                 _log.info(common.table_log_format(push_time, (SCHED_RCX + DX + ':' + str(diagnostic_msg))))
                 self.publish_results(push_time, SCHED_RCX + DX, diagnostic_msg)
         else:
@@ -49,11 +49,11 @@ for the
 UNITED STATES DEPARTMENT OF ENERGY
 under Contract DE-AC05-76RL01830
 """
-import math
 import logging
 from volttron.platform.agent.math_utils import mean
 from volttron.platform.agent.utils import setup_logging
 from . import common
+from . import vectorized
 
 INCONSISTENT_DATE = -89.2
 INSUFFICIENT_DATA = -79.2
@@ -63,6 +63,23 @@ DUCT_STC_RCX2 = "High Duct Static Pressure Dx"
 DX = "/diagnostic message"
 DX_LIST = [DUCT_STC_RCX, DUCT_STC_RCX1, DUCT_STC_RCX2]
 
+LOW_STCPR_MSG = {
+    10.0: "{} - no retuning opportunities detected for Low duct static pressure diagnostic.",
+    11.1: "{} - duct static pressure too low. Set point increased to: {}",
+    12.1: "{} - duct static pressure too low. Set point increased to max {}.",
+    13.1: "{} - duct static pressure is too low but auto-correction is not enabled.",
+    14.1: "{} - duct static pressure is too low but set point data is not available.",
+    15.1: "{} - duct static pressure too low. Supply fan at maximum."
+}
+HIGH_STCPR_MSG = {
+    20.0: "{} - No retuning opportunities detected for high duct static pressure diagnostic.",
+    21.1: "{} - duct static pressure too high. Set point decreased to: {}",
+    22.1: "{} - duct static pressure too high. Set point decreased to min {}.",
+    23.1: "{} - duct static pressure is too high but auto-correction is not enabled.",
+    24.1: "{} - duct static pressure is too high but set point data is not available.",
+    25.1: "{} - duct static pressure too high. Supply fan at minimum."
+}
+
 setup_logging()
 _log = logging.getLogger(__name__)
 logging.basicConfig(level=logging.debug, format="%(asctime)s   %(levelname)-8s %(message)s",
@@ -95,9 +112,7 @@ class DuctStaticAIRCx(object):
         self.auto_correct_flag = False
         self.min_stcpr_stpt = 0
         self.hdzn_dmpr_thr = {}
-        self.ls_dmpr_low_avg = []
-        self.ls_dmpr_high_avg = []
-        self.hs_dmpr_high_avg = []
+        self.zn_dmpr_array = []
         self.low_sf_condition = []
         self.high_sf_condition = []
         self.command_tuple = []
@@ -139,9 +154,7 @@ class DuctStaticAIRCx(object):
         self.stcpr_stpt_array = []
         self.stcpr_array = []
         self.timestamp_array = []
-        self.ls_dmpr_low_avg = []
-        self.ls_dmpr_high_avg = []
-        self.hs_dmpr_high_avg = []
+        self.zn_dmpr_array = []
         self.low_sf_condition = []
         self.high_sf_condition = []
 
@@ -178,68 +191,43 @@ class DuctStaticAIRCx(object):
         self.stcpr_array.append(mean(stcpr_data))
         if stcpr_stpt_data:
             self.stcpr_stpt_array.append(mean(stcpr_stpt_data))
-
-        zn_dmpr_data.sort(reverse=False)
-        self.ls_dmpr_low_avg.extend(zn_dmpr_data[:int(math.ceil(len(zn_dmpr_data) * 0.5)) if len(zn_dmpr_data) != 1 else 1])
-        self.ls_dmpr_high_avg.extend(zn_dmpr_data[int(math.ceil(len(zn_dmpr_data) * 0.5)) - 1 if len(zn_dmpr_data) != 1 else 0:])
-
-        zn_dmpr_data.sort(reverse=True)
-        self.hs_dmpr_high_avg.extend(zn_dmpr_data[:int(math.ceil(len(zn_dmpr_data) * 0.5)) if len(zn_dmpr_data) != 1 else 1])
-
+        self.zn_dmpr_array.append(zn_dmpr_data)
         self.low_sf_condition.append(low_sf_cond if low_sf_cond is not None else 0)
         self.high_sf_condition.append(high_sf_cond if high_sf_cond is not None else 0)
         self.timestamp_array.append(current_time)
 
+    def send_results(self, dx_name, diagnostic_msg, messages, command):
+        """
+        Log and publish a duct static pressure diagnostic result, sending the
+        auto-correct set point first when there is one.
+        :param dx_name:
+        :param diagnostic_msg:
+        :param messages: log message for each result code
+        :param command: duct static pressure set point command or None
+        :return:
+        """
+        stcpr_stpt = None
+        if command is not None:
+            self.send_autocorrect_command(self.stcpr_stpt_cname, command)
+            stcpr_stpt = "%s" % float("%.2g" % command)
+            stcpr_stpt = stcpr_stpt + " in. w.g."
+        for key, result in diagnostic_msg.items():
+            _log.info(messages[result].format(key, stcpr_stpt))
+
+        _log.info(common.table_log_format(self.timestamp_array[-1], (dx_name + DX + ": " + str(diagnostic_msg))))
+        self.publish_results(self.timestamp_array[-1], dx_name + DX, diagnostic_msg)
+
     def low_stcpr_aircx(self, avg_stcpr_stpt):
         """
         AIRCx to identify and correct low duct static pressure.
         :param avg_stcpr_stpt:
         :return:
         """
-        dmpr_low_avg = mean(self.ls_dmpr_low_avg)
-        dmpr_high_avg = mean(self.ls_dmpr_high_avg)
-        low_sf_condition = True if sum(self.low_sf_condition)/len(self.low_sf_condition) > 0.5 else False
-        thresholds = zip(self.zn_high_dmpr_thr.items(), self.zn_low_dmpr_thr.items())
-        diagnostic_msg = {}
-
-        for (key, zn_high_dmpr_thr), (key2, zn_low_dmpr_thr) in thresholds:
-            if dmpr_high_avg > zn_high_dmpr_thr and dmpr_low_avg > zn_low_dmpr_thr:
-                if low_sf_condition is not None and low_sf_condition:
-                    msg = "{} - duct static pressure too low. Supply fan at maximum.".format(key)
-                    result = 15.1
-                elif avg_stcpr_stpt is None:
-                    # Create diagnostic message for fault
-                    # when duct static pressure set point
-                    # is not available.
-                    msg = "{} - duct static pressure is too low but set point data is not available.".format(key)
-                    result = 14.1
-                elif self.auto_correct_flag and self.auto_correct_flag == key:
-                    aircx_stcpr_stpt = avg_stcpr_stpt + self.stcpr_retuning
-                    if aircx_stcpr_stpt <= self.max_stcpr_stpt:
-                        self.send_autocorrect_command(self.stcpr_stpt_cname, aircx_stcpr_stpt)
-                        stcpr_stpt = "%s" % float("%.2g" % aircx_stcpr_stpt)
-                        stcpr_stpt = stcpr_stpt + " in. w.g."
-                        msg = "{} - duct static pressure too low. Set point increased to: {}".format(key,
-                                                                                                     stcpr_stpt)
-                        result = 11.1
-                    else:
-                        self.send_autocorrect_command(self.stcpr_stpt_cname, self.max_stcpr_stpt)
-                        stcpr_stpt = "%s" % float("%.2g" % self.max_stcpr_stpt)
-                        stcpr_stpt = stcpr_stpt + " in. w.g."
-                        msg = "{} - duct static pressure too low. Set point increased to max {}.".format(key,
-                                                                                                         stcpr_stpt)
-                        result = 12.1
-                else:
-                    msg = "{} - duct static pressure is too low but auto-correction is not enabled.".format(key)
-                    result = 13.1
-            else:
-                msg = "{} - no retuning opportunities detected for Low duct static pressure diagnostic.".format(key)
-                result = 10.0
-            diagnostic_msg.update({key: result})
-            _log.info(msg)
-
-        _log.info(common.table_log_format(self.timestamp_array[-1], (DUCT_STC_RCX1 + DX + ": " + str(diagnostic_msg))))
-        self.publish_results(self.timestamp_array[-1], DUCT_STC_RCX1 + DX, diagnostic_msg)
+        diagnostic_msg, command = vectorized.low_stcpr_aircx(self.zn_dmpr_array, self.low_sf_condition,
+                                                             avg_stcpr_stpt, self.zn_high_dmpr_thr,
+                                                             self.zn_low_dmpr_thr, self.auto_correct_flag,
+                                                             self.stcpr_retuning, self.max_stcpr_stpt)
+        self.send_results(DUCT_STC_RCX1, diagnostic_msg, LOW_STCPR_MSG, command)
 
     def high_stcpr_aircx(self, avg_stcpr_stpt):
         """
@@ -247,45 +235,8 @@ class DuctStaticAIRCx(object):
         :param avg_stcpr_stpt::
         :return:
         """
-        high_sf_condition = True if sum(self.high_sf_condition) / len(self.high_sf_condition) > 0.5 else False
-        dmpr_high_avg = mean(self.hs_dmpr_high_avg)
-        diagnostic_msg = {}
-
-        for key, hdzn_dmpr_thr in self.hdzn_dmpr_thr.items():
-            if dmpr_high_avg <= hdzn_dmpr_thr:
-                if high_sf_condition is not None and high_sf_condition:
-                    msg = "{} - duct static pressure too high. Supply fan at minimum.".format(key)
-                    result = 25.1
-                elif avg_stcpr_stpt is None:
-                    # Create diagnostic message for fault
-                    # when duct static pressure set point
-                    # is not available.
-                    msg = "{} - duct static pressure is too high but set point data is not available.".format(key)
-                    result = 24.1
-                elif self.auto_correct_flag and self.auto_correct_flag == key:
-                    aircx_stcpr_stpt = avg_stcpr_stpt - self.stcpr_retuning
-                    if aircx_stcpr_stpt >= self.min_stcpr_stpt:
-                        self.send_autocorrect_command(self.stcpr_stpt_cname, aircx_stcpr_stpt)
-                        stcpr_stpt = "%s" % float("%.2g" % aircx_stcpr_stpt)
-                        stcpr_stpt = stcpr_stpt + " in. w.g."
-                        msg = "{} - duct static pressure too high. Set point decreased to: {}".format(key,
-                                                                                                      stcpr_stpt)
-                        result = 21.1
-                    else:
-                        self.send_autocorrect_command(self.stcpr_stpt_cname, self.min_stcpr_stpt)
-                        stcpr_stpt = "%s" % float("%.2g" % self.min_stcpr_stpt)
-                        stcpr_stpt = stcpr_stpt + " in. w.g."
-                        msg = "{} - duct static pressure too high. Set point decreased to min {}.".format(key,
-                                                                                                          stcpr_stpt)
-                        result = 22.1
-                else:
-                    msg = "{} - duct static pressure is too high but auto-correction is not enabled.".format(key)
-                    result = 23.1
-            else:
-                msg = "{} - No retuning opportunities detected for high duct static pressure diagnostic.".format(key)
-                result = 20.0
-            diagnostic_msg.update({key: result})
-            _log.info(msg)
-
-        _log.info(common.table_log_format(self.timestamp_array[-1], (DUCT_STC_RCX2 + DX + ": " + str(diagnostic_msg))))
-        self.publish_results(self.timestamp_array[-1], DUCT_STC_RCX2 + DX, diagnostic_msg)
+        diagnostic_msg, command = vectorized.high_stcpr_aircx(self.zn_dmpr_array, self.high_sf_condition,
+                                                              avg_stcpr_stpt, self.hdzn_dmpr_thr,
+                                                              self.auto_correct_flag, self.stcpr_retuning,
+                                                              self.min_stcpr_stpt)
+        self.send_results(DUCT_STC_RCX2, diagnostic_msg, HIGH_STCPR_MSG, command)
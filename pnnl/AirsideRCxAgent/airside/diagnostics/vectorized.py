@@ -0,0 +1,347 @@
+"""
+NumPy implementations of the AIRCx window calculations.
+
+Each function evaluates a complete analysis window at once.  Zone data is a
+2-D time x zone array (or list of per-timestamp lists, padded with NaN for
+zones that did not report).  SupplyTempAIRCx, DuctStaticAIRCx and
+SchedResetAIRCx keep the per-scrape zone values and call these functions at
+the end of each window; the functions return the diagnostic messages plus
+the auto-correct set point (or None) and the classes publish them.
+
+Copyright (c) 2020, Battelle Memorial Institute
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this
+   list of conditions and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice,
+   this list of conditions and the following disclaimer in the documentation
+   and/or other materials provided with the distribution.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+(INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+The views and conclusions contained in the software and documentation are those
+of the authors and should not be interpreted as representing official policies,
+either expressed or implied, of the FreeBSD Project.
+
+This material was prepared as an account of work sponsored by an agency of the
+United States Government. Neither the United States Government nor the United
+States Department of Energy, nor Battelle, nor any of their employees, nor any
+jurisdiction or organization that has cooperated in the development of these
+materials, makes any warranty, express or implied, or assumes any legal
+liability or responsibility for the accuracy, completeness, or usefulness or
+any information, apparatus, product, software, or process disclosed, or
+represents that its use would not infringe privately owned rights.
+
+Reference herein to any specific commercial product, process, or service by
+trade name, trademark, manufacturer, or otherwise does not necessarily
+constitute or imply its endorsement, recommendation, or favoring by the
+United States Government or any agency thereof, or Battelle Memorial Institute.
+The views and opinions of authors expressed herein do not necessarily state or
+reflect those of the United States Government or any agency thereof.
+
+PACIFIC NORTHWEST NATIONAL LABORATORY
+operated by
+BATTELLE
+for the
+UNITED STATES DEPARTMENT OF ENERGY
+under Contract DE-AC05-76RL01830
+"""
+import numpy as np
+
+
+def zone_matrix(zone_data):
+    """
+    Build a float time x zone array from per-timestamp zone values.
+    Rows shorter than the widest row are padded with NaN.
+    :param zone_data: 2-D array or list of lists of zone values
+    :return: numpy.ndarray
+    """
+    if isinstance(zone_data, np.ndarray):
+        return np.atleast_2d(zone_data.astype(float, copy=False))
+    widths = set(len(row) for row in zone_data)
+    if len(widths) == 1:
+        return np.array(zone_data, dtype=float).reshape(len(zone_data), -1)
+    width = max(widths) if widths else 0
+    matrix = np.full((len(zone_data), width), np.nan)
+    for index, row in enumerate(zone_data):
+        matrix[index, :len(row)] = row
+    return matrix
+
+
+def fraction_above(matrix, threshold):
+    """
+    Fraction of reporting zones above threshold for each timestamp.
+    :param matrix: time x zone array
+    :param threshold:
+    :return: numpy.ndarray, one value per timestamp
+    """
+    return (matrix > threshold).sum(axis=1) / (~np.isnan(matrix)).sum(axis=1)
+
+
+def low_sat(zn_rht, avg_sat_stpt, rht_on_thr, rht_valve_thr, percent_rht_thr,
+            auto_correct_flag, sat_retuning, max_sat_stpt):
+    """
+    Diagnostic to identify and correct low supply-air temperature.
+    :param zn_rht: time x zone reheat command
+    :param avg_sat_stpt: average SAT set point or None
+    :param rht_on_thr:
+    :param rht_valve_thr: sensitivity: threshold
+    :param percent_rht_thr: sensitivity: threshold
+    :param auto_correct_flag: sensitivity to auto-correct or False
+    :param sat_retuning:
+    :param max_sat_stpt:
+    :return: diagnostic message, SAT set point command or None
+    """
+    zn_rht = zone_matrix(zn_rht)
+    rht_avg = (np.nansum(zn_rht, axis=1) / (~np.isnan(zn_rht)).sum(axis=1)).mean()
+    avg_zones_rht = fraction_above(zn_rht, rht_on_thr).mean() * 100.0
+    thresholds = zip(rht_valve_thr.items(), percent_rht_thr.items())
+    diagnostic_msg = {}
+    command = None
+
+    for (key, valve_thr), (key2, percent_thr) in thresholds:
+        if rht_avg > valve_thr and avg_zones_rht > percent_thr:
+            if avg_sat_stpt is None:
+                result = 44.1
+            elif auto_correct_flag and auto_correct_flag == key:
+                command = avg_sat_stpt + sat_retuning
+                result = 41.1
+                if command > max_sat_stpt:
+                    command = max_sat_stpt
+                    result = 42.1
+            else:
+                result = 43.1
+        else:
+            result = 40.0
+        diagnostic_msg.update({key: result})
+    return diagnostic_msg, command
+
+
+def high_sat(zn_rht, zn_dmpr, avg_sat_stpt, rht_on_thr, high_dmpr_thr, percent_dmpr_thr,
+             percent_rht_thr, auto_correct_flag, sat_retuning, min_sat_stpt):
+    """
+    Diagnostic to identify and correct high supply-air temperature.
+    :param zn_rht: time x zone reheat command
+    :param zn_dmpr: time x zone damper command
+    :param avg_sat_stpt: average SAT set point or None
+    :param rht_on_thr:
+    :param high_dmpr_thr: sensitivity: threshold
+    :param percent_dmpr_thr: sensitivity: threshold
+    :param percent_rht_thr: sensitivity: threshold
+    :param auto_correct_flag: sensitivity to auto-correct or False
+    :param sat_retuning:
+    :param min_sat_stpt:
+    :return: diagnostic message, SAT set point command or None
+    """
+    zn_dmpr = zone_matrix(zn_dmpr)
+    avg_zones_rht = fraction_above(zone_matrix(zn_rht), rht_on_thr).mean() * 100.0
+    thresholds = zip(percent_dmpr_thr.items(), percent_rht_thr.items())
+    diagnostic_msg = {}
+    command = None
+
+    for (key, dmpr_thr), (key2, rht_thr) in thresholds:
+        avg_zone_dmpr = fraction_above(zn_dmpr, high_dmpr_thr[key]).mean() * 100.0
+        if avg_zone_dmpr > dmpr_thr and avg_zones_rht < rht_thr:
+            if avg_sat_stpt is None:
+                result = 54.1
+            elif auto_correct_flag and auto_correct_flag == key:
+                command = avg_sat_stpt - sat_retuning
+                result = 51.1
+                if command < min_sat_stpt:
+                    command = min_sat_stpt
+                    result = 52.1
+            else:
+                result = 53.1
+        else:
+            result = 50.0
+        diagnostic_msg.update({key: result})
+    return diagnostic_msg, command
+
+
+def sorted_prefix_sums(zn_dmpr):
+    """
+    Sort each timestamp's zone dampers and take running sums so the sum of
+    any run of sorted zones is a difference of two lookups.
+    :param zn_dmpr: time x zone damper command
+    :return: running sums (leading zero column), zone counts, half counts
+    """
+    zn_dmpr = np.sort(zone_matrix(zn_dmpr), axis=1)
+    missing = np.isnan(zn_dmpr)
+    counts = zn_dmpr.shape[1] - missing.sum(axis=1)
+    if counts.min() < zn_dmpr.shape[1]:
+        zn_dmpr[missing] = 0.0
+    prefix = np.zeros((zn_dmpr.shape[0], zn_dmpr.shape[1] + 1))
+    np.cumsum(zn_dmpr, axis=1, out=prefix[:, 1:])
+    half = np.ceil(counts * 0.5).astype(int)
+    return prefix, counts, half
+
+
+def prefix_sum(prefix, index):
+    """Total of the running sums at one index per timestamp"""
+    return np.take_along_axis(prefix, index[:, np.newaxis], axis=1).sum()
+
+
+def damper_averages(zn_dmpr):
+    """
+    Average of the least open half and the most open half (both including
+    the middle zone) for each timestamp, pooled over the window.
+    :param zn_dmpr: time x zone damper command
+    :return: low half average, high half average
+    """
+    prefix, counts, half = sorted_prefix_sums(zn_dmpr)
+    total = prefix_sum(prefix, counts)
+    low_sum = prefix_sum(prefix, half)
+    high_sum = total - prefix_sum(prefix, half - 1)
+    return low_sum / half.sum(), high_sum / (counts - half + 1).sum()
+
+
+def most_open_average(zn_dmpr):
+    """
+    Average of the most open half of the zone dampers for each timestamp,
+    pooled over the window.
+    :param zn_dmpr: time x zone damper command
+    :return: float
+    """
+    prefix, counts, half = sorted_prefix_sums(zn_dmpr)
+    return (prefix_sum(prefix, counts) - prefix_sum(prefix, counts - half)) / half.sum()
+
+
+def supply_fan_condition(sf_condition):
+    """
+    True when the supply fan condition held for most of the window.
+    :param sf_condition: condition per timestamp, None counts as 0
+    :return: bool
+    """
+    sf_condition = np.array([0 if value is None else value for value in sf_condition], dtype=float)
+    return bool(sf_condition.mean() > 0.5)
+
+
+def low_stcpr_aircx(zn_dmpr, low_sf_condition, avg_stcpr_stpt, zn_high_dmpr_thr, zn_low_dmpr_thr,
+                    auto_correct_flag, stcpr_retuning, max_stcpr_stpt):
+    """
+    AIRCx to identify and correct low duct static pressure.
+    :param zn_dmpr: time x zone damper command
+    :param low_sf_condition: supply fan at maximum per timestamp
+    :param avg_stcpr_stpt: average duct static pressure set point or None
+    :param zn_high_dmpr_thr: sensitivity: threshold
+    :param zn_low_dmpr_thr: sensitivity: threshold
+    :param auto_correct_flag: sensitivity to auto-correct or False
+    :param stcpr_retuning:
+    :param max_stcpr_stpt:
+    :return: diagnostic message, duct static pressure set point command or None
+    """
+    dmpr_low_avg, dmpr_high_avg = damper_averages(zn_dmpr)
+    low_sf_condition = supply_fan_condition(low_sf_condition)
+    thresholds = zip(zn_high_dmpr_thr.items(), zn_low_dmpr_thr.items())
+    diagnostic_msg = {}
+    command = None
+
+    for (key, high_thr), (key2, low_thr) in thresholds:
+        if dmpr_high_avg > high_thr and dmpr_low_avg > low_thr:
+            if low_sf_condition:
+                result = 15.1
+            elif avg_stcpr_stpt is None:
+                result = 14.1
+            elif auto_correct_flag and auto_correct_flag == key:
+                command = avg_stcpr_stpt + stcpr_retuning
+                result = 11.1
+                if command > max_stcpr_stpt:
+                    command = max_stcpr_stpt
+                    result = 12.1
+            else:
+                result = 13.1
+        else:
+            result = 10.0
+        diagnostic_msg.update({key: result})
+    return diagnostic_msg, command
+
+
+def high_stcpr_aircx(zn_dmpr, high_sf_condition, avg_stcpr_stpt, hdzn_dmpr_thr,
+                     auto_correct_flag, stcpr_retuning, min_stcpr_stpt):
+    """
+    AIRCx to identify and correct high duct static pressure.
+    :param zn_dmpr: time x zone damper command
+    :param high_sf_condition: supply fan at minimum per timestamp
+    :param avg_stcpr_stpt: average duct static pressure set point or None
+    :param hdzn_dmpr_thr: sensitivity: threshold
+    :param auto_correct_flag: sensitivity to auto-correct or False
+    :param stcpr_retuning:
+    :param min_stcpr_stpt:
+    :return: diagnostic message, duct static pressure set point command or None
+    """
+    dmpr_high_avg = most_open_average(zn_dmpr)
+    high_sf_condition = supply_fan_condition(high_sf_condition)
+    diagnostic_msg = {}
+    command = None
+
+    for key, dmpr_thr in hdzn_dmpr_thr.items():
+        if dmpr_high_avg <= dmpr_thr:
+            if high_sf_condition:
+                result = 25.1
+            elif avg_stcpr_stpt is None:
+                result = 24.1
+            elif auto_correct_flag and auto_correct_flag == key:
+                command = avg_stcpr_stpt - stcpr_retuning
+                result = 21.1
+                if command < min_stcpr_stpt:
+                    command = min_stcpr_stpt
+                    result = 22.1
+            else:
+                result = 23.1
+        else:
+            result = 20.0
+        diagnostic_msg.update({key: result})
+    return diagnostic_msg, command
+
+
+def unocc_fan_operation(hours, fan_status, stcpr, unocc_time_thr, unocc_stcpr_thr):
+    """
+    AIRCx to determine if AHU is operating excessively in unoccupied mode.
+    :param hours: hour of day for each unoccupied fan status sample
+    :param fan_status: unoccupied fan status samples
+    :param stcpr: unoccupied duct static pressure samples
+    :param unocc_time_thr: sensitivity: threshold
+    :param unocc_stcpr_thr: sensitivity: threshold
+    :return: diagnostic message, list of 24 hourly messages or None when the
+        pressure sensor is suspect
+    """
+    hours = np.asarray(hours, dtype=int)
+    fan_on = np.asarray(fan_status, dtype=float).astype(int) == 1
+    stcpr = np.asarray(stcpr, dtype=float)
+    fan_count = np.bincount(hours, minlength=24)
+    fan_on_count = np.bincount(hours, weights=fan_on, minlength=24)
+    hourly_counter = np.where(fan_count > 0, fan_on_count / np.maximum(fan_count, 1) * 100, 0)
+    diagnostic_msg = {}
+
+    if hours.size:
+        percent_on = (fan_on.sum() / hours.size) * 100.0
+        avg_duct_stcpr = stcpr.mean() if stcpr.size else 0
+        for (key, time_thr), (key2, stcpr_thr) in zip(unocc_time_thr.items(), unocc_stcpr_thr.items()):
+            if percent_on > time_thr:
+                result = 63.1
+            elif avg_duct_stcpr < stcpr_thr:
+                result = 60.0
+            else:
+                result = 64.2
+            diagnostic_msg.update({key: result})
+    else:
+        diagnostic_msg = {"low": 60.0, "normal": 60.0, "high": 60.0}
+
+    if 64.2 in diagnostic_msg.values():
+        return diagnostic_msg, None
+    hourly = []
+    for counter in hourly_counter:
+        hourly.append({key: 63.1 if counter > time_thr else 60.0 for key, time_thr in unocc_time_thr.items()})
+    return diagnostic_msg, hourly
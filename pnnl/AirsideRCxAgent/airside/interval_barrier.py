@@ -0,0 +1,202 @@
+"""
+Copyright (c) 2020, Battelle Memorial Institute
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this
+   list of conditions and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice,
+   this list of conditions and the following disclaimer in the documentation
+   and/or other materials provided with the distribution.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+(INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+The views and conclusions contained in the software and documentation are those
+of the authors and should not be interpreted as representing official policies,
+either expressed or implied, of the FreeBSD Project.
+
+This material was prepared as an account of work sponsored by an agency of the
+United States Government. Neither the United States Government nor the United
+States Department of Energy, nor Battelle, nor any of their employees, nor any
+jurisdiction or organization that has cooperated in the development of these
+materials, makes any warranty, express or implied, or assumes any legal
+liability or responsibility for the accuracy, completeness, or usefulness or
+any information, apparatus, product, software, or process disclosed, or
+represents that its use would not infringe privately owned rights.
+
+Reference herein to any specific commercial product, process, or service by
+trade name, trademark, manufacturer, or otherwise does not necessarily
+constitute or imply its endorsement, recommendation, or favoring by the
+United States Government or any agency thereof, or Battelle Memorial Institute.
+The views and opinions of authors expressed herein do not necessarily state or
+reflect those of the United States Government or any agency thereof.
+
+PACIFIC NORTHWEST NATIONAL LABORATORY
+operated by
+BATTELLE
+for the
+UNITED STATES DEPARTMENT OF ENERGY
+under Contract DE-AC05-76RL01830
+"""
+import logging
+from datetime import timedelta as td
+
+_log = logging.getLogger(__name__)
+
+
+class IntervalFrame(object):
+    """
+    Device publishes for one scrape interval.
+    start: datetime, start of the scrape interval
+    timestamp: datetime, latest publish time received for the interval
+    values: dictionary of device: point values
+    missing: list of devices that had not reported when the frame was released
+    partial: True when the frame was released without every device
+    """
+
+    def __init__(self, start):
+        self.start = start
+        self.timestamp = None
+        self.values = {}
+        self.missing = []
+        self.partial = False
+
+
+class IntervalBarrier(object):
+    """
+    Group device publishes by scrape interval and release each interval
+    once every device has reported or its grace period has passed.
+
+    Publishes are bucketed by their scrape timestamp, so several intervals
+    can be open at once and a slow device still lands in its own interval.
+    Intervals are released oldest first.  When a newer interval is released
+    the older ones still waiting are released with it and marked partial.
+    Publishes for an interval that was already released are dropped.
+
+    Deadlines follow the publish timestamps, not the local clock.  expire
+    converts the local time to publish time with the offset seen on the
+    newest publish, so device clock skew does not release intervals early
+    or hold them back.
+
+    airside/interval_barrier.py in the AirsideRCxAgent and
+    drivenmatlab/interval_barrier.py in the DrivenMatlabAgent are kept
+    identical.
+    """
+
+    def __init__(self, devices, interval, grace_period):
+        """
+        devices: list of devices expected every interval
+        interval: int, scrape interval in seconds
+        grace_period: int, seconds to wait for late devices after the interval ends
+        """
+        self.devices = list(devices)
+        self.interval = interval
+        self.length = td(seconds=interval)
+        self.deadline = td(seconds=interval + grace_period)
+        self.current = None
+        self.frames = {}
+        self.released = None
+        self.newest = None
+        self.offset = None
+        self.late = 0
+
+    def interval_start(self, timestamp):
+        """Start of the scrape interval containing timestamp
+        timestamp: datetime
+
+        return datetime
+        """
+        # Publishes from one scrape share an interval, skip recomputing it.
+        if self.current is not None and self.current <= timestamp < self.current + self.length:
+            return self.current
+        midnight = timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+        seconds = (timestamp - midnight).total_seconds()
+        self.current = midnight + td(seconds=seconds - seconds % self.interval)
+        return self.current
+
+    def add(self, device, timestamp, values, received=None):
+        """Add one device publish
+        device: string
+        timestamp: datetime, scrape time of the publish
+        values: dictionary of point: value
+        received: datetime, local time the publish arrived
+
+        return list of released IntervalFrame, oldest first
+        """
+        if self.newest is None or timestamp >= self.newest:
+            self.newest = timestamp
+            if received is not None:
+                self.offset = received - timestamp
+        start = self.interval_start(timestamp)
+        if self.released is not None and start <= self.released:
+            self.late += 1
+            _log.warning("Dropping late publish from %s for released interval %s", device, start)
+            return self.release(timestamp)
+        frame = self.frames.get(start)
+        if frame is None:
+            frame = self.frames[start] = IntervalFrame(start)
+        elif device in frame.values:
+            _log.warning("Replacing duplicate publish from %s for interval %s", device, start)
+        frame.values[device] = values
+        if frame.timestamp is None or timestamp > frame.timestamp:
+            frame.timestamp = timestamp
+        return self.release(timestamp)
+
+    def release(self, now):
+        """Release every interval that is complete or past its grace period,
+        together with the older intervals still waiting for devices.
+        now: datetime, publish time
+
+        return list of released IntervalFrame, oldest first
+        """
+        ready = [start for start, frame in self.frames.items()
+                 if len(frame.values) == len(self.devices) or start + self.deadline <= now]
+        if not ready:
+            return []
+        return self.release_through(max(ready))
+
+    def expire(self, now):
+        """Release every interval past its grace period at local time now,
+        shifted to publish time by the offset seen on the newest publish.
+        When no publish carried its arrival time, now is taken as publish time.
+        now: datetime, local time
+
+        return list of released IntervalFrame, oldest first
+        """
+        if self.offset is None:
+            return self.release(now)
+        return self.release(now - self.offset)
+
+    def flush(self):
+        """Release every open interval
+
+        return list of released IntervalFrame, oldest first
+        """
+        if not self.frames:
+            return []
+        return self.release_through(max(self.frames))
+
+    def release_through(self, last):
+        """Release the open intervals up to and including last"""
+        released = []
+        for start in sorted(start for start in self.frames if start <= last):
+            frame = self.frames.pop(start)
+            frame.missing = [device for device in self.devices if device not in frame.values]
+            frame.partial = bool(frame.missing)
+            released.append(frame)
+        self.released = last
+        return released
+
+    def __len__(self):
+        return len(self.frames)
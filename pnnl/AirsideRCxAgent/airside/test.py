@@ -46,14 +46,25 @@ under Contract DE-AC05-76RL01830
 """
 File used to unit test Airside
 """
+import math
 import unittest
+import os
+import csv
+import json
+import shutil
+import random
+import sqlite3
+import tempfile
 
 from datetime import timedelta as td
 from .diagnostics.sat_aircx import SupplyTempAIRCx
 from .diagnostics.stcpr_aircx import DuctStaticAIRCx
 from .diagnostics.schedule_reset_aircx import SchedResetAIRCx
 from .diagnostics import common
+from . import replay
+from .interval_barrier import IntervalBarrier
 from datetime import datetime
+from volttron.platform.agent.math_utils import mean
 
 
 class TestDiagnosticsSupplyTempAIRCx(unittest.TestCase):
@@ -90,16 +101,14 @@ class TestDiagnosticsSupplyTempAIRCx(unittest.TestCase):
         diagnostic.sat_stpt_array = "test"
         diagnostic.sat_array = "test"
         diagnostic.rht_array = "test"
-        diagnostic.percent_rht = "test"
-        diagnostic.percent_dmpr ="test"
+        diagnostic.dmpr_array = "test"
         diagnostic.reinitialize()
         assert diagnostic.table_key is None
         assert diagnostic.timestamp_array == []
         assert diagnostic.sat_stpt_array == []
         assert diagnostic.sat_array == []
         assert diagnostic.rht_array == []
-        assert diagnostic.percent_rht == []
-        assert diagnostic.percent_dmpr == []
+        assert diagnostic.dmpr_array == []
 
     def test_temp_sensor_dx_sat_aircx(self):
         """test the sat_aircx method"""
@@ -172,9 +181,7 @@ class TestDiagnosticsDuctStaticAIRCx(unittest.TestCase):
         diagnostic.timestamp_array = "test"
         diagnostic.stcpr_stpt_array = "test"
         diagnostic.stcpr_array = "test"
-        diagnostic.ls_dmpr_low_avg = "test"
-        diagnostic.ls_dmpr_high_avg = "test"
-        diagnostic.hs_dmpr_high_avg ="test"
+        diagnostic.zn_dmpr_array = "test"
         diagnostic.low_sf_condition = "test"
         diagnostic.high_sf_condition = "test"
         diagnostic.reinitialize()
@@ -182,9 +189,7 @@ class TestDiagnosticsDuctStaticAIRCx(unittest.TestCase):
         assert diagnostic.timestamp_array == []
         assert diagnostic.stcpr_stpt_array == []
         assert diagnostic.stcpr_array == []
-        assert diagnostic.ls_dmpr_low_avg == []
-        assert diagnostic.ls_dmpr_high_avg == []
-        assert diagnostic.hs_dmpr_high_avg == []
+        assert diagnostic.zn_dmpr_array == []
         assert diagnostic.low_sf_condition == []
         assert diagnostic.high_sf_condition == []
 
@@ -317,3 +322,500 @@ class TestDiagnosticsCommon(unittest.TestCase):
         assert results_publish[1][0] == "test_analysis&1969-12-31 19:17:16"
         assert results_publish[1][1] == ['d2/diagnostic message:', "{'low': 'test', 'normal': 'test', 'high': 'test'}"]
 
+
+
+class TestScrapeFrame(unittest.TestCase):
+    """
+    Contains all the tests for the columnar scrape frame
+    """
+
+    def test_scrape_frame_fill(self):
+        """test device publishes are written to their slot of each point column"""
+        frame = common.ScrapeFrame(["AHU1", "AHU1/VAV1", "AHU1/VAV2"], ["fan", "damper", None])
+        frame.fill("AHU1/VAV2", {"damper": 20.0, "other": 1.0})
+        frame.fill("AHU1", {"fan": 1})
+        frame.fill("AHU1/VAV1", {"damper": 10.0})
+        assert len(frame) == 3
+        assert frame.columns["damper"] == [None, 10.0, 20.0]
+        assert frame.values("damper") == [10.0, 20.0]
+        assert frame.values("fan") == [1]
+        assert frame.values("other") == []
+        assert frame.values(None) == []
+
+    def test_scrape_frame_clear(self):
+        """test clearing the frame keeps the preallocated columns"""
+        frame = common.ScrapeFrame(["AHU1", "AHU1/VAV1"], ["damper"])
+        column = frame.columns["damper"]
+        frame.fill("AHU1/VAV1", {"damper": 10.0})
+        frame.clear()
+        assert len(frame) == 0
+        assert frame.columns["damper"] is column
+        assert column == [None, None]
+
+
+class TestIntervalBarrier(unittest.TestCase):
+    """
+    Contains all the tests for grouping device publishes by scrape interval
+    """
+    start = datetime(2020, 1, 6, 8, 0)
+
+    def at(self, seconds):
+        return self.start + td(seconds=seconds)
+
+    def test_interval_barrier_complete(self):
+        """test an interval is released as soon as every device reports"""
+        barrier = IntervalBarrier(["AHU1", "AHU1/VAV1"], 60, 60)
+        assert barrier.add("AHU1", self.at(1), {"fan": 1}) == []
+        frames = barrier.add("AHU1/VAV1", self.at(2), {"damper": 10.0})
+        assert len(frames) == 1
+        assert frames[0].start == self.start
+        assert frames[0].timestamp == self.at(2)
+        assert frames[0].values == {"AHU1": {"fan": 1}, "AHU1/VAV1": {"damper": 10.0}}
+        assert not frames[0].partial
+        assert len(barrier) == 0
+
+    def test_interval_barrier_overlap(self):
+        """test a slow device still lands in its own interval while the next one fills"""
+        barrier = IntervalBarrier(["AHU1", "AHU1/VAV1"], 60, 60)
+        barrier.add("AHU1", self.at(1), {"fan": 1})
+        barrier.add("AHU1", self.at(61), {"fan": 0})
+        assert len(barrier) == 2
+        frames = barrier.add("AHU1/VAV1", self.at(59), {"damper": 10.0})
+        assert [frame.start for frame in frames] == [self.start]
+        assert frames[0].values["AHU1"] == {"fan": 1}
+        frames = barrier.add("AHU1/VAV1", self.at(62), {"damper": 20.0})
+        assert [frame.values["AHU1"] for frame in frames] == [{"fan": 0}]
+
+    def test_interval_barrier_grace_period(self):
+        """test an incomplete interval is released as partial once its grace period passes"""
+        barrier = IntervalBarrier(["AHU1", "AHU1/VAV1", "AHU1/VAV2"], 60, 30)
+        barrier.add("AHU1", self.at(1), {"fan": 1})
+        barrier.add("AHU1/VAV1", self.at(1), {"damper": 10.0})
+        assert barrier.add("AHU1", self.at(61), {"fan": 1}) == []
+        assert barrier.release(self.at(89)) == []
+        frames = barrier.release(self.at(90))
+        assert len(frames) == 1
+        assert frames[0].partial
+        assert frames[0].missing == ["AHU1/VAV2"]
+        assert len(barrier) == 1
+        # The missing device reports after its interval was released.
+        assert barrier.add("AHU1/VAV2", self.at(2), {"damper": 30.0}) == []
+        assert barrier.late == 1
+
+    def test_interval_barrier_release_order(self):
+        """test completing a newer interval releases the older ones first"""
+        barrier = IntervalBarrier(["AHU1", "AHU1/VAV1"], 60, 600)
+        barrier.add("AHU1", self.at(1), {"fan": 1})
+        barrier.add("AHU1", self.at(61), {"fan": 1})
+        frames = barrier.add("AHU1/VAV1", self.at(61), {"damper": 10.0})
+        assert [frame.start for frame in frames] == [self.start, self.at(60)]
+        assert [frame.partial for frame in frames] == [True, False]
+        frames = barrier.add("AHU1", self.at(121), {"fan": 1}) + barrier.flush()
+        assert [frame.missing for frame in frames] == [["AHU1/VAV1"]]
+
+    def test_interval_barrier_expire_skewed_clock(self):
+        """test grace periods are measured in publish time when the device clock is skewed"""
+        for skew in (td(minutes=10), -td(minutes=10)):
+            barrier = IntervalBarrier(["AHU1", "AHU1/VAV1"], 60, 30)
+            barrier.add("AHU1", self.at(1), {"fan": 1}, self.at(1) + skew)
+            assert barrier.expire(self.at(89) + skew) == []
+            frames = barrier.expire(self.at(90) + skew)
+            assert [frame.start for frame in frames] == [self.start]
+            assert frames[0].missing == ["AHU1/VAV1"]
+
+
+def zone_window(rng, samples, zones, value_range, missing=0.0):
+    """Random per-timestamp zone values, some zones may not report"""
+    window = []
+    for _ in range(samples):
+        row = [rng.uniform(*value_range) for _ in range(zones)]
+        window.append([value for value in row if rng.random() >= missing] or row[:1])
+    return window
+
+
+def reference_low_sat(rht, avg_sat_stpt, rht_on_thr, rht_valve_thr, percent_rht_thr,
+                      auto_correct_flag, sat_retuning, max_sat_stpt):
+    """Per-scrape low SAT diagnostic, the reference for the window kernel"""
+    percent_rht = [sum(1 if val > rht_on_thr else 0 for val in row) / len(row) for row in rht]
+    avg_zones_rht = mean(percent_rht) * 100.0
+    rht_avg = mean([mean(row) for row in rht])
+    diagnostic_msg = {}
+    command = None
+
+    for (key, valve_thr), (key2, percent_thr) in zip(rht_valve_thr.items(), percent_rht_thr.items()):
+        if rht_avg > valve_thr and avg_zones_rht > percent_thr:
+            if avg_sat_stpt is None:
+                result = 44.1
+            elif auto_correct_flag and auto_correct_flag == key:
+                command = avg_sat_stpt + sat_retuning
+                result = 41.1
+                if command > max_sat_stpt:
+                    command = max_sat_stpt
+                    result = 42.1
+            else:
+                result = 43.1
+        else:
+            result = 40.0
+        diagnostic_msg.update({key: result})
+    return diagnostic_msg, command
+
+
+def reference_high_sat(rht, dmpr, avg_sat_stpt, rht_on_thr, high_dmpr_thr, percent_dmpr_thr,
+                       percent_rht_thr, auto_correct_flag, sat_retuning, min_sat_stpt):
+    """Per-scrape high SAT diagnostic, the reference for the window kernel"""
+    percent_rht = [sum(1 if val > rht_on_thr else 0 for val in row) / len(row) for row in rht]
+    avg_zones_rht = mean(percent_rht) * 100.0
+    diagnostic_msg = {}
+    command = None
+
+    for (key, dmpr_thr), (key2, rht_thr) in zip(percent_dmpr_thr.items(), percent_rht_thr.items()):
+        percent_dmpr = [sum(1 if val > high_dmpr_thr[key] else 0 for val in row) / len(row) for row in dmpr]
+        if mean(percent_dmpr) * 100.0 > dmpr_thr and avg_zones_rht < rht_thr:
+            if avg_sat_stpt is None:
+                result = 54.1
+            elif auto_correct_flag and auto_correct_flag == key:
+                command = avg_sat_stpt - sat_retuning
+                result = 51.1
+                if command < min_sat_stpt:
+                    command = min_sat_stpt
+                    result = 52.1
+            else:
+                result = 53.1
+        else:
+            result = 50.0
+        diagnostic_msg.update({key: result})
+    return diagnostic_msg, command
+
+
+def reference_low_stcpr_aircx(dmpr, low_sf_condition, avg_stcpr_stpt, zn_high_dmpr_thr, zn_low_dmpr_thr,
+                              auto_correct_flag, stcpr_retuning, max_stcpr_stpt):
+    """Per-scrape low duct static pressure diagnostic, the reference for the window kernel"""
+    dmpr_low = []
+    dmpr_high = []
+    for row in dmpr:
+        row = sorted(row)
+        half = int(math.ceil(len(row) * 0.5))
+        dmpr_low.extend(row[:half])
+        dmpr_high.extend(row[half - 1:])
+    low_sf_condition = [0 if value is None else value for value in low_sf_condition]
+    low_sf_condition = sum(low_sf_condition) / len(low_sf_condition) > 0.5
+    diagnostic_msg = {}
+    command = None
+
+    for (key, high_thr), (key2, low_thr) in zip(zn_high_dmpr_thr.items(), zn_low_dmpr_thr.items()):
+        if mean(dmpr_high) > high_thr and mean(dmpr_low) > low_thr:
+            if low_sf_condition:
+                result = 15.1
+            elif avg_stcpr_stpt is None:
+                result = 14.1
+            elif auto_correct_flag and auto_correct_flag == key:
+                command = avg_stcpr_stpt + stcpr_retuning
+                result = 11.1
+                if command > max_stcpr_stpt:
+                    command = max_stcpr_stpt
+                    result = 12.1
+            else:
+                result = 13.1
+        else:
+            result = 10.0
+        diagnostic_msg.update({key: result})
+    return diagnostic_msg, command
+
+
+def reference_high_stcpr_aircx(dmpr, high_sf_condition, avg_stcpr_stpt, hdzn_dmpr_thr,
+                               auto_correct_flag, stcpr_retuning, min_stcpr_stpt):
+    """Per-scrape high duct static pressure diagnostic, the reference for the window kernel"""
+    dmpr_high = []
+    for row in dmpr:
+        row = sorted(row, reverse=True)
+        dmpr_high.extend(row[:int(math.ceil(len(row) * 0.5))])
+    high_sf_condition = sum(high_sf_condition) / len(high_sf_condition) > 0.5
+    diagnostic_msg = {}
+    command = None
+
+    for key, dmpr_thr in hdzn_dmpr_thr.items():
+        if mean(dmpr_high) <= dmpr_thr:
+            if high_sf_condition:
+                result = 25.1
+            elif avg_stcpr_stpt is None:
+                result = 24.1
+            elif auto_correct_flag and auto_correct_flag == key:
+                command = avg_stcpr_stpt - stcpr_retuning
+                result = 21.1
+                if command < min_stcpr_stpt:
+                    command = min_stcpr_stpt
+                    result = 22.1
+            else:
+                result = 23.1
+        else:
+            result = 20.0
+        diagnostic_msg.update({key: result})
+    return diagnostic_msg, command
+
+
+def reference_unocc_fan_operation(hours, fan_status, stcpr, unocc_time_thr, unocc_stcpr_thr):
+    """Per-sample unoccupied fan operation diagnostic, the reference for the window kernel"""
+    hourly_counter = []
+    for counter in range(24):
+        fan_count = [status for hour, status in zip(hours, fan_status) if hour == counter]
+        hourly_counter.append(fan_count.count(1) / len(fan_count) * 100 if fan_count else 0)
+    diagnostic_msg = {}
+
+    if hours:
+        percent_on = fan_status.count(1) / len(fan_status) * 100.0
+        avg_duct_stcpr = mean(stcpr) if stcpr else 0
+        for (key, time_thr), (key2, stcpr_thr) in zip(unocc_time_thr.items(), unocc_stcpr_thr.items()):
+            if percent_on > time_thr:
+                result = 63.1
+            elif avg_duct_stcpr < stcpr_thr:
+                result = 60.0
+            else:
+                result = 64.2
+            diagnostic_msg.update({key: result})
+    else:
+        diagnostic_msg = {"low": 60.0, "normal": 60.0, "high": 60.0}
+
+    if 64.2 in diagnostic_msg.values():
+        return diagnostic_msg, None
+    return diagnostic_msg, [{key: 63.1 if counter > time_thr else 60.0 for key, time_thr in unocc_time_thr.items()}
+                            for counter in hourly_counter]
+
+
+class TestVectorized(unittest.TestCase):
+    """
+    Contains the tests comparing the diagnostic classes, which use the NumPy
+    window kernels, with the per-scrape reference diagnostics
+    """
+    stpt_deviation_thr = {"low": 30.0, "normal": 20.0, "high": 10.0}
+    percent_rht_thr = {"low": 25.0, "normal": 25.0, "high": 25.0}
+    percent_dmpr_thr = {"low": 75.0, "normal": 60.0, "high": 45.0}
+    rht_valve_thr = {"low": 75.0, "normal": 50.0, "high": 25.0}
+    high_dmpr_thr = {"low": 95.0, "normal": 80.0, "high": 65.0}
+    zn_high_dmpr_thr = {"low": 95.0, "normal": 90.0, "high": 85.0}
+    zn_low_dmpr_thr = {"low": 10.0, "normal": 10.0, "high": 10.0}
+    hdzn_dmpr_thr = {"low": 25.0, "normal": 30.0, "high": 35.0}
+    unocc_time_thr = {"low": 60.0, "normal": 40.0, "high": 20.0}
+    unocc_stcpr_thr = {"low": 0.3, "normal": 0.2, "high": 0.125}
+    # (samples, zones, reheat range, damper range, missing zone fraction)
+    windows = [(1, 1, (4.0, 4.0), (4.0, 4.0), 0.0), (60, 10, (0.0, 100.0), (0.0, 100.0), 0.0),
+               (60, 25, (0.0, 5.0), (70.0, 100.0), 0.2), (60, 25, (40.0, 100.0), (0.0, 40.0), 0.2),
+               (30, 7, (20.0, 100.0), (20.0, 100.0), 0.5), (30, 4, (0.0, 20.0), (0.0, 20.0), 0.0)]
+
+    def setUp(self):
+        self.published = []
+        self.commands = []
+
+    def publish(self, timestamp, topic, message):
+        self.published.append((topic, message))
+
+    def autocorrect(self, point, value):
+        self.commands.append(value)
+
+    def reference(self, diagnostic):
+        diagnostic.setup_platform_interfaces(self.publish, self.autocorrect)
+        return diagnostic
+
+    def assert_same(self, expected):
+        """Compare the diagnostic publish and autocorrect with a reference result"""
+        diagnostic_msg, command = expected
+        assert self.published.pop()[1] == diagnostic_msg
+        if command is None:
+            assert self.commands == []
+        else:
+            self.assertAlmostEqual(self.commands.pop(), command)
+
+    def test_vectorized_sat(self):
+        """test low and high SAT diagnostics match the per-scrape reference"""
+        rng = random.Random(4)
+        cur_time = datetime.fromtimestamp(1036)
+        results = set()
+        for samples, zones, rht_range, dmpr_range, missing in self.windows:
+            rht = zone_window(rng, samples, zones, rht_range, missing)
+            dmpr = zone_window(rng, samples, zones, dmpr_range, missing)
+            for auto_correct_flag, avg_sat_stpt, limit in [(False, 55.0, 1.0), ("normal", 55.0, 1.0),
+                                                           ("normal", 55.0, 0.0), ("high", None, 1.0)]:
+                diagnostic = self.reference(SupplyTempAIRCx())
+                diagnostic.set_class_values([], 1, td(days=1), auto_correct_flag, self.stpt_deviation_thr,
+                                            10.0, self.high_dmpr_thr, self.percent_dmpr_thr, self.percent_rht_thr,
+                                            55.0 - 3.0 * limit, 2.0, self.rht_valve_thr, 55.0 + 3.0 * limit,
+                                            "sat_stpt")
+                for index in range(samples):
+                    diagnostic.sat_aircx(cur_time + td(seconds=index), [55.0], [55.0], rht[index], dmpr[index])
+                diagnostic.low_sat(avg_sat_stpt)
+                expected = reference_low_sat(rht, avg_sat_stpt, 10.0, self.rht_valve_thr, self.percent_rht_thr,
+                                             diagnostic.auto_correct_flag, 2.0, 55.0 + 3.0 * limit)
+                self.assert_same(expected)
+                results.update(expected[0].values())
+                diagnostic.high_sat(avg_sat_stpt)
+                expected = reference_high_sat(rht, dmpr, avg_sat_stpt, 10.0, self.high_dmpr_thr,
+                                              self.percent_dmpr_thr, self.percent_rht_thr,
+                                              diagnostic.auto_correct_flag, 2.0, 55.0 - 3.0 * limit)
+                self.assert_same(expected)
+                results.update(expected[0].values())
+        assert results == {40.0, 41.1, 42.1, 43.1, 44.1, 50.0, 51.1, 52.1, 53.1, 54.1}
+
+    def test_vectorized_stcpr(self):
+        """test low and high duct static pressure diagnostics match the per-scrape reference"""
+        rng = random.Random(7)
+        cur_time = datetime.fromtimestamp(1036)
+        results = set()
+        for (samples, zones, rht_range, dmpr_range, missing), sf_on in zip(self.windows * 2, [0.0] * 6 + [0.8] * 6):
+            dmpr = zone_window(rng, samples, zones, dmpr_range, missing)
+            low_sf = [1 if rng.random() < sf_on else rng.choice([0, None]) for _ in range(samples)]
+            high_sf = [1 if rng.random() < sf_on else 0 for _ in range(samples)]
+            for auto_correct_flag, avg_stcpr_stpt, limit in [(False, 1.0, 2.5), ("normal", 1.0, 2.5),
+                                                             ("normal", 1.0, 0.5), ("normal", 1.0, 0.4),
+                                                             ("normal", None, 2.5)]:
+                diagnostic = self.reference(DuctStaticAIRCx())
+                diagnostic.set_class_values([], 1, td(days=1), auto_correct_flag, self.stpt_deviation_thr,
+                                            limit * 2.5, 0.15, self.zn_high_dmpr_thr, self.zn_low_dmpr_thr,
+                                            self.hdzn_dmpr_thr, limit, "stcpr_stpt")
+                for index in range(samples):
+                    diagnostic.stcpr_aircx(cur_time + td(seconds=index), [1.0], [1.0], list(dmpr[index]),
+                                           low_sf[index], high_sf[index])
+                diagnostic.low_stcpr_aircx(avg_stcpr_stpt)
+                expected = reference_low_stcpr_aircx(dmpr, low_sf, avg_stcpr_stpt, self.zn_high_dmpr_thr,
+                                                     self.zn_low_dmpr_thr, diagnostic.auto_correct_flag,
+                                                     0.15, limit * 2.5)
+                self.assert_same(expected)
+                results.update(expected[0].values())
+                diagnostic.high_stcpr_aircx(avg_stcpr_stpt)
+                expected = reference_high_stcpr_aircx(dmpr, high_sf, avg_stcpr_stpt, self.hdzn_dmpr_thr,
+                                                      diagnostic.auto_correct_flag, 0.15, limit)
+                self.assert_same(expected)
+                results.update(expected[0].values())
+        assert results == {10.0, 11.1, 12.1, 13.1, 14.1, 15.1, 20.0, 21.1, 22.1, 23.1, 24.1, 25.1}
+
+    def test_vectorized_unocc_fan_operation(self):
+        """test the unoccupied fan operation diagnostic matches the per-sample reference"""
+        rng = random.Random(11)
+        start = datetime(2020, 1, 6)
+        for samples, on_fraction, stcpr in [(0, 0.0, 0.0), (600, 0.1, 0.05), (600, 0.5, 0.05), (600, 0.0, 1.0)]:
+            times = sorted(start + td(minutes=rng.randrange(1440)) for _ in range(samples))
+            status = [1 if rng.random() < on_fraction else 0 for _ in times]
+            pressure = [stcpr + rng.uniform(0.0, 0.05) for _ in times]
+            self.published = []
+            diagnostic = self.reference(SchedResetAIRCx())
+            diagnostic.unocc_time_thr = self.unocc_time_thr
+            diagnostic.unocc_stcpr_thr = self.unocc_stcpr_thr
+            diagnostic.fan_status_array = list(zip(times, status))
+            diagnostic.schedule_time_array = list(times)
+            diagnostic.stcpr_array = pressure
+            diagnostic.timestamp_array = [start]
+            diagnostic.unocc_fan_operation()
+
+            diagnostic_msg, hourly = reference_unocc_fan_operation(
+                [time.hour for time in times], status, pressure, self.unocc_time_thr, self.unocc_stcpr_thr)
+            if hourly is None:
+                assert [message for topic, message in self.published] == [diagnostic_msg]
+                assert 64.2 in diagnostic_msg.values()
+            else:
+                assert [message for topic, message in self.published] == hourly
+
+
+class TestReplay(unittest.TestCase):
+    """
+    Contains all the tests for offline replay of exported data
+    """
+    config = {
+        "analysis_name": "AirsideAIRCx",
+        "device": {
+            "campus": "campus",
+            "building": "building",
+            "unit": {
+                "AHU3": {"subdevices": ["VAV107", "VAV104", "VAV116", "VAV105"]}
+            }
+        },
+        "actuation_mode": "passive",
+        "arguments": {
+            "point_mapping": {
+                "fan_status": "supplyfanstatus",
+                "zone_reheat": "heatingsignal",
+                "zone_damper": "damperposition",
+                "duct_stcpr": "ductstaticpressure",
+                "duct_stcpr_stpt": "ductstaticpressuresetpoint",
+                "sa_temp": "dischargeairtemperature",
+                "fan_speedcmd": "supplyfanspeed",
+                "sat_stpt": "dischargeairtemperaturesetpoint"
+            }
+        }
+    }
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        sample = os.path.join(os.path.dirname(__file__), "sample_data", "airside_sample.csv")
+        with open(sample) as csv_file:
+            rows = list(csv.reader(csv_file))
+        # Four hours of one minute data
+        self.header = rows[0]
+        self.rows = rows[1:241]
+        self.csv_path = os.path.join(self.directory, "AHU3.csv")
+        with open(self.csv_path, "w") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(self.header)
+            writer.writerows(self.rows)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_replay_matches_agent(self):
+        """test replayed results match the agent callback handling the same publishes"""
+        agent = replay.AirsideReplay(self.config)
+        for row in self.rows:
+            values = {point: replay.parse_value(value) for point, value in zip(self.header[1:], row[1:])}
+            device_values = replay.split_devices(values)
+            for topic in agent.device_list:
+                tag = agent.device_topic_dict[topic].split("/", 1)
+                data = device_values[tag[1] if len(tag) > 1 else ""]
+                agent.new_data_message(None, None, None, topic, {"Date": row[0] + "+00:00"}, [data, {}])
+
+        results = replay.replay_unit(self.config, "AHU3", self.csv_path)
+        assert agent.results
+        assert results == agent.results
+
+    def test_replay_historian_matches_csv(self):
+        """test a SQLite historian export replays the same as a CSV export"""
+        path = os.path.join(self.directory, "historian.sqlite")
+        connection = sqlite3.connect(path)
+        connection.execute("CREATE TABLE topics (topic_id INTEGER PRIMARY KEY, topic_name TEXT)")
+        connection.execute("CREATE TABLE data (ts TIMESTAMP, topic_id INTEGER, value_string TEXT)")
+        for topic_id, point in enumerate(self.header[1:]):
+            connection.execute("INSERT INTO topics VALUES (?, ?)", (topic_id, "campus/building/AHU3/" + point))
+            for row in self.rows:
+                connection.execute("INSERT INTO data VALUES (?, ?, ?)",
+                                   (row[0] + "+00:00", topic_id, json.dumps(replay.parse_value(row[topic_id + 1]))))
+        connection.commit()
+        connection.close()
+
+        from_csv = replay.replay_unit(self.config, "AHU3", self.csv_path)
+        from_historian = replay.replay_unit(self.config, "AHU3", path)
+        assert from_historian == from_csv
+
+    def test_replay_partial_interval(self):
+        """test intervals missing a VAV are analyzed instead of dropped"""
+        config = dict(self.config, grace_period=30, missing_data_threshold=25.0)
+        agent = replay.AirsideReplay(config)
+        ran = []
+        agent.run_diagnostics = ran.append
+        rows = []
+        for row in self.rows[:4]:
+            values = {point: replay.parse_value(value) for point, value in zip(self.header[1:], row[1:])}
+            rows.append((replay.parse_timestamp(row[0]), replay.split_devices(values)))
+        for index, (current_time, device_values) in enumerate(rows):
+            for topic in agent.device_list:
+                tag = agent.device_topic_dict[topic].split("/", 1)
+                if index in (1, 3) and tag[-1] == "VAV105":
+                    continue
+                agent.process_data_message(topic, current_time, [device_values[tag[1] if len(tag) > 1 else ""], {}])
+        # The first row precedes the first scrape interval.  The second row is
+        # released when the third completes, the last waits for its deadline.
+        assert ran == [rows[1][0], rows[2][0]]
+        agent.release_expired(rows[3][0] + td(seconds=60))
+        assert len(ran) == 2
+        agent.release_expired(rows[3][0] + td(seconds=85))
+        assert ran == [time for time, values in rows[1:]]
+
+    def test_replay_split_devices(self):
+        """test unit rows are split into the points each device publishes"""
+        values = {"supplyfanstatus": 1, "VAV107/damperposition": 100}
+        assert replay.split_devices(values) == {"": {"supplyfanstatus": 1}, "VAV107": {"damperposition": 100}}
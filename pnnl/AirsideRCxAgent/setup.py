@@ -63,7 +63,7 @@ setup(
     include_package_data=True,
     name=package + 'agent',
     version=__version__,
-    install_requires=['volttron>=3.0'],
+    install_requires=['volttron>=3.0', 'numpy'],
     packages=packages,
     entry_points={
         'setuptools.installation': [
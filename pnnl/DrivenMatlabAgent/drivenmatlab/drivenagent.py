@@ -62,6 +62,7 @@ from collections import defaultdict
 from datetime import datetime as dt, timedelta as td
 from copy import deepcopy
 from dateutil.parser import parse
+from dateutil.tz import tzutc
 
 from volttron.platform.messaging import topics
 from volttron.platform.agent import utils
@@ -70,6 +71,7 @@ from volttron.platform.vip.agent import Agent, Core
 from volttron.platform.jsonrpc import RemoteError
 from volttron.platform.agent.driven import ConversionMapper
 from volttron.platform.messaging import (headers as headers_mod, topics)
+from .interval_barrier import IntervalBarrier
 
 __version__ = "3.5.0"
 
@@ -110,6 +112,9 @@ def driven_agent(config_path, **kwargs):
     subdevices_list = []
     vip_destination = config.get('vip_destination', None)
     from_file = config.get('from_file')
+    interval = config.get('interval', 60)
+    grace_period = config.get('grace_period', interval)
+    missing_data_threshold = config.get('missing_data_threshold', 0.0) / 100.0
     for device_name in device_config:
         device_topic = topics.DEVICES_VALUE(campus=campus_building.get('campus'),
                                             building=campus_building.get('building'),
@@ -172,11 +177,10 @@ def driven_agent(config_path, **kwargs):
 
             super(DrivenAgent, self).__init__(**kwargs)
 
-            # master is where we copy from to get a poppable list of
-            # subdevices that should be present before we run the analysis.
+            # master lists the devices that should be present in each
+            # scrape interval before we run the analysis.
             self._master_devices = device_topic_list
-            self._needed_devices = []
-            self._device_values = {}
+            self._barrier = None
             self._initialize_devices()
             self.received_input_datetime = None
             self._kwargs = kwargs
@@ -188,8 +192,7 @@ def driven_agent(config_path, **kwargs):
                 self.actuation_vip = self.agent.vip.rpc
 
         def _initialize_devices(self):
-            self._needed_devices = deepcopy(self._master_devices)
-            self._device_values = {}
+            self._barrier = IntervalBarrier(self._master_devices, interval, grace_period)
 
         def setup_remote_actuation(self, vip_destination):
             event = gevent.event.Event()
@@ -212,22 +215,15 @@ def driven_agent(config_path, **kwargs):
                 self.vip.pubsub.subscribe(peer='pubsub',
                                           prefix=device_topic,
                                           callback=self.on_analysis_message)
-
-        def _should_run_now(self):
-            """
-            Checks if messages from all the devices are received
-                before running application
-            :returns: True or False based on received messages.
-            :rtype: boolean"""
-            # Assumes the unit/all values will have values.
-            if not len(self._device_values.keys()) > 0:
-                return False
-            return not len(self._needed_devices) > 0
+            # Publishes replayed from a file are not in wall clock time.
+            if not from_file:
+                self.core.periodic(interval, self._release_expired, wait=interval)
 
         def on_analysis_message(self, peer, sender, bus, topic, headers, message):
             """
             Subscribe to device data and assemble data set to pass
-                to applications.
+                to applications.  Publishes are grouped by scrape interval
+                and the application runs once for each released interval.
             :param peer:
             :param sender: device name
             :param bus:
@@ -246,45 +242,51 @@ def driven_agent(config_path, **kwargs):
             if isinstance(device_data, list):
                 device_data = device_data[0]
 
-            def aggregate_subdevice(device_data):
-                tagged_device_data = {}
-                device_tag = device_topic_dict[topic]
-                if device_tag not in self._needed_devices:
-                    return False
-                for key, value in device_data.items():
+            device_tag = device_topic_dict[topic]
+            released = self._barrier.add(device_tag, parse(headers.get('Date')), device_data, dt.now(tzutc()))
+            if not released:
+                _log.debug("Waiting on {} open scrape intervals.".format(len(self._barrier)))
+            for frame in released:
+                self._run_frame(frame)
+
+        def _release_expired(self):
+            """
+            Run the application for scrape intervals whose grace period
+                has passed without another publish to release them.  The
+                barrier measures the grace period in publish time, offset
+                from the local clock."""
+            for frame in self._barrier.expire(dt.now(tzutc())):
+                self._run_frame(frame)
+
+        def _run_frame(self, frame):
+            """
+            Run the application on the device values of one scrape interval.
+                Partial intervals run when few enough devices are missing.
+            :param frame: device publishes for the scrape interval
+            :type frame: IntervalFrame"""
+            if frame.partial:
+                fraction_missing = float(len(frame.missing)) / len(self._master_devices)
+                if fraction_missing > missing_data_threshold:
+                    _log.error("Skipping scrape interval {}, missing {}".format(frame.start, frame.missing))
+                    return
+                _log.warning("Running scrape interval {} without {}".format(frame.start, frame.missing))
+            field_names = {}
+            for device_tag, values in frame.values.items():
+                for key, value in values.items():
                     device_data_tag = '&'.join([key, device_tag])
-                    tagged_device_data[device_data_tag] = value
-                self._device_values.update(tagged_device_data)
-                self._needed_devices.remove(device_tag)
-                return True
-
-            device_needed = aggregate_subdevice(device_data)
-            if not device_needed:
-                _log.error("Warning device values already present, "
-                           "reinitializing")
-                self._initialize_devices()
-            if self._should_run_now():
-                field_names = {}
-                for key, value in self._device_values.items():
-                    field_names[key.lower() if isinstance(key, str) else key] = value
-                if not converter.initialized and conversion_map is not None:
-                    converter.setup_conversion_map(map_names, field_names)
-                if from_file:
-                    _timestamp = parse(headers.get('Date'))
-                    self.received_input_datetime = _timestamp
-                else:
-                    _timestamp = dt.now()
-                    self.received_input_datetime = dt.utcnow()
-
-                device_data = converter.process_row(field_names)
-                results = app_instance.run(_timestamp, device_data)
-                # results = app_instance.run(
-                # dateutil.parser.parse(self._subdevice_values['Timestamp'],
-                #                       fuzzy=True), self._subdevice_values)
-                self._process_results(results)
-                self._initialize_devices()
+                    field_names[device_data_tag.lower() if isinstance(device_data_tag, str) else device_data_tag] = value
+            if not converter.initialized and conversion_map is not None:
+                converter.setup_conversion_map(map_names, field_names)
+            if from_file:
+                _timestamp = frame.timestamp
+                self.received_input_datetime = _timestamp
             else:
-                _log.info("Still need {} before running.".format(self._needed_devices))
+                _timestamp = dt.now()
+                self.received_input_datetime = dt.utcnow()
+
+            device_data = converter.process_row(field_names)
+            results = app_instance.run(_timestamp, device_data)
+            self._process_results(results)
 
         def _process_results(self, results):
             """
@@ -0,0 +1,198 @@
+"""
+Measure memory and CPU for many AHUs: one process holding the diagnostics
+of every AHU, as one EconomizerAgent runs them, against one process per AHU,
+as one agent per AHU would.  A process per AHU is a lower bound for an agent
+per AHU, which also holds a platform connection.
+
+    python -m economizer.benchmark [--devices 300] [--messages 600] [--processes 10]
+
+Copyright (c) 2020, Battelle Memorial Institute
+All rights reserved.
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+1. Redistributions of source code must retain the above copyright notice, this
+   list of conditions and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice,
+   this list of conditions and the following disclaimer in the documentation
+   and/or other materials provided with the distribution.
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+(INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+The views and conclusions contained in the software and documentation are those
+of the authors and should not be interpreted as representing official policies,
+either expressed or implied, of the FreeBSD Project.
+This material was prepared as an account of work sponsored by an agency of the
+United States Government. Neither the United States Government nor the United
+States Department of Energy, nor Battelle, nor any of their employees, nor any
+jurisdiction or organization that has cooperated in th.e development of these
+materials, makes any warranty, express or implied, or assumes any legal
+liability or responsibility for the accuracy, completeness, or usefulness or
+any information, apparatus, product, software, or process disclosed, or
+represents that its use would not infringe privately owned rights.
+Reference herein to any specific commercial product, process, or service by
+trade name, trademark, manufacturer, or otherwise does not necessarily
+constitute or imply its endorsement, recommendation, or favoring by the
+United States Government or any agency thereof, or Battelle Memorial Institute.
+The views and opinions of authors expressed herein do not necessarily state or
+reflect those of the United States Government or any agency thereof.
+PACIFIC NORTHWEST NATIONAL LABORATORY
+operated by
+BATTELLE
+for the
+UNITED STATES DEPARTMENT OF ENERGY
+under Contract DE-AC05-76RL01830
+"""
+import os
+import sys
+import json
+import random
+import logging
+import argparse
+import subprocess
+from datetime import datetime, timedelta as td
+
+from .settings import EconomizerSettings
+from .device_diagnostics import DeviceDiagnostics
+
+POINT_MAPPING = {
+    "supply_fan_status": "FanStatus",
+    "outdoor_air_temperature": "OutdoorAirTemperature",
+    "return_air_temperature": "ReturnAirTemperature",
+    "mixed_air_temperature": "MixedAirTemperature",
+    "outdoor_damper_signal": "OutdoorDamperSignal",
+    "cool_call": "CompressorStatus"
+}
+
+
+def device_config(devices):
+    """An agent configuration with devices RTUs"""
+    return {
+        "analysis_name": "Economizer_AIRCx",
+        "device": {
+            "campus": "campus",
+            "building": "building",
+            "unit": {"rtu{}".format(index): {"subdevices": []} for index in range(devices)}
+        },
+        "arguments": {
+            "point_mapping": POINT_MAPPING,
+            "device_type": "rtu",
+            "data_window": 30,
+            "no_required_data": 10
+        }
+    }
+
+
+def device_message(rng):
+    """One RTU publish"""
+    outdoor = rng.uniform(50.0, 80.0)
+    damper = rng.uniform(0.0, 100.0)
+    return {
+        "FanStatus": 1,
+        "OutdoorAirTemperature": outdoor,
+        "ReturnAirTemperature": 72.0 + rng.uniform(-1.0, 1.0),
+        "MixedAirTemperature": outdoor + (72.0 - outdoor) * (1.0 - damper / 100.0) + rng.uniform(-1.0, 1.0),
+        "OutdoorDamperSignal": damper,
+        "CompressorStatus": rng.choice([0, 1])
+    }
+
+
+def rss_kb():
+    """Resident memory of this process in KB"""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except IOError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def cpu_seconds():
+    """User and system CPU time of this process since it started"""
+    times = os.times()
+    return times[0] + times[1]
+
+
+def run_devices(devices, messages, seed=0):
+    """
+    Create the diagnostics of devices RTUs and feed each one a publish a minute
+    devices: int
+    messages: int, publishes per device
+
+    return dictionary of memory (KB) and CPU (seconds) measurements
+    """
+    rng = random.Random(seed)
+    publishes = [device_message(rng) for _ in range(min(messages, 1000))]
+    start_rss = rss_kb()
+    start_cpu = cpu_seconds()
+    settings = EconomizerSettings(device_config(devices))
+    diagnostics = [DeviceDiagnostics(settings, publish_path) for publish_path in settings.publish_list]
+    start = datetime(2020, 7, 6, 12)
+    for index in range(messages):
+        current_time = start + td(minutes=index)
+        data = publishes[index % len(publishes)]
+        for device in diagnostics:
+            device.analyze([data, {}], current_time)
+            del device.results_publish[:]
+    return {"devices": devices,
+            "messages": messages,
+            "process_rss_kb": rss_kb(),
+            "device_rss_kb": rss_kb() - start_rss,
+            "process_cpu_s": cpu_seconds(),
+            "device_cpu_s": cpu_seconds() - start_cpu}
+
+
+def run_processes(processes, messages):
+    """Run one RTU in each of processes child processes, at the same time"""
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    children = [subprocess.Popen([sys.executable, "-m", "economizer.benchmark", "--single",
+                                  "--messages", str(messages)], cwd=package_dir, stdout=subprocess.PIPE)
+                for _ in range(processes)]
+    return [json.loads(child.communicate()[0].decode("utf-8")) for child in children]
+
+
+def main(argv=sys.argv):
+    """Print memory and CPU per AHU for one process and for a process per AHU"""
+    arg_parser = argparse.ArgumentParser(description="Benchmark the economizer diagnostics for many AHUs")
+    arg_parser.add_argument("--devices", type=int, default=300, help="AHUs run by one agent")
+    arg_parser.add_argument("--messages", type=int, default=600, help="one-minute publishes per AHU")
+    arg_parser.add_argument("--processes", type=int, default=10,
+                            help="single-AHU processes to run, their cost is scaled to --devices")
+    arg_parser.add_argument("--single", action="store_true", help="run one AHU and print its costs as JSON")
+    args = arg_parser.parse_args(argv[1:])
+
+    # Per-message info logging would dominate the timings.
+    logging.disable(logging.CRITICAL)
+    if args.single:
+        print(json.dumps(run_devices(1, args.messages)))
+        return
+
+    shared = run_devices(args.devices, args.messages)
+    single = run_processes(args.processes, args.messages)
+    single_rss = sum(result["process_rss_kb"] for result in single) / float(len(single))
+    single_cpu = sum(result["process_cpu_s"] for result in single) / float(len(single))
+    single_message_cpu = sum(result["device_cpu_s"] for result in single) / float(len(single))
+    messages = float(args.devices * args.messages)
+
+    print("{} AHUs, {} one-minute publishes each".format(args.devices, args.messages))
+    print("{:>18} {:>14} {:>16} {:>14} {:>12}".format("", "memory/AHU KB", "CPU/publish us", "total MB",
+                                                     "total CPU s"))
+    print("{:>18} {:>14.1f} {:>16.1f} {:>14.1f} {:>12.2f}".format(
+        "one agent", shared["device_rss_kb"] / float(args.devices), shared["device_cpu_s"] / messages * 1e6,
+        shared["process_rss_kb"] / 1024.0, shared["process_cpu_s"]))
+    print("{:>18} {:>14.1f} {:>16.1f} {:>14.1f} {:>12.2f}".format(
+        "process per AHU", single_rss, single_message_cpu / args.messages * 1e6,
+        single_rss * args.devices / 1024.0, single_cpu * args.devices))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,365 @@
+"""
+Copyright (c) 2020, Battelle Memorial Institute
+All rights reserved.
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+1. Redistributions of source code must retain the above copyright notice, this
+   list of conditions and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice,
+   this list of conditions and the following disclaimer in the documentation
+   and/or other materials provided with the distribution.
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+(INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+The views and conclusions contained in the software and documentation are those
+of the authors and should not be interpreted as representing official policies,
+either expressed or implied, of the FreeBSD Project.
+This material was prepared as an account of work sponsored by an agency of the
+United States Government. Neither the United States Government nor the United
+States Department of Energy, nor Battelle, nor any of their employees, nor any
+jurisdiction or organization that has cooperated in th.e development of these
+materials, makes any warranty, express or implied, or assumes any legal
+liability or responsibility for the accuracy, completeness, or usefulness or
+any information, apparatus, product, software, or process disclosed, or
+represents that its use would not infringe privately owned rights.
+Reference herein to any specific commercial product, process, or service by
+trade name, trademark, manufacturer, or otherwise does not necessarily
+constitute or imply its endorsement, recommendation, or favoring by the
+United States Government or any agency thereof, or Battelle Memorial Institute.
+The views and opinions of authors expressed herein do not necessarily state or
+reflect those of the United States Government or any agency thereof.
+PACIFIC NORTHWEST NATIONAL LABORATORY
+operated by
+BATTELLE
+for the
+UNITED STATES DEPARTMENT OF ENERGY
+under Contract DE-AC05-76RL01830
+"""
+import logging
+from datetime import timedelta as td
+from volttron.platform.agent.math_utils import mean
+from volttron.platform.agent.utils import setup_logging
+
+from . import constants
+from . diagnostics.TemperatureSensor import TemperatureSensor
+from . diagnostics.EconCorrectlyOn import EconCorrectlyOn
+from . diagnostics.EconCorrectlyOff import EconCorrectlyOff
+from . diagnostics.ExcessOutsideAir import ExcessOutsideAir
+from . diagnostics.InsufficientOutsideAir import InsufficientOutsideAir
+
+setup_logging()
+_log = logging.getLogger(__name__)
+
+
+class DeviceDiagnostics(object):
+    """
+    Economizer diagnostic state for one AHU/RTU.
+    Holds the precondition flags, the last parsed data message and the
+    diagnostic classes for a single device so that one agent can run the
+    economizer diagnostics for many devices.
+    """
+
+    def __init__(self, settings, publish_path):
+        self.settings = settings
+        self.publish_path = publish_path
+
+        #list attributes
+        self.damper_data = []
+        self.oat_data = []
+        self.mat_data = []
+        self.rat_data = []
+        self.cooling_data = []
+        self.fan_sp_data = []
+        self.fan_status_data = []
+        self.missing_data = []
+        self.results_publish = []
+
+        #float attributes
+        self.fan_speed = 0
+        self.oat = 0.0
+        self.rat = 0.0
+        self.mat = 0.0
+        self.oad = 0.0
+
+        # Precondition flags
+        self.oaf_condition = None
+        self.unit_status = None
+        self.sensor_limit = None
+        self.temp_sensor_problem = None
+
+        #diagnostics
+        self.temp_sensor = None
+        self.econ_correctly_on = None
+        self.econ_correctly_off = None
+        self.excess_outside_air = None
+        self.insufficient_outside_air = None
+        self.create_diagnostics()
+
+    def create_diagnostics(self):
+        """creates the diagnostic classes
+        No return
+        """
+        self.temp_sensor = TemperatureSensor()
+        self.temp_sensor.set_class_values(self.settings.analysis_name, self.results_publish, self.settings.data_window, self.settings.no_required_data, self.settings.temp_difference_threshold, self.settings.open_damper_time,  self.settings.temp_damper_threshold)
+        self.econ_correctly_on = EconCorrectlyOn()
+        self.econ_correctly_on.set_class_values(self.settings.analysis_name, self.results_publish, self.settings.data_window, self.settings.no_required_data, self.settings.minimum_damper_setpoint, self.settings.open_damper_threshold, float(self.settings.rated_cfm), self.settings.eer)
+        self.econ_correctly_off = EconCorrectlyOff()
+        self.econ_correctly_off.set_class_values(self.settings.analysis_name, self.results_publish, self.settings.data_window, self.settings.no_required_data, self.settings.minimum_damper_setpoint, self.settings.desired_oaf, float(self.settings.rated_cfm), self.settings.eer)
+        self.excess_outside_air = ExcessOutsideAir()
+        self.excess_outside_air.set_class_values(self.settings.analysis_name, self.results_publish, self.settings.data_window, self.settings.no_required_data, self.settings.minimum_damper_setpoint, self.settings.desired_oaf, float(self.settings.rated_cfm), self.settings.eer)
+        self.insufficient_outside_air = InsufficientOutsideAir()
+        self.insufficient_outside_air.set_class_values(self.settings.analysis_name, self.results_publish, self.settings.data_window, self.settings.no_required_data, self.settings.desired_oaf)
+
+    def parse_data_message(self, message):
+        """Breaks down the passed VOLTTRON message
+        message: dictionary
+        no return
+        """
+        data_message = message[0]
+        #reset the data arrays on new message
+        self.fan_status_data = []
+        self.damper_data = []
+        self.oat_data = []
+        self.mat_data = []
+        self.rat_data = []
+        self.cooling_data = []
+        self.fan_sp_data = []
+        self.missing_data = []
+
+        for key in data_message:
+            value = data_message[key]
+            if value is None:
+                continue
+            if key == self.settings.fan_status_name:
+                self.fan_status_data.append(value)
+            elif key == self.settings.oad_sig_name:
+                self.damper_data.append(value)
+            elif key == self.settings.oat_name:
+                self.oat_data.append(value)
+            elif key == self.settings.mat_name:
+                self.mat_data.append(value)
+            elif key == self.settings.rat_name:
+                self.rat_data.append(value)
+            elif key == self.settings.cool_call_name:
+                self.cooling_data.append(value)
+            elif key == self.settings.fan_sp_name:
+                self.fan_sp_data.append(value)
+
+    def check_for_missing_data(self):
+        """Method that checks the parsed message results for any missing data
+        return bool
+        """
+        if not self.oat_data:
+            self.missing_data.append(self.settings.oat_name)
+        if not self.rat_data:
+            self.missing_data.append(self.settings.rat_name)
+        if not self.mat_data:
+            self.missing_data.append(self.settings.mat_name)
+        if not self.damper_data:
+            self.missing_data.append(self.settings.oad_sig_name)
+        if not self.cooling_data:
+            self.missing_data.append(self.settings.cool_call_name)
+        if not self.fan_status_data and not self.fan_sp_data:
+            self.missing_data.append(self.settings.fan_status_name)
+
+        if self.missing_data:
+            return True
+        return False
+
+    def check_fan_status(self, current_time):
+        """Check the status and speed of the fan
+        current_time: datetime time delta
+
+        return int
+        """
+        if self.fan_status_data:
+            supply_fan_status = int(max(self.fan_status_data))
+        else:
+            supply_fan_status = None
+
+        if self.fan_sp_data:
+            self.fan_speed = mean(self.fan_sp_data)
+        else:
+            self.fan_speed = None
+        if supply_fan_status is None:
+            if self.fan_speed > self.settings.low_supply_fan_threshold:
+                supply_fan_status = 1
+            else:
+                supply_fan_status = 0
+
+        if not supply_fan_status:
+            if self.unit_status is None:
+                self.unit_status = current_time
+        else:
+            self.unit_status = None
+        return supply_fan_status
+
+    def check_temperature_condition(self, current_time):
+        """Ensure the OAT and RAT have minimum difference to allow for a conclusive diagnostic.
+        current_time: datetime time delta
+
+        no return
+        """
+        if abs(self.oat - self.rat) < self.settings.oaf_temperature_threshold:
+            if self.oaf_condition is None:
+                self.oaf_condition = current_time
+        else:
+            self.oaf_condition = None
+
+    def check_elapsed_time(self, current_time, condition, message):
+        """Check on time since last message to see if it is in data window
+        current_time: datetime time delta
+        condition: datetime time delta
+        message: string
+        """
+        if condition is not None:
+            elapsed_time = current_time - condition
+        else:
+            elapsed_time = td(minutes=0)
+        if elapsed_time >= self.settings.data_window:
+            self.pre_conditions(message, current_time)
+            self.clear_all()
+
+    def clear_all(self):
+        """Reinitialize all data arrays for diagnostics.
+        no return
+        """
+        self.clear_diagnostics()
+        self.temp_sensor_problem = None
+        self.unit_status = None
+        self.oaf_condition = None
+        self.sensor_limit = None
+
+    def clear_diagnostics(self):
+        """Clear the diagnositcs
+        no return
+        """
+        self.temp_sensor.clear_data()
+        self.econ_correctly_on.clear_data()
+        self.econ_correctly_off.clear_data()
+        self.excess_outside_air.clear_data()
+        self.insufficient_outside_air.clear_data()
+
+    def pre_conditions(self, message, cur_time):
+        """Publish Pre conditions not met
+        message: string
+        cur_time: datetime time delta
+
+        no return
+        """
+        dx_msg = {}
+        for sensitivity in self.settings.sensitivity:
+            dx_msg[sensitivity] = message
+
+        for diagnostic in constants.DX_LIST:
+            _log.info(constants.table_log_format(self.settings.analysis_name, cur_time, (diagnostic + constants.DX + ':' + str(dx_msg))))
+            self.results_publish.append(constants.table_publish_format(self.settings.analysis_name, cur_time, (diagnostic + constants.DX), str(dx_msg)))
+
+    def sensor_limit_check(self, current_time):
+        """ Check temperature limits on sensors.
+        current_time: datetime time delta
+
+        return bool
+        """
+        sensor_limit = (False, None)
+        if self.oat < self.settings.oat_low_threshold or self.oat > self.settings.oat_high_threshold:
+            sensor_limit = (True, constants.OAT_LIMIT)
+        elif self.mat < self.settings.mat_low_threshold or self.mat > self.settings.mat_high_threshold:
+            sensor_limit = (True, constants.MAT_LIMIT)
+        elif self.rat < self.settings.rat_low_threshold or self.rat > self.settings.rat_high_threshold:
+            sensor_limit = (True, constants.RAT_LIMIT)
+
+        if sensor_limit[0]:
+            if self.sensor_limit is None:
+                self.sensor_limit = current_time
+        else:
+            self.sensor_limit = None
+        return sensor_limit
+
+    def determine_cooling_condition(self):
+        """Determine if the unit is in a cooling mode and if conditions are favorable for economizing.
+
+        return float
+        return Bool/int
+        """
+        cool_call = None
+        if self.settings.device_type == "ahu":
+            clg_vlv_pos = mean(self.cooling_data)
+            cool_call = True if clg_vlv_pos > self.settings.cooling_enabled_threshold else False
+        elif self.settings.device_type == "rtu":
+            cool_call = int(max(self.cooling_data))
+
+        if self.settings.economizer_type == "ddb":
+            econ_condition = (self.rat - self.oat) > self.settings.temp_band
+        else:
+            econ_condition = (self.settings.econ_hl_temp - self.oat) > self.settings.temp_band
+
+        return econ_condition, cool_call
+
+    def analyze(self, message, current_time):
+        """
+        Run the economizer diagnostics on one device data publish.
+        message: list (device data, metadata)
+        current_time: datetime time delta
+
+        no return
+        """
+        _log.info("Processing Results!")
+        self.parse_data_message(message)
+        missing_data = self.check_for_missing_data()
+        #want to do no further parsing if data is missing
+        if missing_data:
+            _log.info("Missing data from publish: %s", self.missing_data)
+            return
+
+        #check on fan status and speed
+        fan_status = self.check_fan_status(current_time)
+        self.check_elapsed_time(current_time, self.unit_status, constants.FAN_OFF)
+        if not fan_status:
+            _log.info("Supply fan is off: %s", current_time)
+            return
+        else:
+            _log.info("Supply fan is on: %s", current_time)
+
+        if self.fan_speed is None and self.settings.constant_volume:
+            self.fan_speed = 100.0
+
+        self.oat = mean(self.oat_data)
+        self.rat = mean(self.rat_data)
+        self.mat = mean(self.mat_data)
+        self.oad = mean(self.damper_data)
+
+        #check on temperature condition
+        self.check_temperature_condition(current_time)
+        self.check_elapsed_time(current_time, self.oaf_condition, constants.OAF)
+
+        if self.oaf_condition:
+            _log.info("OAT and RAT readings are too close.")
+            return
+
+        limit_condition = self.sensor_limit_check(current_time)
+        self.check_elapsed_time(current_time, self.sensor_limit, limit_condition[1])
+        #check to see if there was a temperature sensor out of bounds
+        if limit_condition[0]:
+            _log.info("Temperature sensor is outside of bounds: {} -- {}".format(limit_condition, self.sensor_limit))
+            return
+
+        self.temp_sensor_problem = self.temp_sensor.temperature_algorithm(self.oat, self.rat, self.mat, self.oad, current_time)
+        econ_condition, cool_call = self.determine_cooling_condition()
+        _log.debug("Cool call: %s - Economizer status: %s", cool_call, econ_condition)
+
+        if self.temp_sensor_problem is not None and not self.temp_sensor_problem:
+            self.econ_correctly_on.economizer_on_algorithm(cool_call, self.oat, self.rat, self.mat, self.oad, econ_condition, current_time, self.fan_speed)
+            self.econ_correctly_off.economizer_off_algorithm(self.oat, self.rat, self.mat, self.oad, econ_condition, current_time, self.fan_speed)
+            self.excess_outside_air.excess_ouside_air_algorithm(self.oat, self.rat, self.mat, self.oad, econ_condition, current_time, self.fan_speed)
+            self.insufficient_outside_air.insufficient_outside_air_algorithm(self.oat, self.rat, self.mat, current_time)
+        elif self.temp_sensor_problem:
+            self.pre_conditions(constants.TEMP_SENSOR, current_time)
+            self.clear_diagnostics()
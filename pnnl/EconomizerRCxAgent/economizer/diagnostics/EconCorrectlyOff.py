@@ -44,9 +44,9 @@ under Contract DE-AC05-76RL01830
 """
 import logging
 from datetime import timedelta as td
-from volttron.platform.agent.math_utils import mean
 from volttron.platform.agent.utils import setup_logging
 from .. import constants
+from .common import DataWindow
 
 setup_logging()
 _log = logging.getLogger(__name__)
@@ -61,13 +61,8 @@ class EconCorrectlyOff(object):
     """
 
     def __init__(self):
-        # Initialize data arrays
-        self.oat_values = []
-        self.rat_values = []
-        self.mat_values = []
-        self.fan_spd_values = []
-        self.oad_values = []
-        self.timestamp = []
+        # Initialize data window
+        self.window = DataWindow()
         self.analysis_name = ''
 
         # Initialize not_cooling and not_economizing flags
@@ -139,25 +134,36 @@ class EconCorrectlyOff(object):
         if economizing:
             return
 
-        self.oat_values.append(oat)
-        self.mat_values.append(mat)
-        self.rat_values.append(rat)
-        self.oad_values.append(oad)
-        self.timestamp.append(cur_time)
-
         fan_sp = fan_sp / 100.0 if fan_sp is not None else 1.0
-        self.fan_spd_values.append(fan_sp)
-        elapsed_time = self.timestamp[-1] - self.timestamp[0]
+        self.add_sample(oat, rat, mat, oad, fan_sp, cur_time)
+        elapsed_time = self.window.elapsed()
 
-        if elapsed_time >= self.data_window and len(self.timestamp) >= self.no_required_data:
+        if elapsed_time >= self.data_window and len(self.window) >= self.no_required_data:
             if elapsed_time > self.max_dx_time:
-                _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (constants.ECON3 + constants.DX + ':' + str(self.inconsistent_date))))
-                self.results_publish.append(constants.table_publish_format(self.analysis_name, self.timestamp[-1], (constants.ECON3 + constants.DX), str(self.inconsistent_date)))
+                _log.info(constants.table_log_format(self.analysis_name, self.window.last, (constants.ECON3 + constants.DX + ':' + str(self.inconsistent_date))))
+                self.results_publish.append(constants.table_publish_format(self.analysis_name, self.window.last, (constants.ECON3 + constants.DX), str(self.inconsistent_date)))
                 self.clear_data()
                 return
             self.economizing_when_not_needed()
 
 
+    def add_sample(self, oat, rat, mat, oad, fan_sp, cur_time):
+        """Add the damper and energy terms for one sample to the data window
+        oat: float
+        rat: float
+        mat: float
+        oad: float
+        fan_sp: float (fraction of full speed)
+        cur_time: datetime time delta
+
+        No return
+        """
+        self.window.add(cur_time, oad=oad)
+        desired_oaf = self.desired_oaf / 100.0
+        excess_mat = mat - (oat * desired_oaf + (rat * (1.0 - desired_oaf)))
+        if excess_mat > 0:
+            self.window.include("energy", (1.08 * fan_sp * self.cfm * excess_mat) / (1000.0 * self.eer))
+
     def economizer_conditions(self, econ_condition, cur_time):
         """ Check conditions to see if should be economizing
         econ_conditions: float
@@ -165,7 +171,7 @@ class EconCorrectlyOff(object):
         returns boolean
         """
         if econ_condition:
-            _log.info("{}: economizing, for data {} --{}.".format(constants.ECON3, econ_condition, cur_time))
+            _log.info("%s: economizing, for data %s --%s.", constants.ECON3, econ_condition, cur_time)
             if self.economizing is None:
                 self.economizing = cur_time
             if cur_time - self.economizing >= self.data_window:
@@ -182,8 +188,7 @@ class EconCorrectlyOff(object):
         """If the detected problems(s) are consistent then generate a fault message(s).
         No return
         """
-        desired_oaf = self.desired_oaf / 100.0
-        avg_damper = mean(self.oad_values)
+        avg_damper = self.window.mean("oad")
         diagnostic_msg = {}
         energy_impact = {}
         for sensitivity, threshold in self.excess_damper_threshold.items():
@@ -191,7 +196,7 @@ class EconCorrectlyOff(object):
                 msg = "{} - {}: {}".format(constants.ECON3, sensitivity, self.alg_result_messages[0])
                 # color_code = "RED"
                 result = 21.1
-                energy = self.energy_impact_calculation(desired_oaf)
+                energy = self.energy_impact_calculation()
             else:
                 msg = "{} - {}: {}".format(constants.ECON3, sensitivity, self.alg_result_messages[1])
                 # color_code = "GREEN"
@@ -200,43 +205,26 @@ class EconCorrectlyOff(object):
             _log.info(msg)
             diagnostic_msg.update({sensitivity: result})
             energy_impact.update({sensitivity: energy})
-        _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (constants.ECON3 + constants.DX + ':' + str(diagnostic_msg))))
-        self.results_publish.append(constants.table_publish_format(self.analysis_name, self.timestamp[-1], (constants.ECON3 + constants.DX), str(diagnostic_msg)))
-        _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (constants.ECON3 + constants.EI + ':' + str(energy_impact))))
-        self.results_publish.append(constants.table_publish_format(self.analysis_name, self.timestamp[-1], (constants.ECON3 + constants.EI), str(energy_impact)))
+        _log.info(constants.table_log_format(self.analysis_name, self.window.last, (constants.ECON3 + constants.DX + ':' + str(diagnostic_msg))))
+        self.results_publish.append(constants.table_publish_format(self.analysis_name, self.window.last, (constants.ECON3 + constants.DX), str(diagnostic_msg)))
+        _log.info(constants.table_log_format(self.analysis_name, self.window.last, (constants.ECON3 + constants.EI + ':' + str(energy_impact))))
+        self.results_publish.append(constants.table_publish_format(self.analysis_name, self.window.last, (constants.ECON3 + constants.EI), str(energy_impact)))
         self.clear_data()
 
-    def energy_impact_calculation(self, desired_oaf):
+    def energy_impact_calculation(self):
         """ Calculate the impact the temperature values have
-        desired_oaf: float
 
         returns float
         """
-        ei = 0.0
-        energy_calc = [
-            (1.08 * spd * self.cfm * (mat - (oat * desired_oaf + (rat * (1.0 - desired_oaf))))) / (1000.0 * self.eer)
-            for mat, oat, rat, spd in zip(self.mat_values, self.oat_values, self.rat_values, self.fan_spd_values)
-            if (mat - (oat * desired_oaf + (rat * (1.0 - desired_oaf)))) > 0
-        ]
-        if energy_calc:
-            avg_step = (self.timestamp[-1] - self.timestamp[0]).total_seconds() / 60 if len(self.timestamp) > 1 else 1
-            dx_time = (len(energy_calc) - 1) * avg_step if len(energy_calc) > 1 else 1.0
-            ei = (sum(energy_calc) * 60.0) / (len(energy_calc) * dx_time)
-            ei = round(ei, 2)
-        return ei
+        return self.window.energy_impact("energy")
 
     def clear_data(self):
         """
-        Reinitialize data arrays.
+        Reinitialize data window.
 
         No return
         """
-        self.oad_values = []
-        self.oat_values = []
-        self.rat_values = []
-        self.mat_values = []
-        self.fan_spd_values = []
-        self.timestamp = []
+        self.window.clear()
         self.economizing = None
 
 
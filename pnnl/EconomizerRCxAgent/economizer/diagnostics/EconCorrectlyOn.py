@@ -44,9 +44,9 @@ under Contract DE-AC05-76RL01830
 """
 import logging
 from datetime import timedelta as td
-from volttron.platform.agent.math_utils import mean
 from volttron.platform.agent.utils import setup_logging
 from .. import constants
+from .common import DataWindow
 
 setup_logging()
 _log = logging.getLogger(__name__)
@@ -60,13 +60,8 @@ class EconCorrectlyOn(object):
     """
 
     def __init__(self):
-        # Initialize data arrays
-        self.oat_values = []
-        self.rat_values = []
-        self.mat_values = []
-        self.fan_spd_values = []
-        self.oad_values = []
-        self.timestamp = []
+        # Initialize data window
+        self.window = DataWindow()
         self.analysis_name = ''
 
         # Initialize not_cooling and not_economizing flags
@@ -148,25 +143,34 @@ class EconCorrectlyOn(object):
         if not economizing:
             return
 
-        self.oat_values.append(oat)
-        self.mat_values.append(mat)
-        self.rat_values.append(rat)
-        self.oad_values.append(oad)
-        self.timestamp.append(cur_time)
-
         fan_sp = fan_sp / 100.0 if fan_sp is not None else 1.0
-        self.fan_spd_values.append(fan_sp)
-        elapsed_time = self.timestamp[-1] - self.timestamp[0]
+        self.add_sample(oat, rat, mat, oad, fan_sp, cur_time)
+        elapsed_time = self.window.elapsed()
 
-        if elapsed_time >= self.data_window and len(self.timestamp) >= self.no_required_data:
+        if elapsed_time >= self.data_window and len(self.window) >= self.no_required_data:
             if elapsed_time > self.max_dx_time:
-                _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (constants.ECON2 + constants.DX + ':' + str(self.inconsistent_date))))
-                self.results_publish.append(constants.table_publish_format(self.analysis_name, self.timestamp[-1], (constants.ECON2 + constants.DX), str(self.inconsistent_date)))
+                _log.info(constants.table_log_format(self.analysis_name, self.window.last, (constants.ECON2 + constants.DX + ':' + str(self.inconsistent_date))))
+                self.results_publish.append(constants.table_publish_format(self.analysis_name, self.window.last, (constants.ECON2 + constants.DX), str(self.inconsistent_date)))
                 self.clear_data()
                 return
             self.not_economizing_when_needed()
 
 
+    def add_sample(self, oat, rat, mat, oad, fan_sp, cur_time):
+        """Add the OAF, damper and energy terms for one sample to the data window
+        oat: float
+        rat: float
+        mat: float
+        oad: float
+        fan_sp: float (fraction of full speed)
+        cur_time: datetime time delta
+
+        No return
+        """
+        self.window.add(cur_time, oaf=(mat - rat) / (oat - rat), oad=oad)
+        if (mat - oat) > 0:
+            self.window.include("energy", 1.08 * fan_sp * self.cfm * (mat - oat) / (1000.0 * self.eer))
+
     def economizer_conditions(self, cooling_call, econ_condition, cur_time):
         """Check conditions to see if should be economizing
         cooling_call: int
@@ -176,7 +180,7 @@ class EconCorrectlyOn(object):
         returns boolean
         """
         if not cooling_call:
-            _log.info("{}: not cooling at {}".format(constants.ECON2, cur_time))
+            _log.info("%s: not cooling at %s", constants.ECON2, cur_time)
             if self.not_cooling is None:
                 self.not_cooling = cur_time
             if cur_time - self.not_cooling >= self.data_window:
@@ -189,7 +193,7 @@ class EconCorrectlyOn(object):
             self.not_cooling = None
 
         if not econ_condition:
-            _log.info("{}: not economizing at {}.".format(constants.ECON2, cur_time))
+            _log.info("%s: not economizing at %s.", constants.ECON2, cur_time)
             if self.not_economizing is None:
                 self.not_economizing = cur_time
             if cur_time - self.not_economizing >= self.data_window:
@@ -206,9 +210,8 @@ class EconCorrectlyOn(object):
         """If the detected problems(s) are consistent then generate a fault message(s).
         No return
         """
-        oaf = [(m - r) / (o - r) for o, r, m in zip(self.oat_values, self.rat_values, self.mat_values)]
-        avg_oaf = max(0.0, min(100.0, mean(oaf) * 100.0))
-        avg_damper_signal = mean(self.oad_values)
+        avg_oaf = max(0.0, min(100.0, self.window.mean("oaf") * 100.0))
+        avg_damper_signal = self.window.mean("oad")
         diagnostic_msg = {}
         energy_impact = {}
         thresholds = zip(self.open_damper_threshold.items(), self.oaf_economizing_threshold.items())
@@ -229,10 +232,10 @@ class EconCorrectlyOn(object):
             _log.info(msg)
             diagnostic_msg.update({key: result})
             energy_impact.update({key: energy})
-        _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (constants.ECON2 + constants.DX + ':' + str(diagnostic_msg))))
-        _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (constants.ECON2 + constants.EI + ':' + str(energy_impact))))
-        self.results_publish.append(constants.table_publish_format(self.analysis_name, self.timestamp[-1], (constants.ECON2 + constants.DX), str(diagnostic_msg)))
-        self.results_publish.append(constants.table_publish_format(self.analysis_name, self.timestamp[-1], (constants.ECON2 + constants.EI),  str(energy_impact)))
+        _log.info(constants.table_log_format(self.analysis_name, self.window.last, (constants.ECON2 + constants.DX + ':' + str(diagnostic_msg))))
+        _log.info(constants.table_log_format(self.analysis_name, self.window.last, (constants.ECON2 + constants.EI + ':' + str(energy_impact))))
+        self.results_publish.append(constants.table_publish_format(self.analysis_name, self.window.last, (constants.ECON2 + constants.DX), str(diagnostic_msg)))
+        self.results_publish.append(constants.table_publish_format(self.analysis_name, self.window.last, (constants.ECON2 + constants.EI),  str(energy_impact)))
         self.clear_data()
 
     def energy_impact_calculation(self):
@@ -240,29 +243,15 @@ class EconCorrectlyOn(object):
 
         returns float
         """
-        ei = 0.0
-        energy_calc = [1.08 * spd * self.cfm * (mat - oat) / (1000.0 * self.eer)
-                       for mat, oat, spd in zip(self.mat_values, self.oat_values, self.fan_spd_values)
-                       if (mat - oat) > 0]
-        if energy_calc:
-            avg_step = (self.timestamp[-1] - self.timestamp[0]).total_seconds() / 60 if len(self.timestamp) > 1 else 1
-            dx_time = (len(energy_calc) - 1) * avg_step if len(energy_calc) > 1 else 1.0
-            ei = (sum(energy_calc) * 60.0) / (len(energy_calc) * dx_time)
-            ei = round(ei, 2)
-        return ei
+        return self.window.energy_impact("energy")
 
     def clear_data(self):
         """
-        Reinitialize data arrays.
+        Reinitialize data window.
 
         No return
         """
-        self.oad_values = []
-        self.oat_values = []
-        self.rat_values = []
-        self.mat_values = []
-        self.fan_spd_values = []
-        self.timestamp = []
+        self.window.clear()
         self.not_economizing = None
         self.not_cooling = None
 
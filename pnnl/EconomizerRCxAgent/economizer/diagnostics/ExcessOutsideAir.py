@@ -44,9 +44,9 @@ under Contract DE-AC05-76RL01830
 """
 import logging
 from datetime import timedelta as td
-from volttron.platform.agent.math_utils import mean
 from volttron.platform.agent.utils import setup_logging
 from .. import constants
+from .common import DataWindow
 
 setup_logging()
 _log = logging.getLogger(__name__)
@@ -61,13 +61,8 @@ class ExcessOutsideAir(object):
     """
 
     def __init__(self):
-        # Initialize data arrays
-        self.oat_values = []
-        self.rat_values = []
-        self.mat_values = []
-        self.oad_values = []
-        self.timestamp = []
-        self.fan_spd_values = []
+        # Initialize data window
+        self.window = DataWindow()
         self.economizing = None
         self.analysis_name = ''
         self.results_publish = None
@@ -138,25 +133,36 @@ class ExcessOutsideAir(object):
         if economizing:
             return
 
-        self.oad_values.append(oad)
-        self.oat_values.append(oat)
-        self.rat_values.append(rat)
-        self.mat_values.append(mat)
-        self.timestamp.append(cur_time)
-
         fan_sp = fan_sp / 100.0 if fan_sp is not None else 1.0
-        self.fan_spd_values.append(fan_sp)
-        elapsed_time = self.timestamp[-1] - self.timestamp[0]
+        self.add_sample(oat, rat, mat, oad, fan_sp, cur_time)
+        elapsed_time = self.window.elapsed()
 
-        if elapsed_time >= self.data_window and len(self.timestamp) >= self.no_required_data:
+        if elapsed_time >= self.data_window and len(self.window) >= self.no_required_data:
             if elapsed_time > self.max_dx_time:
-                _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (constants.ECON4 + constants.DX + ':' + str(self.inconsistent_date))))
-                self.results_publish.append(constants.table_publish_format(self.analysis_name, self.timestamp[-1], (constants.ECON4 + constants.DX), str(self.inconsistent_date)))
+                _log.info(constants.table_log_format(self.analysis_name, self.window.last, (constants.ECON4 + constants.DX + ':' + str(self.inconsistent_date))))
+                self.results_publish.append(constants.table_publish_format(self.analysis_name, self.window.last, (constants.ECON4 + constants.DX), str(self.inconsistent_date)))
                 self.clear_data()
                 return
             self.excess_oa()
 
 
+    def add_sample(self, oat, rat, mat, oad, fan_sp, cur_time):
+        """Add the OAF, damper and energy terms for one sample to the data window
+        oat: float
+        rat: float
+        mat: float
+        oad: float
+        fan_sp: float (fraction of full speed)
+        cur_time: datetime time delta
+
+        No return
+        """
+        self.window.add(cur_time, oaf=(mat - rat) / (oat - rat), oad=oad)
+        desired_oaf = self.desired_oaf / 100.0
+        excess_mat = mat - (oat * desired_oaf + (rat * (1.0 - desired_oaf)))
+        if excess_mat > 0:
+            self.window.include("energy", (1.08 * fan_sp * self.cfm * excess_mat) / (1000.0 * self.eer))
+
     def economizer_conditions(self, econ_condition, cur_time):
         """Check conditions to see if should be economizing
         econ_conditions: float
@@ -165,14 +171,14 @@ class ExcessOutsideAir(object):
         returns boolean
         """
         if econ_condition:
-            _log.info("{}: economizing at {} .".format(constants.ECON4, cur_time))
+            _log.info("%s: economizing at %s .", constants.ECON4, cur_time)
             if self.economizing is None:
                 self.economizing = cur_time
             if cur_time - self.economizing >= self.data_window:
                 _log.info("{}: economizing for data set, reinitialize.".format(constants.ECON4))
-                if len(self.timestamp):
-                    _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (constants.ECON4 + constants.DX + ':' + str(self.economizing_dict))))
-                    self.results_publish.append(constants.table_publish_format(self.analysis_name, self.timestamp[-1], (constants.ECON4 + constants.DX), str(self.economizing_dict)))
+                if len(self.window):
+                    _log.info(constants.table_log_format(self.analysis_name, self.window.last, (constants.ECON4 + constants.DX + ':' + str(self.economizing_dict))))
+                    self.results_publish.append(constants.table_publish_format(self.analysis_name, self.window.last, (constants.ECON4 + constants.DX), str(self.economizing_dict)))
                 else:
                     _log.info(constants.table_log_format(self.analysis_name, cur_time, (constants.ECON4 + constants.DX + ':' + str(self.economizing_dict))))
                     self.results_publish.append(constants.table_publish_format(self.analysis_name, cur_time, (constants.ECON4 + constants.DX), str(self.economizing_dict)))
@@ -187,18 +193,16 @@ class ExcessOutsideAir(object):
         No return
         """
         energy = 0.0
-        oaf = [(m - r) / (o - r) for o, r, m in zip(self.oat_values, self.rat_values, self.mat_values)]
-        avg_oaf = mean(oaf) * 100.0
-        avg_damper = mean(self.oad_values)
-        desired_oaf = self.desired_oaf / 100.0
+        avg_oaf = self.window.mean("oaf") * 100.0
+        avg_damper = self.window.mean("oad")
         diagnostic_msg = {}
         energy_impact = {}
 
         if avg_oaf < 0 or avg_oaf > 125.0:
             msg = ("{}: Inconclusive result, unexpected OAF value: {}".format(constants.ECON4, avg_oaf))
             _log.info(msg)
-            _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (constants.ECON4 + constants.DX + ':' + str(self.invalid_oaf_dict))))
-            self.results_publish.append(constants.table_publish_format(self.analysis_name, self.timestamp[-1], (constants.ECON4 + constants.DX),  str(self.invalid_oaf_dict)))
+            _log.info(constants.table_log_format(self.analysis_name, self.window.last, (constants.ECON4 + constants.DX + ':' + str(self.invalid_oaf_dict))))
+            self.results_publish.append(constants.table_publish_format(self.analysis_name, self.window.last, (constants.ECON4 + constants.DX),  str(self.invalid_oaf_dict)))
             self.clear_data()
             return
 
@@ -214,13 +218,13 @@ class ExcessOutsideAir(object):
                            "but is significantly above that value. Excess outdoor air is "
                            "being provided; This could significantly increase "
                            "heating and cooling costs".format(constants.ECON4))
-                    energy = self.energy_impact_calculation(desired_oaf)
+                    energy = self.energy_impact_calculation()
                     result = 34.1
             elif avg_oaf - self.desired_oaf > oaf_thr:
                 msg = ("{}: Excess outdoor air is being provided, this could "
                        "increase heating and cooling energy consumption.".format(constants.ECON4))
                 # color_code = "RED"
-                energy = self.energy_impact_calculation(desired_oaf)
+                energy = self.energy_impact_calculation()
                 result = 33.1
             else:
                 # color_code = "GREEN"
@@ -231,42 +235,25 @@ class ExcessOutsideAir(object):
             _log.info(msg)
             energy_impact.update({key: energy})
             diagnostic_msg.update({key: result})
-        _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (constants.ECON4 + constants.DX + ':' + str(diagnostic_msg))))
-        _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (constants.ECON4 + constants.EI + ':' + str(energy_impact))))
-        self.results_publish.append(constants.table_publish_format(self.analysis_name, self.timestamp[-1], (constants.ECON4 + constants.DX),  str(diagnostic_msg)))
-        self.results_publish.append(constants.table_publish_format(self.analysis_name, self.timestamp[-1], (constants.ECON4 + constants.EI), str(energy_impact)))
+        _log.info(constants.table_log_format(self.analysis_name, self.window.last, (constants.ECON4 + constants.DX + ':' + str(diagnostic_msg))))
+        _log.info(constants.table_log_format(self.analysis_name, self.window.last, (constants.ECON4 + constants.EI + ':' + str(energy_impact))))
+        self.results_publish.append(constants.table_publish_format(self.analysis_name, self.window.last, (constants.ECON4 + constants.DX),  str(diagnostic_msg)))
+        self.results_publish.append(constants.table_publish_format(self.analysis_name, self.window.last, (constants.ECON4 + constants.EI), str(energy_impact)))
         self.clear_data()
 
 
-    def energy_impact_calculation(self, desired_oaf):
+    def energy_impact_calculation(self):
         """ Calculate the impact the temperature values have
-        desired_oaf: float
 
         returns float
         """
-        ei = 0.0
-        energy_calc = [
-            (1.08 * spd * self.cfm * (mat - (oat * desired_oaf + (rat * (1.0 - desired_oaf))))) / (1000.0 * self.eer)
-            for mat, oat, rat, spd in zip(self.mat_values, self.oat_values, self.rat_values, self.fan_spd_values)
-            if (mat - (oat * desired_oaf + (rat * (1.0 - desired_oaf)))) > 0
-        ]
-        if energy_calc:
-            avg_step = (self.timestamp[-1] - self.timestamp[0]).total_seconds() / 60 if len(self.timestamp) > 1 else 1
-            dx_time = (len(energy_calc) - 1) * avg_step if len(energy_calc) > 1 else 1.0
-            ei = (sum(energy_calc) * 60.0) / (len(energy_calc) * dx_time)
-            ei = round(ei, 2)
-        return ei
+        return self.window.energy_impact("energy")
 
     def clear_data(self):
         """
-        Reinitialize data arrays.
+        Reinitialize data window.
 
         No return
         """
-        self.oad_values = []
-        self.oat_values = []
-        self.rat_values = []
-        self.mat_values = []
-        self.fan_spd_values = []
-        self.timestamp = []
+        self.window.clear()
         self.economizing = None
@@ -44,9 +44,9 @@ under Contract DE-AC05-76RL01830
 """
 import logging
 from datetime import timedelta as td
-from volttron.platform.agent.math_utils import mean
 from volttron.platform.agent.utils import setup_logging
 from .. import constants
+from .common import DataWindow
 
 setup_logging()
 _log = logging.getLogger(__name__)
@@ -61,11 +61,8 @@ class InsufficientOutsideAir(object):
     """
 
     def __init__(self):
-        # Initialize data arrays
-        self.oat_values = []
-        self.rat_values = []
-        self.mat_values = []
-        self.timestamp = []
+        # Initialize data window
+        self.window = DataWindow()
         self.max_dx_time = None
         self.analysis_name = ''
         self.results_publish = None
@@ -113,36 +110,42 @@ class InsufficientOutsideAir(object):
 
         No return
         """
-        self.oat_values.append(oatemp)
-        self.rat_values.append(ratemp)
-        self.mat_values.append(matemp)
-        self.timestamp.append(cur_time)
+        self.add_sample(oatemp, ratemp, matemp, cur_time)
+        elapsed_time = self.window.elapsed()
 
-        elapsed_time = self.timestamp[-1] - self.timestamp[0]
-
-        if elapsed_time >= self.data_window and len(self.timestamp) >= self.no_required_data:
+        if elapsed_time >= self.data_window and len(self.window) >= self.no_required_data:
             if elapsed_time > self.max_dx_time:
-                _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (constants.ECON5 + constants.DX + ':' + str(self.inconsistent_date))))
-                self.results_publish.append(constants.table_publish_format(self.analysis_name, self.timestamp[-1], (constants.ECON5 + constants.DX), str(self.inconsistent_date)))
+                _log.info(constants.table_log_format(self.analysis_name, self.window.last, (constants.ECON5 + constants.DX + ':' + str(self.inconsistent_date))))
+                self.results_publish.append(constants.table_publish_format(self.analysis_name, self.window.last, (constants.ECON5 + constants.DX), str(self.inconsistent_date)))
                 self.clear_data()
                 return
             self.insufficient_oa()
 
 
+    def add_sample(self, oatemp, ratemp, matemp, cur_time):
+        """Add the OAF for one sample to the data window
+        oatemp: float
+        ratemp: float
+        matemp: float
+        cur_time: datetime time delta
+
+        No return
+        """
+        self.window.add(cur_time, oaf=(matemp - ratemp) / (oatemp - ratemp))
+
     def insufficient_oa(self):
         """If the detected problems(s) are consistent then generate a fault message(s).
         No return
         """
-        oaf = [(mat - rat) / (oat - rat) for oat, rat, mat in zip(self.oat_values, self.rat_values, self.mat_values)]
-        avg_oaf = mean(oaf) * 100.0
+        avg_oaf = self.window.mean("oaf") * 100.0
         diagnostic_msg = {}
 
         if avg_oaf < 0 or avg_oaf > 125.0:
             msg = ("{}: Inconclusive result, the OAF calculation led to an "
                    "unexpected value: {}".format(constants.ECON5, avg_oaf))
             _log.info(msg)
-            _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (constants.ECON5 + constants.DX + ':' + str(self.invalid_oaf_dict))))
-            self.results_publish.append(constants.table_publish_format(self.analysis_name, self.timestamp[-1], (constants.ECON5 + constants.DX), str(self.invalid_oaf_dict)))
+            _log.info(constants.table_log_format(self.analysis_name, self.window.last, (constants.ECON5 + constants.DX + ':' + str(self.invalid_oaf_dict))))
+            self.results_publish.append(constants.table_publish_format(self.analysis_name, self.window.last, (constants.ECON5 + constants.DX), str(self.invalid_oaf_dict)))
             self.clear_data()
             return
 
@@ -156,20 +159,17 @@ class InsufficientOutsideAir(object):
                 result = 40.0
             _log.info(msg)
             diagnostic_msg.update({sensitivity: result})
-        _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (constants.ECON5 + constants.DX + ':' + str(diagnostic_msg))))
-        self.results_publish.append(constants.table_publish_format(self.analysis_name, self.timestamp[-1], (constants.ECON5 + constants.DX), str(diagnostic_msg)))
+        _log.info(constants.table_log_format(self.analysis_name, self.window.last, (constants.ECON5 + constants.DX + ':' + str(diagnostic_msg))))
+        self.results_publish.append(constants.table_publish_format(self.analysis_name, self.window.last, (constants.ECON5 + constants.DX), str(diagnostic_msg)))
 
         self.clear_data()
 
 
     def clear_data(self):
         """
-        Reinitialize data arrays.
+        Reinitialize data window.
 
         No return
         """
-        self.oat_values = []
-        self.rat_values = []
-        self.mat_values = []
-        self.timestamp = []
+        self.window.clear()
         return
@@ -44,9 +44,9 @@ under Contract DE-AC05-76RL01830
 """
 import logging
 from datetime import timedelta as td
-from volttron.platform.agent.math_utils import mean
 from volttron.platform.agent.utils import setup_logging
 from .. import constants
+from .common import DataWindow
 
 setup_logging()
 _log = logging.getLogger(__name__)
@@ -62,11 +62,8 @@ class TemperatureSensor(object):
     """
 
     def __init__(self):
-        # Initialize data arrays
-        self.oat_values = []
-        self.rat_values = []
-        self.mat_values = []
-        self.timestamp = []
+        # Initialize data window
+        self.window = DataWindow()
 
         self.temp_sensor_problem = None
         self.max_dx_time = None
@@ -123,18 +120,15 @@ class TemperatureSensor(object):
 
         return bool
         """
-        self.oat_values.append(oat)
-        self.mat_values.append(mat)
-        self.rat_values.append(rat)
-        self.timestamp.append(cur_time)
-        elapsed_time = self.timestamp[-1] - self.timestamp[0]
+        self.add_sample(oat, rat, mat, cur_time)
+        elapsed_time = self.window.elapsed()
 
         _log.info("Elapsed time: {} -- required time: {}".format(elapsed_time, self.data_window))
 
-        if elapsed_time >= self.data_window and len(self.timestamp) >= self.no_required_data:
+        if elapsed_time >= self.data_window and len(self.window) >= self.no_required_data:
             if elapsed_time > self.max_dx_time:
-                _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (constants.ECON1 + constants.DX + ':' + str(self.inconsistent_date))))
-                self.results_publish.append(constants.table_publish_format(self.analysis_name, self.timestamp[-1], (constants.ECON1 + constants.DX), str(self.inconsistent_date)))
+                _log.info(constants.table_log_format(self.analysis_name, self.window.last, (constants.ECON1 + constants.DX + ':' + str(self.inconsistent_date))))
+                self.results_publish.append(constants.table_publish_format(self.analysis_name, self.window.last, (constants.ECON1 + constants.DX), str(self.inconsistent_date)))
                 self.clear_data()
             else:
                 self.temperature_sensor_dx()
@@ -146,6 +140,17 @@ class TemperatureSensor(object):
             self.sensor_damper_dx.damper_algorithm(oat, mat, oad, cur_time)
         return self.temp_sensor_problem
 
+    def add_sample(self, oat, rat, mat, cur_time):
+        """Add the temperature differences for one sample to the data window
+        oat: float
+        rat: float
+        mat: float
+        cur_time: datetime time delta
+
+        No return
+        """
+        self.window.add(cur_time, oa_ma=oat - mat, ra_ma=rat - mat)
+
     def temperature_sensor_dx(self):
         """Temperature sensor diagnostic.
         No return
@@ -168,8 +173,8 @@ class TemperatureSensor(object):
 
         if diagnostic_msg["normal"] > 0.0:
             self.temp_sensor_problem = True
-        _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (constants.ECON1 + constants.DX + ':' + str(diagnostic_msg))))
-        self.results_publish.append(constants.table_publish_format(self.analysis_name, self.timestamp[-1], (constants.ECON1 + constants.DX ), str(diagnostic_msg)))
+        _log.info(constants.table_log_format(self.analysis_name, self.window.last, (constants.ECON1 + constants.DX + ':' + str(diagnostic_msg))))
+        self.results_publish.append(constants.table_publish_format(self.analysis_name, self.window.last, (constants.ECON1 + constants.DX ), str(diagnostic_msg)))
         self.clear_data()
 
     def aggregate_data(self):
@@ -180,26 +185,19 @@ class TemperatureSensor(object):
         avg_ma_oa: float
         avg_ma_ra: float
         """
-        oa_ma = [(x - y) for x, y in zip(self.oat_values, self.mat_values)]
-        ra_ma = [(x - y) for x, y in zip(self.rat_values, self.mat_values)]
-        ma_oa = [(y - x) for x, y in zip(self.oat_values, self.mat_values)]
-        ma_ra = [(y - x) for x, y in zip(self.rat_values, self.mat_values)]
-        avg_oa_ma = mean(oa_ma)
-        avg_ra_ma = mean(ra_ma)
-        avg_ma_oa = mean(ma_oa)
-        avg_ma_ra = mean(ma_ra)
+        avg_oa_ma = self.window.mean("oa_ma")
+        avg_ra_ma = self.window.mean("ra_ma")
+        avg_ma_oa = -avg_oa_ma
+        avg_ma_ra = -avg_ra_ma
         return avg_oa_ma, avg_ra_ma, avg_ma_oa, avg_ma_ra
 
     def clear_data(self):
         """
-        Reinitialize data arrays.
+        Reinitialize data window.
 
         No return
         """
-        self.oat_values = []
-        self.rat_values = []
-        self.mat_values = []
-        self.timestamp = []
+        self.window.clear()
         if self.temp_sensor_problem:
             self.temp_sensor_problem = None
 
@@ -213,10 +211,8 @@ class DamperSensorInconsistency(object):
     """
 
     def __init__(self):
-        # Initialize data arrays
-        self.oat_values = []
-        self.mat_values = []
-        self.timestamp = []
+        # Initialize data window
+        self.window = DataWindow()
         self.steady_state = None
         self.econ_time_check = None
         self.data_window = None
@@ -259,18 +255,15 @@ class DamperSensorInconsistency(object):
             if self.steady_state is None:
                 self.steady_state = cur_time
             elif cur_time - self.steady_state >= self.econ_time_check:
-                self.oat_values.append(oat)
-                self.mat_values.append(mat)
-                self.timestamp.append(cur_time)
+                self.add_sample(oat, mat, cur_time)
         else:
             self.steady_state = None
 
-        elapsed_time = self.timestamp[-1] - self.timestamp[0] if self.timestamp else td(minutes=0)
+        elapsed_time = self.window.elapsed()
 
         if elapsed_time >= self.data_window:
-            if len(self.oat_values) > self.no_required_data:
-                mat_oat_diff_list = [abs(x - y) for x, y in zip(self.oat_values, self.mat_values)]
-                open_damper_check = mean(mat_oat_diff_list)
+            if len(self.window) > self.no_required_data:
+                open_damper_check = self.window.mean("oat_mat")
                 diagnostic_msg = {}
                 for sensitivity, threshold in self.oat_mat_check.items():
                     if open_damper_check > threshold:
@@ -282,18 +275,26 @@ class DamperSensorInconsistency(object):
                     diagnostic_msg.update({sensitivity: result})
 
                 _log.info(msg)
-                _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (constants.ECON1 + constants.DX + ':' + str(diagnostic_msg))))
-                self.results_publish.append(constants.table_publish_format(self.analysis_name, self.timestamp[-1], (constants.ECON1 + constants.DX), str(diagnostic_msg)))
+                _log.info(constants.table_log_format(self.analysis_name, self.window.last, (constants.ECON1 + constants.DX + ':' + str(diagnostic_msg))))
+                self.results_publish.append(constants.table_publish_format(self.analysis_name, self.window.last, (constants.ECON1 + constants.DX), str(diagnostic_msg)))
 
             self.clear_data()
 
+    def add_sample(self, oat, mat, cur_time):
+        """Add the OAT/MAT difference for one sample to the data window
+        oat: float
+        mat: float
+        cur_time: datetime time delta
+
+        No return
+        """
+        self.window.add(cur_time, oat_mat=abs(oat - mat))
+
     def clear_data(self):
         """
-        Reinitialize data arrays.
+        Reinitialize data window.
 
         No return
         """
-        self.oat_values = []
-        self.mat_values = []
+        self.window.clear()
         self.steady_state = None
-        self.timestamp = []
@@ -0,0 +1,133 @@
+"""
+Copyright (c) 2020, Battelle Memorial Institute
+All rights reserved.
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+1. Redistributions of source code must retain the above copyright notice, this
+   list of conditions and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice,
+   this list of conditions and the following disclaimer in the documentation
+   and/or other materials provided with the distribution.
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+(INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+The views and conclusions contained in the software and documentation are those
+of the authors and should not be interpreted as representing official policies,
+either expressed or implied, of the FreeBSD Project.
+This material was prepared as an account of work sponsored by an agency of the
+United States Government. Neither the United States Government nor the United
+States Department of Energy, nor Battelle, nor any of their employees, nor any
+jurisdiction or organization that has cooperated in th.e development of these
+materials, makes any warranty, express or implied, or assumes any legal
+liability or responsibility for the accuracy, completeness, or usefulness or
+any information, apparatus, product, software, or process disclosed, or
+represents that its use would not infringe privately owned rights.
+Reference herein to any specific commercial product, process, or service by
+trade name, trademark, manufacturer, or otherwise does not necessarily
+constitute or imply its endorsement, recommendation, or favoring by the
+United States Government or any agency thereof, or Battelle Memorial Institute.
+The views and opinions of authors expressed herein do not necessarily state or
+reflect those of the United States Government or any agency thereof.
+PACIFIC NORTHWEST NATIONAL LABORATORY
+operated by
+BATTELLE
+for the
+UNITED STATES DEPARTMENT OF ENERGY
+under Contract DE-AC05-76RL01830
+"""
+from datetime import timedelta as td
+
+
+class DataWindow(object):
+    """
+    Running statistics for one diagnostic analysis window.
+
+    Samples are folded into per-quantity sums and counts as they arrive
+    so memory stays constant no matter how long the window is.  Only the
+    first and last timestamps are kept.
+    """
+
+    def __init__(self):
+        self.first = None
+        self.last = None
+        self.count = 0
+        self.totals = {}
+        self.counts = {}
+
+    def add(self, cur_time, **values):
+        """Add one sample to the window
+        cur_time: datetime
+        values: float values keyed by quantity name
+
+        No return
+        """
+        if self.first is None:
+            self.first = cur_time
+        self.last = cur_time
+        self.count += 1
+        for name, value in values.items():
+            self.include(name, value)
+
+    def include(self, name, value):
+        """Fold a value into the totals for a quantity without counting a new sample.
+        name: string
+        value: float
+
+        No return
+        """
+        self.totals[name] = self.totals.get(name, 0.0) + value
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def total(self, name):
+        """Return the running sum of a quantity"""
+        return self.totals.get(name, 0.0)
+
+    def size(self, name):
+        """Return the number of values accumulated for a quantity"""
+        return self.counts.get(name, 0)
+
+    def mean(self, name):
+        """Return the average of a quantity over the window"""
+        return self.totals[name] / float(self.counts[name])
+
+    def elapsed(self):
+        """Return the time spanned by the samples in the window"""
+        if self.first is None:
+            return td(minutes=0)
+        return self.last - self.first
+
+    def energy_impact(self, name):
+        """ Calculate the energy impact from the accumulated per-sample terms of a quantity
+
+        returns float
+        """
+        ei = 0.0
+        no_terms = self.size(name)
+        if no_terms:
+            avg_step = self.elapsed().total_seconds() / 60 if self.count > 1 else 1
+            dx_time = (no_terms - 1) * avg_step if no_terms > 1 else 1.0
+            ei = (self.total(name) * 60.0) / (no_terms * dx_time)
+            ei = round(ei, 2)
+        return ei
+
+    def clear(self):
+        """
+        Reinitialize the window.
+
+        No return
+        """
+        self.first = None
+        self.last = None
+        self.count = 0
+        self.totals = {}
+        self.counts = {}
+
+    def __len__(self):
+        return self.count
@@ -0,0 +1,280 @@
+"""
+Copyright (c) 2020, Battelle Memorial Institute
+All rights reserved.
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+1. Redistributions of source code must retain the above copyright notice, this
+   list of conditions and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice,
+   this list of conditions and the following disclaimer in the documentation
+   and/or other materials provided with the distribution.
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+(INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+The views and conclusions contained in the software and documentation are those
+of the authors and should not be interpreted as representing official policies,
+either expressed or implied, of the FreeBSD Project.
+This material was prepared as an account of work sponsored by an agency of the
+United States Government. Neither the United States Government nor the United
+States Department of Energy, nor Battelle, nor any of their employees, nor any
+jurisdiction or organization that has cooperated in th.e development of these
+materials, makes any warranty, express or implied, or assumes any legal
+liability or responsibility for the accuracy, completeness, or usefulness or
+any information, apparatus, product, software, or process disclosed, or
+represents that its use would not infringe privately owned rights.
+Reference herein to any specific commercial product, process, or service by
+trade name, trademark, manufacturer, or otherwise does not necessarily
+constitute or imply its endorsement, recommendation, or favoring by the
+United States Government or any agency thereof, or Battelle Memorial Institute.
+The views and opinions of authors expressed herein do not necessarily state or
+reflect those of the United States Government or any agency thereof.
+PACIFIC NORTHWEST NATIONAL LABORATORY
+operated by
+BATTELLE
+for the
+UNITED STATES DEPARTMENT OF ENERGY
+under Contract DE-AC05-76RL01830
+"""
+import sys
+import csv
+import json
+import logging
+import sqlite3
+import argparse
+from datetime import datetime
+from multiprocessing import Pool
+from dateutil import parser
+import dateutil.tz
+from volttron.platform.agent import utils
+from volttron.platform.agent.utils import setup_logging
+
+from . settings import EconomizerSettings
+from . device_diagnostics import DeviceDiagnostics
+
+setup_logging()
+_log = logging.getLogger(__name__)
+
+RESULT_COLUMNS = ["timestamp", "device", "diagnostic", "result"]
+SQLITE_HEADER = b"SQLite format 3\x00"
+
+
+def parse_value(value):
+    """Convert an exported value to the type the driver would publish
+    value: string
+
+    return int, float, string or None for an empty value
+    """
+    if value is None or value == "":
+        return None
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+
+def read_csv(path):
+    """Read a wide CSV export, one row per scrape.
+    The first column is the timestamp, unit points use the bare point name
+    and subdevice points are prefixed with the subdevice ("VAV1/point").
+    path: string
+
+    yields (timestamp string, dictionary of point: value)
+    """
+    with open(path) as csv_file:
+        reader = csv.reader(csv_file)
+        header = next(reader)
+        for row in reader:
+            values = {}
+            for point, value in zip(header[1:], row[1:]):
+                value = parse_value(value)
+                if value is not None:
+                    values[point] = value
+            yield row[0], values
+
+
+def read_sqlite(path, unit_topic):
+    """Read one unit from a VOLTTRON SQLite historian database.
+    Historian topics are campus/building/unit[/subdevice]/point; points are
+    returned relative to the unit so rows match the CSV layout.
+    path: string
+    unit_topic: string, campus/building/unit
+
+    yields (timestamp string, dictionary of point: value)
+    """
+    prefix = unit_topic + "/"
+    connection = sqlite3.connect(path)
+    try:
+        cursor = connection.execute(
+            "SELECT data.ts, topics.topic_name, data.value_string FROM data "
+            "JOIN topics ON data.topic_id = topics.topic_id "
+            "WHERE topics.topic_name LIKE ? ORDER BY data.ts", (prefix + "%",))
+        timestamp = None
+        values = {}
+        for ts, topic_name, value_string in cursor:
+            if not topic_name.startswith(prefix):
+                continue
+            if ts != timestamp:
+                if values:
+                    yield timestamp, values
+                timestamp = ts
+                values = {}
+            value = json.loads(value_string)
+            if value is not None:
+                values[topic_name[len(prefix):]] = value
+        if values:
+            yield timestamp, values
+    finally:
+        connection.close()
+
+
+def read_source(source, unit_topic):
+    """Read rows from a SQLite historian database or a CSV file
+    source: string, file path
+    unit_topic: string, campus/building/unit
+
+    yields (timestamp string, dictionary of point: value)
+    """
+    with open(source, "rb") as source_file:
+        is_sqlite = source_file.read(len(SQLITE_HEADER)) == SQLITE_HEADER
+    if is_sqlite:
+        return read_sqlite(source, unit_topic)
+    return read_csv(source)
+
+
+def parse_timestamp(timestamp):
+    """Parse an exported timestamp, historian timestamps without an offset are UTC
+    timestamp: string
+
+    return datetime
+    """
+    try:
+        current_time = datetime.fromisoformat(timestamp)
+    except (AttributeError, ValueError):
+        current_time = parser.parse(timestamp)
+    if current_time.tzinfo is None:
+        current_time = current_time.replace(tzinfo=dateutil.tz.tzutc())
+    return current_time
+
+
+def device_points(values, subdevice):
+    """Select the points one device would publish from a unit row
+    values: dictionary of point: value
+    subdevice: string, empty for the unit itself
+
+    return dictionary of point: value
+    """
+    if not subdevice:
+        return {point: value for point, value in values.items() if "/" not in point}
+    prefix = subdevice + "/"
+    return {point[len(prefix):]: value for point, value in values.items() if point.startswith(prefix)}
+
+
+def replay_device(config, unit, subdevice, source):
+    """Run one device's exported data through the economizer diagnostics.
+    config: dictionary, agent configuration
+    unit: string
+    subdevice: string, empty for the unit itself
+    source: string, CSV or SQLite file with the unit's data
+
+    return list of [timestamp, device, diagnostic, result] rows
+    """
+    settings = EconomizerSettings(config)
+    publish_path = "/".join([settings.campus, settings.building, unit] + ([subdevice] if subdevice else []))
+    device = DeviceDiagnostics(settings, publish_path)
+    to_zone = dateutil.tz.gettz(settings.timezone)
+    rows = []
+    for timestamp, values in read_source(source, "/".join([settings.campus, settings.building, unit])):
+        data = device_points(values, subdevice)
+        if not data:
+            continue
+        current_time = parse_timestamp(timestamp).astimezone(to_zone)
+        try:
+            device.analyze([data, {}], current_time)
+        except Exception as ex:
+            # The platform logs callback errors and keeps delivering data.
+            _log.error("{} failed at {}: {!r}".format(publish_path, current_time, ex))
+        for app, analysis_table in device.results_publish:
+            rows.append([app.split("&")[1], publish_path, analysis_table[0], analysis_table[1]])
+        del device.results_publish[:]
+    return rows
+
+
+def _replay_job(job):
+    """Pool entry point for replay_device"""
+    return replay_device(*job)
+
+
+def replay(config, sources, output, processes=None):
+    """Replay exported data for every configured device and write the results.
+    Devices are independent, so each one is analyzed in its own pool task.
+    config: dictionary, agent configuration
+    sources: dictionary of unit: CSV or SQLite file
+    output: string, results CSV file
+    processes: int, pool size (None uses every CPU, 1 runs in process)
+
+    return int number of result rows written
+    """
+    units = config.get("device", {}).get("unit", {})
+    jobs = []
+    for unit, source in sources.items():
+        if unit not in units:
+            _log.warning("{} is not a configured unit, skipping {}".format(unit, source))
+            continue
+        jobs.append((config, unit, "", source))
+        for subdevice in units[unit].get("subdevices", []):
+            jobs.append((config, unit, subdevice, source))
+
+    if processes == 1:
+        results = map(_replay_job, jobs)
+        pool = None
+    else:
+        pool = Pool(processes)
+        results = pool.imap(_replay_job, jobs)
+    count = 0
+    try:
+        with open(output, "w", newline="") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(RESULT_COLUMNS)
+            for rows in results:
+                writer.writerows(rows)
+                count += len(rows)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return count
+
+
+def main(argv=sys.argv):
+    """Command line entry point for offline replay"""
+    arg_parser = argparse.ArgumentParser(description="Replay exported device data through the Economizer diagnostics")
+    arg_parser.add_argument("config", help="agent configuration file")
+    arg_parser.add_argument("output", help="results CSV file")
+    arg_parser.add_argument("--source", action="append", default=[], metavar="UNIT=FILE",
+                            help="CSV export or SQLite historian for a unit (repeatable)")
+    arg_parser.add_argument("--historian", help="SQLite historian holding every configured unit")
+    arg_parser.add_argument("--processes", type=int, default=None, help="worker processes (default: CPU count)")
+    arg_parser.add_argument("--verbose", action="store_true", help="log diagnostic progress")
+    args = arg_parser.parse_args(argv[1:])
+
+    logging.getLogger().setLevel(logging.DEBUG if args.verbose else logging.WARNING)
+    config = utils.load_config(args.config)
+    sources = dict(source.split("=", 1) for source in args.source)
+    if args.historian:
+        for unit in config.get("device", {}).get("unit", {}):
+            sources.setdefault(unit, args.historian)
+    count = replay(config, sources, args.output, args.processes)
+    print("Wrote {} results to {}".format(count, args.output))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+"""
+Copyright (c) 2020, Battelle Memorial Institute
+All rights reserved.
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+1. Redistributions of source code must retain the above copyright notice, this
+   list of conditions and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice,
+   this list of conditions and the following disclaimer in the documentation
+   and/or other materials provided with the distribution.
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+(INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+The views and conclusions contained in the software and documentation are those
+of the authors and should not be interpreted as representing official policies,
+either expressed or implied, of the FreeBSD Project.
+This material was prepared as an account of work sponsored by an agency of the
+United States Government. Neither the United States Government nor the United
+States Department of Energy, nor Battelle, nor any of their employees, nor any
+jurisdiction or organization that has cooperated in th.e development of these
+materials, makes any warranty, express or implied, or assumes any legal
+liability or responsibility for the accuracy, completeness, or usefulness or
+any information, apparatus, product, software, or process disclosed, or
+represents that its use would not infringe privately owned rights.
+Reference herein to any specific commercial product, process, or service by
+trade name, trademark, manufacturer, or otherwise does not necessarily
+constitute or imply its endorsement, recommendation, or favoring by the
+United States Government or any agency thereof, or Battelle Memorial Institute.
+The views and opinions of authors expressed herein do not necessarily state or
+reflect those of the United States Government or any agency thereof.
+PACIFIC NORTHWEST NATIONAL LABORATORY
+operated by
+BATTELLE
+for the
+UNITED STATES DEPARTMENT OF ENERGY
+under Contract DE-AC05-76RL01830
+"""
+import sys
+import logging
+from datetime import timedelta as td
+from volttron.platform.messaging import topics
+from volttron.platform.agent.utils import setup_logging
+
+setup_logging()
+_log = logging.getLogger(__name__)
+
+
+class EconomizerSettings(object):
+    """
+    Economizer diagnostic configuration.
+    Parses the agent configuration into the device list, point names and
+    diagnostic thresholds.  One instance is shared by all of the devices
+    an agent analyzes.
+    """
+    def __init__(self, config):
+        self.config = config
+
+        #string attributes
+        self.campus = ""
+        self.building = ""
+        self.device = {}
+        self.device_type = ""
+        self.economizer_type = ""
+        self.sensitivity = ""
+        self.analysis_name = ""
+        self.fan_status_name = ""
+        self.fan_sp_name = ""
+        self.oat_name = ""
+        self.rat_name = ""
+        self.mat_name = ""
+        self.oad_sig_name = ""
+        self.cool_call_name = ""
+        self.timezone = ""
+
+        #list attributes
+        self.device_list = []
+        self.publish_list = []
+        self.units = []
+        self.arguments = []
+        self.point_mapping = []
+
+        #int attributes
+        self.data_window = 0
+        self.no_required_data = 0
+        self.open_damper_time = 0
+
+        #bool attributes
+        self.constant_volume = False
+
+        #float attributes
+        self.econ_hl_temp = 0.0
+        self.temp_band = 0.0
+        self.oaf_temperature_threshold = 0.0
+        self.oaf_economizing_threshold = 0.0
+        self.cooling_enabled_threshold = 0.0
+        self.temp_difference_threshold = 0.0
+        self.mat_low_threshold = 0.0
+        self.mat_high_threshold = 0.0
+        self.rat_low_threshold = 0.0
+        self.rat_high_threshold = 0.0
+        self.oat_low_threshold = 0.0
+        self.oat_high_threshold = 0.0
+        self.oat_mat_check = 0.0
+        self.open_damper_threshold = 0.0
+        self.minimum_damper_setpoint = 0.0
+        self.desired_oaf = 0.0
+        self.low_supply_fan_threshold = 0.0
+        self.excess_damper_threshold = 0.0
+        self.excess_oaf_threshold = 0.0
+        self.ventilation_oaf_threshold = 0.0
+        self.insufficient_damper_threshold = 0.0
+        self.temp_damper_threshold = 0.0
+        self.rated_cfm = 0.0
+        self.eer = 0.0
+        self.temp_deadband = 0.0
+
+        self.setup_device_list()
+        self.read_argument_config()
+        self.read_point_mapping()
+        self.configuration_value_check()
+
+    def setup_device_list(self):
+        """Setup the device subscriptions"""
+        #get device, then the units underneath that
+
+        self.analysis_name = self.config.get("analysis_name", "analysis_name")
+        self.timezone = self.config.get("local_timezone", "US/Pacific")
+        self.device = self.config.get("device", {})
+
+        if "campus" in self.device:
+            self.campus = self.device["campus"]
+        if "building" in self.device:
+            self.building = self.device["building"]
+        if "unit" in self.device:
+            #units will be a dictionary with subdevices
+            self.units = self.device["unit"]
+        for u in self.units:
+            #building the connection string for each unit
+            self.device_list.append(topics.DEVICES_VALUE(campus=self.campus, building=self.building, unit=u, path="", point="all"))
+            self.publish_list.append("/".join([self.campus, self.building, u]))
+            #loop over subdevices and add them
+            if "subdevices" in self.units[u]:
+                for sd in self.units[u]["subdevices"]:
+                    self.device_list.append(topics.DEVICES_VALUE(campus=self.campus, building=self.building, unit=u, path=sd, point="all"))
+                    self.publish_list.append("/".join([self.campus, self.building, u, sd]))
+
+    def read_argument_config(self):
+        """read all the config arguments section
+        no return
+        """
+
+        self.arguments = self.config.get("arguments", {})
+
+        self.econ_hl_temp = self.read_argument("econ_hl_temp", 65.0)
+        self.constant_volume = self.read_argument("constant_volume", False)
+        self.temp_band = self.read_argument("temp_band", 1.0)
+        self.oaf_temperature_threshold = self.read_argument("oaf_temperature_threshold", 5.0)
+        self.oaf_economizing_threshold = self.read_argument("oaf_economizing_threshold", 25.0)
+        self.cooling_enabled_threshold = self.read_argument("cooling_enabled_threshold", 5.0)
+        self.temp_difference_threshold = self.read_argument("temp_difference_threshold", 4.0)
+        self.mat_low_threshold = self.read_argument("mat_low_threshold", 50.0)
+        self.mat_high_threshold = self.read_argument("mat_high_threshold", 90.0)
+        self.rat_low_threshold = self.read_argument("rat_low_threshold", 50.0)
+        self.rat_high_threshold = self.read_argument("rat_high_threshold", 90.0)
+        self.oat_low_threshold = self.read_argument("oat_low_threshold", 30.0)
+        self.oat_high_threshold = self.read_argument("oat_high_threshold", 110.0)
+        self.oat_mat_check = self.read_argument("oat_mat_check", 5.0)
+        self.open_damper_threshold = self.read_argument("open_damper_threshold", 80.0)
+        self.minimum_damper_setpoint = self.read_argument("minimum_damper_setpoint", 20.0)
+        self.desired_oaf = self.read_argument("desired_oaf", 10.0)
+        self.low_supply_fan_threshold = self.read_argument("low_supply_fan_threshold", 15.0)
+        self.excess_damper_threshold = self.read_argument("excess_damper_threshold", 20.0)
+        self.excess_oaf_threshold = self.read_argument("excess_oaf_threshold", 20.0)
+        self.ventilation_oaf_threshold = self.read_argument("ventilation_oaf_threshold", 5.0)
+        self.insufficient_damper_threshold = self.read_argument("insufficient_damper_threshold", 15.0)
+        self.temp_damper_threshold = self.read_argument("temp_damper_threshold", 90.0)
+        self.rated_cfm = self.read_argument("rated_cfm", 6000.0)
+        self.eer = self.read_argument("eer", 10.0)
+        self.temp_deadband = self.read_argument("temp_band", 1.0)
+        self.data_window = td(minutes=self.read_argument("data_window", 30))
+        self.no_required_data = self.read_argument("no_required_data", 15)
+        self.open_damper_time = td(minutes=self.read_argument("open_damper_time", 5))
+        self.device_type = self.read_argument("device_type", "rtu").lower()
+        self.economizer_type = self.read_argument("economizer_type", "DDB").lower()
+        self.sensitivity = self.read_argument("sensitivity", ['low', 'normal', 'high'])
+        self.point_mapping = self.read_argument("point_mapping", {})
+
+    def read_argument(self, config_key, default_value):
+        """Method that reads an argument from the config file and returns the value or returns the default value if key is not present in config file
+        return mixed (string or float or int or dict)
+        """
+        return_value = default_value
+        if config_key in self.arguments:
+            return_value = self.arguments[config_key]
+        return return_value
+
+    def read_point_mapping(self):
+        """Method that reads the point mapping and sets the values
+        no return
+        """
+        self.fan_status_name = self.get_point_mapping_or_none("supply_fan_status")
+        self.fan_sp_name = self.get_point_mapping_or_none("supply_fan_speed")
+        self.oat_name = self.get_point_mapping_or_none("outdoor_air_temperature")
+        self.rat_name = self.get_point_mapping_or_none("return_air_temperature")
+        self.mat_name = self.get_point_mapping_or_none("mixed_air_temperature")
+        self.oad_sig_name = self.get_point_mapping_or_none("outdoor_damper_signal")
+        self.cool_call_name = self.get_point_mapping_or_none("cool_call")
+
+    def get_point_mapping_or_none(self, name):
+        """ Get the item from the point mapping, or return None
+        return mixed (string or float or int or dic
+        """
+        value = self.point_mapping.get(name, None)
+        return value
+
+    def configuration_value_check(self):
+        """Method goes through the configuration values and checks them for correctness.  Will error if values are not correct. Some may change based on specific settings
+        no return
+        """
+        if self.sensitivity is not None and self.sensitivity == "custom":
+            self.oaf_temperature_threshold = max(5.0, min(self.oaf_temperature_threshold, 15.0))
+            self.cooling_enabled_threshold = max(5.0, min(self.cooling_enabled_threshold, 50.0))
+            self.temp_difference_threshold = max(2.0, min(self.temp_difference_threshold, 6.0))
+            self.mat_low_threshold = max(40.0, min(self.mat_low_threshold, 60.0))
+            self.mat_high_threshold = max(80.0, min(self.mat_high_threshold, 90.0))
+            self.rat_low_threshold = max(40.0, min(self.rat_low_threshold, 60.0))
+            self.rat_high_threshold = max(80.0, min(self.rat_high_threshold, 90.0))
+            self.oat_low_threshold = max(20.0, min(self.oat_low_threshold, 40.0))
+            self.oat_high_threshold = max(90.0, min(self.oat_high_threshold, 125.0))
+            self.open_damper_threshold = max(60.0, min(self.open_damper_threshold, 90.0))
+            self.minimum_damper_setpoint = max(0.0, min(self.minimum_damper_setpoint, 50.0))
+            self.desired_oaf = max(5.0, min(self.desired_oaf, 30.0))
+        else:
+            self.oaf_temperature_threshold = 5.0
+            self.cooling_enabled_threshold = 5.0
+            self.temp_difference_threshold = 4.0
+            self.mat_low_threshold = 50.0
+            self.mat_high_threshold = 90.0
+            self.rat_low_threshold = 50.0
+            self.rat_high_threshold = 90.0
+            self.oat_low_threshold = 30.0
+            self.oat_high_threshold = 110.0
+            self.open_damper_threshold = 80.0
+            self.minimum_damper_setpoint = 20.0
+            self.desired_oaf = 10.0
+
+        if self.economizer_type == "hl":
+            self.econ_hl_temp = max(50.0, min(self.econ_hl_temp, 75.0))
+        else:
+            self.econ_hl_temp = None
+        self.temp_band = max(0.5, min(self.temp_band, 10.0))
+        if self.device_type not in ("ahu", "rtu"):
+            _log.error('device_type must be specified as "AHU" or "RTU" in configuration file.')
+            sys.exit()
+
+        if self.economizer_type.lower() not in ("ddb", "hl"):
+            _log.error('economizer_type must be specified as "DDB" or "HL" in configuration file.')
+            sys.exit()
+
+        if self.fan_sp_name is None and self.fan_status_name is None:
+            _log.error("SupplyFanStatus or SupplyFanSpeed are required to verify AHU status.")
+            sys.exit()
@@ -49,16 +49,63 @@ File used to unit test EconimizerRC
 import unittest
 import os
 import sys
+import csv
+import json
+import shutil
+import sqlite3
+import tempfile
 from datetime import timedelta as td
+from dateutil import parser
+import dateutil.tz
 from .diagnostics.TemperatureSensor import TemperatureSensor
 from .diagnostics.TemperatureSensor import DamperSensorInconsistency
 from .diagnostics.EconCorrectlyOff import EconCorrectlyOff
 from .diagnostics.EconCorrectlyOn import EconCorrectlyOn
 from .diagnostics.ExcessOutsideAir import ExcessOutsideAir
 from .diagnostics.InsufficientOutsideAir import InsufficientOutsideAir
+from .diagnostics.common import DataWindow
+from .settings import EconomizerSettings
+from .device_diagnostics import DeviceDiagnostics
+from . import replay
 from datetime import datetime
 
 
+class TestDataWindow(unittest.TestCase):
+    """
+    Contains all the tests for the diagnostic data window
+    """
+    def test_data_window_running_mean(self):
+        """test the data window sums and averages"""
+        window = DataWindow()
+        window.add(datetime.fromtimestamp(1), oaf=0.25, oad=10.0)
+        window.add(datetime.fromtimestamp(61), oaf=0.75, oad=30.0)
+        assert len(window) == 2
+        assert window.mean("oaf") == 0.5
+        assert window.mean("oad") == 20.0
+        assert window.total("oad") == 40.0
+        assert window.elapsed() == td(minutes=1)
+
+    def test_data_window_include(self):
+        """test values included without counting a sample"""
+        window = DataWindow()
+        window.add(datetime.fromtimestamp(1))
+        window.include("energy", 64.8)
+        assert len(window) == 1
+        assert window.size("energy") == 1
+        assert window.size("oaf") == 0
+        assert window.energy_impact("energy") == 3888.0
+        assert window.energy_impact("oaf") == 0.0
+
+    def test_data_window_clear(self):
+        """test the data window clear"""
+        window = DataWindow()
+        window.add(datetime.fromtimestamp(1), oaf=0.5)
+        window.clear()
+        assert len(window) == 0
+        assert window.first is None
+        assert window.size("oaf") == 0
+        assert window.elapsed() == td(minutes=0)
+
 class TestDiagnosticsTempSensor(unittest.TestCase):
     """
     Contains all the tests for Temperature Diagnostic
@@ -106,10 +153,7 @@ class TestDiagnosticsTempSensor(unittest.TestCase):
         rat = 50
         mat = 25
         cur_time = datetime.fromtimestamp(1036)
-        temp_sensor.timestamp.append(cur_time)
-        temp_sensor.oat_values.append(oat)
-        temp_sensor.mat_values.append(mat)
-        temp_sensor.rat_values.append(rat)
+        temp_sensor.add_sample(oat, rat, mat, cur_time)
         temp_sensor.temperature_sensor_dx()
         assert temp_sensor.temp_sensor_problem is None
 
@@ -123,10 +167,7 @@ class TestDiagnosticsTempSensor(unittest.TestCase):
         rat = 50
         mat = 50
         cur_time = datetime.fromtimestamp(1036)
-        temp_sensor.timestamp.append(cur_time)
-        temp_sensor.oat_values.append(oat)
-        temp_sensor.mat_values.append(mat)
-        temp_sensor.rat_values.append(rat)
+        temp_sensor.add_sample(oat, rat, mat, cur_time)
         temp_sensor.temperature_sensor_dx()
         assert temp_sensor.temp_sensor_problem is False
 
@@ -136,12 +177,9 @@ class TestDiagnosticsTempSensor(unittest.TestCase):
         data_window = td(minutes=1)
         results = []
         temp_sensor.set_class_values("test", results, data_window, 1, 4.0, 0, 90.0)
-        temp_sensor.oat_values.append(50)
-        temp_sensor.mat_values.append(25)
-        temp_sensor.rat_values.append(50)
-        temp_sensor.oat_values.append(100)
-        temp_sensor.mat_values.append(50)
-        temp_sensor.rat_values.append(100)
+        first_stamp = datetime.fromtimestamp(1)
+        temp_sensor.add_sample(50, 50, 25, first_stamp)
+        temp_sensor.add_sample(100, 100, 50, first_stamp)
         avg_oa_ma, avg_ra_ma, avg_ma_oa, avg_ma_ra = temp_sensor.aggregate_data()
         assert avg_oa_ma == 37.5
         assert avg_ra_ma == 37.5
@@ -154,21 +192,14 @@ class TestDiagnosticsTempSensor(unittest.TestCase):
         data_window = td(minutes=1)
         results = []
         temp_sensor.set_class_values("test", results, data_window, 1, 4.0, 0, 90.0)
-        temp_sensor.oat_values.append(50)
-        temp_sensor.mat_values.append(25)
-        temp_sensor.rat_values.append(50)
-        temp_sensor.oat_values.append(100)
-        temp_sensor.mat_values.append(50)
-        temp_sensor.rat_values.append(100)
+        first_stamp = datetime.fromtimestamp(1)
+        temp_sensor.add_sample(50, 50, 25, first_stamp)
+        temp_sensor.add_sample(100, 100, 50, first_stamp)
         temp_sensor.temp_sensor_problem = True
-        assert len(temp_sensor.oat_values) == 2
-        assert len(temp_sensor.mat_values) == 2
-        assert len(temp_sensor.rat_values) == 2
+        assert len(temp_sensor.window) == 2
         assert temp_sensor.temp_sensor_problem is True
         temp_sensor.clear_data()
-        assert len(temp_sensor.oat_values) == 0
-        assert len(temp_sensor.mat_values) == 0
-        assert len(temp_sensor.rat_values) == 0
+        assert len(temp_sensor.window) == 0
         assert temp_sensor.temp_sensor_problem is None
 
 class TestDiagnosticsDamperSensorInconsistency(unittest.TestCase):
@@ -216,18 +247,14 @@ class TestDiagnosticsDamperSensorInconsistency(unittest.TestCase):
             'high': max(temp_diff_thr, 4.0)
         }
         first_stamp = datetime.fromtimestamp(1)
-        damp_sensor.timestamp.append(first_stamp)
         cur_time = datetime.fromtimestamp(10000)
         results = []
         damp_sensor.set_class_values("test", results, data_window, 1, open_damp_time, oat_mat_check, 90.0)
-        damp_sensor.oat_values.append(50)
-        damp_sensor.mat_values.append(25)
+        damp_sensor.add_sample(50, 25, first_stamp)
         damp_sensor.steady_state = first_stamp
         damp_sensor.damper_algorithm(50, 25, 100, cur_time)
-        assert len(damp_sensor.timestamp) == 0
+        assert len(damp_sensor.window) == 0
         assert damp_sensor.steady_state is None
-        assert len(damp_sensor.oat_values) == 0
-        assert len(damp_sensor.mat_values) == 0
 
     def test_damp_sensor_clear_data(self):
         """test the damp sensor clear data"""
@@ -242,17 +269,14 @@ class TestDiagnosticsDamperSensorInconsistency(unittest.TestCase):
         }
         results = []
         damp_sensor.set_class_values("test", results, data_window, 1, open_damp_time, oat_mat_check, 90.0)
-        damp_sensor.oat_values.append(50)
-        damp_sensor.mat_values.append(25)
-        damp_sensor.oat_values.append(100)
-        damp_sensor.mat_values.append(50)
+        first_stamp = datetime.fromtimestamp(1)
+        damp_sensor.add_sample(50, 25, first_stamp)
+        damp_sensor.add_sample(100, 50, first_stamp)
         damp_sensor.steady_state = True
-        assert len(damp_sensor.oat_values) == 2
-        assert len(damp_sensor.mat_values) == 2
+        assert len(damp_sensor.window) == 2
         assert damp_sensor.steady_state is True
         damp_sensor.clear_data()
-        assert len(damp_sensor.oat_values) == 0
-        assert len(damp_sensor.mat_values) == 0
+        assert len(damp_sensor.window) == 0
         assert damp_sensor.steady_state is None
 
 class TestDiagnosticsEconCorrectlyOff(unittest.TestCase):
@@ -292,29 +316,19 @@ class TestDiagnosticsEconCorrectlyOff(unittest.TestCase):
         results = []
         econ.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
         econ.economizer_off_algorithm(50.0, 25.0, 50.0, 25.0, 5.0, cur_time, 36)
-        assert len(econ.oat_values) == 0
-        assert len(econ.mat_values) == 0
-        assert len(econ.rat_values) == 0
-        assert len(econ.oad_values) == 0
-        assert len(econ.fan_spd_values) == 0
-        assert len(econ.timestamp) == 0
+        assert len(econ.window) == 0
 
     def test_econ_off_algorithm_two_timestamp(self):
         """test the econ correctly off algorithm method"""
         econ = EconCorrectlyOff()
         data_window = td(minutes=1)
         first_stamp = datetime.fromtimestamp(1)
-        econ.timestamp.append(first_stamp)
+        econ.window.add(first_stamp)
         cur_time = datetime.fromtimestamp(10000)
         results = []
         econ.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
         econ.economizer_off_algorithm(50.0, 25.0, 50.0, 25.0, 5.0, cur_time, 36)
-        assert len(econ.oat_values) == 0
-        assert len(econ.mat_values) == 0
-        assert len(econ.rat_values) == 0
-        assert len(econ.oad_values) == 0
-        assert len(econ.fan_spd_values) == 0
-        assert len(econ.timestamp) == 1
+        assert len(econ.window) == 1
 
     def test_econ_conditions(self):
         """test the econ conditions method"""
@@ -325,17 +339,9 @@ class TestDiagnosticsEconCorrectlyOff(unittest.TestCase):
         econ.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(1)
         econ.economizing = first_stamp
-        econ.oat_values.append(50)
-        econ.mat_values.append(25)
-        econ.oad_values.append(100)
-        econ.rat_values.append(50)
+        econ.add_sample(50, 50, 25, 100, 1.0, first_stamp)
         ret = econ.economizer_conditions(5.0, cur_time)
-        assert len(econ.oat_values) == 0
-        assert len(econ.mat_values) == 0
-        assert len(econ.rat_values) == 0
-        assert len(econ.oad_values) == 0
-        assert len(econ.fan_spd_values) == 0
-        assert len(econ.timestamp) == 0
+        assert len(econ.window) == 0
         assert ret is True
 
     def test_econ_conditions_no_clear(self):
@@ -347,18 +353,9 @@ class TestDiagnosticsEconCorrectlyOff(unittest.TestCase):
         econ.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(100000)
         econ.economizing = first_stamp
-        econ.oat_values.append(50)
-        econ.mat_values.append(25)
-        econ.oad_values.append(100)
-        econ.rat_values.append(50)
-        econ.fan_spd_values.append(50)
+        econ.add_sample(50, 50, 25, 100, 50, first_stamp)
         ret = econ.economizer_conditions(5.0, cur_time)
-        assert len(econ.oat_values) == 1
-        assert len(econ.mat_values) == 1
-        assert len(econ.rat_values) == 1
-        assert len(econ.oad_values) == 1
-        assert len(econ.fan_spd_values) == 1
-        assert len(econ.timestamp) == 0
+        assert len(econ.window) == 1
         assert ret is True
 
     def test_econ_conditions_false(self):
@@ -378,35 +375,21 @@ class TestDiagnosticsEconCorrectlyOff(unittest.TestCase):
         results = []
         econ.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(1)
-        econ.timestamp.append(first_stamp)
         econ.economizing = first_stamp
-        econ.oat_values.append(50)
-        econ.mat_values.append(25)
-        econ.oad_values.append(100)
-        econ.rat_values.append(50)
+        econ.add_sample(50, 50, 25, 100, 1.0, first_stamp)
         econ.economizing_when_not_needed()
-        assert len(econ.oat_values) == 0
-        assert len(econ.mat_values) == 0
-        assert len(econ.rat_values) == 0
-        assert len(econ.oad_values) == 0
-        assert len(econ.fan_spd_values) == 0
-        assert len(econ.timestamp) == 0
+        assert len(econ.window) == 0
 
     def test_econ_ei_calculation_positive(self):
         """test the econ energy impact method"""
         econ = EconCorrectlyOff()
         data_window = td(minutes=1)
         results = []
-        econ.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
+        econ.set_class_values("test", results, data_window, 1, 20.0, 100.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(1)
-        econ.timestamp.append(first_stamp)
         econ.economizing = first_stamp
-        econ.oat_values.append(10)
-        econ.mat_values.append(20)
-        econ.oad_values.append(10)
-        econ.rat_values.append(10)
-        econ.fan_spd_values.append(10)
-        ei = econ.energy_impact_calculation(1.0)
+        econ.add_sample(10, 10, 20, 10, 10, first_stamp)
+        ei = econ.energy_impact_calculation()
         assert ei == 3888.0
 
     def test_econ_ei_calculation_zero_value(self):
@@ -414,16 +397,11 @@ class TestDiagnosticsEconCorrectlyOff(unittest.TestCase):
         econ = EconCorrectlyOff()
         data_window = td(minutes=1)
         results = []
-        econ.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
+        econ.set_class_values("test", results, data_window, 1, 20.0, 0.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(1)
-        econ.timestamp.append(first_stamp)
         econ.economizing = first_stamp
-        econ.oat_values.append(1)
-        econ.mat_values.append(1)
-        econ.oad_values.append(1)
-        econ.rat_values.append(1)
-        econ.fan_spd_values.append(1)
-        ei = econ.energy_impact_calculation(0.0)
+        econ.add_sample(1, 1, 1, 1, 1, first_stamp)
+        ei = econ.energy_impact_calculation()
         assert ei == 0.0
 
     def test_econ_ei_calculation_negative_value(self):
@@ -431,16 +409,11 @@ class TestDiagnosticsEconCorrectlyOff(unittest.TestCase):
         econ = EconCorrectlyOff()
         data_window = td(minutes=1)
         results = []
-        econ.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
+        econ.set_class_values("test", results, data_window, 1, 20.0, -1000.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(1)
-        econ.timestamp.append(first_stamp)
         econ.economizing = first_stamp
-        econ.oat_values.append(10)
-        econ.mat_values.append(20)
-        econ.oad_values.append(10)
-        econ.rat_values.append(10)
-        econ.fan_spd_values.append(10)
-        ei = econ.energy_impact_calculation(-10.0)
+        econ.add_sample(10, 10, 20, 10, 10, first_stamp)
+        ei = econ.energy_impact_calculation()
         assert ei == 3888.0
 
     def test_econ_clear_data(self):
@@ -449,21 +422,12 @@ class TestDiagnosticsEconCorrectlyOff(unittest.TestCase):
         data_window = td(minutes=1)
         results = []
         econ.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
-        econ.oat_values.append(50)
-        econ.mat_values.append(25)
-        econ.oat_values.append(100)
-        econ.mat_values.append(50)
-        econ.oad_values.append(10)
-        econ.fan_spd_values.append(10)
-        assert len(econ.oat_values) == 2
-        assert len(econ.mat_values) == 2
-        assert len(econ.oad_values) == 1
-        assert len(econ.fan_spd_values) == 1
+        first_stamp = datetime.fromtimestamp(1)
+        econ.add_sample(50, 50, 25, 10, 10, first_stamp)
+        econ.add_sample(100, 50, 50, 0, 1.0, first_stamp)
+        assert len(econ.window) == 2
         econ.clear_data()
-        assert len(econ.oat_values) == 0
-        assert len(econ.mat_values) == 0
-        assert len(econ.oad_values) == 0
-        assert len(econ.fan_spd_values) == 0
+        assert len(econ.window) == 0
 
 
 class TestDiagnosticsEconCorrectlyOn(unittest.TestCase):
@@ -501,29 +465,19 @@ class TestDiagnosticsEconCorrectlyOn(unittest.TestCase):
         results = []
         econ.set_class_values("test", results, data_window, 1, 20.0, 80.0, 6000.0, 10.0)
         econ.economizer_on_algorithm(True, 50.0, 25.0, 50.0, 25.0, 5.0, cur_time, 36)
-        assert len(econ.oat_values) == 1
-        assert len(econ.mat_values) == 1
-        assert len(econ.rat_values) == 1
-        assert len(econ.oad_values) == 1
-        assert len(econ.fan_spd_values) == 1
-        assert len(econ.timestamp) == 1
+        assert len(econ.window) == 1
 
     def test_econ_on_algorithm_two_timestamp(self):
         """test the econ correctly On algorithm method"""
         econ = EconCorrectlyOn()
         data_window = td(minutes=1)
         first_stamp = datetime.fromtimestamp(1)
-        econ.timestamp.append(first_stamp)
+        econ.window.add(first_stamp)
         cur_time = datetime.fromtimestamp(10000)
         results = []
         econ.set_class_values("test", results, data_window, 1, 20.0, 80.0, 6000.0, 10.0)
         econ.economizer_on_algorithm(True, 50.0, 25.0, 50.0, 25.0, 5.0, cur_time, 36)
-        assert len(econ.oat_values) == 0
-        assert len(econ.mat_values) == 0
-        assert len(econ.rat_values) == 0
-        assert len(econ.oad_values) == 0
-        assert len(econ.fan_spd_values) == 0
-        assert len(econ.timestamp) == 0
+        assert len(econ.window) == 0
 
     def test_econ_on_conditions(self):
         """test the econ conditions method"""
@@ -534,17 +488,9 @@ class TestDiagnosticsEconCorrectlyOn(unittest.TestCase):
         econ.set_class_values("test", results, data_window, 1, 20.0, 80.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(1)
         econ.not_cooling = first_stamp
-        econ.oat_values.append(50)
-        econ.mat_values.append(25)
-        econ.oad_values.append(100)
-        econ.rat_values.append(50)
+        econ.add_sample(50, 100, 25, 100, 1.0, first_stamp)
         ret = econ.economizer_conditions(False, 5.0, cur_time)
-        assert len(econ.oat_values) == 0
-        assert len(econ.mat_values) == 0
-        assert len(econ.rat_values) == 0
-        assert len(econ.oad_values) == 0
-        assert len(econ.fan_spd_values) == 0
-        assert len(econ.timestamp) == 0
+        assert len(econ.window) == 0
         assert ret is False
 
     def test_econ_on_conditions_no_clear(self):
@@ -556,18 +502,9 @@ class TestDiagnosticsEconCorrectlyOn(unittest.TestCase):
         econ.set_class_values("test", results,  data_window, 1, 20.0, 80.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(100000)
         econ.economizing = first_stamp
-        econ.oat_values.append(50)
-        econ.mat_values.append(25)
-        econ.oad_values.append(100)
-        econ.rat_values.append(50)
-        econ.fan_spd_values.append(50)
+        econ.add_sample(50, 100, 25, 100, 50, first_stamp)
         ret = econ.economizer_conditions(True, 5.0, cur_time)
-        assert len(econ.oat_values) == 1
-        assert len(econ.mat_values) == 1
-        assert len(econ.rat_values) == 1
-        assert len(econ.oad_values) == 1
-        assert len(econ.fan_spd_values) == 1
-        assert len(econ.timestamp) == 0
+        assert len(econ.window) == 1
         assert ret is True
 
     def test_econ_on_conditions_false(self):
@@ -587,19 +524,10 @@ class TestDiagnosticsEconCorrectlyOn(unittest.TestCase):
         results = []
         econ.set_class_values("test", results, data_window, 1, 20.0, 80.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(1)
-        econ.timestamp.append(first_stamp)
         econ.economizing = first_stamp
-        econ.oat_values.append(51)
-        econ.mat_values.append(25)
-        econ.oad_values.append(100)
-        econ.rat_values.append(50)
+        econ.add_sample(51, 50, 25, 100, 1.0, first_stamp)
         econ.not_economizing_when_needed()
-        assert len(econ.oat_values) == 0
-        assert len(econ.mat_values) == 0
-        assert len(econ.rat_values) == 0
-        assert len(econ.oad_values) == 0
-        assert len(econ.fan_spd_values) == 0
-        assert len(econ.timestamp) == 0
+        assert len(econ.window) == 0
 
     def test_econ_on_not_economizing_when_needed_0_divide(self):
         """test the econ when not needed method"""
@@ -609,12 +537,8 @@ class TestDiagnosticsEconCorrectlyOn(unittest.TestCase):
             results = []
             econ.set_class_values("test", results, data_window, 1, 20.0, 80.0, 6000.0, 10.0)
             first_stamp = datetime.fromtimestamp(1)
-            econ.timestamp.append(first_stamp)
             econ.economizing = first_stamp
-            econ.oat_values.append(50)
-            econ.mat_values.append(25)
-            econ.oad_values.append(100)
-            econ.rat_values.append(50)
+            econ.add_sample(50, 50, 25, 100, 1.0, first_stamp)
             econ.not_economizing_when_needed()
 
 
@@ -625,13 +549,8 @@ class TestDiagnosticsEconCorrectlyOn(unittest.TestCase):
         results = []
         econ.set_class_values("test", results, data_window, 1, 20.0, 80.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(1)
-        econ.timestamp.append(first_stamp)
         econ.economizing = first_stamp
-        econ.oat_values.append(10)
-        econ.mat_values.append(20)
-        econ.oad_values.append(10)
-        econ.rat_values.append(10)
-        econ.fan_spd_values.append(10)
+        econ.add_sample(10, 0, 20, 10, 10, first_stamp)
         ei = econ.energy_impact_calculation()
         assert ei == 3888.0
 
@@ -642,13 +561,8 @@ class TestDiagnosticsEconCorrectlyOn(unittest.TestCase):
         results = []
         econ.set_class_values("test", results, data_window, 1, 20.0, 80.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(1)
-        econ.timestamp.append(first_stamp)
         econ.economizing = first_stamp
-        econ.oat_values.append(1)
-        econ.mat_values.append(1)
-        econ.oad_values.append(1)
-        econ.rat_values.append(1)
-        econ.fan_spd_values.append(1)
+        econ.add_sample(1, 0, 1, 1, 1, first_stamp)
         ei = econ.energy_impact_calculation()
         assert ei == 0.0
 
@@ -659,13 +573,8 @@ class TestDiagnosticsEconCorrectlyOn(unittest.TestCase):
         results = []
         econ.set_class_values("test", results, data_window, 1, 20.0, 80.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(1)
-        econ.timestamp.append(first_stamp)
         econ.economizing = first_stamp
-        econ.oat_values.append(10)
-        econ.mat_values.append(20)
-        econ.oad_values.append(10)
-        econ.rat_values.append(10)
-        econ.fan_spd_values.append(10)
+        econ.add_sample(10, 0, 20, 10, 10, first_stamp)
         ei = econ.energy_impact_calculation()
         assert ei == 3888.0
 
@@ -675,21 +584,12 @@ class TestDiagnosticsEconCorrectlyOn(unittest.TestCase):
         data_window = td(minutes=1)
         results = []
         econ.set_class_values("test", results, data_window, 1, 20.0, 80.0, 6000.0, 10.0)
-        econ.oat_values.append(50)
-        econ.mat_values.append(25)
-        econ.oat_values.append(100)
-        econ.mat_values.append(50)
-        econ.oad_values.append(10)
-        econ.fan_spd_values.append(10)
-        assert len(econ.oat_values) == 2
-        assert len(econ.mat_values) == 2
-        assert len(econ.oad_values) == 1
-        assert len(econ.fan_spd_values) == 1
+        first_stamp = datetime.fromtimestamp(1)
+        econ.add_sample(50, 100, 25, 10, 10, first_stamp)
+        econ.add_sample(100, 50, 50, 0, 1.0, first_stamp)
+        assert len(econ.window) == 2
         econ.clear_data()
-        assert len(econ.oat_values) == 0
-        assert len(econ.mat_values) == 0
-        assert len(econ.oad_values) == 0
-        assert len(econ.fan_spd_values) == 0
+        assert len(econ.window) == 0
 
 class TestDiagnosticsExcessOutsideAir(unittest.TestCase):
     """
@@ -728,29 +628,19 @@ class TestDiagnosticsExcessOutsideAir(unittest.TestCase):
         results = []
         air.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
         air.excess_ouside_air_algorithm(50.0, 25.0, 50.0, 25.0, 0.0, cur_time, 36)
-        assert len(air.oat_values) == 1
-        assert len(air.mat_values) == 1
-        assert len(air.rat_values) == 1
-        assert len(air.oad_values) == 1
-        assert len(air.fan_spd_values) == 1
-        assert len(air.timestamp) == 1
+        assert len(air.window) == 1
 
     def test_excess_outside_air_algorithm_two_timestamp(self):
         """test the excess outside air algorithm method"""
         air = ExcessOutsideAir()
         data_window = td(minutes=1)
         first_stamp = datetime.fromtimestamp(1)
-        air.timestamp.append(first_stamp)
+        air.window.add(first_stamp)
         cur_time = datetime.fromtimestamp(10000)
         results = []
         air.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
         air.excess_ouside_air_algorithm(50.0, 25.0, 50.0, 25.0, 0.0, cur_time, 36)
-        assert len(air.oat_values) == 0
-        assert len(air.mat_values) == 0
-        assert len(air.rat_values) == 0
-        assert len(air.oad_values) == 0
-        assert len(air.fan_spd_values) == 0
-        assert len(air.timestamp) == 0
+        assert len(air.window) == 0
 
     def test_econ_conditions(self):
         """test the econ conditions method"""
@@ -761,18 +651,9 @@ class TestDiagnosticsExcessOutsideAir(unittest.TestCase):
         air.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(1)
         air.economizing = first_stamp
-        air.timestamp.append(first_stamp)
-        air.oat_values.append(50)
-        air.mat_values.append(25)
-        air.oad_values.append(100)
-        air.rat_values.append(50)
+        air.add_sample(50, 100, 25, 100, 1.0, first_stamp)
         ret = air.economizer_conditions(5.0, cur_time)
-        assert len(air.oat_values) == 0
-        assert len(air.mat_values) == 0
-        assert len(air.rat_values) == 0
-        assert len(air.oad_values) == 0
-        assert len(air.fan_spd_values) == 0
-        assert len(air.timestamp) == 0
+        assert len(air.window) == 0
         assert ret is True
 
     def test_econ_conditions_no_clear(self):
@@ -784,18 +665,9 @@ class TestDiagnosticsExcessOutsideAir(unittest.TestCase):
         air.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(100000)
         air.economizing = first_stamp
-        air.oat_values.append(50)
-        air.mat_values.append(25)
-        air.oad_values.append(100)
-        air.rat_values.append(50)
-        air.fan_spd_values.append(50)
+        air.add_sample(50, 100, 25, 100, 50, first_stamp)
         ret = air.economizer_conditions(5.0, cur_time)
-        assert len(air.oat_values) == 1
-        assert len(air.mat_values) == 1
-        assert len(air.rat_values) == 1
-        assert len(air.oad_values) == 1
-        assert len(air.fan_spd_values) == 1
-        assert len(air.timestamp) == 0
+        assert len(air.window) == 1
         assert ret is True
 
     def test_econ_conditions_false(self):
@@ -815,19 +687,10 @@ class TestDiagnosticsExcessOutsideAir(unittest.TestCase):
         results = []
         air.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(1)
-        air.timestamp.append(first_stamp)
         air.economizing = first_stamp
-        air.oat_values.append(51)
-        air.mat_values.append(25)
-        air.oad_values.append(100)
-        air.rat_values.append(50)
+        air.add_sample(51, 50, 25, 100, 1.0, first_stamp)
         air.excess_oa()
-        assert len(air.oat_values) == 0
-        assert len(air.mat_values) == 0
-        assert len(air.rat_values) == 0
-        assert len(air.oad_values) == 0
-        assert len(air.fan_spd_values) == 0
-        assert len(air.timestamp) == 0
+        assert len(air.window) == 0
 
     def test_excess_oa_method_dividing_zero(self):
         """test the excess_oa_method dividing error"""
@@ -837,35 +700,21 @@ class TestDiagnosticsExcessOutsideAir(unittest.TestCase):
             results = []
             air.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
             first_stamp = datetime.fromtimestamp(1)
-            air.timestamp.append(first_stamp)
             air.economizing = first_stamp
-            air.oat_values.append(50)
-            air.mat_values.append(25)
-            air.oad_values.append(100)
-            air.rat_values.append(50)
+            air.add_sample(50, 50, 25, 100, 1.0, first_stamp)
             air.excess_oa()
-            assert len(air.oat_values) == 0
-            assert len(air.mat_values) == 0
-            assert len(air.rat_values) == 0
-            assert len(air.oad_values) == 0
-            assert len(air.fan_spd_values) == 0
-            assert len(air.timestamp) == 0
+            assert len(air.window) == 0
 
     def test_oa_ei_calculation_positive(self):
         """test the excess outside air energy impact method"""
         air = ExcessOutsideAir()
         data_window = td(minutes=1)
         results = []
-        air.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
+        air.set_class_values("test", results, data_window, 1, 20.0, 100.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(1)
-        air.timestamp.append(first_stamp)
         air.economizing = first_stamp
-        air.oat_values.append(10)
-        air.mat_values.append(20)
-        air.oad_values.append(10)
-        air.rat_values.append(10)
-        air.fan_spd_values.append(10)
-        ei = air.energy_impact_calculation(1.0)
+        air.add_sample(10, 0, 20, 10, 10, first_stamp)
+        ei = air.energy_impact_calculation()
         assert ei == 3888.0
 
     def test_oa_ei_calculation_zero_value(self):
@@ -873,16 +722,11 @@ class TestDiagnosticsExcessOutsideAir(unittest.TestCase):
         air = ExcessOutsideAir()
         data_window = td(minutes=1)
         results = []
-        air.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
+        air.set_class_values("test", results, data_window, 1, 20.0, 0.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(1)
-        air.timestamp.append(first_stamp)
         air.economizing = first_stamp
-        air.oat_values.append(1)
-        air.mat_values.append(1)
-        air.oad_values.append(1)
-        air.rat_values.append(1)
-        air.fan_spd_values.append(1)
-        ei = air.energy_impact_calculation(0.0)
+        air.add_sample(10, 1, 1, 1, 1, first_stamp)
+        ei = air.energy_impact_calculation()
         assert ei == 0.0
 
     def test_oa_ei_calculation_negative_value(self):
@@ -890,16 +734,11 @@ class TestDiagnosticsExcessOutsideAir(unittest.TestCase):
         air = ExcessOutsideAir()
         data_window = td(minutes=1)
         results = []
-        air.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
+        air.set_class_values("test", results, data_window, 1, 20.0, -1000.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(1)
-        air.timestamp.append(first_stamp)
         air.economizing = first_stamp
-        air.oat_values.append(10)
-        air.mat_values.append(20)
-        air.oad_values.append(10)
-        air.rat_values.append(10)
-        air.fan_spd_values.append(10)
-        ei = air.energy_impact_calculation(-10.0)
+        air.add_sample(0, 10, 120, 10, 10, first_stamp)
+        ei = air.energy_impact_calculation()
         assert ei == 3888.0
 
     def test_econ_clear_data(self):
@@ -908,21 +747,12 @@ class TestDiagnosticsExcessOutsideAir(unittest.TestCase):
         data_window = td(minutes=1)
         results = []
         air.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
-        air.oat_values.append(50)
-        air.mat_values.append(25)
-        air.oat_values.append(100)
-        air.mat_values.append(50)
-        air.oad_values.append(10)
-        air.fan_spd_values.append(10)
-        assert len(air.oat_values) == 2
-        assert len(air.mat_values) == 2
-        assert len(air.oad_values) == 1
-        assert len(air.fan_spd_values) == 1
+        first_stamp = datetime.fromtimestamp(1)
+        air.add_sample(50, 100, 25, 10, 10, first_stamp)
+        air.add_sample(100, 50, 50, 0, 1.0, first_stamp)
+        assert len(air.window) == 2
         air.clear_data()
-        assert len(air.oat_values) == 0
-        assert len(air.mat_values) == 0
-        assert len(air.oad_values) == 0
-        assert len(air.fan_spd_values) == 0
+        assert len(air.window) == 0
 
 class TestDiagnosticsInsufficientOutsideAir(unittest.TestCase):
     """
@@ -959,61 +789,191 @@ class TestDiagnosticsInsufficientOutsideAir(unittest.TestCase):
         results = []
         air.set_class_values("test", results, data_window, 1, 10.0)
         air.insufficient_outside_air_algorithm(100.0, 50.0, 50.0, cur_time)
-        assert len(air.oat_values) == 1
-        assert len(air.mat_values) == 1
-        assert len(air.rat_values) == 1
-        assert len(air.timestamp) == 1
+        assert len(air.window) == 1
 
     def test_insufficient_ouside_air_algorithm_two_timestamps(self):
         """test the Insufficient_outside_air algorithm"""
         air = InsufficientOutsideAir()
         data_window = td(minutes=1)
         first_stamp = datetime.fromtimestamp(1)
-        air.timestamp.append(first_stamp)
+        air.window.add(first_stamp)
         cur_time = datetime.fromtimestamp(10000)
         results = []
         air.set_class_values("test", results, data_window, 1, 10.0)
         air.insufficient_outside_air_algorithm(100.0, 50.0, 50.0, cur_time)
-        assert len(air.oat_values) == 0
-        assert len(air.mat_values) == 0
-        assert len(air.rat_values) == 0
-        assert len(air.timestamp) == 0
+        assert len(air.window) == 0
 
     def test_insufficient_ouside_air_oa(self):
         """test the Insufficient_outside_air insufficient oa method"""
         air = InsufficientOutsideAir()
         data_window = td(minutes=1)
         first_stamp = datetime.fromtimestamp(1)
-        air.timestamp.append(first_stamp)
         cur_time = datetime.fromtimestamp(10000)
         results = []
         air.set_class_values("test", results, data_window, 1, 10.0)
-        air.oat_values.append(50)
-        air.mat_values.append(25)
-        air.rat_values.append(100)
+        air.add_sample(50, 100, 25, first_stamp)
         air.insufficient_oa()
-        assert len(air.oat_values) == 0
-        assert len(air.mat_values) == 0
-        assert len(air.rat_values) == 0
-        assert len(air.timestamp) == 0
+        assert len(air.window) == 0
 
     def test_insufficient_ouside_air_clear_data(self):
         """test the Insufficient_outside_air clear data method"""
         air = InsufficientOutsideAir()
         data_window = td(minutes=1)
         first_stamp = datetime.fromtimestamp(1)
-        air.timestamp.append(first_stamp)
         results = []
         air.set_class_values("test", results, data_window, 1, 10.0)
-        air.oat_values.append(50)
-        air.mat_values.append(25)
-        air.rat_values.append(10)
-        assert len(air.oat_values) == 1
-        assert len(air.mat_values) == 1
-        assert len(air.rat_values) == 1
-        assert len(air.timestamp) == 1
+        air.add_sample(50, 10, 25, first_stamp)
+        assert len(air.window) == 1
         air.clear_data()
-        assert len(air.oat_values) == 0
-        assert len(air.mat_values) == 0
-        assert len(air.rat_values) == 0
-        assert len(air.timestamp) == 0
+        assert len(air.window) == 0
+
+
+class TestDeviceDiagnostics(unittest.TestCase):
+    """
+    Contains all the tests for the per device diagnostic state
+    """
+    config = {
+        "analysis_name": "Economizer_AIRCx",
+        "device": {
+            "campus": "campus",
+            "building": "building",
+            "unit": {
+                "rtu1": {"subdevices": []},
+                "rtu2": {"subdevices": []}
+            }
+        },
+        "arguments": {
+            "point_mapping": {
+                "supply_fan_status": "FanStatus",
+                "outdoor_air_temperature": "OutdoorAirTemperature",
+                "return_air_temperature": "ReturnAirTemperature",
+                "mixed_air_temperature": "MixedAirTemperature",
+                "outdoor_damper_signal": "OutdoorDamperSignal",
+                "cool_call": "CompressorStatus"
+            },
+            "device_type": "rtu",
+            "data_window": 1,
+            "no_required_data": 1
+        }
+    }
+    data = {
+        "FanStatus": 1,
+        "OutdoorAirTemperature": 60.0,
+        "ReturnAirTemperature": 72.0,
+        "MixedAirTemperature": 65.0,
+        "OutdoorDamperSignal": 50.0,
+        "CompressorStatus": 1
+    }
+
+    def test_settings_device_list(self):
+        """test a device topic and publish path for every configured unit"""
+        settings = EconomizerSettings(self.config)
+        assert sorted(settings.publish_list) == ["campus/building/rtu1", "campus/building/rtu2"]
+        assert len(settings.device_list) == 2
+        assert settings.data_window == td(minutes=1)
+
+    def test_devices_keep_separate_state(self):
+        """test diagnostics for one device do not see the data of another"""
+        settings = EconomizerSettings(self.config)
+        rtu1 = DeviceDiagnostics(settings, "campus/building/rtu1")
+        rtu2 = DeviceDiagnostics(settings, "campus/building/rtu2")
+        rtu1.analyze([self.data, {}], datetime.fromtimestamp(0))
+        rtu1.analyze([self.data, {}], datetime.fromtimestamp(60))
+        assert rtu1.temp_sensor_problem is False
+        assert len(rtu1.results_publish) == 1
+        assert rtu2.temp_sensor_problem is None
+        assert len(rtu2.results_publish) == 0
+        assert len(rtu2.temp_sensor.window) == 0
+
+    def test_device_missing_data(self):
+        """test a data message without the mixed air temperature"""
+        settings = EconomizerSettings(self.config)
+        rtu1 = DeviceDiagnostics(settings, "campus/building/rtu1")
+        data = dict(self.data)
+        data.pop("MixedAirTemperature")
+        rtu1.analyze([data, {}], datetime.fromtimestamp(0))
+        assert rtu1.missing_data == ["MixedAirTemperature"]
+        assert len(rtu1.temp_sensor.window) == 0
+
+
+class TestReplay(unittest.TestCase):
+    """
+    Contains all the tests for offline replay of exported data
+    """
+    config = TestDeviceDiagnostics.config
+    points = ["FanStatus", "OutdoorAirTemperature", "ReturnAirTemperature", "MixedAirTemperature",
+              "OutdoorDamperSignal", "CompressorStatus"]
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.rows = []
+        for minute in range(10):
+            stamp = datetime(2020, 7, 1, 12, minute).isoformat()
+            self.rows.append([stamp, 1, 60.0 + minute, 72.0, 65.0, 50.0, 1])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_csv(self):
+        path = os.path.join(self.directory, "rtu1.csv")
+        with open(path, "w") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(["Timestamp"] + self.points)
+            writer.writerows(self.rows)
+        return path
+
+    def write_historian(self):
+        path = os.path.join(self.directory, "historian.sqlite")
+        connection = sqlite3.connect(path)
+        connection.execute("CREATE TABLE topics (topic_id INTEGER PRIMARY KEY, topic_name TEXT)")
+        connection.execute("CREATE TABLE data (ts TIMESTAMP, topic_id INTEGER, value_string TEXT)")
+        for topic_id, point in enumerate(self.points):
+            connection.execute("INSERT INTO topics VALUES (?, ?)", (topic_id, "campus/building/rtu1/" + point))
+            for row in self.rows:
+                connection.execute("INSERT INTO data VALUES (?, ?, ?)",
+                                   (row[0] + "+00:00", topic_id, json.dumps(row[topic_id + 1])))
+        connection.commit()
+        connection.close()
+        return path
+
+    def test_replay_matches_agent(self):
+        """test replayed results match the agent handling of the same publishes"""
+        settings = EconomizerSettings(self.config)
+        device = DeviceDiagnostics(settings, "campus/building/rtu1")
+        to_zone = dateutil.tz.gettz(settings.timezone)
+        expected = []
+        for row in self.rows:
+            current_time = parser.parse(row[0] + "+00:00").astimezone(to_zone)
+            device.analyze([dict(zip(self.points, row[1:])), {}], current_time)
+            for app, analysis_table in device.results_publish:
+                expected.append([app.split("&")[1], device.publish_path, analysis_table[0], analysis_table[1]])
+            del device.results_publish[:]
+
+        results = replay.replay_device(self.config, "rtu1", "", self.write_csv())
+        assert expected
+        assert results == expected
+
+    def test_replay_historian_matches_csv(self):
+        """test a SQLite historian export replays the same as a CSV export"""
+        from_csv = replay.replay_device(self.config, "rtu1", "", self.write_csv())
+        from_historian = replay.replay_device(self.config, "rtu1", "", self.write_historian())
+        assert from_historian == from_csv
+
+    def test_replay_writes_results(self):
+        """test the results file has one row per published result"""
+        output = os.path.join(self.directory, "results.csv")
+        count = replay.replay(self.config, {"rtu1": self.write_csv(), "rtu9": "missing.csv"}, output, processes=1)
+        with open(output) as csv_file:
+            rows = list(csv.reader(csv_file))
+        assert rows[0] == replay.RESULT_COLUMNS
+        assert len(rows) == count + 1
+        assert set(row[1] for row in rows[1:]) == {"campus/building/rtu1"}
+
+    def test_replay_device_points(self):
+        """test unit rows are split into the points each device publishes"""
+        values = {"FanStatus": 1, "VAV1/ZoneTemperature": 70.0}
+        assert replay.device_points(values, "") == {"FanStatus": 1}
+        assert replay.device_points(values, "VAV1") == {"ZoneTemperature": 70.0}
+        assert replay.parse_value("") is None
+        assert replay.parse_value("1") == 1
+        assert replay.parse_value("72.5") == 72.5
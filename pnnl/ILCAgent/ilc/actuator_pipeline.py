@@ -0,0 +1,224 @@
+"""
+-*- coding: utf-8 -*- {{{
+vim: set fenc=utf-8 ft=python sw=4 ts=4 sts=4 et:
+
+Copyright (c) 2017, Battelle Memorial Institute
+All rights reserved.
+
+1.  Battelle Memorial Institute (hereinafter Battelle) hereby grants
+    permission to any person or entity lawfully obtaining a copy of this
+    software and associated documentation files (hereinafter "the Software")
+    to redistribute and use the Software in source and binary forms, with or
+    without modification.  Such person or entity may use, copy, modify, merge,
+    publish, distribute, sublicense, and/or sell copies of the Software, and
+    may permit others to do so, subject to the following conditions:
+
+    -   Redistributions of source code must retain the above copyright notice,
+        this list of conditions and the following disclaimers.
+
+    -	Redistributions in binary form must reproduce the above copyright
+        notice, this list of conditions and the following disclaimer in the
+        documentation and/or other materials provided with the distribution.
+
+    -	Other than as used herein, neither the name Battelle Memorial Institute
+        or Battelle may be used in any form whatsoever without the express
+        written consent of Battelle.
+
+2.	THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+    AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+    IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+    ARE DISCLAIMED. IN NO EVENT SHALL BATTELLE OR CONTRIBUTORS BE LIABLE FOR
+    ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+    DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+    SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+    CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+    LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+    OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+    DAMAGE.
+
+The views and conclusions contained in the software and documentation are those
+of the authors and should not be interpreted as representing official policies,
+either expressed or implied, of the FreeBSD Project.
+
+This material was prepared as an account of work sponsored by an agency of the
+United States Government. Neither the United States Government nor the United
+States Department of Energy, nor Battelle, nor any of their employees, nor any
+jurisdiction or organization that has cooperated in the development of these
+materials, makes any warranty, express or implied, or assumes any legal
+liability or responsibility for the accuracy, completeness, or usefulness or
+any information, apparatus, product, software, or process disclosed, or
+represents that its use would not infringe privately owned rights.
+
+Reference herein to any specific commercial product, process, or service by
+trade name, trademark, manufacturer, or otherwise does not necessarily
+constitute or imply its endorsement, recommendation, or favoring by the
+United States Government or any agency thereof, or Battelle Memorial Institute.
+The views and opinions of authors expressed herein do not necessarily state or
+reflect those of the United States Government or any agency thereof.
+
+PACIFIC NORTHWEST NATIONAL LABORATORY
+operated by
+BATTELLE for the UNITED STATES DEPARTMENT OF ENERGY
+under Contract DE-AC05-76RL01830
+}}}
+"""
+import logging
+from collections import OrderedDict
+import gevent
+from gevent.pool import Pool
+from volttron.platform.agent.utils import setup_logging
+
+setup_logging()
+_log = logging.getLogger(__name__)
+
+
+class ActuatorPipeline(object):
+    """
+    Issues actuator RPC calls concurrently with bounded parallelism and
+    reports the outcome of every call instead of stopping at the first
+    failure.
+    """
+    def __init__(self, rpc, concurrency=10, timeout=5.0):
+        self.rpc = rpc
+        self.concurrency = max(1, int(concurrency))
+        self.timeout = timeout
+
+    def call_all(self, calls):
+        """
+        Issue the RPC calls, at most self.concurrency at a time.
+        :param calls: list of (key, peer, method, args) tuples.
+        :return: dict of key -> (success, result or exception)
+        """
+        def call(item):
+            key, peer, method, args = item
+            try:
+                return key, True, self.rpc.call(peer, method, *args).get(timeout=self.timeout)
+            except (Exception, gevent.Timeout) as ex:
+                return key, False, ex
+
+        results = {}
+        if not calls:
+            return results
+        pool = Pool(min(self.concurrency, len(calls)))
+        for key, success, result in pool.imap_unordered(call, calls):
+            results[key] = (success, result)
+        return results
+
+    def get_points(self, reads):
+        """
+        Read point values with one get_multiple_points call per device.
+        If the call for a device fails as a whole its points are read
+        individually with get_point.
+        :param reads: list of (key, actuator, device, point_topic) tuples.
+        :return: dict of key -> (success, value or error)
+        """
+        devices = OrderedDict()
+        for key, actuator, device, point_topic in reads:
+            devices.setdefault((actuator, device), []).append((key, point_topic))
+
+        calls = []
+        for (actuator, device), points in devices.items():
+            topics = list(OrderedDict.fromkeys(point_topic for _, point_topic in points))
+            calls.append(((actuator, device), actuator, "get_multiple_points", [topics]))
+
+        values = {}
+        fallback = []
+        for device_key, (success, result) in self.call_all(calls).items():
+            points = devices[device_key]
+            if not success:
+                _log.debug("get_multiple_points failed for {} ({}), getting points individually".format(device_key[1],
+                                                                                                       result))
+                fallback.extend((key, device_key[0], "get_point", [point_topic]) for key, point_topic in points)
+                continue
+            results, errors = result
+            for key, point_topic in points:
+                if point_topic in results:
+                    values[key] = (True, results[point_topic])
+                else:
+                    values[key] = (False, errors.get(point_topic))
+
+        values.update(self.call_all(fallback))
+        return values
+
+    def set_points(self, requester_id, writes):
+        """
+        Write point values with one set_multiple_points call per device.
+        If the call for a device fails as a whole its points are written
+        individually with set_point.
+        :param requester_id:
+        :param writes: list of (key, actuator, device, point_topic, value) tuples.
+        :return: dict of key -> None on success or the error.
+        """
+        devices = OrderedDict()
+        for key, actuator, device, point_topic, value in writes:
+            devices.setdefault((actuator, device), []).append((key, point_topic, value))
+
+        calls = []
+        for (actuator, device), points in devices.items():
+            topics_values = [[point_topic, value] for _, point_topic, value in points]
+            calls.append(((actuator, device), actuator, "set_multiple_points", [requester_id, topics_values]))
+
+        errors = {}
+        fallback = []
+        for device_key, (success, result) in self.call_all(calls).items():
+            points = devices[device_key]
+            if not success:
+                _log.debug("set_multiple_points failed for {} ({}), setting points individually".format(device_key[1],
+                                                                                                       result))
+                fallback.extend((key, device_key[0], "set_point", [requester_id, point_topic, value])
+                                for key, point_topic, value in points)
+                continue
+            result = result or {}
+            for key, point_topic, value in points:
+                errors[key] = result.get(point_topic)
+
+        for key, (success, result) in self.call_all(fallback).items():
+            errors[key] = None if success else result
+
+        return errors
+
+    def request_schedules(self, requester_id, task_id, priority, device_requests):
+        """
+        Reserve devices with one request_new_schedule call per actuator.
+        If the combined request for an actuator fails (e.g. one device is
+        unavailable) its devices are requested individually, using the
+        device name as the task id, so the available ones are still
+        reserved.
+        :param requester_id:
+        :param task_id: task id used for the combined requests.
+        :param priority:
+        :param device_requests: list of (device, actuator, [device_topic, start, end]) tuples.
+        :return: dict of (device, actuator) -> task id, or None if the
+                 device could not be reserved.
+        """
+        actuators = OrderedDict()
+        for device, actuator, request in device_requests:
+            actuators.setdefault(actuator, []).append((device, request))
+
+        calls = []
+        for actuator, requests in actuators.items():
+            calls.append((actuator, actuator, "request_new_schedule",
+                          [requester_id, task_id, priority, [request for _, request in requests]]))
+
+        scheduled = {}
+        fallback = []
+        for actuator, (success, result) in self.call_all(calls).items():
+            requests = actuators[actuator]
+            if success and result["result"] != "FAILURE":
+                for device, _ in requests:
+                    scheduled[device, actuator] = task_id
+                continue
+            fallback.extend(((device, actuator), actuator, "request_new_schedule",
+                             [requester_id, device, priority, [request]]) for device, request in requests)
+
+        for device_key, (success, result) in self.call_all(fallback).items():
+            if not success:
+                _log.warning("Failed to schedule device {}: {}".format(device_key[0], str(result)))
+                scheduled[device_key] = None
+            elif result["result"] == "FAILURE":
+                _log.warn("Failed to schedule device (unavailable) " + device_key[0])
+                scheduled[device_key] = None
+            else:
+                scheduled[device_key] = device_key[0]
+
+        return scheduled
@@ -0,0 +1,247 @@
+"""
+-*- coding: utf-8 -*- {{{
+vim: set fenc=utf-8 ft=python sw=4 ts=4 sts=4 et:
+
+Copyright (c) 2017, Battelle Memorial Institute
+All rights reserved.
+
+1.  Battelle Memorial Institute (hereinafter Battelle) hereby grants
+    permission to any person or entity lawfully obtaining a copy of this
+    software and associated documentation files (hereinafter "the Software")
+    to redistribute and use the Software in source and binary forms, with or
+    without modification.  Such person or entity may use, copy, modify, merge,
+    publish, distribute, sublicense, and/or sell copies of the Software, and
+    may permit others to do so, subject to the following conditions:
+
+    -   Redistributions of source code must retain the above copyright notice,
+        this list of conditions and the following disclaimers.
+
+    -	Redistributions in binary form must reproduce the above copyright
+        notice, this list of conditions and the following disclaimer in the
+        documentation and/or other materials provided with the distribution.
+
+    -	Other than as used herein, neither the name Battelle Memorial Institute
+        or Battelle may be used in any form whatsoever without the express
+        written consent of Battelle.
+
+2.	THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+    AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+    IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+    ARE DISCLAIMED. IN NO EVENT SHALL BATTELLE OR CONTRIBUTORS BE LIABLE FOR
+    ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+    DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+    SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+    CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+    LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+    OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+    DAMAGE.
+
+The views and conclusions contained in the software and documentation are those
+of the authors and should not be interpreted as representing official policies,
+either expressed or implied, of the FreeBSD Project.
+
+This material was prepared as an account of work sponsored by an agency of the
+United States Government. Neither the United States Government nor the United
+States Department of Energy, nor Battelle, nor any of their employees, nor any
+jurisdiction or organization that has cooperated in the development of these
+materials, makes any warranty, express or implied, or assumes any legal
+liability or responsibility for the accuracy, completeness, or usefulness or
+any information, apparatus, product, software, or process disclosed, or
+represents that its use would not infringe privately owned rights.
+
+Reference herein to any specific commercial product, process, or service by
+trade name, trademark, manufacturer, or otherwise does not necessarily
+constitute or imply its endorsement, recommendation, or favoring by the
+United States Government or any agency thereof, or Battelle Memorial Institute.
+The views and opinions of authors expressed herein do not necessarily state or
+reflect those of the United States Government or any agency thereof.
+
+PACIFIC NORTHWEST NATIONAL LABORATORY
+operated by
+BATTELLE for the UNITED STATES DEPARTMENT OF ENERGY
+under Contract DE-AC05-76RL01830
+}}}
+
+Time the ILC building demand averages: the list the agent used to keep,
+re-sorted on every meter message, against DemandWindow.  Time the formula
+criteria and conditional curtailments evaluated by sympy substitution, as
+they were, against their compiled expressions.
+
+    python -m ilc.benchmark [--windows 15 60 240] [--hours 24] [--jitter 0]
+    python -m ilc.benchmark --only criteria [--messages 10000]
+
+With --jitter the list and DemandWindow keep different readings (the list
+evicts one reading per message once full, DemandWindow evicts by age), so
+their averages differ.
+"""
+import sys
+import random
+import logging
+import argparse
+import timeit
+from datetime import datetime, timedelta as td
+
+from .demand_window import DemandWindow
+from .criteria_handler import FormulaCriterion
+from .curtailment_handler import ConditionalCurtailment
+
+SAMPLE_INTERVAL = td(seconds=15)
+
+FORMULA = {
+    "operation": "1/(AverageZoneTemperature-CoolingTemperatureSetPoint)",
+    "operation_args": ["CoolingTemperatureSetPoint", "AverageZoneTemperature"],
+    "minimum": 0.0,
+    "maximum": 10.0
+}
+CONDITION = {
+    "condition": ["AverageZoneTemperature > CoolingTemperatureSetPoint", "&", "SupplyFanStatus > 0"],
+    "conditional_args": ["AverageZoneTemperature", "CoolingTemperatureSetPoint", "SupplyFanStatus"],
+    "point": "CoolingTemperatureSetPoint",
+    "load": 0.5,
+    "offset": 2.0,
+    "curtailment_method": "offset"
+}
+
+
+def meter_readings(hours, jitter=0.0, seed=0):
+    """15-second building power readings, in kW, each up to jitter seconds early or late"""
+    rng = random.Random(seed)
+    start = datetime(2017, 7, 10)
+    return [(start + SAMPLE_INTERVAL * index + td(seconds=rng.uniform(-jitter, jitter)),
+             400.0 + rng.uniform(-50.0, 50.0))
+            for index in range(int(td(hours=hours).total_seconds() / SAMPLE_INTERVAL.total_seconds()))]
+
+
+def list_window(readings, window):
+    """
+    The averaging calculate_average_power did before DemandWindow, for every reading.
+    :return: the exponential and normal averages after the last reading
+    """
+    bldg_power = []
+    average_power = normal_average_power = 0.0
+    for current_time, current_power in readings:
+        if bldg_power:
+            current_average_window = bldg_power[-1][0] - bldg_power[0][0] + SAMPLE_INTERVAL
+        else:
+            current_average_window = td(minutes=0)
+
+        if current_average_window >= window and current_power > 0:
+            bldg_power.append((current_time, current_power))
+            bldg_power.pop(0)
+        elif current_power > 0:
+            bldg_power.append((current_time, current_power))
+
+        smoothing_constant = 2.0/(len(bldg_power) + 1.0)*2.0 if bldg_power else 1.0
+        smoothing_constant = smoothing_constant if smoothing_constant <= 1.0 else 1.0
+        power_sort = list(bldg_power)
+        power_sort.sort(reverse=True)
+        average_power = 0
+
+        for n in range(len(bldg_power)):
+            average_power += power_sort[n][1] * smoothing_constant * (1.0 - smoothing_constant) ** n
+
+        norm_list = [float(i[1]) for i in bldg_power]
+        normal_average_power = sum(norm_list) / len(norm_list) if norm_list else 0.0
+    return average_power, normal_average_power
+
+
+def demand_window(readings, window):
+    """
+    The same averages from DemandWindow, for every reading.
+    :return: the exponential and normal averages after the last reading
+    """
+    bldg_power = DemandWindow(window, SAMPLE_INTERVAL)
+    average_power = normal_average_power = 0.0
+    for current_time, current_power in readings:
+        bldg_power.add(current_time, current_power)
+        average_power = bldg_power.exponential_average()
+        normal_average_power = bldg_power.average()
+    return average_power, normal_average_power
+
+
+def device_messages(count, seed=0):
+    """Device publishes holding the points of FORMULA and CONDITION"""
+    rng = random.Random(seed)
+    return [{"AverageZoneTemperature": rng.uniform(68.0, 80.0),
+             "CoolingTemperatureSetPoint": rng.choice([72.0, 74.0]),
+             "SupplyFanStatus": rng.choice([0, 1])} for _ in range(count)]
+
+
+def formula_criterion(criterion, messages, compiled):
+    """Ingest and evaluate each message, with the compiled expression or with sympy subs"""
+    for data in messages:
+        criterion.ingest_data(None, data)
+        if compiled:
+            criterion.evaluate()
+        else:
+            criterion.expr.expr.subs(criterion.point_list)
+
+
+def conditional_curtailment(conditional, messages, compiled):
+    """Ingest and check each message, with the compiled expression or with sympy subs"""
+    for data in messages:
+        conditional.ingest_data(data)
+        if compiled:
+            conditional.check_condition()
+        else:
+            conditional.conditional_curtail.expr.subs(zip(conditional.conditional_args,
+                                                          conditional.conditional_points))
+
+
+def best_time(function, repeat):
+    """Best time of repeat calls in seconds"""
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+
+def time_demand_window(hours, windows, repeat, jitter):
+    """Print the per-message cost of both for each window length"""
+    readings = meter_readings(hours, jitter)
+    print("{} meter messages, {} s jitter".format(len(readings), jitter))
+    print("{:>8} {:>12} {:>12} {:>8} {:>14}".format("window", "list us/msg", "window us/msg", "speedup",
+                                                    "max difference"))
+    for minutes in windows:
+        window = td(minutes=minutes)
+        list_time = best_time(lambda: list_window(readings, window), repeat)
+        window_time = best_time(lambda: demand_window(readings, window), repeat)
+        difference = max(abs(a - b) for a, b in zip(list_window(readings, window), demand_window(readings, window)))
+        print("{:>6} m {:>12.1f} {:>12.1f} {:>7.1f}x {:>14.2e}".format(
+            minutes, list_time / len(readings) * 1e6, window_time / len(readings) * 1e6, list_time / window_time,
+            difference))
+
+
+def time_criteria(count, repeat):
+    """Print the per-message cost of sympy subs and of the compiled expressions"""
+    messages = device_messages(count)
+    criterion = FormulaCriterion(**FORMULA)
+    conditional = ConditionalCurtailment(**CONDITION)
+    print("{} device messages".format(count))
+    print("{:>24} {:>12} {:>15} {:>8}".format("", "subs us/msg", "compiled us/msg", "speedup"))
+    for name, function, instance in (("FormulaCriterion", formula_criterion, criterion),
+                                     ("ConditionalCurtailment", conditional_curtailment, conditional)):
+        subs_time = best_time(lambda: function(instance, messages, False), repeat)
+        compiled_time = best_time(lambda: function(instance, messages, True), repeat)
+        print("{:>24} {:>12.1f} {:>15.1f} {:>7.1f}x".format(
+            name, subs_time / count * 1e6, compiled_time / count * 1e6, subs_time / compiled_time))
+
+
+def main(argv=sys.argv):
+    """Run the demand window and criteria benchmarks"""
+    arg_parser = argparse.ArgumentParser(description="Benchmark the ILC demand averages and criteria")
+    arg_parser.add_argument("--only", choices=["demand", "criteria"], help="run one of the benchmarks")
+    arg_parser.add_argument("--windows", type=int, nargs="+", default=[15, 60, 240],
+                            help="average_building_power_window lengths, in minutes")
+    arg_parser.add_argument("--hours", type=float, default=24.0, help="hours of 15-second meter data")
+    arg_parser.add_argument("--jitter", type=float, default=0.0, help="seconds a meter reading may be early or late")
+    arg_parser.add_argument("--messages", type=int, default=10000, help="device messages for the criteria")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="repetitions, the best is reported")
+    args = arg_parser.parse_args(argv[1:])
+
+    logging.disable(logging.CRITICAL)
+    if args.only in (None, "demand"):
+        time_demand_window(args.hours, args.windows, args.repeat, args.jitter)
+    if args.only in (None, "criteria"):
+        time_criteria(args.messages, args.repeat)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -64,15 +64,17 @@ under Contract DE-AC05-76RL01830
 """
 import re
 import abc
-from sympy import symbols
+import calendar
+import numpy as np
+from array import array
+from bisect import bisect_left, bisect_right
+from sympy import symbols, lambdify
 from sympy.core import numbers
 from sympy.parsing.sympy_parser import parse_expr
-from collections import deque
 import logging
 from datetime import timedelta as td
 from volttron.platform.agent.utils import setup_logging
-from ilc.ilc_matrices import (extract_criteria, calc_column_sums, normalize_matrix,
-                              validate_input, build_score, input_matrix)
+from ilc.ilc_matrices import build_score, input_matrix, rank_scores
 setup_logging()
 _log = logging.getLogger(__name__)
 
@@ -86,6 +88,26 @@ def register_criterion(name):
     return decorator
 
 
+_clean_text_patterns = {}
+
+
+def clean_text(text, rep={" ": ""}):
+    """
+    Apply the rep replacements to text.  The replacement patterns are
+    compiled once and reused.
+    :param text:
+    :param rep:
+    :return:
+    """
+    pattern_key = tuple(sorted(rep.items()))
+    cached = _clean_text_patterns.get(pattern_key)
+    if cached is None:
+        escaped = dict((re.escape(k), v) for k, v in rep.iteritems())
+        cached = _clean_text_patterns[pattern_key] = (re.compile("|".join(escaped.keys())), escaped)
+    pattern, escaped = cached
+    return pattern.sub(lambda m: escaped[re.escape(m.group(0))], text)
+
+
 def parse_sympy(data, condition=False):
     """
     Parser for sympy.
@@ -93,13 +115,6 @@ def parse_sympy(data, condition=False):
     :param condition:
     :return:
     """
-
-    def clean_text(text, rep={" ": ""}):
-        rep = dict((re.escape(k), v) for k, v in rep.iteritems())
-        pattern = re.compile("|".join(rep.keys()))
-        new_key = pattern.sub(lambda m: rep[re.escape(m.group(0))], text)
-        return new_key
-
     if isinstance(data, dict):
         return_data = {}
         for key, value in data.items():
@@ -123,12 +138,84 @@ def parse_sympy(data, condition=False):
     return return_data
 
 
+class DataParser(object):
+    """
+    Translates the point names of device publishes with clean_text.  The
+    translated names are cached per topic and only computed for points that
+    have not been seen on the topic before.
+    """
+    def __init__(self):
+        self.key_maps = {}
+
+    def parse(self, topic, data):
+        key_map = self.key_maps.setdefault(topic, {})
+        try:
+            return dict((key_map[key], value) for key, value in data.iteritems())
+        except KeyError:
+            for key in data:
+                if key not in key_map:
+                    key_map[key] = clean_text(key)
+            return dict((key_map[key], value) for key, value in data.iteritems())
+
+
+_expression_cache = {}
+
+
+def compile_expression(expression, args):
+    """
+    Return a CompiledExpression for the (already parsed) expression string
+    and argument list.  Identical expressions used by many devices share a
+    single compiled instance.
+    :param expression:
+    :param args:
+    :return:
+    """
+    key = (expression, tuple(args))
+    compiled = _expression_cache.get(key)
+    if compiled is None:
+        compiled = _expression_cache[key] = CompiledExpression(expression, args)
+    return compiled
+
+
+class CompiledExpression(object):
+    """
+    Wraps a sympy expression that is parsed and converted to a native python
+    function once at configuration load.  Evaluation calls the native function
+    and only falls back to sympy substitution when the values cannot be
+    handled natively (non-numeric data, division by zero, etc.).
+    """
+    def __init__(self, expression, args):
+        self.args = list(args)
+        self.expr = parse_expr(expression)
+        self.points = symbols(self.args)
+        self.func = lambdify(self.points, self.expr, modules="math")
+
+    def evaluate(self, values):
+        """
+        Evaluate the expression for values ordered as self.args.
+        :param values:
+        :return:
+        """
+        try:
+            return self.func(*values)
+        except (TypeError, ValueError, NameError, ArithmeticError):
+            return self.expr.subs(zip(self.args, values))
+
+    def evaluate_data(self, data):
+        """
+        Evaluate the expression using the args values contained in data.
+        :param data:
+        :return:
+        """
+        return self.evaluate([data[point] for point in self.args])
+
+
 class CriteriaCluster(object):
     def __init__(self, priority, criteria_labels, row_average, cluster_config):
         self.criteria = {}
         self.priority = priority
         self.criteria_labels = criteria_labels
-        self.row_average = row_average
+        self.row_average = np.asarray(row_average, dtype=float)
         global mappers
         try:
             mappers = cluster_config.pop("mappers")
@@ -138,6 +225,16 @@ class CriteriaCluster(object):
         for device_name, device_criteria in cluster_config.items():
             self.criteria[device_name] = DeviceCriteria(device_criteria)
 
+        # Persistent devices x criteria array, one row per (device, token).
+        self.device_keys = []
+        for device_name, device in self.criteria.items():
+            for device_id in device.criteria:
+                self.device_keys.append((device_name, device_id))
+        self.input_array = np.zeros((len(self.device_keys), len(criteria_labels)))
+
+        for row, (device_name, device_id) in enumerate(self.device_keys):
+            self.criteria[device_name].set_score_row(device_id, self.input_array[row], criteria_labels)
+
     def get_all_evaluations(self):
         results = {}
         for name, device in self.criteria.items():
@@ -146,37 +243,44 @@ class CriteriaCluster(object):
                 results[name, device_id] = evaluations
         return results
 
+    def get_scores(self):
+        return build_score(input_matrix(self.input_array), self.row_average, self.priority)
+
 
 class CriteriaContainer(object):
     def __init__(self):
         self.clusters = []
         self.devices = {}
+        self.device_cluster = {}
+        self.device_keys = []
+        self.key_rank = np.empty(0, dtype=int)
 
     def add_criteria_cluster(self, cluster):
         self.clusters.append(cluster)
         self.devices.update(cluster.criteria)
+        for device_name in cluster.criteria:
+            self.device_cluster[device_name] = len(self.clusters) - 1
+        self.device_keys.extend(cluster.device_keys)
 
-    def get_score_order(self):
-        all_scored = []
-        for cluster in self.clusters:
-            evaluations = cluster.get_all_evaluations()
-
-            _log.debug('Device Evaluations: ' + str(evaluations))
-
-            if not evaluations:
-                continue
-
-            input_arr = input_matrix(evaluations, cluster.criteria_labels)
-            scores = build_score(input_arr, cluster.row_average, cluster.priority)
-            all_scored.extend(scores)
+        # Rank of each device key, used to break ties between equal scores.
+        self.key_rank = np.empty(len(self.device_keys), dtype=int)
+        self.key_rank[sorted(range(len(self.device_keys)), key=self.device_keys.__getitem__)] = \
+            np.arange(len(self.device_keys))
 
-            _log.debug('Input Array: ' + str(input_arr))
-            _log.debug('Scored devices: ' + str(scores))
+    def get_score_order(self, k=None):
+        """
+        Return the (device, token) keys of all clusters ordered by
+        descending curtailment score.
+        :param k: only return the k highest scored devices.
+        :return:
+        """
+        if not self.device_keys:
+            return []
 
-        all_scored.sort(reverse=True)
-        results = [x[1] for x in all_scored]
+        scores = np.concatenate([cluster.get_scores() for cluster in self.clusters])
+        _log.debug('Scored devices: ' + str(zip(self.device_keys, scores.tolist())))
 
-        return results
+        return [self.device_keys[index] for index in rank_scores(scores, self.key_rank, k)]
 
     def get_device(self, device_name):
         return self.devices[device_name]
@@ -188,14 +292,52 @@ class DeviceCriteria(object):
         self.points = {}
         self.expressions = {}
         self.condition = {}
+        self.score_rows = {}
+        self.criteria_labels = []
+        self.history_buffers = {}
 
         for device_id, device_criteria in criteria_config.items():
-            criteria = Criteria(device_criteria)
+            criteria = Criteria(device_criteria, self.history_buffers)
             self.criteria[device_id] = criteria
 
+    def set_score_row(self, token, row, criteria_labels):
+        """
+        Attach the row of the cluster input array that holds the
+        evaluated criteria for token.
+        :param token:
+        :param row:
+        :param criteria_labels:
+        :return:
+        """
+        self.criteria_labels = criteria_labels
+        self.score_rows[token] = row
+        self.update_score_row(token)
+
+    def update_score_row(self, token):
+        """
+        Evaluate the criteria of token into its score row.  A criterion
+        that fails keeps its previous value so the other criteria, and
+        the rest of the device publish, are still processed.
+        :param token:
+        :return:
+        """
+        row = self.score_rows.get(token)
+        if row is None:
+            return
+        criteria = self.criteria[token].criteria
+        for index, label in enumerate(self.criteria_labels):
+            criterion = criteria.get(label)
+            if criterion is None:
+                raise Exception('Input criteria and data criteria do not match.')
+            try:
+                row[index] = criterion.evaluate_criterion()
+            except Exception as ex:
+                _log.error("Criterion {} of {} could not be evaluated: {}".format(label, token, ex))
+
     def ingest_data(self, time_stamp, data):
-        for criteria in self.criteria.values():
+        for token, criteria in self.criteria.items():
             criteria.ingest_data(time_stamp, data)
+            self.update_score_row(token)
 
     def criteria_status(self, token, status):
         self.criteria[token].criteria_status(status)
@@ -205,8 +347,9 @@ class DeviceCriteria(object):
 
 
 class Criteria(object):
-    def __init__(self, criteria):
+    def __init__(self, criteria, history_buffers=None):
         self.criteria = {}
+        self.history_buffers = history_buffers if history_buffers is not None else {}
         for name, criterion in criteria.items():
             self.add(name, criterion)
 
@@ -215,6 +358,7 @@ class Criteria(object):
         operation_type = criterion.pop('operation_type')
         klass = criterion_registry[operation_type]
         self.criteria[name] = klass(**criterion)
+        self.criteria[name].share_history(self.history_buffers)
 
     def evaluate(self):
         results = {}
@@ -287,6 +431,9 @@ class BaseCriterion(object):
     def criteria_status(self, status):
         pass
 
+    def share_history(self, history_buffers):
+        pass
+
 
 @register_criterion('status')
 class StatusCriterion(BaseCriterion):
@@ -337,14 +484,14 @@ class FormulaCriterion(BaseCriterion):
         self.operation_parms = operation_args.values()
         print operation_args.keys(), operation_args.values()
         self.operation_args = parse_sympy(operation_points)
-        self.points = symbols(self.operation_args)
-        self.expr = parse_expr(parse_sympy(operation))
+        self.expr = compile_expression(parse_sympy(operation), self.operation_args)
+        self.points = self.expr.points
         self.point_list = []
         self.status = False
 
     def evaluate(self):
         if self.point_list:
-            value = self.expr.subs(self.point_list)
+            value = self.expr.evaluate([value for _, value in self.point_list])
         else:
             value = self.minimum
         return value
@@ -382,43 +529,124 @@ class HistoryCriterion(BaseCriterion):
         super(HistoryCriterion, self).__init__(**kwargs)
         if comparison_type is None or point_name is None or previous_time is None:
             raise ValueError('Missing parameter')
-        self.history = deque()
         self.comparison_type = comparison_type
         self.point_name = point_name
         self.previous_time_delta = td(minutes=previous_time)
+        self.history = HistoryBuffer()
+        self.history.require(self.previous_time_delta)
         self.current_value = None
         self.history_time = None
 
-    def linear_interpolation(self, date1, value1, date2, value2, target_date):
-        end_delta_t = (date2 - date1).total_seconds()
-        target_delta_t = (target_date - date1).total_seconds()
-        return (value2 - value1) * (target_delta_t / end_delta_t) + value1
+    def share_history(self, history_buffers):
+        """
+        Use the history buffer of the device point shared with other
+        criteria of the same device.
+        :param history_buffers:
+        :return:
+        """
+        self.history = history_buffers.setdefault(self.point_name, self.history)
+        self.history.require(self.previous_time_delta)
 
     def evaluate(self):
         if self.current_value is None:
             return self.minimum
 
-        pre_timestamp, pre_value = self.history.pop()
-
-        if pre_timestamp > self.history_time:
-            self.history.append((pre_timestamp, pre_value))
+        prev_value = self.history.interpolate(self.history_time)
+        if prev_value is None:
             return self.minimum
 
-        post_timestamp, post_value = self.history.pop()
-
-        while post_timestamp < self.history_time:
-            pre_value, pre_timestamp = post_value, post_timestamp
-            post_timestamp, post_value = self.history.pop()
-
-        self.history.append((post_timestamp, post_value))
-        prev_value = self.linear_interpolation(pre_timestamp, pre_value, post_timestamp, post_value, self.history_time)
         if self.comparison_type == 'direct':
             value = abs(prev_value - self.current_value)
         elif self.comparison_type == 'inverse':
-            value = 1 / abs(prev_value - self.current_value)
+            delta = abs(prev_value - self.current_value)
+            if delta == 0:
+                # No change: the highest configured score, if there is one
+                return self.maximum if self.maximum is not None else self.minimum
+            value = 1.0 / delta
         return value
 
     def ingest_data(self, time_stamp, data):
         self.history_time = time_stamp - self.previous_time_delta
         self.current_value = data[self.point_name]
-        self.history.appendleft((time_stamp, self.current_value))
+        self.history.append(time_stamp, self.current_value)
+
+
+def to_seconds(time_stamp):
+    """
+    Convert a datetime to (UTC) epoch seconds.  Naive datetimes are
+    treated as UTC.
+    :param time_stamp:
+    :return:
+    """
+    return calendar.timegm(time_stamp.utctimetuple()) + time_stamp.microsecond / 1e6
+
+
+class HistoryBuffer(object):
+    """
+    Time ordered samples of a single device point stored in compact arrays.
+    Samples older than the longest retention period required by the criteria
+    sharing the buffer are discarded, keeping the newest sample at or before
+    the retention boundary so interpolation at the boundary is possible.
+    """
+    def __init__(self):
+        self.timestamps = array('d')
+        self.values = array('d')
+        self.start = 0
+        self.retention = 0.0
+
+    def __len__(self):
+        return len(self.timestamps) - self.start
+
+    def require(self, retention):
+        self.retention = max(self.retention, retention.total_seconds())
+
+    def append(self, time_stamp, value):
+        """
+        Add a sample.  Samples that are not newer than the newest stored
+        sample (e.g. the same publish ingested by another criterion sharing
+        the buffer) and non-numeric samples are ignored.
+        :param time_stamp:
+        :param value:
+        :return:
+        """
+        time_stamp = to_seconds(time_stamp)
+        if len(self) and time_stamp <= self.timestamps[-1]:
+            return
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return
+        self.timestamps.append(time_stamp)
+        self.values.append(value)
+        self.trim(time_stamp - self.retention)
+
+    def trim(self, boundary):
+        index = bisect_right(self.timestamps, boundary, self.start) - 1
+        if index > self.start:
+            self.start = index
+        # Compact the arrays once the discarded prefix dominates them.
+        if self.start > len(self.timestamps) // 2:
+            del self.timestamps[:self.start]
+            del self.values[:self.start]
+            self.start = 0
+
+    def interpolate(self, target_time):
+        """
+        Linearly interpolate the point value at target_time from the
+        bracketing samples.  Returns None if target_time is not covered by
+        the stored history.
+        :param target_time:
+        :return:
+        """
+        target = to_seconds(target_time)
+        post = bisect_left(self.timestamps, target, self.start)
+        if post >= len(self.timestamps):
+            return None
+        if self.timestamps[post] == target:
+            return self.values[post]
+        if post == self.start:
+            return None
+        pre = post - 1
+        end_delta_t = self.timestamps[post] - self.timestamps[pre]
+        target_delta_t = target - self.timestamps[pre]
+        return (self.values[post] - self.values[pre]) * (target_delta_t / end_delta_t) + self.values[pre]
@@ -68,6 +68,7 @@ import logging
 from collections import defaultdict
 from sympy.parsing.sympy_parser import parse_expr
 from volttron.platform.agent.utils import setup_logging
+from ilc.criteria_handler import compile_expression
 
 
 setup_logging()
@@ -182,8 +183,8 @@ class CurtailmentManager(object):
 
             self.device_status_args[device_id] = device_status_args
             self.condition[device_id] = parse_sympy(condition, condition=True)
-            self.points[device_id] = symbols(device_status_args)
-            self.expr[device_id] = parse_expr(self.condition[device_id])
+            self.expr[device_id] = compile_expression(self.condition[device_id], device_status_args)
+            self.points[device_id] = self.expr[device_id].points
 
             self.command_status[device_id] = False
             self.curtail_count[device_id] = 0.0
@@ -195,12 +196,9 @@ class CurtailmentManager(object):
                 conditional_curtail_instance.ingest_data(data)
 
         for device_id in self.command_status:
-            conditional_points = []
-            for item in self.device_status_args[device_id]:
-                conditional_points.append((item, data[item]))
             conditional_value = False
-            if conditional_points:
-                conditional_value = self.expr[device_id].subs(conditional_points)
+            if self.device_status_args[device_id]:
+                conditional_value = self.expr[device_id].evaluate_data(data)
             _log.debug('{} (device status) evaluated to {}'.format(self.condition[device_id], conditional_value))
             try:
                 self.command_status[device_id] = bool(conditional_value)
@@ -310,25 +308,22 @@ class ConditionalCurtailment(object):
         if None in (condition, conditional_args):
             raise ValueError('Missing parameter')
         self.conditional_args = parse_sympy(conditional_args)
-        self.points = symbols(self.conditional_args)
         self.conditional_expr = parse_sympy(condition, condition=True)
-        self.conditional_curtail = parse_expr(self.conditional_expr)
+        self.conditional_curtail = compile_expression(self.conditional_expr, self.conditional_args)
+        self.points = self.conditional_curtail.points
         self.curtailment = CurtailmentSetting(**kwargs)
         self.conditional_points = []
 
     def check_condition(self):
         if self.conditional_points:
-            value = self.conditional_curtail.subs(self.conditional_points)
+            value = self.conditional_curtail.evaluate(self.conditional_points)
             _log.debug('{} (conditional_curtail) evaluated to {}'.format(self.conditional_expr, value))
         else:
             value = False
         return value
 
     def ingest_data(self, data):
-        point_list = []
-        for point in self.conditional_args:
-            point_list.append((point, data[point]))
-        self.conditional_points = point_list
+        self.conditional_points = [data[point] for point in self.conditional_args]
 
     def get_curtailment(self):
         return self.curtailment.get_curtailment_dict()
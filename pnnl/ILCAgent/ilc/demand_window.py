@@ -0,0 +1,190 @@
+"""
+-*- coding: utf-8 -*- {{{
+vim: set fenc=utf-8 ft=python sw=4 ts=4 sts=4 et:
+
+Copyright (c) 2017, Battelle Memorial Institute
+All rights reserved.
+
+1.  Battelle Memorial Institute (hereinafter Battelle) hereby grants
+    permission to any person or entity lawfully obtaining a copy of this
+    software and associated documentation files (hereinafter "the Software")
+    to redistribute and use the Software in source and binary forms, with or
+    without modification.  Such person or entity may use, copy, modify, merge,
+    publish, distribute, sublicense, and/or sell copies of the Software, and
+    may permit others to do so, subject to the following conditions:
+
+    -   Redistributions of source code must retain the above copyright notice,
+        this list of conditions and the following disclaimers.
+
+    -	Redistributions in binary form must reproduce the above copyright
+        notice, this list of conditions and the following disclaimer in the
+        documentation and/or other materials provided with the distribution.
+
+    -	Other than as used herein, neither the name Battelle Memorial Institute
+        or Battelle may be used in any form whatsoever without the express
+        written consent of Battelle.
+
+2.	THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+    AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+    IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+    ARE DISCLAIMED. IN NO EVENT SHALL BATTELLE OR CONTRIBUTORS BE LIABLE FOR
+    ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+    DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+    SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+    CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+    LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+    OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+    DAMAGE.
+
+The views and conclusions contained in the software and documentation are those
+of the authors and should not be interpreted as representing official policies,
+either expressed or implied, of the FreeBSD Project.
+
+This material was prepared as an account of work sponsored by an agency of the
+United States Government. Neither the United States Government nor the United
+States Department of Energy, nor Battelle, nor any of their employees, nor any
+jurisdiction or organization that has cooperated in the development of these
+materials, makes any warranty, express or implied, or assumes any legal
+liability or responsibility for the accuracy, completeness, or usefulness or
+any information, apparatus, product, software, or process disclosed, or
+represents that its use would not infringe privately owned rights.
+
+Reference herein to any specific commercial product, process, or service by
+trade name, trademark, manufacturer, or otherwise does not necessarily
+constitute or imply its endorsement, recommendation, or favoring by the
+United States Government or any agency thereof, or Battelle Memorial Institute.
+The views and opinions of authors expressed herein do not necessarily state or
+reflect those of the United States Government or any agency thereof.
+
+PACIFIC NORTHWEST NATIONAL LABORATORY
+operated by
+BATTELLE for the UNITED STATES DEPARTMENT OF ENERGY
+under Contract DE-AC05-76RL01830
+}}}
+"""
+import logging
+from collections import deque
+from datetime import timedelta as td
+from volttron.platform.agent.utils import setup_logging
+
+setup_logging()
+_log = logging.getLogger(__name__)
+
+SYNC_BAND = 1
+
+
+class DemandWindow(object):
+    """
+    Rolling window of building power readings.
+
+    Readings older than the configured window are evicted as new readings
+    arrive.  The mean and the exponentially weighted average (newest reading
+    weighted highest) are maintained incrementally so the cost of adding a
+    reading does not depend on the window length.  The smoothing constant
+    depends on the number of readings, so the exponentially weighted sum is
+    kept for every length within SYNC_BAND of the length at the last
+    synchronization; readings arriving a little early or late move between
+    those sums without a recomputation.  The sums are recomputed from the
+    buffer when the length leaves that band, as it does while the window
+    fills, and once per window length to bound floating point drift.
+    """
+    def __init__(self, window, sample_interval=td(seconds=15)):
+        self.window = window
+        self.sample_interval = sample_interval
+        self.readings = deque()
+        self.power_sum = 0.0
+        self.band_start = 1
+        self.decays = []
+        self.exp_sums = []
+        self.updates_since_sync = 0
+
+    def __len__(self):
+        return len(self.readings)
+
+    def span(self):
+        """
+        Time covered by the readings currently in the window.
+        :return:
+        """
+        if not self.readings:
+            return td(minutes=0)
+        return self.readings[-1][0] - self.readings[0][0] + self.sample_interval
+
+    def add(self, current_time, current_power):
+        """
+        Add a reading to the window.  Non-positive readings are ignored.
+        Returns the window span prior to adding the reading.
+        :param current_time:
+        :param current_power:
+        :return:
+        """
+        current_average_window = self.span()
+        if current_power <= 0:
+            return current_average_window
+
+        current_power = float(current_power)
+        self.readings.append((current_time, current_power))
+        self.power_sum += current_power
+
+        evicted = []
+        while len(self.readings) > 1 and current_time - self.readings[0][0] + self.sample_interval > self.window:
+            evicted.append((len(self.readings) - 1, self.readings.popleft()[1]))
+            self.power_sum -= evicted[-1][1]
+
+        # Shift the weights of the older readings by one position, add the
+        # newest reading and drop the evicted readings at their old weights.
+        if len(evicted) == 1:
+            age, evicted_power = evicted[0]
+            self.exp_sums = [current_power + decay * exp_sum - decay ** age * evicted_power
+                             for decay, exp_sum in zip(self.decays, self.exp_sums)]
+        else:
+            self.exp_sums = [current_power + decay * exp_sum - sum(decay ** age * power for age, power in evicted)
+                             for decay, exp_sum in zip(self.decays, self.exp_sums)]
+
+        self.updates_since_sync += 1
+        band_index = len(self.readings) - self.band_start
+        if not 0 <= band_index < len(self.exp_sums) or self.updates_since_sync >= len(self.readings):
+            self.synchronize()
+        return current_average_window
+
+    def synchronize(self):
+        """
+        Recompute the running sums from the readings in the window.
+        :return:
+        """
+        length = len(self.readings)
+        self.band_start = max(length - SYNC_BAND, 1)
+        self.decays = [1.0 - smoothing_constant(band_length)
+                       for band_length in range(self.band_start, length + SYNC_BAND + 1)]
+
+        exp_sums = []
+        for decay in self.decays:
+            exp_sum = 0.0
+            for _, power in self.readings:
+                exp_sum = exp_sum * decay + power
+            exp_sums.append(exp_sum)
+
+        self.exp_sums = exp_sums
+        self.power_sum = sum(power for _, power in self.readings)
+        self.updates_since_sync = 0
+
+    def exponential_average(self):
+        if not self.readings:
+            return 0
+        length = len(self.readings)
+        return smoothing_constant(length) * self.exp_sums[length - self.band_start]
+
+    def average(self):
+        if not self.readings:
+            return 0.0
+        return self.power_sum / len(self.readings)
+
+
+def smoothing_constant(length):
+    """
+    Smoothing constant of the exponential average for a window of length readings.
+    :param length:
+    :return:
+    """
+    constant = 2.0/(length + 1.0)*2.0 if length else 1.0
+    return constant if constant <= 1.0 else 1.0
@@ -64,24 +64,26 @@ under Contract DE-AC05-76RL01830
 """
 import os
 import sys
+import time
 import logging
 import math
 from datetime import timedelta as td, datetime as dt
 from dateutil import parser
 import gevent
 import dateutil.tz
-from sympy.parsing.sympy_parser import parse_expr
-from sympy import symbols
 from volttron.platform.agent import utils
 from volttron.platform.messaging import topics
-from volttron.platform.agent.math_utils import mean
 from volttron.platform.agent.utils import (setup_logging, format_timestamp, get_aware_utc_now)
-from volttron.platform.vip.agent import Agent, Core
-from volttron.platform.jsonrpc import RemoteError
+from volttron.platform.vip.agent import Agent, Core, RPC
 from ilc.ilc_matrices import (extract_criteria, calc_column_sums,
                               normalize_matrix, validate_input)
 from ilc.curtailment_handler import CurtailmentCluster, CurtailmentContainer
-from ilc.criteria_handler import CriteriaContainer, CriteriaCluster, parse_sympy
+from ilc.demand_window import DemandWindow
+from ilc.target_schedule import TargetSchedule, DEFAULT_SCHEDULE_FILE, schedule_file_path
+from ilc.actuator_pipeline import ActuatorPipeline
+from ilc.criteria_handler import (CriteriaContainer, CriteriaCluster, DataParser,
+                                  parse_sympy, compile_expression)
+from ilc.statistics import Statistics
 
 
 __version__ = "1.0.4"
@@ -199,9 +201,9 @@ class ILCAgent(Agent):
             try:
                 demand_operation = parse_sympy(demand_formula["operation"])
                 _log.debug("Demand calculation - expression: {}".format(demand_operation))
-                self.demand_expr = parse_expr(parse_sympy(demand_operation))
                 self.demand_args = parse_sympy(demand_formula["operation_args"])
-                self.demand_points = symbols(self.demand_args)
+                self.demand_expr = compile_expression(parse_sympy(demand_operation), self.demand_args)
+                self.demand_points = self.demand_expr.points
             except (KeyError, ValueError):
                 _log.debug("Missing 'operation_args' or 'operation' for setting demand formula!")
                 self.calculate_demand = False
@@ -253,16 +255,20 @@ class ILCAgent(Agent):
         self.break_end = None
         self.reset_curtail_count = None
         self.kill_signal_received = False
-        self.scheduled_devices = set()
+        self.scheduled_devices = {}
         self.devices_curtailed = []
-        self.bldg_power = []
+        self.bldg_power = DemandWindow(self.average_building_power_window)
         self.device_group_size = None
         self.current_stagger = None
         self.next_release = None
         self.power_meta = None
-        self.tasks = {}
+        self.tasks = TargetSchedule(schedule_file_path(config.get("target_schedule_file", DEFAULT_SCHEDULE_FILE),
+                                                       self.core.identity))
         self.tz = None
         self.simulation_running = config.get("simulation_running", False)
+        self.data_parser = DataParser()
+        self.statistics = Statistics()
+        self.actuator = ActuatorPipeline(self.vip.rpc, concurrency=config.get("actuator_concurrency", 10))
 
     @Core.receiver("onstart")
     def starting_base(self, sender, **kwargs):
@@ -287,6 +293,8 @@ class ILCAgent(Agent):
 
         demand_limit_handler = self.demand_limit_handler if not self.simulation_running else self.simulation_demand_limit_handler
 
+        self.restore_targets()
+
         if self.demand_schedule is not None:
             self.setup_demand_schedule()
 
@@ -295,8 +303,7 @@ class ILCAgent(Agent):
         self.vip.pubsub.publish("pubsub", self.ilc_start_topic, headers={}, message={})
 
     def setup_demand_schedule(self):
-        self.tasks = {}
-        current_time = dt.now()
+        current_time = dt.now(dateutil.tz.tzlocal())
         demand_goal = self.demand_schedule[0]
 
         start = parser.parse(self.demand_schedule[1])
@@ -305,12 +312,47 @@ class ILCAgent(Agent):
         start = current_time.replace(hour=start.hour, minute=start.minute) + td(days=1)
         end = current_time.replace(hour=end.hour, minute=end.minute) + td(days=1)
         _log.debug("Setting demand goal target {} -  start: {} - end: {}".format(demand_goal, start, end))
-        self.tasks[start] = {
-            "schedule": [
-                self.core.schedule(start, self.demand_limit_update, demand_goal, start),
-                self.core.schedule(end, self.demand_limit_update, None, start)
-            ]
-        }
+        self.schedule_target("demand_schedule", start, end, demand_goal)
+
+    def restore_targets(self):
+        """
+        Re-schedule the demand targets saved before the agent restarted.
+        Targets that already ended are discarded.
+        :return:
+        """
+        current_time = get_aware_utc_now()
+        for task in self.tasks.load():
+            if task["end"] <= current_time:
+                continue
+            _log.debug("TARGET: restoring schedule for id: {}".format(task["id"]))
+            if self.tz is None:
+                self.tz = task["start"].tzinfo
+            if self.simulation_running:
+                self.tasks.add(task["id"], task["start"], task["end"], task["target"], cancel_adjacent=True)
+            else:
+                self.schedule_target(task["id"], task["start"], task["end"], task["target"])
+
+    def schedule_target(self, task_id, start_time, end_time, demand_goal):
+        """
+        Add the target to the schedule and schedule the demand limit
+        updates at its start and end.  Overlapping targets are cancelled.
+        :param task_id:
+        :param start_time:
+        :param end_time:
+        :param demand_goal:
+        :return:
+        """
+        if self.tasks.ends_at(start_time):
+            start_time += td(seconds=15)
+
+        removed = self.tasks.add(task_id, start_time, end_time, demand_goal,
+                                 schedule=[self.core.schedule(start_time, self.demand_limit_update, demand_goal, task_id),
+                                           self.core.schedule(end_time, self.demand_limit_update, None, task_id)])
+        for task in removed:
+            if task["id"] == task_id:
+                _log.debug("TARGET: duplicate task received - {}".format(task_id))
+            for item in task.get("schedule", []):
+                item.cancel()
 
     def new_data(self, peer, sender, bus, topic, headers, message):
         """
@@ -333,8 +375,11 @@ class ILCAgent(Agent):
         meta = message[1]
         now = parser.parse(headers["Date"])
         current_time_str = format_timestamp(now)
-        parsed_data = parse_sympy(data)
+        start = time.time()
+        parsed_data = self.data_parser.parse(topic, data)
+        self.statistics.record_parse(time.time() - start)
 
+        start = time.time()
         subdevices = self.curtailment.get_device(device_name).command_status.keys()
         for subdevice in subdevices:
             status = self.curtailment.get_device(device_name).currently_curtailed[subdevice]
@@ -343,9 +388,29 @@ class ILCAgent(Agent):
 
         self.criteria.get_device(device_name[0]).ingest_data(now, parsed_data)
         self.curtailment.get_device(device_name).ingest_data(parsed_data)
+        self.statistics.record_evaluation(self.criteria.device_cluster[device_name[0]], time.time() - start)
         self.create_device_status_publish(current_time_str, device_name, data, topic, meta)
         # self.create_curtailment_publish(current_time_str, device_name, meta)
 
+    @RPC.export
+    def get_statistics(self):
+        """
+        RPC method returning message rate and parse/evaluation timing
+        counters for the device data path.
+        :return:
+        """
+        return self.statistics.get_statistics()
+
+    @RPC.export
+    def reset_statistics(self):
+        self.statistics.reset()
+
+    def get_score_order(self):
+        start = time.time()
+        scored_devices = self.criteria.get_score_order()
+        self.statistics.record_scoring(time.time() - start)
+        return scored_devices
+
     def create_curtailment_publish(self, current_time_str, device_name, meta):
         try:
             headers = {
@@ -386,26 +451,8 @@ class ILCAgent(Agent):
         demand_goal = float(target_info["target"])
         task_id = target_info["id"]
         _log.debug("TARGET - id: {} - start: {} - goal: {}".format(target_info["id"], start_time, demand_goal))
-        for key, value in self.tasks.items():
-            if start_time == value["end"]:
-                start_time += td(seconds=15)
-            if (start_time < value["end"] and end_time > value["start"]) or value["start"] <= start_time <= value["end"]:
-                for item in self.tasks.pop(key)["schedule"]:
-                    item.cancel()
-
-        current_task_exits = self.tasks.get(target_info["id"])
-        if current_task_exits is not None:
-            _log.debug("TARGET: duplicate task received - {}".format(target_info["id"]))
-            for item in self.tasks.pop(target_info["id"])["schedule"]:
-                item.cancel()
         _log.debug("TARGET: create schedule for id: {}".format(target_info["id"]))
-        self.tasks[target_info["id"]] = {
-            "schedule": [self.core.schedule(start_time, self.demand_limit_update, demand_goal, task_id),
-                         self.core.schedule(end_time, self.demand_limit_update, None, task_id)],
-            "start": start_time,
-            "end": end_time,
-            "target": demand_goal
-        }
+        self.schedule_target(task_id, start_time, end_time, demand_goal)
         return
 
     def check_schedule(self, current_time):
@@ -417,12 +464,11 @@ class ILCAgent(Agent):
         """
         if self.tasks:
             current_time = current_time.replace(tzinfo=self.tz)
-            for key, value in self.tasks.items():
-                if value["start"] <= current_time < value["end"]:
-                    self.demand_limit = value["target"]
-                elif current_time >= value["end"]:
-                    self.demand_limit = None
-                    self.tasks.pop(key)
+            if self.tasks.expire(current_time):
+                self.demand_limit = None
+            active_task = self.tasks.active(current_time)
+            if active_task is not None:
+                self.demand_limit = active_task["target"]
 
     def demand_limit_update(self, demand_goal, task_id):
         """
@@ -433,8 +479,8 @@ class ILCAgent(Agent):
         """
         _log.debug("Updating demand limit: {}".format(demand_goal))
         self.demand_limit = demand_goal
-        if demand_goal is None and self.tasks and task_id in self.tasks:
-            self.tasks.pop(task_id)
+        if demand_goal is None and task_id in self.tasks:
+            self.tasks.remove(task_id)
             if self.demand_schedule is not None:
                 self.setup_demand_schedule()
 
@@ -473,28 +519,9 @@ class ILCAgent(Agent):
         if self.simulation_running:
             self.check_schedule(current_time)
 
-        if self.bldg_power:
-            current_average_window = self.bldg_power[-1][0] - self.bldg_power[0][0] + td(seconds=15)
-        else:
-            current_average_window = td(minutes=0)
-
-        if current_average_window >= self.average_building_power_window and current_power > 0:
-            self.bldg_power.append((current_time, current_power))
-            self.bldg_power.pop(0)
-        elif current_power > 0:
-            self.bldg_power.append((current_time, current_power))
-
-        smoothing_constant = 2.0/(len(self.bldg_power) + 1.0)*2.0 if self.bldg_power else 1.0
-        smoothing_constant = smoothing_constant if smoothing_constant <= 1.0 else 1.0
-        power_sort = list(self.bldg_power)
-        power_sort.sort(reverse=True)
-        average_power = 0
-
-        for n in xrange(len(self.bldg_power)):
-            average_power += power_sort[n][1] * smoothing_constant * (1.0 - smoothing_constant) ** n
-
-        norm_list = [float(i[1]) for i in self.bldg_power]
-        normal_average_power = mean(norm_list) if norm_list else 0.0
+        current_average_window = self.bldg_power.add(current_time, current_power)
+        average_power = self.bldg_power.exponential_average()
+        normal_average_power = self.bldg_power.average()
 
         _log.debug("Reported time: {} - instantaneous power: {}".format(current_time, current_power))
         _log.debug(
@@ -525,11 +552,7 @@ class ILCAgent(Agent):
             _log.debug("Reading building power data.")
             if self.calculate_demand:
                 try:
-                    demand_point_list = []
-                    for point in self.demand_args:
-                        _log.debug("Demand calculation - point: {} - value: {}".format(point, data[point]))
-                        demand_point_list.append((point, data[point]))
-                    current_power = self.demand_expr.subs(demand_point_list)
+                    current_power = self.demand_expr.evaluate_data(data)
                     _log.debug("Demand calculation - calculated power: {}".format(current_power))
                 except:
                     current_power = float(data[self.power_point])
@@ -633,7 +656,7 @@ class ILCAgent(Agent):
 
         if self.demand_limit is not None and bldg_power > self.demand_limit:
             result = "Current load of {} kW exceeds demand limit of {} kW.".format(bldg_power, self.demand_limit)
-            scored_devices = self.criteria.get_score_order()
+            scored_devices = self.get_score_order()
             on_devices = self.curtailment.get_on_devices()
             score_order = [device for scored in scored_devices for device in on_devices if scored in [(device[0], device[1])]]
 
@@ -664,35 +687,26 @@ class ILCAgent(Agent):
 
         already_handled = dict((device[0], True) for device in self.scheduled_devices)
 
-        for item in score_order:
-
-            device, token, device_actuator = item
-
-            _log.debug("Reserving device: {}".format(device))
-
+        device_requests = []
+        for device, token, device_actuator in score_order:
             if device in already_handled:
-                if already_handled[device]:
-                    _log.debug("Skipping reserve device (previously reserved): " + device)
-                    curtailable_device.append(item)
                 continue
-
+            _log.debug("Reserving device: {}".format(device))
+            already_handled[device] = None
             curtailed_device = self.base_rpc_path(unit=device, point="")
-            schedule_request = [[curtailed_device, start_time_str, end_time_str]]
-            try:
-                if self.kill_signal_received:
-                    break
-                result = self.vip.rpc.call(device_actuator, "request_new_schedule",
-                                           self.agent_id, device, "HIGH", schedule_request).get(timeout=5)
-            except RemoteError as ex:
-                _log.warning("Failed to schedule device {} (RemoteError): {}".format(device, str(ex)))
-                continue
+            device_requests.append((device, device_actuator, [curtailed_device, start_time_str, end_time_str]))
 
-            if result["result"] == "FAILURE":
-                _log.warn("Failed to schedule device (unavailable) " + device)
-                already_handled[device] = False
-            else:
-                already_handled[device] = True
-                self.scheduled_devices.add((device, device_actuator))
+        if device_requests and not self.kill_signal_received:
+            task_id = "_".join([self.agent_id, start_time_str])
+            scheduled = self.actuator.request_schedules(self.agent_id, task_id, "HIGH", device_requests)
+            for device_key, device_task_id in scheduled.items():
+                already_handled[device_key[0]] = device_task_id is not None
+                if device_task_id is not None:
+                    self.scheduled_devices[device_key] = device_task_id
+
+        for item in score_order:
+            device = item[0]
+            if already_handled.get(device):
                 curtailable_device.append(item)
 
         return curtailable_device
@@ -726,31 +740,88 @@ class ILCAgent(Agent):
         self.reset_curtail_count = self.curtail_end + self.reset_curtail_count_time
         self.next_curtail_confirm = current_time + self.curtail_confirm
 
-        for device in remaining_devices:
+        curtail_reads = {}
+        while remaining_devices and est_curtailed < need_curtailed and not self.kill_signal_received:
+            # Select devices in score order until the estimated shed meets
+            # the need, then write them as one batch.  Devices whose write
+            # fails are replaced by the next devices in a following batch.
+            # The points each device needs are read ahead, concurrently,
+            # for as many devices as the actuator pipeline runs at once.
+            batch = []
+            batch_curtailed = est_curtailed
+            while remaining_devices and batch_curtailed < need_curtailed:
+                if remaining_devices[0] not in curtail_reads:
+                    curtail_reads.update(self.read_curtail_points(remaining_devices[:self.actuator.concurrency]))
+                device = remaining_devices.pop(0)
+                curtail, point_values = curtail_reads.pop(device)
+                if point_values is None:
+                    continue
+                curtail_parms = self.determine_curtail_parms(curtail, device, point_values)
+                batch.append((device, curtail_parms))
+                batch_curtailed += curtail_parms[2]
+
+            if not batch:
+                continue
+
+            writes = [(index, device[2], device[0], curtail_parms[0], curtail_parms[1])
+                      for index, (device, curtail_parms) in enumerate(batch)]
+            errors = self.actuator.set_points("ilc_agent", writes)
+
+            for index, (device, curtail_parms) in enumerate(batch):
+                device_name, device_id, actuator = device
+                curtail_point, curtail_value, curtail_load, revert_priority, revert_value = curtail_parms
+                if errors.get(index) is not None:
+                    _log.warning("Failed to set {} to {}: {}".format(curtail_point, curtail_value, str(errors[index])))
+                    continue
+
+                est_curtailed += curtail_load
+                self.curtailment.get_device((device_name, actuator)).increment_curtail(device_id)
+                self.devices_curtailed.append(
+                    [device_name, device_id, revert_value, revert_priority, format_timestamp(current_time), actuator]
+                )
+
+    def read_curtail_points(self, devices):
+        """
+        Read the points needed to curtail each device (the point to
+        curtail, for its revert value, and the load and curtail equation
+        arguments) with one concurrent batch of actuator reads.
+        :param devices: list of (device_name, device_id, actuator) tuples.
+        :return: dict of device -> (curtail, {point: value}).  The values
+                 are None if any read for the device failed.
+        """
+        curtails = {}
+        reads = []
+        for device in devices:
             device_name, device_id, actuator = device
             curtail = self.curtailment.get_device((device_name, actuator)).get_curtailment(device_id)
-            curtail_point, curtail_value, curtail_load, revert_priority, revert_value = self.determine_curtail_parms(curtail, device)
-            try:
-                if self.kill_signal_received:
-                    break
-                result = self.vip.rpc.call(actuator, "set_point", "ilc_agent", curtail_point, curtail_value).get(timeout=5)
-            except RemoteError as ex:
-                _log.warning("Failed to set {} to {}: {}".format(curtail_point, curtail_value, str(ex)))
+            curtails[device] = curtail
+
+            points = [curtail["point"]]
+            if isinstance(curtail["load"], dict):
+                points.extend(curtail["load"]["load_equation_args"])
+            if curtail["curtailment_method"].lower() == "equation":
+                points.extend(curtail["curtail_equation_args"])
+            for point in set(points):
+                reads.append(((device, point), actuator, device_name, self.base_rpc_path(unit=device_name, point=point)))
+
+        curtail_reads = dict((device, (curtail, {})) for device, curtail in curtails.items())
+        for (device, point), (success, result) in self.actuator.get_points(reads).items():
+            curtail, point_values = curtail_reads[device]
+            if point_values is None:
                 continue
+            if not success:
+                _log.warning("Failed to read {} for {}: {}".format(point, device[0], str(result)))
+                curtail_reads[device] = (curtail, None)
+                continue
+            point_values[point] = result
+        return curtail_reads
 
-            est_curtailed += curtail_load
-            self.curtailment.get_device((device_name, actuator)).increment_curtail(device_id)
-            self.devices_curtailed.append(
-                [device_name, device_id, revert_value, revert_priority, format_timestamp(current_time), actuator]
-            )
-            if est_curtailed >= need_curtailed:
-                break
-
-    def determine_curtail_parms(self, curtail, device_dict):
+    def determine_curtail_parms(self, curtail, device_dict, point_values):
         """
         Pull stored curtail parameters for devices.
         :param curtail:
         :param device_dict:
+        :param point_values: dict of point -> value read by read_curtail_points.
         :return:
         """
         device, token, device_actuator = device_dict
@@ -763,27 +834,16 @@ class ILCAgent(Agent):
 
         if isinstance(curtail_load, dict):
             load_equation = curtail_load["load_equation"]
-            load_point_values = []
-
-            for point in curtail_load["load_equation_args"]:
-                point_to_get = self.base_rpc_path(unit=device, point=point)
-                value = self.vip.rpc.call(device_actuator, "get_point", point_to_get).get(timeout=5)
-                load_point_values.append((point, value))
+            load_point_values = [(point, point_values[point]) for point in curtail_load["load_equation_args"]]
             curtail_load = load_equation.subs(load_point_values)
 
-        revert_value = self.vip.rpc.call(device_actuator, "get_point", curtail_point).get(timeout=5)
+        revert_value = point_values[curtail_pt]
 
         if curtailment_method.lower() == "offset":
             curtail_value = revert_value + curtail["offset"]
         elif curtailment_method.lower() == "equation":
             equation = curtail["curtail_equation"]
-            equation_point_values = []
-
-            for point in curtail["curtail_equation_args"]:
-                point_get = self.base_rpc_path(unit=device, point=point)
-                value = self.vip.rpc.call(device_actuator, "get_point", point_get).get(timeout=5)
-                equation_point_values.append((point, value))
-
+            equation_point_values = [(point, point_values[point]) for point in curtail["curtail_equation_args"]]
             curtail_value = float(equation.subs(equation_point_values))
         else:
             curtail_value = curtail["value"]
@@ -876,42 +936,50 @@ class ILCAgent(Agent):
     def reset_devices(self):
         _log.info("Resetting Devices: {}".format(self.devices_curtailed))
 
-        scored_devices = self.criteria.get_score_order()
+        scored_devices = self.get_score_order()
         curtailed = [device for scored in scored_devices for device in self.devices_curtailed if scored in [(device[0], device[1])]]
 
         _log.debug("Curtailed devices: {}".format(self.devices_curtailed))
 
         currently_curtailed = curtailed[::-1]
-        curtailed_iterate = currently_curtailed[:]
-        index_counter = 0
         _log.debug("Curtailed devices for release reverse sort: {}".format(currently_curtailed))
 
-        for item in range(self.device_group_size.pop(0)):
-            device, device_id, revert_val, revert_priority, modified_time, actuator = curtailed_iterate[item]
+        release = currently_curtailed[:self.device_group_size.pop(0)]
+        curtailed_points = []
+        writes = []
+        reverts = []
+        for index, item in enumerate(release):
+            device, device_id, revert_val, revert_priority, modified_time, actuator = item
             curtail = self.curtailment.get_device((device, actuator)).get_curtailment(device_id)
             curtail_point = curtail["point"]
             curtailed_point = self.base_rpc_path(unit=device, point=curtail_point)
             revert_value = self.get_revert_value(device, revert_priority, revert_val)
+            curtailed_points.append((curtailed_point, revert_value))
 
             _log.debug("Returned revert value: {}".format(revert_value))
 
-            try:
-                if revert_value is not None:
-                    result = self.vip.rpc.call(actuator, "set_point", "ilc", curtailed_point, revert_value).get(timeout=5)
-                    _log.debug("Reverted point: {} to value: {}".format(curtailed_point, revert_value))
-                else:
-                    result = self.vip.rpc.call(actuator, "revert_point", "ilc", curtailed_point).get(timeout=5)
-                    _log.debug("Reverted point: {} - Result: {}".format(curtailed_point, result))
-                if currently_curtailed:
-                    _log.debug("Removing from curtailed list: {} ".format(curtailed_iterate[item]))
-                    self.curtailment.get_device((device, actuator)).reset_curtail_status(device_id)
-                    index = curtailed_iterate.index(curtailed_iterate[item]) - index_counter
-                    currently_curtailed.pop(index)
-                    index_counter += 1
-            except RemoteError as ex:
-                _log.warning("Failed to revert point {} (RemoteError): {}".format(curtailed_point, str(ex)))
+            if revert_value is not None:
+                writes.append((index, actuator, device, curtailed_point, revert_value))
+            else:
+                reverts.append((index, actuator, "revert_point", ["ilc", curtailed_point]))
+
+        errors = self.actuator.set_points("ilc", writes)
+        for index, (success, result) in self.actuator.call_all(reverts).items():
+            errors[index] = None if success else result
+
+        released = []
+        for index, item in enumerate(release):
+            device, device_id, revert_val, revert_priority, modified_time, actuator = item
+            curtailed_point, revert_value = curtailed_points[index]
+            if errors.get(index) is not None:
+                _log.warning("Failed to revert point {}: {}".format(curtailed_point, str(errors[index])))
                 continue
-        self.devices_curtailed = currently_curtailed
+            _log.debug("Reverted point: {} to value: {}".format(curtailed_point, revert_value))
+            _log.debug("Removing from curtailed list: {} ".format(item))
+            self.curtailment.get_device((device, actuator)).reset_curtail_status(device_id)
+            released.append(id(item))
+
+        self.devices_curtailed = [item for item in currently_curtailed if id(item) not in released]
 
     def get_revert_value(self, device, revert_priority, revert_value):
         """
@@ -952,15 +1020,23 @@ class ILCAgent(Agent):
         self.reset_all_devices()
 
     def reset_all_devices(self):
-        for device in self.scheduled_devices:
-            release_all_device = self.base_rpc_path(unit=device[0], point="")
-            try:
-                release_all = self.vip.rpc.call(device[1], "revert_device", "ilc", release_all_device).get(timeout=10)
-                _log.debug("Revert device: {} with return value {}".format(release_all_device, release_all))
-            except RemoteError as ex:
-                _log.warning("Failed revert all on device {} (RemoteError): {}".format(release_all_device, str(ex)))
-            result = self.vip.rpc.call(device[1], "request_cancel_schedule", self.agent_id, device[0]).get(timeout=10)
-        self.scheduled_devices = set()
+        calls = []
+        for device_key in self.scheduled_devices:
+            release_all_device = self.base_rpc_path(unit=device_key[0], point="")
+            calls.append((device_key, device_key[1], "revert_device", ["ilc", release_all_device]))
+
+        for device_key, (success, result) in self.actuator.call_all(calls).items():
+            if success:
+                _log.debug("Revert device: {} with return value {}".format(device_key[0], result))
+            else:
+                _log.warning("Failed revert all on device {}: {}".format(device_key[0], str(result)))
+
+        tasks = set((actuator, task_id) for (device, actuator), task_id in self.scheduled_devices.items())
+        calls = [(task, task[0], "request_cancel_schedule", [self.agent_id, task[1]]) for task in tasks]
+        for task, (success, result) in self.actuator.call_all(calls).items():
+            if not success:
+                _log.warning("Failed to cancel schedule {}: {}".format(task[1], str(result)))
+        self.scheduled_devices = {}
 
     def create_application_status(self, current_time_str, result):
         """
@@ -1073,14 +1149,10 @@ class ILCAgent(Agent):
         task_id = target_info["id"]
 
         _log.debug("TARGET: Simulation running.")
-        for key, value in self.tasks.items():
-            if (start_time < value["end"] and end_time > value["start"]) or (value["start"] <= start_time <= value["end"]):
-                self.tasks.pop(key)
-
         _log.debug("TARGET: received demand goal schedule - start: {} - end: {} - target: {}.".format(start_time,
                                                                                                       end_time,
                                                                                                       demand_goal))
-        self.tasks[target_info["id"]] = {"start": start_time, "end": end_time, "target": demand_goal}
+        self.tasks.add(task_id, start_time, end_time, demand_goal, cancel_adjacent=True)
         return
 
 
@@ -62,11 +62,9 @@ BATTELLE for the UNITED STATES DEPARTMENT OF ENERGY
 under Contract DE-AC05-76RL01830
 }}}
 """
-import operator
 import logging
-import math
+import numpy as np
 from volttron.platform.agent import utils
-from collections import defaultdict
 
 utils.setup_logging()
 _log = logging.getLogger(__name__)
@@ -88,15 +86,14 @@ def extract_criteria(filename):
     for label, index in index_of.items():
         criteria_labels.insert(index, label)
 
-    criteria_matrix = [[0.0 for _ in config_matrix] for _ in config_matrix]
+    criteria_matrix = np.eye(len(config_matrix))
     for j in config_matrix:
         row = index_of[j]
-        criteria_matrix[row][row] = 1.0
 
         for k in config_matrix[j]:
             col = index_of[k]
-            criteria_matrix[row][col] = float(config_matrix[j][k])
-            criteria_matrix[col][row] = float(1.0 / criteria_matrix[row][col])
+            criteria_matrix[row, col] = float(config_matrix[j][k])
+            criteria_matrix[col, row] = float(1.0 / criteria_matrix[row, col])
 
     return criteria_labels, criteria_matrix
 
@@ -107,38 +104,21 @@ def calc_column_sums(criteria_matrix):
     :param criteria_matrix:
     :return:
     """
-    j = 0
-    cumsum = []
-    while j < len(criteria_matrix[0]):
-        col = [float(row[j]) for row in criteria_matrix]
-        cumsum.append(sum(col))
-        j += 1
-    return cumsum
+    return np.asarray(criteria_matrix, dtype=float).sum(axis=0)
 
 
 def normalize_matrix(criteria_matrix, col_sums):
     """
     Normalizes the members of criteria matrix using the vector
-    col_sums. Returns sums of each row of the matrix.
+    col_sums. Returns the average of each row of the normalized matrix.
     :param criteria_matrix:
     :param col_sums:
     :return:
     """
-    normalized_matrix = []
-    row_sums = []
-    i = 0
-    while i < len(criteria_matrix):
-        j = 0
-        norm_row = []
-        while j < len(criteria_matrix[0]):
-            norm_row.append(criteria_matrix[i][j]/(col_sums[j] if col_sums[j] != 0 else 1))
-            j += 1
-        row_sum = sum(norm_row)
-        norm_row.append(row_sum/j)
-        row_sums.append(row_sum/j)
-        normalized_matrix.append(norm_row)
-        i += 1
-    return row_sums
+    criteria_matrix = np.asarray(criteria_matrix, dtype=float)
+    col_sums = np.asarray(col_sums, dtype=float)
+    col_sums = np.where(col_sums != 0, col_sums, 1.0)
+    return (criteria_matrix / col_sums).mean(axis=1)
 
 
 def validate_input(pairwise_matrix, col_sums):
@@ -154,23 +134,15 @@ def validate_input(pairwise_matrix, col_sums):
     # Calculate row products and take the 5th root
     _log.info("Validating matrix")
     random_index = [0, 0, 0, 0.58, 0.9, 1.12, 1.24, 1.32, 1.41, 1.45, 1.49]
-    roots = []
-    for row in pairwise_matrix:
-        roots.append(math.pow(reduce(operator.mul, row, 1), 1.0/5))
-    # Sum the vector of products
-    root_sum = sum(roots)
-    # Calculate the priority vector
-    priority_vec = []
-    for item in roots:
-        priority_vec.append(item / root_sum)
+    pairwise_matrix = np.asarray(pairwise_matrix, dtype=float)
+    col_sums = np.asarray(col_sums, dtype=float)
+    roots = np.power(pairwise_matrix.prod(axis=1), 1.0/5)
 
-    # Calculate the priority row
-    priority_row = []
-    for i in range(0, len(col_sums)):
-        priority_row.append(col_sums[i] * priority_vec[i])
+    # Calculate the priority vector
+    priority_vec = roots / roots.sum()
 
     # Sum the priority row
-    priority_row_sum = sum(priority_row)
+    priority_row_sum = float(np.dot(col_sums, priority_vec))
 
     # Calculate the consistency index
     consistency_index = \
@@ -184,47 +156,47 @@ def validate_input(pairwise_matrix, col_sums):
 
 def build_score(_matrix, weight, priority):
     """
-    Calculates the curtailment score using the normalized matrix
-    and the weights vector. Returns a sorted vector of weights for each
-    device that is a candidate for curtailment.
+    Calculates the curtailment score using the normalized input matrix
+    (devices x criteria) and the weights vector. Returns an array with the
+    score of each device (row) that is a candidate for curtailment.
     :param _matrix:
     :param weight:
     :param priority:
     :return:
     """
-    input_keys, input_values = _matrix.keys(), _matrix.values()
-    scores = []
-
-    for input_array in input_values:
-        criteria_sum = sum(i*w for i, w in zip(input_array, weight))
+    return np.dot(_matrix, weight) * priority
 
-        scores.append(criteria_sum*priority)
 
-    return zip(scores, input_keys)
+def input_matrix(input_array):
+    """
+    Construct normalized input matrix.  Each criteria column of the
+    devices x criteria array is divided by the column sum.
+    :param input_array:
+    :return:
+    """
+    col_sums = input_array.sum(axis=0)
+    col_sums[col_sums == 0] = 1.0
+    return input_array / col_sums
 
 
-def input_matrix(builder, criteria_labels):
+def rank_scores(scores, tie_breaker, k=None):
     """
-    Construct input normalized input matrix.
-    :param builder:
-    :param criteria_labels:
+    Return the indices of scores in descending order.  Equal scores are
+    ordered by descending tie_breaker rank.  If k is given only the indices
+    of the k highest scores are returned.
+    :param scores:
+    :param tie_breaker:
+    :param k:
     :return:
     """
-    sum_mat = defaultdict(float)
-    inp_mat = {}
-    label_check = builder.values()[-1].keys()
-    if set(label_check) != set(criteria_labels):
-        raise Exception('Input criteria and data criteria do not match.')
-    for device_data in builder.values():
-        for k, v in device_data.items():
-            sum_mat[k] += v
-    for key in builder:
-        inp_mat[key] = mat_list = []
-        for tag in criteria_labels:
-            builder_value = builder[key][tag]
-            if builder_value:
-                mat_list.append(builder_value/sum_mat[tag])
-            else:
-                mat_list.append(0.0)
-
-    return inp_mat
+    if k is not None and k < len(scores):
+        if k <= 0:
+            return np.empty(0, dtype=int)
+        # Include every candidate tied with the k-th score so ties resolve
+        # the same way as a full sort.
+        kth_score = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        candidates = np.flatnonzero(scores >= kth_score)
+    else:
+        candidates = np.arange(len(scores))
+    order = np.lexsort((-tie_breaker[candidates], -scores[candidates]))
+    return candidates[order][:k]
@@ -0,0 +1,259 @@
+"""
+-*- coding: utf-8 -*- {{{
+vim: set fenc=utf-8 ft=python sw=4 ts=4 sts=4 et:
+
+Copyright (c) 2017, Battelle Memorial Institute
+All rights reserved.
+
+1.  Battelle Memorial Institute (hereinafter Battelle) hereby grants
+    permission to any person or entity lawfully obtaining a copy of this
+    software and associated documentation files (hereinafter "the Software")
+    to redistribute and use the Software in source and binary forms, with or
+    without modification.  Such person or entity may use, copy, modify, merge,
+    publish, distribute, sublicense, and/or sell copies of the Software, and
+    may permit others to do so, subject to the following conditions:
+
+    -   Redistributions of source code must retain the above copyright notice,
+        this list of conditions and the following disclaimers.
+
+    -	Redistributions in binary form must reproduce the above copyright
+        notice, this list of conditions and the following disclaimer in the
+        documentation and/or other materials provided with the distribution.
+
+    -	Other than as used herein, neither the name Battelle Memorial Institute
+        or Battelle may be used in any form whatsoever without the express
+        written consent of Battelle.
+
+2.	THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+    AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+    IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+    ARE DISCLAIMED. IN NO EVENT SHALL BATTELLE OR CONTRIBUTORS BE LIABLE FOR
+    ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+    DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+    SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+    CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+    LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+    OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+    DAMAGE.
+
+The views and conclusions contained in the software and documentation are those
+of the authors and should not be interpreted as representing official policies,
+either expressed or implied, of the FreeBSD Project.
+
+This material was prepared as an account of work sponsored by an agency of the
+United States Government. Neither the United States Government nor the United
+States Department of Energy, nor Battelle, nor any of their employees, nor any
+jurisdiction or organization that has cooperated in the development of these
+materials, makes any warranty, express or implied, or assumes any legal
+liability or responsibility for the accuracy, completeness, or usefulness or
+any information, apparatus, product, software, or process disclosed, or
+represents that its use would not infringe privately owned rights.
+
+Reference herein to any specific commercial product, process, or service by
+trade name, trademark, manufacturer, or otherwise does not necessarily
+constitute or imply its endorsement, recommendation, or favoring by the
+United States Government or any agency thereof, or Battelle Memorial Institute.
+The views and opinions of authors expressed herein do not necessarily state or
+reflect those of the United States Government or any agency thereof.
+
+PACIFIC NORTHWEST NATIONAL LABORATORY
+operated by
+BATTELLE for the UNITED STATES DEPARTMENT OF ENERGY
+under Contract DE-AC05-76RL01830
+}}}
+"""
+import os
+import json
+import logging
+from bisect import bisect_left, bisect_right
+from dateutil import parser
+from volttron.platform.agent.utils import setup_logging, format_timestamp
+
+setup_logging()
+_log = logging.getLogger(__name__)
+
+# Default target_schedule_file; {identity} is the agent's VIP identity so
+# that every ILC agent on a platform keeps its own schedule.
+DEFAULT_SCHEDULE_FILE = "$VOLTTRON_HOME/data/{identity}.target_schedule.json"
+
+
+def schedule_file_path(path, identity):
+    """
+    Resolve a target_schedule_file setting for the agent with identity.
+    :param path: setting, may contain {identity}, ~ and environment variables.
+    :param identity:
+    :return: the path, or None if path is None (no persistence).
+    """
+    if path is None:
+        return None
+    path = path.format(identity=identity)
+    if "$VOLTTRON_HOME" in path and "VOLTTRON_HOME" not in os.environ:
+        path = path.replace("$VOLTTRON_HOME", "~/.volttron")
+    return os.path.expandvars(os.path.expanduser(path))
+
+
+class TargetSchedule(object):
+    """
+    Demand target schedule indexed by interval start time.
+
+    A new target cancels every target it overlaps, so the stored intervals
+    never overlap and sorting them by start also sorts them by end.  That
+    makes overlap detection, insertion and the "active target at time t"
+    lookup binary searches over the start times.
+
+    Each task is a dict with "id", "start", "end" and "target" keys.
+    Callers may store additional keys (e.g. scheduled greenlets); only
+    the four keys above are persisted when a file path is configured.
+    """
+    def __init__(self, path=None):
+        self.path = os.path.expanduser(path) if path is not None else None
+        self.starts = []
+        self.tasks = []
+        self.ids = {}
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def __contains__(self, task_id):
+        return task_id in self.ids
+
+    def get(self, task_id):
+        return self.ids.get(task_id)
+
+    def ends_at(self, time_stamp):
+        """
+        Return True if a stored target ends exactly at time_stamp.
+        :param time_stamp:
+        :return:
+        """
+        index = bisect_right(self.starts, time_stamp) - 1
+        return index >= 0 and self.tasks[index]["end"] == time_stamp
+
+    def add(self, task_id, start, end, target, cancel_adjacent=False, **kwargs):
+        """
+        Add a target.  Targets with the same id and targets overlapping
+        [start, end] are removed and returned so the caller can cancel any
+        work scheduled for them.
+        :param task_id:
+        :param start:
+        :param end:
+        :param target:
+        :param cancel_adjacent: also remove a target ending exactly at start.
+        :return: list of removed tasks
+        """
+        removed = []
+        if task_id in self.ids:
+            removed.append(self._remove(self.ids[task_id]))
+
+        # Candidates start before end; walk back while they still overlap.
+        index = bisect_left(self.starts, end)
+        first = index
+        while first > 0:
+            previous = self.tasks[first - 1]
+            if previous["end"] > start or (cancel_adjacent and previous["end"] == start):
+                first -= 1
+            else:
+                break
+        for task in self.tasks[first:index]:
+            del self.ids[task["id"]]
+        removed.extend(self.tasks[first:index])
+        del self.tasks[first:index]
+        del self.starts[first:index]
+
+        task = dict(kwargs, id=task_id, start=start, end=end, target=target)
+        self.starts.insert(first, start)
+        self.tasks.insert(first, task)
+        self.ids[task_id] = task
+        self.save()
+        return removed
+
+    def remove(self, task_id):
+        """
+        Remove and return the target with task_id, if it exists.
+        :param task_id:
+        :return:
+        """
+        task = self.ids.get(task_id)
+        if task is not None:
+            self._remove(task)
+            self.save()
+        return task
+
+    def _remove(self, task):
+        index = bisect_left(self.starts, task["start"])
+        while self.tasks[index] is not task:
+            index += 1
+        del self.starts[index]
+        del self.tasks[index]
+        del self.ids[task["id"]]
+        return task
+
+    def active(self, time_stamp):
+        """
+        Return the target active at time_stamp (start <= time_stamp < end).
+        :param time_stamp:
+        :return:
+        """
+        index = bisect_right(self.starts, time_stamp) - 1
+        if index >= 0 and time_stamp < self.tasks[index]["end"]:
+            return self.tasks[index]
+        return None
+
+    def expire(self, time_stamp):
+        """
+        Remove and return all targets that ended at or before time_stamp.
+        :param time_stamp:
+        :return:
+        """
+        index = 0
+        while index < len(self.tasks) and self.tasks[index]["end"] <= time_stamp:
+            index += 1
+        expired = self.tasks[:index]
+        if expired:
+            for task in expired:
+                del self.ids[task["id"]]
+            del self.tasks[:index]
+            del self.starts[:index]
+            self.save()
+        return expired
+
+    def save(self):
+        if self.path is None:
+            return
+        records = [
+            {
+                "id": task["id"],
+                "start": format_timestamp(task["start"]),
+                "end": format_timestamp(task["end"]),
+                "target": task["target"]
+            } for task in self.tasks
+        ]
+        temp_path = self.path + ".tmp"
+        try:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory)
+            with open(temp_path, "w") as output_file:
+                json.dump(records, output_file)
+            os.rename(temp_path, self.path)
+        except (IOError, OSError) as ex:
+            _log.warning("Unable to save target schedule to {}: {}".format(self.path, ex))
+
+    def load(self):
+        """
+        Return the targets saved in the schedule file.  The targets are not
+        added to the schedule; the caller re-adds the ones still relevant.
+        :return:
+        """
+        if self.path is None or not os.path.exists(self.path):
+            return []
+        try:
+            with open(self.path) as input_file:
+                records = json.load(input_file)
+        except (IOError, OSError, ValueError) as ex:
+            _log.warning("Unable to load target schedule from {}: {}".format(self.path, ex))
+            return []
+        for record in records:
+            record["start"] = parser.parse(record["start"])
+            record["end"] = parser.parse(record["end"])
+        return records